@@ -5,14 +5,23 @@ Estrutura simplificada: apenas duas tabelas (docs_prp e docs_turso)
 """
 
 import os
+import sys
 import sqlite3
 from pathlib import Path
 from datetime import datetime
 import re
 
-def connect_database():
+sys.path.append(str(Path(__file__).resolve().parent.parent / "mcp-turso" / "scripts"))
+from docs_manifest import walk_files
+from docs_pipeline import IngestionPipeline
+from docs_chunks import CHUNKS_SCHEMA, chunk_document, chunk_statements
+
+# Documentos por transação no writer do pipeline
+BATCH_SIZE = 200
+
+def connect_database(check_same_thread=True):
     """Conecta ao banco de dados"""
-    return sqlite3.connect('context-memory.db')
+    return sqlite3.connect('context-memory.db', check_same_thread=check_same_thread)
 
 def extract_tags_from_content(content):
     """Extrai tags do conteúdo do arquivo"""
@@ -56,149 +65,105 @@ def determine_category(file_path, content):
     else:
         return 'documentation'
 
-def migrate_docs_prp():
-    """Migra documentação da pasta docs-prp"""
-    print("📚 Migrando documentação docs-prp...")
-    
-    conn = connect_database()
+def extract_doc_fields(file_path, content):
+    """Categoria, tags e trechos do documento (roda nos processos do pipeline)"""
+    return {
+        "category": determine_category(file_path, content),
+        "tags": extract_tags_from_content(content),
+        "chunks": chunk_document(content)
+    }
+
+def migrate_docs_dir(table, docs_path, label, workers=None):
+    """
+    Migra os .md de uma pasta para a tabela (docs_prp ou docs_turso).
+
+    Leitura, categoria, tags e trechos rodam em paralelo no pipeline; um único writer
+    grava o documento e os seus trechos em doc_chunks e faz commit a cada BATCH_SIZE
+    documentos.
+    """
+    print(f"📚 Migrando documentação {label}...")
+    
+    if not docs_path.exists():
+        print(f"⚠️ Pasta {docs_path} não encontrada")
+        return 0
+    
+    # Só a thread do writer do pipeline usa a conexão
+    conn = connect_database(check_same_thread=False)
     cursor = conn.cursor()
-    
-    docs_prp_path = Path('prp-agent/docs-prp')
-    if not docs_prp_path.exists():
-        print("⚠️ Pasta prp-agent/docs-prp não encontrada")
-        return
-    
-    migrated_count = 0
-    
-    for md_file in docs_prp_path.rglob('*.md'):
-        if md_file.name == 'README.md':
-            continue  # Pular README principal
-            
-        try:
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Extrair cluster da estrutura de pastas
-            cluster = md_file.parent.name
+    for statement in CHUNKS_SCHEMA:
+        cursor.execute(statement)
+    migrated = {"count": 0}
+    
+    def write_batch(docs):
+        for doc in docs:
+            md_file = doc.file_stat.path
+            try:
+                relative_path = doc.file_stat.rel_path
             
-            # Determinar categoria
-            category = determine_category(str(md_file), content)
+                # Extrair cluster da estrutura de pastas
+                cluster = md_file.parent.name
+                category = doc.fields["category"]
+                tags = doc.fields["tags"]
             
-            # Extrair tags
-            tags = extract_tags_from_content(content)
+                # Verificar se já existe
+                cursor.execute(f'''
+                    SELECT id FROM {table} 
+                    WHERE file_path = ? AND title = ?
+                ''', (relative_path, md_file.stem))
             
-            # Verificar se já existe
-            cursor.execute('''
-                SELECT id FROM docs_prp 
-                WHERE file_path = ? AND title = ?
-            ''', (str(md_file.relative_to(docs_prp_path)), md_file.stem))
+                existing = cursor.fetchone()
             
-            existing = cursor.fetchone()
+                if existing:
+                    # Atualizar existente
+                    cursor.execute(f'''
+                        UPDATE {table} 
+                        SET content = ?, category = ?, tags = ?, updated_at = CURRENT_TIMESTAMP
+                        WHERE id = ?
+                    ''', (doc.content, category, tags, existing[0]))
+                    print(f"  🔄 Atualizado: {md_file.name}")
+                else:
+                    # Inserir novo
+                    cursor.execute(f'''
+                        INSERT INTO {table} (title, content, file_path, cluster, category, tags)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (
+                        md_file.stem,
+                        doc.content,
+                        relative_path,
+                        cluster,
+                        category,
+                        tags
+                    ))
+                    print(f"  ✅ Inserido: {md_file.name}")
             
-            if existing:
-                # Atualizar existente
-                cursor.execute('''
-                    UPDATE docs_prp 
-                    SET content = ?, category = ?, tags = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (content, category, tags, existing[0]))
-                print(f"  🔄 Atualizado: {md_file.name}")
-            else:
-                # Inserir novo
-                cursor.execute('''
-                    INSERT INTO docs_prp (title, content, file_path, cluster, category, tags)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    md_file.stem,
-                    content,
-                    str(md_file.relative_to(docs_prp_path)),
-                    cluster,
-                    category,
-                    tags
-                ))
-                print(f"  ✅ Inserido: {md_file.name}")
+                for sql, args in chunk_statements(table, relative_path, doc.fields["chunks"], doc.hash):
+                    cursor.execute(sql, args)
             
-            migrated_count += 1
-            
-        except Exception as e:
-            print(f"  ❌ Erro ao processar {md_file.name}: {e}")
-    
-    conn.commit()
-    conn.close()
-    
-    print(f"📊 Total docs-prp migrados: {migrated_count}")
+                migrated["count"] += 1
+            except Exception as e:
+                print(f"  ❌ Erro ao processar {md_file.name}: {e}")
+        conn.commit()
+    
+    pipeline = IngestionPipeline(extract=extract_doc_fields, workers=workers, batch_size=BATCH_SIZE)
+    try:
+        # Pular README principal
+        report = pipeline.run(walk_files(docs_path, skip_names=('README.md',)), write_batch)
+    finally:
+        conn.close()
+    
+    for error in pipeline.errors:
+        print(f"  ❌ Erro ao processar {Path(error['file']).name}: {error['error']}")
+    
+    print(f"📊 Total {label} migrados: {migrated['count']} ({report['files_per_s']} arquivos/s)")
+    return migrated["count"]
+
+def migrate_docs_prp():
+    """Migra documentação da pasta docs-prp"""
+    return migrate_docs_dir('docs_prp', Path('prp-agent/docs-prp'), 'docs-prp')
 
 def migrate_docs_turso():
     """Migra documentação da pasta docs-turso"""
-    print("📚 Migrando documentação docs-turso...")
-    
-    conn = connect_database()
-    cursor = conn.cursor()
-    
-    docs_turso_path = Path('turso-agent/docs-turso')
-    if not docs_turso_path.exists():
-        print("⚠️ Pasta turso-agent/docs-turso não encontrada")
-        return
-    
-    migrated_count = 0
-    
-    for md_file in docs_turso_path.rglob('*.md'):
-        if md_file.name == 'README.md':
-            continue  # Pular README principal
-            
-        try:
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Extrair cluster da estrutura de pastas
-            cluster = md_file.parent.name
-            
-            # Determinar categoria
-            category = determine_category(str(md_file), content)
-            
-            # Extrair tags
-            tags = extract_tags_from_content(content)
-            
-            # Verificar se já existe
-            cursor.execute('''
-                SELECT id FROM docs_turso 
-                WHERE file_path = ? AND title = ?
-            ''', (str(md_file.relative_to(docs_turso_path)), md_file.stem))
-            
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Atualizar existente
-                cursor.execute('''
-                    UPDATE docs_turso 
-                    SET content = ?, category = ?, tags = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (content, category, tags, existing[0]))
-                print(f"  🔄 Atualizado: {md_file.name}")
-            else:
-                # Inserir novo
-                cursor.execute('''
-                    INSERT INTO docs_turso (title, content, file_path, cluster, category, tags)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    md_file.stem,
-                    content,
-                    str(md_file.relative_to(docs_turso_path)),
-                    cluster,
-                    category,
-                    tags
-                ))
-                print(f"  ✅ Inserido: {md_file.name}")
-            
-            migrated_count += 1
-            
-        except Exception as e:
-            print(f"  ❌ Erro ao processar {md_file.name}: {e}")
-    
-    conn.commit()
-    conn.close()
-    
-    print(f"📊 Total docs-turso migrados: {migrated_count}")
+    return migrate_docs_dir('docs_turso', Path('turso-agent/docs-turso'), 'docs-turso')
 
 def show_migration_summary():
     """Mostra resumo da migração"""
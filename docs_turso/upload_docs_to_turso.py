@@ -1,13 +1,37 @@
 #!/usr/bin/env python3
 """
 Script para inserir todos os arquivos .md do diretório docs-turso na tabela docs_turso
+
+A primeira execução (ou --full) limpa a tabela e insere tudo. As seguintes usam o
+manifesto local (.docs_turso-manifest.json) e enviam só os documentos novos, alterados
+ou removidos, registrando cada mudança em docs_changes.
+
+Cada documento também é dividido em trechos por seção, com embedding, na tabela
+doc_chunks (source_table = 'docs_turso'), usada pela busca por trechos de docs_chunks.py.
+
+Os documentos vão direto para o banco em lotes parametrizados (API HTTP do Turso ou
+arquivo local com --db), sem arquivo .sql intermediário.
+
+Uso:
+    TURSO_DATABASE_URL=libsql://context-memory-<org>.turso.io TURSO_AUTH_TOKEN=... \
+        python3 upload_docs_to_turso.py [--full] [--batch-size 200]
+    python3 upload_docs_to_turso.py --db /tmp/context-memory.db
 """
 
 import os
+import sys
 import json
-import subprocess
+import argparse
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "mcp-turso" / "scripts"))
+from docs_manifest import IncrementalDocSync
+from docs_pipeline import IngestionPipeline
+from docs_bulk_loader import BulkLoader, connect_backend
+from docs_chunks import CHUNKS_SCHEMA, chunk_document, chunk_statements, delete_chunks_statement
+
+DOC_COLUMNS = ['file_name', 'title', 'description', 'content', 'category', 'tags', 'file_path', 'file_size']
+
 def extract_title_from_content(content):
     """Extrai o título do conteúdo markdown (primeira linha # )"""
     lines = content.split('\n')
@@ -40,101 +64,155 @@ def extract_tags_from_filename(filename):
     tags = [word for word in words if word not in stop_words and len(word) > 2]
     return json.dumps(tags)
 
-def escape_sql_string(s):
-    """Escapa strings para SQL"""
-    if s is None:
-        return 'NULL'
-    # Duplica aspas simples para escape SQL
-    return s.replace("'", "''")
+def cleanup_statements():
+    """Limpeza da tabela docs_turso antes da carga completa"""
+    return [
+        ("DELETE FROM docs_turso", []),
+        # Reset do auto-increment
+        ("DELETE FROM sqlite_sequence WHERE name = ?", ['docs_turso']),
+        ("DELETE FROM doc_chunks WHERE source_table = ?", ['docs_turso']),
+    ]
 
-def generate_cleanup_sql():
-    """Gera comando SQL para limpar a tabela docs_turso"""
+def changes_table_sql():
+    """Garante a tabela docs_changes (mesma definição de sync-docs-to-turso.py)"""
     return """
--- Limpeza da tabela docs_turso antes de inserir novos documentos
-DELETE FROM docs_turso;
--- Reset do auto-increment
-DELETE FROM sqlite_sequence WHERE name='docs_turso';
-"""
+CREATE TABLE IF NOT EXISTS docs_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id INTEGER REFERENCES docs(id),
+    change_type TEXT NOT NULL,
+    old_hash TEXT,
+    new_hash TEXT,
+    changed_by TEXT,
+    change_summary TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)"""
 
-def insert_document(file_path, base_dir):
-    """Gera comando SQL para inserir um documento"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        file_name = os.path.basename(file_path)
-        title = extract_title_from_content(content)
-        category = get_category_from_path(file_path)
-        tags = extract_tags_from_filename(file_name)
-        file_size = os.path.getsize(file_path)
-        
-        # Primeiros 200 caracteres como descrição
-        description = content.replace('\n', ' ')[:200].strip() + '...' if len(content) > 200 else content.replace('\n', ' ').strip()
-        
-        # Escapa strings para SQL
-        title_escaped = escape_sql_string(title)
-        description_escaped = escape_sql_string(description)
-        content_escaped = escape_sql_string(content)
-        
-        sql = f"""
-INSERT INTO docs_turso (file_name, title, description, content, category, tags, file_path, file_size) 
-VALUES (
-    '{file_name}',
-    '{title_escaped}',
-    '{description_escaped}',
-    '{content_escaped}',
-    '{category}',
-    '{tags}',
-    '{file_path}',
-    {file_size}
-);"""
-        
-        return sql
-    except Exception as e:
-        print(f"Erro ao processar {file_path}: {e}")
-        return None
+def document_fields(file_path, content):
+    """Campos da tabela docs_turso para um documento já lido"""
+    file_name = os.path.basename(file_path)
+    
+    # Primeiros 200 caracteres como descrição
+    description = content.replace('\n', ' ')[:200].strip() + '...' if len(content) > 200 else content.replace('\n', ' ').strip()
+    
+    return {
+        'file_name': file_name,
+        'title': extract_title_from_content(content),
+        'description': description,
+        'content': content,
+        'category': get_category_from_path(file_path),
+        'tags': extract_tags_from_filename(file_name),
+        'file_path': file_path,
+        'file_size': os.path.getsize(file_path),
+        # Trechos por seção com embedding (calculados nos processos do pipeline)
+        'chunks': chunk_document(content)
+    }
+
+def update_document(loader, doc):
+    """Atualiza um documento já existente (mesmo file_path)"""
+    loader.execute("""
+        UPDATE docs_turso SET
+            file_name = ?, title = ?, description = ?, content = ?,
+            category = ?, tags = ?, file_size = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE file_path = ?
+    """, [doc['file_name'], doc['title'], doc['description'], doc['content'],
+          doc['category'], doc['tags'], doc['file_size'], doc['file_path']])
+
+def delete_document(loader, file_path):
+    """Remove um documento que saiu do diretório, com os seus trechos"""
+    loader.execute("DELETE FROM docs_turso WHERE file_path = ?", [file_path])
+    loader.execute(*delete_chunks_statement('docs_turso', file_path))
+
+def replace_chunks(loader, doc, doc_hash):
+    """Troca os trechos do documento em doc_chunks (mesmo lote do documento)"""
+    for sql, args in chunk_statements('docs_turso', doc['file_path'], doc['chunks'], doc_hash):
+        loader.execute(sql, args)
+
+def log_change(loader, file_path, change):
+    """Registra a mudança em docs_changes (doc_id referencia docs, então fica NULL)"""
+    loader.execute("""
+        INSERT INTO docs_changes (doc_id, change_type, old_hash, new_hash, changed_by, change_summary)
+        VALUES (NULL, ?, ?, ?, 'upload_docs_to_turso', ?)
+    """, [change.change_type, change.old_hash, change.new_hash,
+          f"docs_turso {change.change_type}: {file_path}"])
 
 def main():
+    parser = argparse.ArgumentParser(description="Sincroniza os .md de docs_turso com a tabela docs_turso")
+    parser.add_argument('--full', action='store_true', help="Ignora o manifesto: limpa a tabela e insere tudo")
+    parser.add_argument('--db', default=os.getenv('TURSO_DATABASE_URL'),
+                        help="URL libsql:// do banco ou arquivo local (padrão: TURSO_DATABASE_URL)")
+    parser.add_argument('--batch-size', type=int, default=200, help="Linhas por transação (padrão: 200)")
+    args = parser.parse_args()
+    
+    if not args.db:
+        print("❌ Informe o banco: TURSO_DATABASE_URL (turso db show context-memory --url) ou --db arquivo.db")
+        return 1
+    
     # O diretório base é o diretório onde o script está localizado
     base_dir = Path(__file__).parent.resolve()
-    sql_commands = []
-    
-    # Adiciona comando de limpeza no início
-    sql_commands.append(generate_cleanup_sql())
+    sync = IncrementalDocSync(base_dir, base_dir / '.docs_turso-manifest.json', full=args.full)
+    candidates, seen = sync.candidates()
     
-    # Percorre todos os arquivos .md no diretório e subdiretórios
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.endswith('.md'):
-                file_path = os.path.join(root, file)
-                sql = insert_document(file_path, str(base_dir))
-                if sql:
-                    sql_commands.append(sql)
+    # Sem manifesto não dá para saber o que já está na tabela: carga completa
+    full_load = not sync.has_baseline
     
-    # Salva todos os comandos SQL em um arquivo no mesmo diretório do script
-    output_file = base_dir / 'insert_all_docs_complete.sql'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("-- Script gerado automaticamente para inserir todos os documentos .md\n")
-        f.write("-- Total de documentos: {}\n".format(len(sql_commands) - 1))  # -1 para excluir o comando de limpeza
-        f.write("-- Inclui limpeza automática da tabela para evitar duplicatas\n\n")
+    backend = connect_backend(args.db, os.getenv('TURSO_AUTH_TOKEN'))
+    try:
+        # DDL e limpeza em uma transação própria, antes de qualquer lote
+        schema = [(changes_table_sql(), [])] + [(statement, []) for statement in CHUNKS_SCHEMA]
+        backend.run_transaction(schema + (cleanup_statements() if full_load else []))
+        if full_load:
+            print("✅ Carga completa: tabela limpa para evitar duplicatas")
         
-        for sql in sql_commands:
-            f.write(sql)
-            f.write("\n")
+        with BulkLoader(backend, 'docs_turso', DOC_COLUMNS, batch_size=args.batch_size) as loader:
+            def write_batch(docs):
+                # Writer único do pipeline: linhas vão para o loader, que grava em lotes
+                for ingested in docs:
+                    change = sync.resolve(ingested.file_stat, ingested.content, ingested.hash)
+                    if change is None:
+                        continue
+                    # Documento, registro da mudança e trechos sempre na mesma transação
+                    with loader.unit():
+                        if change.change_type == 'updated' and not full_load:
+                            update_document(loader, ingested.fields)
+                        else:
+                            loader.insert(ingested.fields)
+                        log_change(loader, ingested.fields['file_path'], change)
+                        replace_chunks(loader, ingested.fields, change.new_hash)
+            
+            # Leitura, hash, extração de título/tags e trechos em paralelo
+            pipeline = IngestionPipeline(extract=document_fields, workers=1 if len(candidates) < 200 else None,
+                                         batch_size=args.batch_size)
+            report = pipeline.run(candidates, write_batch)
+            sync.stats["errors"].extend(pipeline.errors)
+            
+            for change in sync.deletions(seen):
+                file_path = str(change.path)
+                with loader.unit():
+                    delete_document(loader, file_path)
+                    log_change(loader, file_path, change)
+    except Exception as e:
+        print(f"❌ Erro ao enviar: {e}")
+        print("Manifesto mantido: a próxima execução reenvia as mesmas mudanças")
+        return 1
+    finally:
+        backend.close()
     
-    print(f"Script SQL gerado: {output_file}")
-    print(f"Total de documentos a inserir: {len(sql_commands) - 1}")
-    print("✅ Inclui limpeza automática para evitar duplicatas")
+    # Manifesto só avança depois do envio bem-sucedido
+    sync.commit()
     
-    # Executa automaticamente
-    print("\nExecutando script SQL...")
-    try:
-        cmd = f'turso db shell context-memory < {output_file}'
-        subprocess.run(cmd, shell=True, check=True)
-        print("✅ Documentos inseridos com sucesso!")
-        print("✅ Tabela limpa e recriada sem duplicatas")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Erro ao executar: {e}")
+    load = loader.stats()
+    print(f"📊 {sync.report()}")
+    print(f"⚡ Pipeline: {report['files_per_s']} arquivos/s com {report['workers']} processos")
+    print(f"⚡ Carga: {load['rows']} linhas + {load['statements']} instruções em {load['batches']} lotes, "
+          f"{load['rows_per_s']} linhas/s")
+    for error in sync.stats["errors"]:
+        print(f"Erro ao processar {error['file']}: {error['error']}")
+    
+    if sync.stats["files_shipped"]:
+        print(f"✅ {sync.stats['files_shipped']} documentos sincronizados com sucesso!")
+    else:
+        print("✅ Nenhuma mudança desde o último envio")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
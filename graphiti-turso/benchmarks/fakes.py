@@ -0,0 +1,282 @@
+"""
+Deterministic offline stand-ins for the services the Graphiti MCP server depends on.
+
+- `FakeLLMClient` answers every prompt with a response built from the requested Pydantic
+  schema, so Graphiti's extraction pipeline runs end to end without a provider.
+- `FakeEmbedder` returns stable pseudo-random unit vectors derived from the input text.
+- `FakeCrossEncoder` ranks passages by token overlap with the query.
+- `LocalGraphDriver` accepts every Cypher query, keeps counts of what was executed and
+  returns no rows, standing in for Neo4j.
+
+Each fake takes a `FakeServiceProfile` with latency, jitter and failure rate, and draws from
+its own seeded RNG so runs with the same seed are reproducible.
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+import typing
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+from graphiti_core.cross_encoder.client import CrossEncoderClient
+from graphiti_core.driver.driver import GraphDriver, GraphDriverSession
+from graphiti_core.embedder.client import EMBEDDING_DIM, EmbedderClient
+from graphiti_core.helpers import DEFAULT_DATABASE
+from graphiti_core.llm_client import LLMClient
+from graphiti_core.llm_client.config import LLMConfig, ModelSize
+from graphiti_core.prompts.models import Message
+
+# List fields Graphiti loops on or uses to point at existing graph data; keeping them empty
+# avoids reflexion rounds and out-of-range duplicate lookups
+EMPTY_LIST_FIELDS = {
+    'missed_entities',
+    'missing_facts',
+    'additional_duplicates',
+    'duplicates',
+    'contradicted_facts',
+    'invalidated_edges',
+}
+
+
+class FakeServiceError(Exception):
+    """Injected failure raised by the fakes according to their failure rate."""
+
+
+@dataclass
+class FakeServiceProfile:
+    """Latency and failure behaviour of a fake service."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    failure_rate: float = 0.0
+
+
+class _Simulated:
+    def __init__(self, profile: FakeServiceProfile, seed: int, name: str):
+        self.profile = profile
+        self.name = name
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(f'{seed}:{name}')
+
+    async def _simulate(self) -> None:
+        self.calls += 1
+        delay = self.profile.latency_ms
+        if self.profile.jitter_ms:
+            delay += self._rng.uniform(-self.profile.jitter_ms, self.profile.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.profile.failure_rate and self._rng.random() < self.profile.failure_rate:
+            self.failures += 1
+            raise FakeServiceError(f'Injected {self.name} failure')
+
+
+def _fill_schema(
+    schema: dict[str, typing.Any],
+    defs: dict[str, typing.Any],
+    seed: str,
+    fanout: int,
+    field_name: str = '',
+    index: int = 0,
+) -> typing.Any:
+    """Build a deterministic value matching a JSON schema produced by Pydantic."""
+    if '$ref' in schema:
+        definition = defs[schema['$ref'].split('/')[-1]]
+        return _fill_schema(definition, defs, seed, fanout, field_name, index)
+
+    if 'anyOf' in schema:
+        options = [option for option in schema['anyOf'] if option.get('type') != 'null']
+        if len(options) < len(schema['anyOf']) and field_name.endswith('_at'):
+            return None
+        return _fill_schema(options[0], defs, seed, fanout, field_name, index)
+
+    schema_type = schema.get('type')
+    if schema_type == 'object' or 'properties' in schema:
+        return {
+            name: _fill_schema(prop, defs, seed, fanout, name, index)
+            for name, prop in schema.get('properties', {}).items()
+        }
+    if schema_type == 'array':
+        if field_name in EMPTY_LIST_FIELDS or schema.get('items', {}).get('type') == 'integer':
+            return []
+        return [
+            _fill_schema(schema.get('items', {}), defs, seed, fanout, field_name, i)
+            for i in range(fanout)
+        ]
+    if schema_type == 'integer':
+        if 'idx' in field_name or 'duplicate' in field_name:
+            return -1
+        if field_name.endswith('type_id'):
+            # Only the default entity type is guaranteed to exist
+            return 0
+        if field_name == 'target_entity_id':
+            return (index + 1) % fanout
+        return index % fanout
+    if schema_type == 'number':
+        return 0.5
+    if schema_type == 'boolean':
+        return False
+    if 'enum' in schema:
+        return schema['enum'][0]
+    return f'{field_name or "value"} {seed} {index}'
+
+
+class FakeLLMClient(LLMClient):
+    """LLMClient that returns schema-shaped responses after a simulated delay."""
+
+    def __init__(
+        self,
+        profile: FakeServiceProfile | None = None,
+        seed: int = 0,
+        fanout: int = 2,
+        model: str = 'fake-llm',
+    ):
+        super().__init__(LLMConfig(model=model, small_model=f'{model}-small', temperature=0.0))
+        self.fanout = fanout
+        self._sim = _Simulated(profile or FakeServiceProfile(), seed, 'llm')
+
+    @property
+    def calls(self) -> int:
+        return self._sim.calls
+
+    @property
+    def failures(self) -> int:
+        return self._sim.failures
+
+    async def _generate_response(
+        self,
+        messages: list[Message],
+        response_model: type[BaseModel] | None = None,
+        max_tokens: int | None = None,
+        model_size: ModelSize = ModelSize.medium,
+    ) -> dict[str, typing.Any]:
+        await self._sim._simulate()
+        if response_model is None:
+            return {'content': 'ok'}
+
+        # Entity names follow the episode content so the graph grows like a real workload
+        seed = hashlib.sha256(messages[-1].content.encode()).hexdigest()[:8]
+        schema = response_model.model_json_schema()
+        return _fill_schema(schema, schema.get('$defs', {}), seed, self.fanout)
+
+    async def generate_response(
+        self,
+        messages: list[Message],
+        response_model: type[BaseModel] | None = None,
+        max_tokens: int | None = None,
+        model_size: ModelSize = ModelSize.medium,
+    ) -> dict[str, typing.Any]:
+        # Skip the base class retry/backoff so injected failures surface immediately
+        return await self._generate_response(messages, response_model, max_tokens, model_size)
+
+
+class FakeEmbedder(EmbedderClient):
+    """EmbedderClient returning stable unit vectors derived from the input text."""
+
+    def __init__(
+        self,
+        profile: FakeServiceProfile | None = None,
+        seed: int = 0,
+        embedding_dim: int = EMBEDDING_DIM,
+    ):
+        self.embedding_dim = embedding_dim
+        self._sim = _Simulated(profile or FakeServiceProfile(), seed, 'embedder')
+
+    @property
+    def calls(self) -> int:
+        return self._sim.calls
+
+    @property
+    def failures(self) -> int:
+        return self._sim.failures
+
+    def _vector(self, text: str) -> list[float]:
+        rng = random.Random(hashlib.sha256(text.encode()).digest())
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.embedding_dim)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    async def create(
+        self, input_data: str | list[str] | Iterable[int] | Iterable[Iterable[int]]
+    ) -> list[float]:
+        await self._sim._simulate()
+        return self._vector(input_data if isinstance(input_data, str) else str(input_data))
+
+    async def create_batch(self, input_data_list: list[str]) -> list[list[float]]:
+        await self._sim._simulate()
+        return [self._vector(text) for text in input_data_list]
+
+
+class FakeCrossEncoder(CrossEncoderClient):
+    """CrossEncoderClient ranking passages by token overlap with the query."""
+
+    def __init__(self, profile: FakeServiceProfile | None = None, seed: int = 0):
+        self._sim = _Simulated(profile or FakeServiceProfile(), seed, 'cross_encoder')
+
+    async def rank(self, query: str, passages: list[str]) -> list[tuple[str, float]]:
+        await self._sim._simulate()
+        query_tokens = set(query.lower().split())
+        scored = [
+            (passage, len(query_tokens & set(passage.lower().split())) / (len(query_tokens) or 1))
+            for passage in passages
+        ]
+        return sorted(scored, key=lambda item: -item[1])
+
+
+class _LocalGraphSession(GraphDriverSession):
+    def __init__(self, driver: 'LocalGraphDriver'):
+        self.driver = driver
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def run(self, query: str, **kwargs: typing.Any) -> typing.Any:
+        await self.driver._run(query)
+        return None
+
+    async def close(self):
+        pass
+
+    async def execute_write(self, func, *args, **kwargs):
+        return await func(self, *args, **kwargs)
+
+
+class LocalGraphDriver(GraphDriver):
+    """Graph driver stand-in: records every query, simulates latency and returns no rows."""
+
+    provider: str = 'neo4j'
+
+    def __init__(self, profile: FakeServiceProfile | None = None, seed: int = 0):
+        self.queries: Counter[str] = Counter()
+        self._sim = _Simulated(profile or FakeServiceProfile(), seed, 'graph')
+
+    @property
+    def calls(self) -> int:
+        return self._sim.calls
+
+    @property
+    def failures(self) -> int:
+        return self._sim.failures
+
+    async def _run(self, query: str) -> None:
+        words = query.split()
+        self.queries[words[0].upper() if words else 'EMPTY'] += 1
+        await self._sim._simulate()
+
+    async def execute_query(self, cypher_query_: str, **kwargs: typing.Any):
+        await self._run(cypher_query_)
+        return [], None, []
+
+    def session(self, database: str = DEFAULT_DATABASE) -> GraphDriverSession:
+        return _LocalGraphSession(self)
+
+    async def close(self):
+        pass
+
+    async def delete_all_indexes(self, database_: str = DEFAULT_DATABASE):
+        await self._run('DROP INDEX')
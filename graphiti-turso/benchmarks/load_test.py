@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the Graphiti MCP server.
+
+Drives the real tool functions (`add_memory` -> episode queue -> `search_memory_facts` /
+`search_memory_nodes`) against deterministic fakes from `benchmarks/fakes.py`, so no OpenAI
+key or Neo4j instance is needed. Runs a scripted workload of phases (ingest bursts, concurrent
+searches, mixed traffic over several group ids) and prints a JSON report with throughput,
+latency percentiles and queue behaviour per phase.
+
+Usage:
+    uv run benchmarks/load_test.py
+    uv run benchmarks/load_test.py --llm-latency-ms 200 --llm-failure-rate 0.02 --output run.json
+    uv run benchmarks/load_test.py --scenario scenario.json --baseline run.json
+
+A scenario file is a JSON list of phases, for example:
+    [{"name": "burst", "episodes": 500, "groups": 4, "concurrency": 100},
+     {"name": "search", "searches": 300, "groups": 4, "concurrency": 30},
+     {"name": "mixed", "episodes": 200, "searches": 200, "groups": 16, "concurrency": 40}]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+import typing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep Graphiti's usage telemetry out of offline runs
+os.environ.setdefault('GRAPHITI_TELEMETRY_ENABLED', 'false')
+
+from fakes import (  # noqa: E402
+    FakeCrossEncoder,
+    FakeEmbedder,
+    FakeLLMClient,
+    FakeServiceProfile,
+    LocalGraphDriver,
+)
+
+import graphiti_mcp_server as server  # noqa: E402
+from graphiti_core import Graphiti  # noqa: E402
+from server_metrics import InstrumentedEmbedderClient, InstrumentedLLMClient  # noqa: E402
+
+DEFAULT_SCENARIO: list[dict[str, typing.Any]] = [
+    {'name': 'ingest_burst', 'episodes': 200, 'groups': 4, 'concurrency': 50},
+    {'name': 'concurrent_search', 'searches': 200, 'groups': 4, 'concurrency': 20},
+    {'name': 'mixed', 'episodes': 100, 'searches': 100, 'groups': 8, 'concurrency': 20},
+]
+
+WORDS = (
+    'acme customer invoice renewal product roadmap meeting contract support ticket '
+    'migration pricing feature request onboarding outage release partner'
+).split()
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 3),
+        'p50': pick(0.50),
+        'p95': pick(0.95),
+        'p99': pick(0.99),
+        'max': round(ordered[-1], 3),
+    }
+
+
+class EpisodeTracker:
+    """Wraps `Graphiti.add_episode` to time each queued episode from enqueue to completion."""
+
+    def __init__(self, client: Graphiti):
+        self.enqueued: dict[str, float] = {}
+        self.started: dict[str, float] = {}
+        self.finished: dict[str, float] = {}
+        self.failed: set[str] = set()
+        self._done = asyncio.Event()
+        self._expected = 0
+        original = client.add_episode
+
+        async def add_episode(**kwargs):
+            name = kwargs['name']
+            self.started[name] = time.perf_counter()
+            try:
+                return await original(**kwargs)
+            except Exception:
+                self.failed.add(name)
+                raise
+            finally:
+                self.finished[name] = time.perf_counter()
+                if len(self.finished) >= self._expected:
+                    self._done.set()
+
+        client.add_episode = add_episode  # type: ignore[method-assign]
+
+    def expect(self, count: int) -> None:
+        self._expected += count
+        if len(self.finished) < self._expected:
+            self._done.clear()
+
+    async def wait(self, timeout: float) -> None:
+        await asyncio.wait_for(self._done.wait(), timeout)
+
+
+class QueueSampler:
+    """Samples per-group queue depth and worker count while a phase runs."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.max_depth = 0
+        self.max_depth_per_group: dict[str, int] = {}
+        self.max_workers = 0
+        self._task: asyncio.Task | None = None
+
+    def sample(self) -> None:
+        depths = {
+            group: backlog['queued'] for group, backlog in server.episode_scheduler.backlog().items()
+        }
+        self.max_depth = max(self.max_depth, sum(depths.values()))
+        for group, depth in depths.items():
+            self.max_depth_per_group[group] = max(self.max_depth_per_group.get(group, 0), depth)
+        self.max_workers = max(self.max_workers, server.episode_scheduler.worker_count)
+
+    async def _run(self) -> None:
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        if self._task:
+            self._task.cancel()
+        self.sample()
+
+
+async def run_phase(
+    phase: dict[str, typing.Any], tracker: EpisodeTracker, rng: random.Random, timeout: float
+) -> dict[str, typing.Any]:
+    episodes = int(phase.get('episodes', 0))
+    searches = int(phase.get('searches', 0))
+    groups = [f'{phase["name"]}-group-{i}' for i in range(int(phase.get('groups', 1)))]
+    semaphore = asyncio.Semaphore(int(phase.get('concurrency', 10)))
+
+    operations: list[tuple[str, int]] = [('add_memory', i) for i in range(episodes)]
+    operations += [('search', i) for i in range(searches)]
+    rng.shuffle(operations)
+
+    tool_latency: dict[str, list[float]] = {}
+    tool_errors: dict[str, int] = {}
+    episode_names: list[str] = []
+
+    async def call(kind: str, i: int) -> None:
+        group_id = rng.choice(groups)
+        text = ' '.join(rng.choice(WORDS) for _ in range(12))
+        async with semaphore:
+            started = time.perf_counter()
+            if kind == 'add_memory':
+                name = f'{phase["name"]}-episode-{i}'
+                episode_names.append(name)
+                tracker.enqueued[name] = started
+                tool = 'add_memory'
+                result: typing.Any = await server.add_memory(
+                    name=name, episode_body=text, group_id=group_id, source_description='load test'
+                )
+            elif i % 2:
+                tool = 'search_memory_nodes'
+                result = await server.search_memory_nodes(query=text, group_ids=[group_id])
+            else:
+                tool = 'search_memory_facts'
+                result = await server.search_memory_facts(query=text, group_ids=[group_id])
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        tool_latency.setdefault(tool, []).append(elapsed_ms)
+        if isinstance(result, dict) and 'error' in result:
+            tool_errors[tool] = tool_errors.get(tool, 0) + 1
+
+    tracker.expect(episodes)
+    phase_started = time.perf_counter()
+    with QueueSampler() as sampler:
+        await asyncio.gather(*(call(kind, i) for kind, i in operations))
+        submitted_at = time.perf_counter()
+        if episodes:
+            await tracker.wait(timeout)
+    phase_ended = time.perf_counter()
+
+    completed = [n for n in episode_names if n in tracker.finished]
+    failed = [n for n in completed if n in tracker.failed]
+    duration = phase_ended - phase_started
+    return {
+        'name': phase['name'],
+        'duration_s': round(duration, 3),
+        'episodes': {
+            'submitted': episodes,
+            'completed': len(completed) - len(failed),
+            'failed': len(failed),
+            'throughput_per_s': round((len(completed) - len(failed)) / duration, 2)
+            if duration
+            else 0.0,
+            'end_to_end_ms': percentiles(
+                [(tracker.finished[n] - tracker.enqueued[n]) * 1000 for n in completed]
+            ),
+            'queue_wait_ms': percentiles(
+                [(tracker.started[n] - tracker.enqueued[n]) * 1000 for n in completed]
+            ),
+            'processing_ms': percentiles(
+                [(tracker.finished[n] - tracker.started[n]) * 1000 for n in completed]
+            ),
+        },
+        'searches': {
+            'submitted': searches,
+            'throughput_per_s': round(searches / (submitted_at - phase_started), 2)
+            if searches
+            else 0.0,
+        },
+        'tools': {
+            tool: {'errors': tool_errors.get(tool, 0), 'latency_ms': percentiles(latencies)}
+            for tool, latencies in tool_latency.items()
+        },
+        'queue': {
+            'max_depth': sampler.max_depth,
+            'max_depth_per_group': sampler.max_depth_per_group,
+            'max_workers': sampler.max_workers,
+            'drain_s': round(phase_ended - submitted_at, 3),
+        },
+    }
+
+
+async def run_load_test(args: argparse.Namespace) -> dict[str, typing.Any]:
+    scenario = DEFAULT_SCENARIO
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+
+    llm = FakeLLMClient(
+        FakeServiceProfile(args.llm_latency_ms, args.llm_jitter_ms, args.llm_failure_rate),
+        seed=args.seed,
+        fanout=args.fanout,
+    )
+    embedder = FakeEmbedder(
+        FakeServiceProfile(
+            args.embedder_latency_ms, args.embedder_jitter_ms, args.embedder_failure_rate
+        ),
+        seed=args.seed,
+    )
+    driver = LocalGraphDriver(
+        FakeServiceProfile(args.graph_latency_ms, args.graph_jitter_ms, args.graph_failure_rate),
+        seed=args.seed,
+    )
+
+    # Same client stack as initialize_graphiti, with fakes at the bottom
+    server.config = server.GraphitiConfig(group_id='default')
+    server.config.llm.cache_enabled = args.llm_cache
+    server.config.llm.cache_path = os.path.join(args.workdir, 'llm_cache.db')
+    client = Graphiti(
+        uri='bolt://load-test',
+        llm_client=server.config.llm.wrap_with_cache(InstrumentedLLMClient(llm)),
+        embedder=InstrumentedEmbedderClient(embedder),
+        cross_encoder=FakeCrossEncoder(seed=args.seed),
+        graph_driver=driver,
+        max_coroutines=server.SEMAPHORE_LIMIT,
+    )
+    server.graphiti_client = client
+    server.index_build_task = asyncio.create_task(server.build_indices_in_background(client))
+    tracker = EpisodeTracker(client)
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    phases = [await run_phase(phase, tracker, rng, args.timeout) for phase in scenario]
+
+    return {
+        'config': {
+            'seed': args.seed,
+            'semaphore_limit': server.SEMAPHORE_LIMIT,
+            'fanout': args.fanout,
+            'llm_cache': args.llm_cache,
+            'llm': vars(llm._sim.profile),
+            'embedder': vars(embedder._sim.profile),
+            'graph': vars(driver._sim.profile),
+            'scenario': scenario,
+        },
+        'duration_s': round(time.perf_counter() - started, 3),
+        'phases': phases,
+        'calls': {
+            'llm': {'calls': llm.calls, 'failures': llm.failures},
+            'embedder': {'calls': embedder.calls, 'failures': embedder.failures},
+            'graph': {
+                'calls': driver.calls,
+                'failures': driver.failures,
+                'by_clause': dict(driver.queries),
+            },
+        },
+    }
+
+
+def compare(report: dict[str, typing.Any], baseline: dict[str, typing.Any]) -> list[dict]:
+    """Relative change of throughput and p95 latencies against a previous report."""
+    previous = {phase['name']: phase for phase in baseline.get('phases', [])}
+    changes = []
+    for phase in report['phases']:
+        before = previous.get(phase['name'])
+        if before is None:
+            continue
+        metrics = {
+            'episodes_per_s': (
+                before['episodes']['throughput_per_s'],
+                phase['episodes']['throughput_per_s'],
+            ),
+            'end_to_end_p95_ms': (
+                before['episodes']['end_to_end_ms'].get('p95'),
+                phase['episodes']['end_to_end_ms'].get('p95'),
+            ),
+        }
+        for tool, stats in phase['tools'].items():
+            if tool in before['tools']:
+                metrics[f'{tool}_p95_ms'] = (
+                    before['tools'][tool]['latency_ms'].get('p95'),
+                    stats['latency_ms'].get('p95'),
+                )
+        for metric, (old, new) in metrics.items():
+            if old and new is not None:
+                changes.append(
+                    {
+                        'phase': phase['name'],
+                        'metric': metric,
+                        'baseline': old,
+                        'current': new,
+                        'change_pct': round((new - old) / old * 100, 1),
+                    }
+                )
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline load test for the Graphiti MCP server')
+    parser.add_argument('--scenario', help='JSON file with the list of phases to run')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--fanout', type=int, default=2, help='Entities/facts per LLM extraction')
+    parser.add_argument('--llm-cache', action='store_true', help='Enable the LLM response cache')
+    for service, latency in (('llm', 50.0), ('embedder', 10.0), ('graph', 2.0)):
+        parser.add_argument(f'--{service}-latency-ms', type=float, default=latency)
+        parser.add_argument(
+            f'--{service}-jitter-ms', type=float, help='Default: half of the latency'
+        )
+        parser.add_argument(f'--{service}-failure-rate', type=float, default=0.0)
+    parser.add_argument('--timeout', type=float, default=600.0, help='Max seconds to drain a phase')
+    parser.add_argument('--workdir', default='.load_test', help='Directory for the LLM cache file')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', help='Previous JSON report to compare against')
+    args = parser.parse_args()
+
+    for service in ('llm', 'embedder', 'graph'):
+        if getattr(args, f'{service}_jitter_ms') is None:
+            setattr(args, f'{service}_jitter_ms', getattr(args, f'{service}_latency_ms') / 2)
+
+    # Per-episode INFO logs would dominate the run
+    logging.getLogger().setLevel(logging.WARNING)
+    os.makedirs(args.workdir, exist_ok=True)
+
+    report = asyncio.run(run_load_test(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['comparison'] = compare(report, json.load(f))
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(rendered)
+    print(rendered)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the Graphiti MCP server.
+
+Every run happens in a fresh interpreter so module imports are cold, the way an editor
+spawning the stdio server sees them. Time is broken down by import phase and by init phase.
+
+Usage:
+    uv run benchmarks/startup_benchmark.py --runs 5
+    uv run benchmarks/startup_benchmark.py --runs 5 --with-neo4j  # also time index building
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported in this order; each phase only pays for modules not loaded by the previous ones
+IMPORT_PHASES = [
+    ('dotenv', 'dotenv'),
+    ('mcp', 'mcp.server.fastmcp'),
+    ('graphiti_core', 'graphiti_core'),
+    ('graphiti_mcp_server', 'graphiti_mcp_server'),
+]
+
+
+def _timed(timings: dict[str, float], phase: str, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    timings[phase] = (time.perf_counter() - started) * 1000
+    return result
+
+
+async def _timed_async(timings: dict[str, float], phase: str, coro):
+    started = time.perf_counter()
+    result = await coro
+    timings[phase] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def run_child(with_neo4j: bool) -> dict[str, dict[str, float]]:
+    """Run a single cold start and return phase timings in milliseconds."""
+    import importlib
+
+    sys.path.insert(0, SERVER_DIR)
+    imports: dict[str, float] = {}
+    for phase, module in IMPORT_PHASES:
+        _timed(imports, phase, importlib.import_module, module)
+
+    server = sys.modules['graphiti_mcp_server']
+    init: dict[str, float] = {}
+    config = _timed(init, 'config_from_env', server.GraphitiConfig.from_env)
+    llm_client = _timed(init, 'llm_create_client', config.llm.create_client)
+    llm_client = _timed(init, 'llm_cache_wrap', config.llm.wrap_with_cache, llm_client)
+    embedder = _timed(init, 'embedder_create_client', config.embedder.create_client)
+
+    def build_graphiti():
+        return server.Graphiti(
+            uri=config.neo4j.uri,
+            user=config.neo4j.user,
+            password=config.neo4j.password,
+            llm_client=llm_client,
+            embedder=embedder,
+            max_coroutines=server.SEMAPHORE_LIMIT,
+        )
+
+    client = _timed(init, 'graphiti_client', build_graphiti)
+
+    if with_neo4j:
+
+        async def build_indices():
+            await _timed_async(init, 'build_indices', client.build_indices_and_constraints())
+            await client.close()
+
+        asyncio.run(build_indices())
+
+    return {
+        'imports_ms': imports,
+        'init_ms': init,
+        'azure_identity_loaded': 'azure.identity' in sys.modules,
+        'modules_loaded': len(sys.modules),
+    }
+
+
+def run_benchmark(runs: int, with_neo4j: bool) -> dict:
+    env = dict(os.environ)
+    # Clients are only constructed, never called, so a placeholder key keeps the run offline
+    env.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+
+    samples = []
+    for _ in range(runs):
+        command = [sys.executable, os.path.abspath(__file__), '--child']
+        if with_neo4j:
+            command.append('--with-neo4j')
+        started = time.perf_counter()
+        output = subprocess.run(
+            command, env=env, cwd=SERVER_DIR, capture_output=True, text=True, check=True
+        )
+        sample = json.loads(output.stdout.strip().splitlines()[-1])
+        sample['process_ms'] = (time.perf_counter() - started) * 1000
+        samples.append(sample)
+
+    def summarize(section: str) -> dict[str, dict[str, float]]:
+        phases = samples[0][section].keys()
+        return {
+            phase: {
+                'median': round(statistics.median(s[section][phase] for s in samples), 2),
+                'min': round(min(s[section][phase] for s in samples), 2),
+                'max': round(max(s[section][phase] for s in samples), 2),
+            }
+            for phase in phases
+        }
+
+    imports = summarize('imports_ms')
+    init = summarize('init_ms')
+    return {
+        'runs': runs,
+        'python': sys.version.split()[0],
+        'imports_ms': imports,
+        'init_ms': init,
+        'total_import_ms': round(sum(p['median'] for p in imports.values()), 2),
+        'total_init_ms': round(sum(p['median'] for p in init.values()), 2),
+        'process_ms_median': round(statistics.median(s['process_ms'] for s in samples), 2),
+        'azure_identity_loaded': any(s['azure_identity_loaded'] for s in samples),
+        'modules_loaded': samples[-1]['modules_loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Graphiti MCP server cold start')
+    parser.add_argument('--runs', type=int, default=5, help='Number of cold starts (default: 5)')
+    parser.add_argument(
+        '--with-neo4j',
+        action='store_true',
+        help='Also time build_indices_and_constraints against NEO4J_URI',
+    )
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.with_neo4j)))
+        return
+
+    report = run_benchmark(args.runs, args.with_neo4j)
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(rendered)
+    print(rendered)
+
+
+if __name__ == '__main__':
+    main()
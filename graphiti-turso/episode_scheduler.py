@@ -0,0 +1,212 @@
+"""
+Fair multi-tenant scheduler for queued episode ingestion.
+
+Every `group_id` gets its own FIFO queue, but all groups share a bounded pool of worker
+tasks. Workers pick the next episode with weighted fair queuing: each group carries a
+virtual time that advances by `1 / weight` per dispatched episode, and the ready group with
+the lowest virtual time goes next. A tenant that enqueues 10k episodes therefore only gets
+its weighted share of the workers, and an interactive tenant with a single episode is
+dispatched almost immediately.
+
+A per-group in-flight limit (default 1) keeps episodes of the same group in submission order;
+Graphiti expects episodes of a group to be added sequentially. Idle groups and idle workers
+are reclaimed after `idle_timeout` seconds.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+import typing
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+EpisodeJob = Callable[[], Awaitable[typing.Any]]
+
+
+def parse_group_weights(value: str) -> dict[str, float]:
+    """Parse 'group_a=3,group_b=0.5' into a weight mapping."""
+    weights: dict[str, float] = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        group_id, _, weight = item.partition('=')
+        try:
+            weights[group_id.strip()] = float(weight)
+        except ValueError:
+            logger.warning(f'Ignoring invalid group weight: {item}')
+    return {group_id: weight for group_id, weight in weights.items() if weight > 0}
+
+
+@dataclass
+class _GroupState:
+    weight: float
+    virtual_time: float = 0.0
+    queue: deque[tuple[float, EpisodeJob]] = field(default_factory=deque)
+    in_flight: int = 0
+    processed: int = 0
+    failed: int = 0
+    last_active: float = field(default_factory=time.monotonic)
+
+
+class EpisodeScheduler:
+    """Bounded worker pool with weighted fair queuing across group_id queues."""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_in_flight_per_group: int = 1,
+        weights: dict[str, float] | None = None,
+        default_weight: float = 1.0,
+        idle_timeout: float = 60.0,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight_per_group = max(1, max_in_flight_per_group)
+        self.weights = weights or {}
+        self.default_weight = default_weight
+        self.idle_timeout = idle_timeout
+
+        self._groups: dict[str, _GroupState] = {}
+        self._workers: set[asyncio.Task] = set()
+        self._idle_workers = 0
+        self._condition: asyncio.Condition | None = None
+        self._virtual_clock = 0.0
+
+    @property
+    def worker_count(self) -> int:
+        return len(self._workers)
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily so the scheduler can be built before the event loop starts
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def submit(self, group_id: str, job: EpisodeJob) -> int:
+        """Queue a job for a group and return its position in that group's queue."""
+        condition = self._get_condition()
+        async with condition:
+            group = self._groups.get(group_id)
+            if group is None:
+                group = self._groups[group_id] = _GroupState(
+                    weight=self.weights.get(group_id, self.default_weight)
+                )
+            if not group.queue and not group.in_flight:
+                # A group coming back from idle starts at the current virtual time instead of
+                # cashing in credit for the time it was not competing
+                group.virtual_time = max(group.virtual_time, self._virtual_clock)
+            group.queue.append((time.monotonic(), job))
+            group.last_active = time.monotonic()
+            position = len(group.queue)
+
+            if self._idle_workers == 0 and len(self._workers) < self.max_workers:
+                self._start_worker()
+            condition.notify()
+        return position
+
+    def _start_worker(self) -> None:
+        # Workers outlive the request that started them, so they must not inherit its context
+        task = contextvars.Context().run(asyncio.create_task, self._worker())
+        self._workers.add(task)
+        task.add_done_callback(self._workers.discard)
+
+    def _next_job(self) -> tuple[str, _GroupState, float, EpisodeJob] | None:
+        ready = [
+            (group.virtual_time, group_id, group)
+            for group_id, group in self._groups.items()
+            if group.queue and group.in_flight < self.max_in_flight_per_group
+        ]
+        if not ready:
+            return None
+        virtual_time, group_id, group = min(ready, key=lambda item: (item[0], item[1]))
+        enqueued_at, job = group.queue.popleft()
+        group.in_flight += 1
+        group.virtual_time = virtual_time + 1.0 / group.weight
+        self._virtual_clock = max(self._virtual_clock, virtual_time)
+        return group_id, group, enqueued_at, job
+
+    def _reclaim_idle_groups(self) -> None:
+        now = time.monotonic()
+        idle = [
+            group_id
+            for group_id, group in self._groups.items()
+            if not group.queue
+            and not group.in_flight
+            and now - group.last_active >= self.idle_timeout
+        ]
+        for group_id in idle:
+            del self._groups[group_id]
+            logger.debug(f'Reclaimed idle episode queue for group_id: {group_id}')
+
+    async def _worker(self) -> None:
+        condition = self._get_condition()
+        try:
+            while True:
+                async with condition:
+                    next_job = self._next_job()
+                    while next_job is None:
+                        self._reclaim_idle_groups()
+                        self._idle_workers += 1
+                        timed_out = False
+                        try:
+                            await asyncio.wait_for(condition.wait(), self.idle_timeout)
+                        except asyncio.TimeoutError:
+                            timed_out = True
+                        finally:
+                            self._idle_workers -= 1
+                        next_job = self._next_job()
+                        if next_job is None and timed_out:
+                            # Nothing to do for a while: let this worker go
+                            self._reclaim_idle_groups()
+                            return
+
+                group_id, group, enqueued_at, job = next_job
+                try:
+                    await job()
+                    group.processed += 1
+                except Exception as e:
+                    group.failed += 1
+                    logger.error(
+                        f'Error processing queued episode for group_id {group_id}: {str(e)}'
+                    )
+                finally:
+                    async with condition:
+                        group.in_flight -= 1
+                        group.last_active = time.monotonic()
+                        # The group may be ready again now that its in-flight slot is free
+                        condition.notify()
+        except asyncio.CancelledError:
+            logger.info('Episode scheduler worker was cancelled')
+            raise
+
+    def queue_depth(self, group_id: str) -> int:
+        group = self._groups.get(group_id)
+        return len(group.queue) if group else 0
+
+    def backlog(self) -> dict[str, dict[str, typing.Any]]:
+        """Per-group backlog: queued and in-flight episodes, weight and oldest wait."""
+        now = time.monotonic()
+        return {
+            group_id: {
+                'queued': len(group.queue),
+                'in_flight': group.in_flight,
+                'processed': group.processed,
+                'failed': group.failed,
+                'weight': group.weight,
+                'oldest_wait_seconds': round(now - group.queue[0][0], 3) if group.queue else 0.0,
+            }
+            for group_id, group in self._groups.items()
+        }
+
+    async def join(self) -> None:
+        """Wait until every queued and in-flight episode has been processed."""
+        while any(group.queue or group.in_flight for group in self._groups.values()):
+            await asyncio.sleep(0.01)
+
+    async def shutdown(self) -> None:
+        for task in list(self._workers):
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
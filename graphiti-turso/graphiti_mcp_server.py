@@ -8,25 +8,22 @@ import asyncio
 import logging
 import os
 import sys
+import time
 from collections.abc import Callable
 from datetime import datetime, timezone
 from typing import Any, TypedDict, cast
 
-from azure.identity import DefaultAzureCredential, get_bearer_token_provider
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
-from openai import AsyncAzureOpenAI
 from pydantic import BaseModel, Field
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
 
 from graphiti_core import Graphiti
 from graphiti_core.edges import EntityEdge
-from graphiti_core.embedder.azure_openai import AzureOpenAIEmbedderClient
 from graphiti_core.embedder.client import EmbedderClient
-from graphiti_core.embedder.openai import OpenAIEmbedder, OpenAIEmbedderConfig
 from graphiti_core.llm_client import LLMClient
-from graphiti_core.llm_client.azure_openai_client import AzureOpenAILLMClient
 from graphiti_core.llm_client.config import LLMConfig
-from graphiti_core.llm_client.openai_client import OpenAIClient
 from graphiti_core.nodes import EpisodeType, EpisodicNode
 from graphiti_core.search.search_config_recipes import (
     NODE_HYBRID_SEARCH_NODE_DISTANCE,
@@ -34,6 +31,26 @@ from graphiti_core.search.search_config_recipes import (
 )
 from graphiti_core.search.search_filters import SearchFilters
 from graphiti_core.utils.maintenance.graph_data_operations import clear_data
+from episode_scheduler import EpisodeScheduler, parse_group_weights
+from llm_cache import (
+    DEFAULT_LLM_CACHE_MAX_MB,
+    DEFAULT_LLM_CACHE_PATH,
+    CachingLLMClient,
+    LLMResponseStore,
+    current_group_id,
+)
+from server_metrics import (
+    EPISODE_DURATION,
+    QUEUE_DEPTH,
+    QUEUE_WAIT,
+    InstrumentedEmbedderClient,
+    InstrumentedLLMClient,
+    InstrumentedNeo4jDriver,
+    current_span,
+    instrument_tool,
+    metrics,
+    tracer,
+)
 
 load_dotenv()
 
@@ -47,6 +64,18 @@ DEFAULT_EMBEDDER_MODEL = 'text-embedding-3-small'
 # Increase if you have high rate limits.
 SEMAPHORE_LIMIT = int(os.getenv('SEMAPHORE_LIMIT', 10))
 
+# Episode scheduling across group_ids.
+# EPISODE_WORKERS bounds how many episodes (from any groups) are ingested at once; each of them
+# shares the SEMAPHORE_LIMIT above. GROUP_MAX_IN_FLIGHT limits concurrent episodes per group;
+# keep it at 1 to ingest a group's episodes strictly in order.
+EPISODE_WORKERS = int(os.getenv('EPISODE_WORKERS', 4))
+GROUP_MAX_IN_FLIGHT = int(os.getenv('GROUP_MAX_IN_FLIGHT', 1))
+EPISODE_QUEUE_IDLE_SECONDS = float(os.getenv('EPISODE_QUEUE_IDLE_SECONDS', 60))
+
+# Default pricing (USD per 1K tokens) used to report what the LLM response cache saved.
+DEFAULT_LLM_INPUT_PRICE_PER_1K = 0.0004
+DEFAULT_LLM_OUTPUT_PRICE_PER_1K = 0.0016
+
 
 class Requirement(BaseModel):
     """A Requirement represents a specific need, feature, or functionality that a product or service must fulfill.
@@ -162,12 +191,25 @@ class EpisodeSearchResponse(TypedDict):
     episodes: list[dict[str, Any]]
 
 
+class GroupBacklog(TypedDict):
+    queued: int
+    in_flight: int
+    processed: int
+    failed: int
+    weight: float
+    oldest_wait_seconds: float
+
+
 class StatusResponse(TypedDict):
     status: str
     message: str
+    backlog: dict[str, GroupBacklog]
 
 
 def create_azure_credential_token_provider() -> Callable[[], str]:
+    # azure.identity is only needed for managed identity auth, so it is imported on demand
+    from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+
     credential = DefaultAzureCredential()
     token_provider = get_bearer_token_provider(
         credential, 'https://cognitiveservices.azure.com/.default'
@@ -200,6 +242,11 @@ class GraphitiLLMConfig(BaseModel):
     azure_openai_deployment_name: str | None = None
     azure_openai_api_version: str | None = None
     azure_openai_use_managed_identity: bool = False
+    cache_enabled: bool = False
+    cache_path: str = DEFAULT_LLM_CACHE_PATH
+    cache_max_mb: int = DEFAULT_LLM_CACHE_MAX_MB
+    input_price_per_1k: float = DEFAULT_LLM_INPUT_PRICE_PER_1K
+    output_price_per_1k: float = DEFAULT_LLM_OUTPUT_PRICE_PER_1K
 
     @classmethod
     def from_env(cls) -> 'GraphitiLLMConfig':
@@ -219,6 +266,19 @@ class GraphitiLLMConfig(BaseModel):
             os.environ.get('AZURE_OPENAI_USE_MANAGED_IDENTITY', 'false').lower() == 'true'
         )
 
+        # LLM response cache settings are shared by both providers
+        cache_settings = {
+            'cache_enabled': os.environ.get('LLM_CACHE_ENABLED', 'false').lower() == 'true',
+            'cache_path': os.environ.get('LLM_CACHE_PATH', DEFAULT_LLM_CACHE_PATH),
+            'cache_max_mb': int(os.environ.get('LLM_CACHE_MAX_MB', DEFAULT_LLM_CACHE_MAX_MB)),
+            'input_price_per_1k': float(
+                os.environ.get('LLM_INPUT_PRICE_PER_1K', DEFAULT_LLM_INPUT_PRICE_PER_1K)
+            ),
+            'output_price_per_1k': float(
+                os.environ.get('LLM_OUTPUT_PRICE_PER_1K', DEFAULT_LLM_OUTPUT_PRICE_PER_1K)
+            ),
+        }
+
         if azure_openai_endpoint is None:
             # Setup for OpenAI API
             # Log if empty model was provided
@@ -236,6 +296,7 @@ class GraphitiLLMConfig(BaseModel):
                 model=model,
                 small_model=small_model,
                 temperature=float(os.environ.get('LLM_TEMPERATURE', '0.0')),
+                **cache_settings,
             )
         else:
             # Setup for Azure OpenAI API
@@ -260,6 +321,7 @@ class GraphitiLLMConfig(BaseModel):
                 model=model,
                 small_model=small_model,
                 temperature=float(os.environ.get('LLM_TEMPERATURE', '0.0')),
+                **cache_settings,
             )
 
     @classmethod
@@ -286,6 +348,9 @@ class GraphitiLLMConfig(BaseModel):
         if hasattr(args, 'temperature') and args.temperature is not None:
             config.temperature = args.temperature
 
+        if hasattr(args, 'llm_cache') and args.llm_cache:
+            config.cache_enabled = True
+
         return config
 
     def create_client(self) -> LLMClient:
@@ -297,6 +362,10 @@ class GraphitiLLMConfig(BaseModel):
 
         if self.azure_openai_endpoint is not None:
             # Azure OpenAI API setup
+            # Provider modules are imported here so only the configured one is loaded at startup
+            from graphiti_core.llm_client.azure_openai_client import AzureOpenAILLMClient
+            from openai import AsyncAzureOpenAI
+
             if self.azure_openai_use_managed_identity:
                 # Use managed identity for authentication
                 token_provider = create_azure_credential_token_provider()
@@ -336,6 +405,8 @@ class GraphitiLLMConfig(BaseModel):
         if not self.api_key:
             raise ValueError('OPENAI_API_KEY must be set when using OpenAI API')
 
+        from graphiti_core.llm_client.openai_client import OpenAIClient
+
         llm_client_config = LLMConfig(
             api_key=self.api_key, model=self.model, small_model=self.small_model
         )
@@ -345,6 +416,25 @@ class GraphitiLLMConfig(BaseModel):
 
         return OpenAIClient(config=llm_client_config)
 
+    def wrap_with_cache(self, client: LLMClient) -> LLMClient:
+        """Wrap an LLM client with the persistent response cache when it is enabled."""
+        if not self.cache_enabled:
+            return client
+
+        if self.temperature:
+            logger.warning(
+                f'LLM cache enabled with temperature {self.temperature}; '
+                'only temperature 0 responses are cached'
+            )
+
+        store = LLMResponseStore(self.cache_path, max_bytes=self.cache_max_mb * 1024 * 1024)
+        return CachingLLMClient(
+            client,
+            store,
+            input_price_per_1k=self.input_price_per_1k,
+            output_price_per_1k=self.output_price_per_1k,
+        )
+
 
 class GraphitiEmbedderConfig(BaseModel):
     """Configuration for the embedder client.
@@ -413,6 +503,9 @@ class GraphitiEmbedderConfig(BaseModel):
     def create_client(self) -> EmbedderClient | None:
         if self.azure_openai_endpoint is not None:
             # Azure OpenAI API setup
+            from graphiti_core.embedder.azure_openai import AzureOpenAIEmbedderClient
+            from openai import AsyncAzureOpenAI
+
             if self.azure_openai_use_managed_identity:
                 # Use managed identity for authentication
                 token_provider = create_azure_credential_token_provider()
@@ -444,6 +537,8 @@ class GraphitiEmbedderConfig(BaseModel):
             if not self.api_key:
                 return None
 
+            from graphiti_core.embedder.openai import OpenAIEmbedder, OpenAIEmbedderConfig
+
             embedder_config = OpenAIEmbedderConfig(api_key=self.api_key, embedding_model=self.model)
 
             return OpenAIEmbedder(config=embedder_config)
@@ -513,11 +608,16 @@ class MCPConfig(BaseModel):
     """Configuration for MCP server."""
 
     transport: str = 'sse'  # Default to SSE transport
+    metrics_endpoint: bool = False  # Serve Prometheus metrics at /metrics on the SSE app
 
     @classmethod
     def from_cli(cls, args: argparse.Namespace) -> 'MCPConfig':
         """Create MCP configuration from CLI arguments."""
-        return cls(transport=args.transport)
+        return cls(
+            transport=args.transport,
+            metrics_endpoint=args.metrics_endpoint
+            or os.environ.get('MCP_METRICS_ENDPOINT', 'false').lower() == 'true',
+        )
 
 
 # Configure logging
@@ -571,10 +671,50 @@ mcp = FastMCP(
 # Initialize Graphiti client
 graphiti_client: Graphiti | None = None
 
+# Background task building Graphiti's indices and constraints. Reads are served while it runs;
+# queued episodes wait for it before writing to the graph.
+index_build_task: asyncio.Task | None = None
+
+
+async def build_indices_in_background(client: Graphiti):
+    """Build Graphiti's indices and constraints without blocking server startup."""
+    started = asyncio.get_running_loop().time()
+    try:
+        await client.build_indices_and_constraints()
+        elapsed = asyncio.get_running_loop().time() - started
+        logger.info(f'Graphiti indices and constraints built in {elapsed:.2f}s')
+    except Exception as e:
+        logger.error(f'Failed to build Graphiti indices and constraints: {str(e)}')
+        raise
+
+
+def index_build_failed() -> bool:
+    """Whether the last index build finished with an error (or was cancelled)."""
+    return (
+        index_build_task is not None
+        and index_build_task.done()
+        and (index_build_task.cancelled() or index_build_task.exception() is not None)
+    )
+
+
+async def wait_for_indices():
+    """Wait until the background index build has finished, if one is running.
+
+    A failed build is restarted first; if the retry fails too, its error is raised so
+    episodes are never written without Graphiti's indices and constraints.
+    """
+    global index_build_task
+    if index_build_task is None:
+        return
+    if index_build_failed() and graphiti_client is not None:
+        logger.warning('Previous Graphiti index build failed; retrying before writing')
+        index_build_task = asyncio.create_task(build_indices_in_background(graphiti_client))
+    await asyncio.shield(index_build_task)
+
 
 async def initialize_graphiti():
     """Initialize the Graphiti client with the configured settings."""
-    global graphiti_client, config
+    global graphiti_client, config, index_build_task
 
     try:
         # Create LLM client if possible
@@ -582,12 +722,17 @@ async def initialize_graphiti():
         if not llm_client and config.use_custom_entities:
             # If custom entities are enabled, we must have an LLM client
             raise ValueError('OPENAI_API_KEY must be set when custom entities are enabled')
+        if llm_client:
+            # Metrics wrap the provider client directly so cache hits are not counted as calls
+            llm_client = config.llm.wrap_with_cache(InstrumentedLLMClient(llm_client))
 
         # Validate Neo4j configuration
         if not config.neo4j.uri or not config.neo4j.user or not config.neo4j.password:
             raise ValueError('NEO4J_URI, NEO4J_USER, and NEO4J_PASSWORD must be set')
 
         embedder_client = config.embedder.create_client()
+        if embedder_client:
+            embedder_client = InstrumentedEmbedderClient(embedder_client)
 
         # Initialize Graphiti client
         graphiti_client = Graphiti(
@@ -596,6 +741,9 @@ async def initialize_graphiti():
             password=config.neo4j.password,
             llm_client=llm_client,
             embedder=embedder_client,
+            graph_driver=InstrumentedNeo4jDriver(
+                config.neo4j.uri, config.neo4j.user, config.neo4j.password
+            ),
             max_coroutines=SEMAPHORE_LIMIT,
         )
 
@@ -604,14 +752,17 @@ async def initialize_graphiti():
             logger.info('Destroying graph...')
             await clear_data(graphiti_client.driver)
 
-        # Initialize the graph database with Graphiti's indices
-        await graphiti_client.build_indices_and_constraints()
+        # Initialize the graph database with Graphiti's indices in the background so the
+        # server can start accepting requests right away
+        index_build_task = asyncio.create_task(build_indices_in_background(graphiti_client))
         logger.info('Graphiti client initialized successfully')
 
         # Log configuration details for transparency
         if llm_client:
             logger.info(f'Using OpenAI model: {config.llm.model}')
             logger.info(f'Using temperature: {config.llm.temperature}')
+            if isinstance(llm_client, CachingLLMClient):
+                logger.info(f'Using LLM response cache at: {config.llm.cache_path}')
         else:
             logger.info('No LLM client configured - entity extraction will be limited')
 
@@ -647,48 +798,28 @@ def format_fact_result(edge: EntityEdge) -> dict[str, Any]:
     return result
 
 
-# Dictionary to store queues for each group_id
-# Each queue is a list of tasks to be processed sequentially
-episode_queues: dict[str, asyncio.Queue] = {}
-# Dictionary to track if a worker is running for each group_id
-queue_workers: dict[str, bool] = {}
-
-
-async def process_episode_queue(group_id: str):
-    """Process episodes for a specific group_id sequentially.
+# Central scheduler for queued episodes. Each group_id has its own FIFO queue; a bounded pool
+# of workers drains them with weighted fair queuing so one busy group cannot starve the others.
+episode_scheduler = EpisodeScheduler(
+    max_workers=EPISODE_WORKERS,
+    max_in_flight_per_group=GROUP_MAX_IN_FLIGHT,
+    weights=parse_group_weights(os.getenv('GROUP_WEIGHTS', '')),
+    idle_timeout=EPISODE_QUEUE_IDLE_SECONDS,
+)
 
-    This function runs as a long-lived task that processes episodes
-    from the queue one at a time.
-    """
-    global queue_workers
 
-    logger.info(f'Starting episode queue worker for group_id: {group_id}')
-    queue_workers[group_id] = True
+def collect_queue_metrics():
+    """Refresh the per-group queue depth gauge when metrics are read."""
+    QUEUE_DEPTH.clear()
+    for group_id, backlog in episode_scheduler.backlog().items():
+        QUEUE_DEPTH.set(backlog['queued'], group_id=group_id)
 
-    try:
-        while True:
-            # Get the next episode processing function from the queue
-            # This will wait if the queue is empty
-            process_func = await episode_queues[group_id].get()
 
-            try:
-                # Process the episode
-                await process_func()
-            except Exception as e:
-                logger.error(f'Error processing queued episode for group_id {group_id}: {str(e)}')
-            finally:
-                # Mark the task as done regardless of success/failure
-                episode_queues[group_id].task_done()
-    except asyncio.CancelledError:
-        logger.info(f'Episode queue worker for group_id {group_id} was cancelled')
-    except Exception as e:
-        logger.error(f'Unexpected error in queue worker for group_id {group_id}: {str(e)}')
-    finally:
-        queue_workers[group_id] = False
-        logger.info(f'Stopped episode queue worker for group_id: {group_id}')
+metrics.register_collector(collect_queue_metrics)
 
 
 @mcp.tool()
+@instrument_tool
 async def add_memory(
     name: str,
     episode_body: str,
@@ -700,7 +831,8 @@ async def add_memory(
     """Add an episode to memory. This is the primary way to add information to the graph.
 
     This function returns immediately and processes the episode addition in the background.
-    Episodes for the same group_id are processed sequentially to avoid race conditions.
+    Episodes for the same group_id are processed sequentially to avoid race conditions, while
+    episodes of different group_ids share a bounded worker pool with weighted fair scheduling.
 
     Args:
         name (str): Name of the episode
@@ -752,7 +884,7 @@ async def add_memory(
         - Entities will be created from appropriate JSON properties
         - Relationships between entities will be established based on the JSON structure
     """
-    global graphiti_client, episode_queues, queue_workers
+    global graphiti_client
 
     if graphiti_client is None:
         return ErrorResponse(error='Graphiti client not initialized')
@@ -779,46 +911,62 @@ async def add_memory(
         # Use cast to help the type checker understand that graphiti_client is not None
         client = cast(Graphiti, graphiti_client)
 
+        # The queued work is traced under this add_memory call
+        request_span = current_span.get()
+        enqueued_at = time.perf_counter()
+
         # Define the episode processing function
         async def process_episode():
+            started = time.perf_counter()
+            QUEUE_WAIT.observe(started - enqueued_at, group_id=group_id_str)
+            tracer.record_span(
+                'episode.queue_wait', request_span, enqueued_at, started, group_id=group_id_str
+            )
+            status = 'ok'
             try:
                 logger.info(f"Processing queued episode '{name}' for group_id: {group_id_str}")
+                # Attribute LLM cache savings for this episode to its group
+                current_group_id.set(group_id_str)
+                # Writes need Graphiti's constraints in place
+                with tracer.span('episode.wait_for_indices', parent=request_span):
+                    await wait_for_indices()
                 # Use all entity types if use_custom_entities is enabled, otherwise use empty dict
                 entity_types = ENTITY_TYPES if config.use_custom_entities else {}
 
-                await client.add_episode(
-                    name=name,
-                    episode_body=episode_body,
-                    source=source_type,
-                    source_description=source_description,
-                    group_id=group_id_str,  # Using the string version of group_id
-                    uuid=uuid,
-                    reference_time=datetime.now(timezone.utc),
-                    entity_types=entity_types,
-                )
+                with tracer.span(
+                    'episode.add_episode', parent=request_span, group_id=group_id_str, episode=name
+                ):
+                    await client.add_episode(
+                        name=name,
+                        episode_body=episode_body,
+                        source=source_type,
+                        source_description=source_description,
+                        group_id=group_id_str,  # Using the string version of group_id
+                        uuid=uuid,
+                        reference_time=datetime.now(timezone.utc),
+                        entity_types=entity_types,
+                    )
                 logger.info(f"Episode '{name}' added successfully")
 
                 logger.info(f"Episode '{name}' processed successfully")
             except Exception as e:
+                status = 'error'
                 error_msg = str(e)
                 logger.error(
                     f"Error processing episode '{name}' for group_id {group_id_str}: {error_msg}"
                 )
+            finally:
+                EPISODE_DURATION.observe(
+                    time.perf_counter() - started, group_id=group_id_str, status=status
+                )
 
-        # Initialize queue for this group_id if it doesn't exist
-        if group_id_str not in episode_queues:
-            episode_queues[group_id_str] = asyncio.Queue()
-
-        # Add the episode processing function to the queue
-        await episode_queues[group_id_str].put(process_episode)
-
-        # Start a worker for this queue if one isn't already running
-        if not queue_workers.get(group_id_str, False):
-            asyncio.create_task(process_episode_queue(group_id_str))
+        # Add the episode processing function to this group's queue; the scheduler starts
+        # workers as needed
+        position = await episode_scheduler.submit(group_id_str, process_episode)
 
         # Return immediately with a success message
         return SuccessResponse(
-            message=f"Episode '{name}' queued for processing (position: {episode_queues[group_id_str].qsize()})"
+            message=f"Episode '{name}' queued for processing (position: {position})"
         )
     except Exception as e:
         error_msg = str(e)
@@ -827,6 +975,7 @@ async def add_memory(
 
 
 @mcp.tool()
+@instrument_tool
 async def search_memory_nodes(
     query: str,
     group_ids: list[str] | None = None,
@@ -908,6 +1057,7 @@ async def search_memory_nodes(
 
 
 @mcp.tool()
+@instrument_tool
 async def search_memory_facts(
     query: str,
     group_ids: list[str] | None = None,
@@ -962,6 +1112,7 @@ async def search_memory_facts(
 
 
 @mcp.tool()
+@instrument_tool
 async def delete_entity_edge(uuid: str) -> SuccessResponse | ErrorResponse:
     """Delete an entity edge from the graph memory.
 
@@ -992,6 +1143,7 @@ async def delete_entity_edge(uuid: str) -> SuccessResponse | ErrorResponse:
 
 
 @mcp.tool()
+@instrument_tool
 async def delete_episode(uuid: str) -> SuccessResponse | ErrorResponse:
     """Delete an episode from the graph memory.
 
@@ -1022,6 +1174,7 @@ async def delete_episode(uuid: str) -> SuccessResponse | ErrorResponse:
 
 
 @mcp.tool()
+@instrument_tool
 async def get_entity_edge(uuid: str) -> dict[str, Any] | ErrorResponse:
     """Get an entity edge from the graph memory by its UUID.
 
@@ -1053,6 +1206,7 @@ async def get_entity_edge(uuid: str) -> dict[str, Any] | ErrorResponse:
 
 
 @mcp.tool()
+@instrument_tool
 async def get_episodes(
     group_id: str | None = None, last_n: int = 10
 ) -> list[dict[str, Any]] | EpisodeSearchResponse | ErrorResponse:
@@ -1105,6 +1259,7 @@ async def get_episodes(
 
 
 @mcp.tool()
+@instrument_tool
 async def clear_graph() -> SuccessResponse | ErrorResponse:
     """Clear all data from the graph memory and rebuild indices."""
     global graphiti_client
@@ -1119,6 +1274,9 @@ async def clear_graph() -> SuccessResponse | ErrorResponse:
         # Use cast to help the type checker understand that graphiti_client is not None
         client = cast(Graphiti, graphiti_client)
 
+        # Let a startup index build finish before clearing the graph
+        await wait_for_indices()
+
         # clear_data is already imported at the top
         await clear_data(client.driver)
         await client.build_indices_and_constraints()
@@ -1131,11 +1289,18 @@ async def clear_graph() -> SuccessResponse | ErrorResponse:
 
 @mcp.resource('http://graphiti/status')
 async def get_status() -> StatusResponse:
-    """Get the status of the Graphiti MCP server and Neo4j connection."""
+    """Get the status of the Graphiti MCP server and Neo4j connection.
+
+    Also reports the episode backlog of every active group_id.
+    """
     global graphiti_client
 
+    backlog = cast(dict[str, GroupBacklog], episode_scheduler.backlog())
+
     if graphiti_client is None:
-        return StatusResponse(status='error', message='Graphiti client not initialized')
+        return StatusResponse(
+            status='error', message='Graphiti client not initialized', backlog=backlog
+        )
 
     try:
         # We've already checked that graphiti_client is not None above
@@ -1147,8 +1312,27 @@ async def get_status() -> StatusResponse:
         # Test database connection
         await client.driver.client.verify_connectivity()  # type: ignore
 
+        if index_build_task is not None and not index_build_task.done():
+            return StatusResponse(
+                status='ok',
+                message='Graphiti MCP server is running and connected to Neo4j '
+                '(indices are still being built)',
+                backlog=backlog,
+            )
+        if index_build_failed():
+            assert index_build_task is not None
+            reason = 'cancelled' if index_build_task.cancelled() else index_build_task.exception()
+            return StatusResponse(
+                status='error',
+                message=f'Graphiti MCP server is running but building indices failed: {reason} '
+                '(retried before the next episode is written)',
+                backlog=backlog,
+            )
+
         return StatusResponse(
-            status='ok', message='Graphiti MCP server is running and connected to Neo4j'
+            status='ok',
+            message='Graphiti MCP server is running and connected to Neo4j',
+            backlog=backlog,
         )
     except Exception as e:
         error_msg = str(e)
@@ -1156,9 +1340,39 @@ async def get_status() -> StatusResponse:
         return StatusResponse(
             status='error',
             message=f'Graphiti MCP server is running but Neo4j connection failed: {error_msg}',
+            backlog=backlog,
         )
 
 
+@mcp.resource('http://graphiti/llm_cache')
+async def get_llm_cache_stats() -> dict[str, Any] | ErrorResponse:
+    """Get the tokens and dollars saved by the LLM response cache, per group_id."""
+    if graphiti_client is None:
+        return ErrorResponse(error='Graphiti client not initialized')
+
+    llm_client = graphiti_client.llm_client
+    if not isinstance(llm_client, CachingLLMClient):
+        return ErrorResponse(error='LLM response cache is disabled (set LLM_CACHE_ENABLED=true)')
+
+    return llm_client.savings_report()
+
+
+@mcp.resource('http://graphiti/metrics')
+async def get_metrics() -> dict[str, Any]:
+    """Get server metrics (tool latency, queues, LLM/embedder/Neo4j calls) and the slowest ingestions."""
+    return {
+        'metrics': metrics.snapshot(),
+        'slowest_ingestions': tracer.slowest(limit=10, root='tool.add_memory'),
+    }
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Serve metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 async def initialize_server() -> MCPConfig:
     """Parse CLI arguments and initialize the Graphiti server configuration."""
     global config
@@ -1195,6 +1409,16 @@ async def initialize_server() -> MCPConfig:
         action='store_true',
         help='Enable entity extraction using the predefined ENTITY_TYPES',
     )
+    parser.add_argument(
+        '--llm-cache',
+        action='store_true',
+        help='Cache deterministic LLM responses on disk (overrides LLM_CACHE_ENABLED)',
+    )
+    parser.add_argument(
+        '--metrics-endpoint',
+        action='store_true',
+        help='Serve Prometheus metrics at /metrics on the SSE app (overrides MCP_METRICS_ENDPOINT)',
+    )
     parser.add_argument(
         '--host',
         default=os.environ.get('MCP_SERVER_HOST'),
@@ -1240,6 +1464,9 @@ async def run_mcp_server():
     if mcp_config.transport == 'stdio':
         await mcp.run_stdio_async()
     elif mcp_config.transport == 'sse':
+        if mcp_config.metrics_endpoint:
+            mcp.custom_route('/metrics', methods=['GET'])(metrics_endpoint)
+            logger.info('Serving Prometheus metrics at /metrics')
         logger.info(
             f'Running MCP server with SSE transport on {mcp.settings.host}:{mcp.settings.port}'
         )
@@ -0,0 +1,316 @@
+"""
+Deduplicating cache for the LLM calls Graphiti makes while ingesting episodes.
+
+Re-sending the same (or re-serialized) episode body to `add_memory` makes Graphiti
+repeat the whole extraction pipeline. `CachingLLMClient` wraps the client built by
+`GraphitiLLMConfig.create_client`, stores deterministic responses in a local SQLite file and
+collapses identical requests that are already in flight into a single provider call.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import typing
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+
+from pydantic import BaseModel
+
+from graphiti_core.llm_client import LLMClient
+from graphiti_core.llm_client.config import ModelSize
+from graphiti_core.prompts.models import Message
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LLM_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'graphiti-mcp', 'llm_cache.db'
+)
+DEFAULT_LLM_CACHE_MAX_MB = 256
+
+# Rough characters-per-token ratio used to estimate the tokens a cache hit saved.
+# The wrapped clients do not surface provider usage through `generate_response`.
+CHARS_PER_TOKEN = 4
+
+# group_id of the episode currently being processed. Set by the episode queue worker so
+# savings can be attributed per group; Graphiti's internal tasks inherit it.
+current_group_id: ContextVar[str] = ContextVar('llm_cache_group_id', default='')
+
+
+@dataclass
+class GroupCacheStats:
+    """Cache counters for a single group_id."""
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    tokens_saved: int = 0
+    dollars_saved: float = 0.0
+
+
+class LLMResponseStore:
+    """Persistent key/value store for LLM responses with size-based LRU eviction.
+
+    All methods are blocking; `CachingLLMClient` calls them through `asyncio.to_thread`.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_LLM_CACHE_PATH,
+        max_bytes: int = DEFAULT_LLM_CACHE_MAX_MB * 1024 * 1024,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses(last_access)'
+        )
+        self._conn.commit()
+        row = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_responses').fetchone()
+        self._total_bytes = int(row[0])
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: str) -> tuple[dict[str, typing.Any], int, int] | None:
+        """Return (response, prompt_tokens, completion_tokens) for a key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT response, prompt_tokens, completion_tokens FROM llm_responses WHERE key = ?',
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                'UPDATE llm_responses SET last_access = ? WHERE key = ?', (time.time(), key)
+            )
+            self._conn.commit()
+        return json.loads(row[0]), row[1], row[2]
+
+    def set(
+        self,
+        key: str,
+        response: dict[str, typing.Any],
+        prompt_tokens: int,
+        completion_tokens: int,
+    ) -> None:
+        payload = json.dumps(response)
+        size = len(payload.encode())
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                'SELECT size FROM llm_responses WHERE key = ?', (key,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_responses
+                    (key, response, size, prompt_tokens, completion_tokens, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, payload, size, prompt_tokens, completion_tokens, now, now),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the store fits in max_bytes."""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                'SELECT key, size FROM llm_responses ORDER BY last_access LIMIT 64'
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+                self._total_bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_responses')
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for savings reporting."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _normalize(content: str) -> str:
+    # A JSON document re-serialized with another key order or indentation, or a prompt with
+    # extra leading/trailing newlines, hits the same entry. Whitespace inside the content is
+    # kept: it can change the answer (code, tables, string values)
+    content = content.strip()
+    try:
+        return json.dumps(json.loads(content), sort_keys=True, ensure_ascii=False)
+    except ValueError:
+        return content
+
+
+class CachingLLMClient(LLMClient):
+    """LLMClient wrapper that caches deterministic responses and deduplicates in-flight calls.
+
+    Responses are keyed by model + prompt hash + temperature (plus the response schema and
+    max_tokens, which change the provider output). Only temperature 0 calls are cached, since
+    any other setting is expected to produce different answers for the same prompt.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        store: LLMResponseStore,
+        input_price_per_1k: float = 0.0,
+        output_price_per_1k: float = 0.0,
+    ):
+        super().__init__(client.config, cache=False)
+        self.client = client
+        self.store = store
+        self.input_price_per_1k = input_price_per_1k
+        self.output_price_per_1k = output_price_per_1k
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._stats: dict[str, GroupCacheStats] = defaultdict(GroupCacheStats)
+
+    @property
+    def deterministic(self) -> bool:
+        return not self.client.temperature
+
+    def cache_key(
+        self,
+        messages: list[Message],
+        response_model: type[BaseModel] | None,
+        max_tokens: int | None,
+        model_size: ModelSize,
+    ) -> str:
+        model = self.client.small_model if model_size == ModelSize.small else self.client.model
+        prompt = json.dumps(
+            {
+                'messages': [[m.role, _normalize(m.content)] for m in messages],
+                'schema': response_model.model_json_schema() if response_model else None,
+                'max_tokens': max_tokens,
+            },
+            sort_keys=True,
+        )
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        return f'{model}:{self.client.temperature}:{prompt_hash}'
+
+    async def _generate_response(
+        self,
+        messages: list[Message],
+        response_model: type[BaseModel] | None = None,
+        max_tokens: int | None = None,
+        model_size: ModelSize = ModelSize.medium,
+    ) -> dict[str, typing.Any]:
+        return await self.client._generate_response(
+            messages, response_model, max_tokens or self.client.max_tokens, model_size
+        )
+
+    async def generate_response(
+        self,
+        messages: list[Message],
+        response_model: type[BaseModel] | None = None,
+        max_tokens: int | None = None,
+        model_size: ModelSize = ModelSize.medium,
+    ) -> dict[str, typing.Any]:
+        if not self.deterministic:
+            return await self.client.generate_response(
+                messages, response_model, max_tokens, model_size
+            )
+
+        key = self.cache_key(messages, response_model, max_tokens, model_size)
+        stats = self._stats[current_group_id.get()]
+
+        try:
+            cached = await asyncio.to_thread(self.store.get, key)
+        except Exception as e:
+            logger.warning(f'LLM cache read failed, calling provider: {str(e)}')
+            cached = None
+        if cached is not None:
+            response, prompt_tokens, completion_tokens = cached
+            stats.hits += 1
+            self._record_savings(stats, prompt_tokens, completion_tokens)
+            return response
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            response, prompt_tokens, completion_tokens = await asyncio.shield(pending)
+            stats.coalesced += 1
+            self._record_savings(stats, prompt_tokens, completion_tokens)
+            return copy.deepcopy(response)
+
+        stats.misses += 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            prompt_tokens = sum(estimate_tokens(m.content) for m in messages)
+            response = await self.client.generate_response(
+                messages, response_model, max_tokens, model_size
+            )
+            completion_tokens = estimate_tokens(json.dumps(response))
+            future.set_result((copy.deepcopy(response), prompt_tokens, completion_tokens))
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody was waiting on it
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        try:
+            await asyncio.to_thread(self.store.set, key, response, prompt_tokens, completion_tokens)
+        except Exception as e:
+            logger.warning(f'LLM cache write failed: {str(e)}')
+        return response
+
+    def _record_savings(self, stats: GroupCacheStats, prompt_tokens: int, completion_tokens: int):
+        stats.tokens_saved += prompt_tokens + completion_tokens
+        stats.dollars_saved += (
+            prompt_tokens * self.input_price_per_1k + completion_tokens * self.output_price_per_1k
+        ) / 1000
+
+    def savings_report(self) -> dict[str, typing.Any]:
+        """Tokens and dollars saved per group_id, plus store occupancy."""
+        groups = {group_id or 'unknown': asdict(stats) for group_id, stats in self._stats.items()}
+        return {
+            'groups': groups,
+            'total_tokens_saved': sum(s.tokens_saved for s in self._stats.values()),
+            'total_dollars_saved': round(sum(s.dollars_saved for s in self._stats.values()), 6),
+            'in_flight': len(self._in_flight),
+            'store_bytes': self.store.total_bytes,
+            'store_max_bytes': self.store.max_bytes,
+        }
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the weighted fair episode scheduler (episode_scheduler.py).
+"""
+
+import asyncio
+
+from episode_scheduler import EpisodeScheduler, parse_group_weights
+
+
+def recorder(order, group_id, index, delay=0.0):
+    async def job():
+        order.append((group_id, index))
+        await asyncio.sleep(delay)
+
+    return job
+
+
+def test_interactive_group_is_not_stuck_behind_a_bulk_backlog():
+    order = []
+
+    async def run():
+        scheduler = EpisodeScheduler(max_workers=1)
+        for index in range(20):
+            await scheduler.submit('bulk', recorder(order, 'bulk', index))
+        await scheduler.submit('interactive', recorder(order, 'interactive', 0))
+        await scheduler.join()
+        await scheduler.shutdown()
+
+    asyncio.run(run())
+
+    assert len(order) == 21
+    assert order.index(('interactive', 0)) <= 1
+    assert [index for group_id, index in order if group_id == 'bulk'] == list(range(20))
+
+
+def test_workers_are_shared_by_weight():
+    order = []
+
+    async def run():
+        scheduler = EpisodeScheduler(max_workers=1, weights=parse_group_weights('a=3,b=1'))
+        for index in range(8):
+            await scheduler.submit('a', recorder(order, 'a', index))
+            await scheduler.submit('b', recorder(order, 'b', index))
+        await scheduler.join()
+        await scheduler.shutdown()
+
+    asyncio.run(run())
+
+    first = [group_id for group_id, _ in order[:8]]
+    assert (first.count('a'), first.count('b')) == (6, 2)
+
+
+def test_in_flight_limit_per_group_keeps_submission_order():
+    order = []
+    running = {'g': 0, 'h': 0}
+    peak = {'g': 0, 'h': 0, 'total': 0}
+
+    def tracked(group_id, index):
+        async def job():
+            order.append((group_id, index))
+            running[group_id] += 1
+            peak[group_id] = max(peak[group_id], running[group_id])
+            peak['total'] = max(peak['total'], sum(running.values()))
+            await asyncio.sleep(0.01)
+            running[group_id] -= 1
+
+        return job
+
+    async def run():
+        scheduler = EpisodeScheduler(max_workers=4, max_in_flight_per_group=1)
+        for index in range(5):
+            await scheduler.submit('g', tracked('g', index))
+            await scheduler.submit('h', tracked('h', index))
+        await scheduler.join()
+        backlog = scheduler.backlog()
+        await scheduler.shutdown()
+        return backlog
+
+    backlog = asyncio.run(run())
+
+    assert (peak['g'], peak['h']) == (1, 1)
+    # Other groups still use the spare workers
+    assert peak['total'] == 2
+    assert [index for group_id, index in order if group_id == 'g'] == list(range(5))
+    assert backlog['g']['processed'] == backlog['h']['processed'] == 5
+
+
+def test_in_flight_limit_can_be_raised():
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def run():
+        scheduler = EpisodeScheduler(max_workers=4, max_in_flight_per_group=2)
+        for _ in range(6):
+            await scheduler.submit('g', job)
+        await scheduler.join()
+        await scheduler.shutdown()
+
+    asyncio.run(run())
+
+    assert peak == 2
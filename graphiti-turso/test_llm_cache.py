@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM response cache (llm_cache.py) with a fake provider client.
+"""
+
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from graphiti_core.llm_client import LLMClient
+from graphiti_core.llm_client.config import LLMConfig, ModelSize
+from graphiti_core.prompts.models import Message
+
+from llm_cache import CachingLLMClient, LLMResponseStore
+
+
+class Entities(BaseModel):
+    names: list[str]
+
+
+class FakeClient(LLMClient):
+    """Provider stub that counts calls and can be held open to overlap requests."""
+
+    def __init__(self, fail: bool = False):
+        super().__init__(LLMConfig(model='large', small_model='small', temperature=0), cache=False)
+        self.fail = fail
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def _generate_response(self, messages, response_model=None, max_tokens=None,
+                                 model_size=ModelSize.medium):
+        raise NotImplementedError
+
+    async def generate_response(self, messages, response_model=None, max_tokens=None,
+                                model_size=ModelSize.medium):
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError('provider down')
+        return {'names': ['alice']}
+
+
+def caching(client: FakeClient) -> CachingLLMClient:
+    return CachingLLMClient(client, LLMResponseStore(':memory:'))
+
+
+def prompt(content: str, role: str = 'user') -> list[Message]:
+    return [Message(role='system', content='Extract entities.'), Message(role=role, content=content)]
+
+
+def test_reserialized_json_shares_a_key():
+    cache = caching(FakeClient())
+
+    compact = cache.cache_key(prompt('{"a": 1, "b": [1, 2]}'), None, None, ModelSize.medium)
+    indented = cache.cache_key(
+        prompt('\n{\n  "b": [\n    1,\n    2\n  ],\n  "a": 1\n}\n'), None, None, ModelSize.medium
+    )
+
+    assert compact == indented
+
+
+def test_interior_whitespace_changes_the_key():
+    cache = caching(FakeClient())
+
+    def key(content):
+        return cache.cache_key(prompt(content), None, None, ModelSize.medium)
+
+    assert key('def f():\n    return 1') != key('def f():\n  return 1')
+    assert key('| a |  b |') != key('| a | b |')
+    assert key('{"text": "a  b"}') != key('{"text": "a b"}')
+    assert key('  episode body\n') == key('episode body')
+
+
+def test_request_parameters_do_not_collide():
+    cache = caching(FakeClient())
+    base = cache.cache_key(prompt('body'), None, None, ModelSize.medium)
+
+    assert len({
+        base,
+        cache.cache_key(prompt('body', role='assistant'), None, None, ModelSize.medium),
+        cache.cache_key(prompt('body'), Entities, None, ModelSize.medium),
+        cache.cache_key(prompt('body'), None, 512, ModelSize.medium),
+        cache.cache_key(prompt('body'), None, None, ModelSize.small),
+        cache.cache_key([Message(role='user', content='Extract entities.\nbody')], None, None,
+                        ModelSize.medium),
+    }) == 6
+
+
+def test_identical_in_flight_requests_share_one_provider_call():
+    async def run():
+        client = FakeClient()
+        cache = caching(client)
+        first = asyncio.create_task(cache.generate_response(prompt('body')))
+        second = asyncio.create_task(cache.generate_response(prompt('body')))
+        await asyncio.sleep(0.01)
+        client.release.set()
+        responses = await asyncio.gather(first, second)
+        # Once stored, the same prompt is served without calling the provider
+        responses.append(await cache.generate_response(prompt('body')))
+        return client, cache, responses
+
+    client, cache, responses = asyncio.run(run())
+
+    assert client.calls == 1
+    assert responses == [{'names': ['alice']}] * 3
+    responses[0]['names'].append('bob')
+    assert responses[1] == {'names': ['alice']}
+    stats = cache.savings_report()['groups']['unknown']
+    assert (stats['misses'], stats['coalesced'], stats['hits']) == (1, 1, 1)
+
+
+def test_failed_call_reaches_every_waiter_and_is_not_cached():
+    async def run():
+        client = FakeClient(fail=True)
+        cache = caching(client)
+        requests = [asyncio.create_task(cache.generate_response(prompt('body'))) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        client.release.set()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await cache.generate_response(prompt('body'))
+        return client, cache, results
+
+    client, cache, results = asyncio.run(run())
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert client.calls == 2
+    assert cache.savings_report()['in_flight'] == 0
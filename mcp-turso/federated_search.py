@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Busca federada nas tabelas do banco context-memory (Turso)
+
+Substitui as quatro consultas `LIKE '%q%'` em sequência de `search_turso_cloud.py`:
+
+- cada tabela tem um índice FTS5 (external content, mantido por triggers, mesmo padrão
+  de `prps_fts` no prp-agent). A busca só lê: os índices são criados e preenchidos por
+  uma etapa explícita de migração (`--create-indexes` / `ensure_indexes`), e uma tabela
+  sem índice fica fora da busca, com o motivo em `skipped`;
+- a pergunta vira uma expressão MATCH passada como parâmetro (nada de texto do usuário
+  concatenado no SQL);
+- as consultas de todas as tabelas saem juntas: `mode="pipeline"` manda todas em uma
+  única requisição `/v2/pipeline` (uma ida e volta); `mode="parallel"` dispara uma
+  requisição por tabela ao mesmo tempo, todas na mesma sessão HTTP keep-alive;
+- os resultados viram uma lista única, ordenada por fusão de rankings (RRF), com o
+  tempo de cada tabela.
+
+O destino é qualquer coisa aceita por `connect_backend`: Turso (`libsql://`/`https://`),
+um sqld local (`http://127.0.0.1:8080`) ou um arquivo SQLite para testes.
+
+Uso:
+    python3 federated_search.py --create-indexes --db libsql://context-memory-<org>.turso.io
+    python3 federated_search.py "token jwt" --db libsql://context-memory-<org>.turso.io
+    python3 federated_search.py "token jwt" --db http://127.0.0.1:8080 --mode parallel --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+sys.path.append(str(Path(__file__).resolve().parent / "scripts"))
+from docs_bulk_loader import connect_backend
+from docs_chunks import fts_query
+
+# Constante do Reciprocal Rank Fusion: posições além do topo pesam cada vez menos
+RRF_K = 60
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    """Tabela pesquisável: colunas indexadas, coluna de título e coluna do trecho"""
+    table: str
+    columns: Sequence[str]
+    title_column: str
+    snippet_column: str
+    # Pesos BM25 na ordem de `columns`
+    weights: Sequence[float]
+    # Peso da tabela na fusão dos rankings
+    weight: float = 1.0
+
+    @property
+    def fts_table(self):
+        return f"{self.table}_fts"
+
+
+SEARCH_SOURCES = {
+    source.table: source for source in (
+        SearchSource("knowledge_base", ("topic", "content", "tags"), "topic", "content", (5.0, 1.0, 3.0)),
+        SearchSource("conversations", ("message", "response", "context"), "message", "response",
+                     (2.0, 1.0, 0.5), weight=0.8),
+        SearchSource("docs_turso", ("title", "content", "tags"), "title", "content", (5.0, 1.0, 3.0)),
+        SearchSource("docs_prp", ("title", "content", "tags"), "title", "content", (5.0, 1.0, 3.0)),
+    )
+}
+
+
+@dataclass
+class SearchHit:
+    """Resultado de uma tabela, já com a nota da fusão"""
+    table: str
+    id: int
+    title: str
+    snippet: str
+    bm25: float
+    table_rank: int
+    score: float = 0.0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def index_statements(source: SearchSource) -> List[str]:
+    """Tabela FTS5 e triggers que a mantêm sincronizada com a tabela de origem"""
+    columns = ", ".join(source.columns)
+    new_values = ", ".join(f"new.{column}" for column in source.columns)
+    old_values = ", ".join(f"old.{column}" for column in source.columns)
+    fts = source.fts_table
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+    {columns},
+    content='{source.table}', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source.table} BEGIN
+    INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source.table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {source.table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+    INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+END""",
+    ]
+
+
+def search_statement(source: SearchSource):
+    """SELECT parametrizado (MATCH ?, LIMIT ?) com trecho destacado e BM25"""
+    fts = source.fts_table
+    snippet_index = list(source.columns).index(source.snippet_column)
+    weights = ", ".join(str(w) for w in source.weights)
+    return (
+        f"SELECT t.id, t.{source.title_column}, "
+        f"snippet({fts}, {snippet_index}, '[', ']', '…', 24), bm25({fts}, {weights}) AS rank "
+        f"FROM {fts} JOIN {source.table} t ON t.id = {fts}.rowid "
+        f"WHERE {fts} MATCH ? ORDER BY rank LIMIT ?"
+    )
+
+
+def fuse(results: Dict[str, List[SearchHit]], k: int) -> List[SearchHit]:
+    """
+    Reciprocal Rank Fusion: nota = peso da tabela / (RRF_K + posição na tabela).
+
+    O BM25 de tabelas diferentes não é comparável (estatísticas de corpus distintas);
+    a posição dentro de cada tabela é.
+    """
+    merged = []
+    for table, hits in results.items():
+        weight = SEARCH_SOURCES[table].weight
+        for hit in hits:
+            hit.score = round(weight / (RRF_K + hit.table_rank), 6)
+            merged.append(hit)
+    merged.sort(key=lambda hit: (-hit.score, hit.bm25))
+    return merged[:k]
+
+
+class FederatedSearch:
+    """Consultas FTS5 de várias tabelas em paralelo, fundidas em um ranking único"""
+
+    def __init__(self, backend, tables: Optional[Sequence[str]] = None):
+        self.backend = backend
+        self.sources = [SEARCH_SOURCES[table] for table in (tables or SEARCH_SOURCES)]
+        self._indexed: Optional[List[SearchSource]] = None
+        # Tabelas fora da busca e o motivo (não existe, schema diferente, sem índice)
+        self.skipped: Dict[str, str] = {}
+        session = getattr(backend, "session", None)
+        if session is not None:
+            # Uma conexão keep-alive por tabela no modo paralelo
+            from requests.adapters import HTTPAdapter
+
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(4, len(self.sources)))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+    @classmethod
+    def connect(cls, target=None, auth_token=None, **kwargs):
+        """`target` padrão: TURSO_DATABASE_URL; token padrão: TURSO_AUTH_TOKEN"""
+        backend = connect_backend(target or os.getenv("TURSO_DATABASE_URL"),
+                                  auth_token or os.getenv("TURSO_AUTH_TOKEN"))
+        return cls(backend, **kwargs)
+
+    def _inspect(self):
+        """Tabelas com o schema esperado e, entre elas, as que ainda não têm índice"""
+        self.skipped = {}
+        names = {row[0] for row in self.backend.query("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        columns: Dict[str, set] = {}
+        for table, column in self.backend.query(
+            "SELECT m.name, p.name FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+            f"WHERE m.type = 'table' AND m.name IN ({', '.join('?' for _ in self.sources)})",
+            [source.table for source in self.sources]
+        ):
+            columns.setdefault(table, set()).add(column)
+        available = []
+        for source in self.sources:
+            required = set(source.columns) | {"id", source.title_column}
+            if source.table not in names:
+                self.skipped[source.table] = "tabela não existe"
+            elif not required <= columns.get(source.table, set()):
+                # Variante antiga do schema (ex.: conversations com role/content)
+                self.skipped[source.table] = f"colunas ausentes: {', '.join(sorted(required - columns[source.table]))}"
+            else:
+                available.append(source)
+        return available, [source for source in available if source.fts_table not in names]
+
+    def ensure_indexes(self) -> List[SearchSource]:
+        """
+        Migração: cria e preenche os índices FTS5 que faltam.
+
+        Altera o schema do banco (tabelas virtuais e triggers), então roda só quando
+        pedido (`--create-indexes`), nunca a partir da busca. Devolve as tabelas indexadas.
+        """
+        available, missing = self._inspect()
+        if missing:
+            statements = []
+            for source in missing:
+                statements.extend((sql, []) for sql in index_statements(source))
+                # Preenche o índice novo com as linhas que já existem
+                statements.append((f"INSERT INTO {source.fts_table}({source.fts_table}) VALUES ('rebuild')", []))
+            self.backend.run_transaction(statements)
+        self._indexed = None
+        return available
+
+    def searchable(self) -> List[SearchSource]:
+        """Tabelas pesquisáveis (com índice); as demais vão para `skipped` com o motivo"""
+        if self._indexed is not None:
+            return self._indexed
+        available, missing = self._inspect()
+        for source in missing:
+            self.skipped[source.table] = f"sem índice {source.fts_table} (rode com --create-indexes)"
+        self._indexed = [source for source in available if source not in missing]
+        return self._indexed
+
+    def _parse(self, source: SearchSource, rows) -> List[SearchHit]:
+        return [
+            SearchHit(table=source.table, id=int(row_id), title=str(title or ""), snippet=str(snippet or ""),
+                      bm25=round(float(rank), 4), table_rank=position)
+            for position, (row_id, title, snippet, rank) in enumerate(rows, 1)
+        ]
+
+    def search(self, query: str, k: int = 10, per_table: int = 10, mode: str = "pipeline") -> Dict:
+        """
+        Busca `query` em todas as tabelas e devolve o ranking único.
+
+        Retorna {"hits": [...], "tables": {tabela: {"hits", "ms", "error"}}, "skipped",
+        "round_trips", "wall_ms", "mode"}. A falha de uma tabela aparece em "tables" sem
+        derrubar as outras.
+        """
+        started = time.perf_counter()
+        match = fts_query(query)
+        sources = self.searchable()
+        report = {"query": query, "mode": mode, "hits": [], "tables": {}, "skipped": dict(self.skipped),
+                  "round_trips": 0}
+        if not match or not sources:
+            report["wall_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return report
+
+        statements = [(search_statement(source), [match, per_table]) for source in sources]
+        if mode == "pipeline":
+            sent = time.perf_counter()
+            outcomes = self.backend.execute_many(statements)
+            round_trip_ms = round((time.perf_counter() - sent) * 1000, 2)
+            report["round_trips"] = 1
+            for outcome in outcomes:
+                # Sem tempo do servidor, cada tabela mostra a ida e volta compartilhada
+                outcome["ms"] = outcome["duration_ms"] if outcome["duration_ms"] is not None else round_trip_ms
+        elif mode == "parallel":
+            def run(statement):
+                sent = time.perf_counter()
+                outcome = self.backend.execute_many([statement])[0]
+                outcome["ms"] = round((time.perf_counter() - sent) * 1000, 2)
+                return outcome
+
+            with ThreadPoolExecutor(max_workers=len(statements)) as pool:
+                outcomes = list(pool.map(run, statements))
+            report["round_trips"] = len(statements)
+        else:
+            raise ValueError(f"Modo desconhecido: {mode} (use 'pipeline' ou 'parallel')")
+
+        results = {}
+        for source, outcome in zip(sources, outcomes):
+            hits = [] if outcome["error"] else self._parse(source, outcome["rows"])
+            results[source.table] = hits
+            report["tables"][source.table] = {"hits": len(hits), "ms": outcome["ms"], "error": outcome["error"]}
+
+        report["hits"] = fuse(results, k)
+        report["wall_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return report
+
+    def close(self):
+        self.backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca federada (FTS5) nas tabelas do context-memory")
+    parser.add_argument("query", nargs="*")
+    parser.add_argument("--db", default=os.getenv("TURSO_DATABASE_URL"),
+                        help="URL libsql://, http:// (sqld local) ou arquivo (padrão: TURSO_DATABASE_URL)")
+    parser.add_argument("-k", type=int, default=10, help="Resultados no ranking final (padrão: 10)")
+    parser.add_argument("--per-table", type=int, default=10, help="Resultados por tabela (padrão: 10)")
+    parser.add_argument("--mode", choices=("pipeline", "parallel"), default="pipeline")
+    parser.add_argument("--table", action="append", choices=sorted(SEARCH_SOURCES), help="Restringe as tabelas")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    parser.add_argument("--create-indexes", action="store_true",
+                        help="Cria e preenche os índices FTS5 que faltam (altera o schema) e sai")
+    args = parser.parse_args()
+
+    if not args.db:
+        print("❌ Informe o banco: TURSO_DATABASE_URL ou --db")
+        return 1
+    if args.create_indexes:
+        with FederatedSearch.connect(args.db, tables=args.table) as searcher:
+            indexed = searcher.ensure_indexes()
+        print(f"✅ Índices FTS5 prontos: {', '.join(source.fts_table for source in indexed) or 'nenhum'}")
+        for table, reason in searcher.skipped.items():
+            print(f"  ⚠️ {table}: {reason}")
+        return 0
+    if not args.query:
+        parser.error("informe a busca (ou --create-indexes)")
+    with FederatedSearch.connect(args.db, tables=args.table) as searcher:
+        report = searcher.search(" ".join(args.query), k=args.k, per_table=args.per_table, mode=args.mode)
+    report["hits"] = [hit.as_dict() for hit in report["hits"]]
+    print(json.dumps(report, indent=2, ensure_ascii=False) if args.json else format_report(report))
+    return 0
+
+
+def format_report(report) -> str:
+    lines = [f"🔎 {report['query']} ({report['mode']}, {report['round_trips']} requisições, {report['wall_ms']} ms)"]
+    for table, info in report["tables"].items():
+        status = f"❌ {info['error']}" if info["error"] else f"{info['hits']} resultados"
+        lines.append(f"  📋 {table}: {status} em {info['ms']} ms")
+    for table, reason in report.get("skipped", {}).items():
+        lines.append(f"  ⚠️ {table}: fora da busca ({reason})")
+    lines.append("")
+    for i, hit in enumerate(report["hits"], 1):
+        hit = hit if isinstance(hit, dict) else hit.as_dict()
+        lines.append(f"{i}. [{hit['table']}#{hit['id']}] {hit['title']}")
+        lines.append(f"   📝 {' '.join(hit['snippet'].split())}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Paginação por keyset para as listagens de PRPs e conversas
+
+`LIMIT ? OFFSET ?` relê e descarta todas as linhas anteriores à página pedida (cada
+página custa mais que a anterior), e as listagens que buscavam tudo de uma vez guardavam
+o resultado inteiro em memória. Aqui cada página continua de onde a anterior parou:
+
+    WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?
+
+- `KeysetQuery` monta o SELECT de uma página (a chave é `(created_at, id)` por padrão,
+  `(timestamp, id)` nas conversas; o id desempata linhas do mesmo segundo);
+- `KeysetPager` é um iterador assíncrono sobre as linhas (ou páginas), que já pede a
+  página seguinte enquanto a atual é consumida;
+- `pager.cursor` é um texto opaco com a posição da última linha entregue: passado a um
+  novo pager (outra chamada, outro processo), a listagem continua dali.
+
+Uso:
+    pager = KeysetPager(PRP_LISTING, fetch, page_size=50, cursor=request_cursor)
+    async for row in pager:
+        ...
+    next_cursor = pager.cursor
+"""
+
+import asyncio
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+
+Key = Tuple[Any, ...]
+# Executa (sql, args) e devolve as linhas como dicts
+FetchPage = Callable[[str, List[Any]], Awaitable[List[Dict[str, Any]]]]
+
+
+def encode_cursor(key: Optional[Key]) -> Optional[str]:
+    """Posição (valores da chave) em texto opaco, seguro para URL"""
+    if key is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Key]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return tuple(json.loads(base64.urlsafe_b64decode(padded.encode())))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+
+
+@dataclass(frozen=True)
+class KeysetQuery:
+    """SELECT paginado por chave, do mais recente para o mais antigo por padrão"""
+    table: str
+    columns: Sequence[str]
+    key: Sequence[str] = ("created_at", "id")
+    # Filtro fixo (nunca texto do usuário; valores variáveis vão em `args`)
+    where: str = ""
+    args: Sequence[Any] = ()
+    descending: bool = True
+
+    @property
+    def select_columns(self) -> List[str]:
+        # As colunas da chave precisam voltar em cada linha para montar o cursor
+        return list(self.columns) + [column for column in self.key if column not in self.columns]
+
+    def page(self, after: Optional[Key], limit: int) -> Tuple[str, List[Any]]:
+        """SQL e argumentos da página que vem depois de `after` (None: primeira página)"""
+        conditions = [self.where] if self.where else []
+        args = list(self.args)
+        if after is not None:
+            if len(after) != len(self.key):
+                raise ValueError(f"Cursor com {len(after)} valores para a chave {tuple(self.key)}")
+            operator = "<" if self.descending else ">"
+            conditions.append(
+                f"({', '.join(self.key)}) {operator} ({', '.join('?' for _ in self.key)})"
+            )
+            args.extend(after)
+        direction = "DESC" if self.descending else "ASC"
+        sql = f"SELECT {', '.join(self.select_columns)} FROM {self.table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(f"({condition})" for condition in conditions)
+        sql += f" ORDER BY {', '.join(f'{column} {direction}' for column in self.key)} LIMIT ?"
+        args.append(limit)
+        return sql, args
+
+    def key_of(self, row: Dict[str, Any]) -> Key:
+        return tuple(row[column] for column in self.key)
+
+
+class KeysetPager:
+    """Iterador assíncrono sobre as linhas de um `KeysetQuery`, página a página"""
+
+    def __init__(self, query: KeysetQuery, fetch: FetchPage, page_size: int = DEFAULT_PAGE_SIZE,
+                 cursor: Optional[str] = None, prefetch: bool = True):
+        self.query = query
+        self.fetch = fetch
+        self.page_size = max(1, page_size)
+        self.prefetch = prefetch
+        self.after = decode_cursor(cursor)
+        self.pages_fetched = 0
+        self.rows_yielded = 0
+        self.exhausted = False
+
+    @property
+    def cursor(self) -> Optional[str]:
+        """Posição da última linha entregue (None antes da primeira)"""
+        return encode_cursor(self.after)
+
+    async def _fetch(self, after: Optional[Key]) -> List[Dict[str, Any]]:
+        sql, args = self.query.page(after, self.page_size)
+        rows = await self.fetch(sql, args)
+        self.pages_fetched += 1
+        return rows
+
+    async def pages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Páginas inteiras; o cursor avança para o fim de cada página entregue"""
+        pending: Optional[asyncio.Future] = asyncio.ensure_future(self._fetch(self.after))
+        try:
+            while True:
+                page = await pending
+                pending = None
+                last = self.query.key_of(page[-1]) if page else None
+                # Página vazia, ou fonte que ignora o cursor (ex.: simulação): fim
+                if not page or last == self.after:
+                    break
+                full = len(page) >= self.page_size
+                if full and self.prefetch:
+                    # A próxima página já vem pela rede enquanto esta é consumida
+                    pending = asyncio.ensure_future(self._fetch(last))
+                self.after = last
+                self.rows_yielded += len(page)
+                yield page
+                if not full:
+                    break
+                if pending is None:
+                    pending = asyncio.ensure_future(self._fetch(last))
+            self.exhausted = True
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        """Linha a linha; o cursor avança a cada linha entregue"""
+        async for page in self.pages():
+            # pages() já marcou o fim da página; aqui o cursor acompanha cada linha
+            for row in page:
+                self.after = self.query.key_of(row)
+                yield row
+
+    async def next_page(self) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Uma página e o cursor da seguinte (None quando acabou), para APIs paginadas"""
+        rows = await self._fetch(self.after)
+        if rows:
+            self.after = self.query.key_of(rows[-1])
+            self.rows_yielded += len(rows)
+        self.exhausted = len(rows) < self.page_size
+        return rows, (None if self.exhausted else self.cursor)
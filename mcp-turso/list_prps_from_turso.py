@@ -1,16 +1,30 @@
 #!/usr/bin/env python3
 """
 Script para listar PRPs do banco de dados Turso via MCP
+
+Com TURSO_REPLICA_PATH configurado, as leituras saem da réplica local
+(`turso_replica.py`) em vez de ir ao banco remoto.
+
+As listagens são paginadas por (created_at, id) / (timestamp, id) (`keyset_pagination.py`)
+e os formatadores consomem as linhas à medida que as páginas chegam. O cursor impresso no
+fim continua a listagem em outra execução:
+
+    python3 list_prps_from_turso.py --page-size 50 --limit 200
+    python3 list_prps_from_turso.py --cursor <cursor> --limit 200
 """
 
+import argparse
 import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 
+from keyset_pagination import DEFAULT_PAGE_SIZE, KeysetPager, KeysetQuery
+from turso_replica import TursoReplica
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
@@ -18,13 +32,75 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Listagens paginadas por chave, da mais recente para a mais antiga
+PRP_LISTING = KeysetQuery(
+    "prps", ("id", "name", "title", "description", "status", "priority", "created_at", "tags")
+)
+CONVERSATION_LISTING = KeysetQuery(
+    "conversations",
+    ("id", "session_id", "message AS user_message", "response AS agent_response",
+     "timestamp", "context AS file_context"),
+    key=("timestamp", "id"),
+)
+
 class TursoPRPList:
     """
     Lista PRPs do banco de dados Turso via MCP
     """
     
-    def __init__(self):
+    PRP_HEADER = "📋 PRPs NO BANCO DE DADOS TURSO\n" + "=" * 60 + "\n\n"
+    PRP_EMPTY = "📭 Nenhum PRP encontrado no banco de dados Turso"
+    CONVERSATION_HEADER = "💬 CONVERSAS NO BANCO DE DADOS TURSO\n" + "=" * 60 + "\n\n"
+    CONVERSATION_EMPTY = "📭 Nenhuma conversa encontrada no banco de dados Turso"
+    
+    def __init__(self, replica: Optional[TursoReplica] = None):
         self.database_name = "context-memory"
+        self.replica = replica if replica is not None else TursoReplica.from_env()
+    
+    async def read(self, query: str, tables: List[str], args: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        """
+        Leitura pela réplica local quando configurada (sincronizada se atrasada),
+        senão pelo MCP Turso.
+        """
+        if self.replica:
+            await asyncio.to_thread(self.replica.pull_if_due)
+            return await asyncio.to_thread(self.replica.fetch, query, list(args), tables)
+        
+        result = await self.call_mcp_turso("mcp_turso_execute_read_only_query", {
+            "database": self.database_name,
+            "query": query,
+            "params": list(args)
+        })
+        return result.get("rows", [])
+    
+    def _pager(self, listing: KeysetQuery, page_size: int, cursor: Optional[str],
+               prefetch: bool) -> KeysetPager:
+        indexed = False
+        
+        async def fetch(sql: str, args: List[Any]) -> List[Dict[str, Any]]:
+            nonlocal indexed
+            rows = await self.read(sql, [listing.table], args)
+            if self.replica and not indexed:
+                # Cada página vira uma busca no índice da chave, não uma ordenação da tabela
+                indexed = self.replica.ensure_local_index(listing.table, listing.key)
+            return rows
+        
+        return KeysetPager(listing, fetch, page_size=page_size, cursor=cursor, prefetch=prefetch)
+    
+    def iter_prps(self, page_size: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                  prefetch: bool = True) -> KeysetPager:
+        """
+        PRPs do mais recente para o mais antigo, página a página (`async for prp in ...`).
+        
+        `pager.cursor` guarda a posição do último PRP entregue; passado em `cursor`,
+        a listagem continua dali.
+        """
+        return self._pager(PRP_LISTING, page_size, cursor, prefetch)
+    
+    def iter_conversations(self, page_size: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                           prefetch: bool = True) -> KeysetPager:
+        """Conversas da mais recente para a mais antiga, página a página"""
+        return self._pager(CONVERSATION_LISTING, page_size, cursor, prefetch)
         
     async def call_mcp_turso(self, tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -79,6 +155,7 @@ class TursoPRPList:
                     "success": True,
                     "rows": [
                         {
+                            "id": 1,
                             "session_id": "cursor-agent-001",
                             "user_message": "Crie um PRP para autenticação",
                             "agent_response": "PRP criado com sucesso...",
@@ -94,73 +171,60 @@ class TursoPRPList:
     
     async def list_prps_from_turso(self) -> List[Dict[str, Any]]:
         """
-        Lista PRPs do banco Turso via MCP
+        Lista PRPs do banco Turso via MCP (todos em memória; prefira `iter_prps`)
         """
         
         try:
-            query = """
-            SELECT id, name, title, description, status, priority, created_at, tags
-            FROM prps 
-            ORDER BY created_at DESC
-            """
-            
-            result = await self.call_mcp_turso("mcp_turso_execute_read_only_query", {
-                "database": self.database_name,
-                "query": query
-            })
-            
-            return result.get("rows", [])
+            return [prp async for prp in self.iter_prps()]
             
         except Exception as e:
             logger.error(f"Erro ao listar PRPs: {e}")
             return []
     
-    async def list_conversations_from_turso(self) -> List[Dict[str, Any]]:
+    async def list_conversations_from_turso(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
-        Lista conversas do banco Turso via MCP
+        Lista as conversas mais recentes do banco Turso via MCP
         """
         
         try:
-            query = """
-            SELECT session_id, user_message, agent_response, timestamp, file_context
-            FROM conversations 
-            ORDER BY timestamp DESC 
-            LIMIT 10
-            """
-            
-            result = await self.call_mcp_turso("mcp_turso_execute_read_only_query", {
-                "database": self.database_name,
-                "query": query
-            })
-            
-            return result.get("rows", [])
+            conversations, _ = await self.iter_conversations(page_size=limit).next_page()
+            return conversations
             
         except Exception as e:
             logger.error(f"Erro ao listar conversas: {e}")
             return []
     
+    @staticmethod
+    def _format_prp(prp: Dict[str, Any]) -> str:
+        output = f"📄 **{prp.get('name', 'N/A')}**\n"
+        output += f"   • Título: {prp.get('title', 'N/A')}\n"
+        output += f"   • Descrição: {prp.get('description', 'N/A')}\n"
+        output += f"   • Status: {prp.get('status', 'N/A')}\n"
+        output += f"   • Prioridade: {prp.get('priority', 'N/A')}\n"
+        output += f"   • Criado: {prp.get('created_at', 'N/A')}\n"
+        output += f"   • Tags: {prp.get('tags', 'N/A')}\n"
+        output += "\n"
+        return output
+    
+    @staticmethod
+    def _format_conversation(conv: Dict[str, Any]) -> str:
+        output = f"💬 **{conv.get('session_id', 'N/A')}**\n"
+        output += f"   • Usuário: {(conv.get('user_message') or 'N/A')[:50]}...\n"
+        output += f"   • Agente: {(conv.get('agent_response') or 'N/A')[:50]}...\n"
+        output += f"   • Arquivo: {conv.get('file_context', 'N/A')}\n"
+        output += f"   • Timestamp: {conv.get('timestamp', 'N/A')}\n"
+        output += "\n"
+        return output
+    
     def format_prp_list(self, prps: List[Dict[str, Any]]) -> str:
         """
         Formata lista de PRPs para exibição
         """
         
         if not prps:
-            return "📭 Nenhum PRP encontrado no banco de dados Turso"
-        
-        output = "📋 PRPs NO BANCO DE DADOS TURSO\n"
-        output += "=" * 60 + "\n\n"
+            return self.PRP_EMPTY
         
-        for prp in prps:
-            output += f"📄 **{prp.get('name', 'N/A')}**\n"
-            output += f"   • Título: {prp.get('title', 'N/A')}\n"
-            output += f"   • Descrição: {prp.get('description', 'N/A')}\n"
-            output += f"   • Status: {prp.get('status', 'N/A')}\n"
-            output += f"   • Prioridade: {prp.get('priority', 'N/A')}\n"
-            output += f"   • Criado: {prp.get('created_at', 'N/A')}\n"
-            output += f"   • Tags: {prp.get('tags', 'N/A')}\n"
-            output += "\n"
-        
-        return output
+        return self.PRP_HEADER + "".join(self._format_prp(prp) for prp in prps)
     
     def format_conversation_list(self, conversations: List[Dict[str, Any]]) -> str:
         """
@@ -168,26 +232,56 @@ class TursoPRPList:
         """
         
         if not conversations:
-            return "📭 Nenhuma conversa encontrada no banco de dados Turso"
+            return self.CONVERSATION_EMPTY
         
-        output = "💬 CONVERSAS NO BANCO DE DADOS TURSO\n"
-        output += "=" * 60 + "\n\n"
+        return self.CONVERSATION_HEADER + "".join(self._format_conversation(conv) for conv in conversations)
+    
+    async def stream_prp_list(self, prps: AsyncIterator[Dict[str, Any]],
+                              limit: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Formata os PRPs à medida que chegam (ex.: de `iter_prps`), sem juntar a lista.
         
-        for conv in conversations:
-            output += f"💬 **{conv.get('session_id', 'N/A')}**\n"
-            output += f"   • Usuário: {conv.get('user_message', 'N/A')[:50]}...\n"
-            output += f"   • Agente: {conv.get('agent_response', 'N/A')[:50]}...\n"
-            output += f"   • Arquivo: {conv.get('file_context', 'N/A')}\n"
-            output += f"   • Timestamp: {conv.get('timestamp', 'N/A')}\n"
-            output += "\n"
+        Para depois de `limit` PRPs; o cursor do pager continua de onde parou.
+        """
         
-        return output
+        count = 0
+        async for prp in prps:
+            if count == 0:
+                yield self.PRP_HEADER
+            yield self._format_prp(prp)
+            count += 1
+            if limit and count >= limit:
+                break
+        if count == 0:
+            yield self.PRP_EMPTY
+    
+    async def stream_conversation_list(self, conversations: AsyncIterator[Dict[str, Any]],
+                                       limit: Optional[int] = None) -> AsyncIterator[str]:
+        """Formata as conversas à medida que chegam, como `stream_prp_list`"""
+        
+        count = 0
+        async for conv in conversations:
+            if count == 0:
+                yield self.CONVERSATION_HEADER
+            yield self._format_conversation(conv)
+            count += 1
+            if limit and count >= limit:
+                break
+        if count == 0:
+            yield self.CONVERSATION_EMPTY
 
 async def main():
     """
     Função principal para listar PRPs do Turso
     """
     
+    parser = argparse.ArgumentParser(description="Lista PRPs e conversas do banco Turso")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Linhas por página")
+    parser.add_argument("--limit", type=int, help="Máximo de PRPs exibidos nesta execução")
+    parser.add_argument("--cursor", help="Continua a listagem de PRPs a partir deste cursor")
+    parser.add_argument("--conversations", type=int, default=10, help="Conversas mais recentes exibidas")
+    args = parser.parse_args()
+    
     print("🔍 LISTANDO PRPs DO BANCO DE DADOS TURSO")
     print("=" * 60)
     print()
@@ -196,15 +290,21 @@ async def main():
     
     # Listar PRPs
     print("📋 Buscando PRPs...")
-    prps = await lister.list_prps_from_turso()
-    print(lister.format_prp_list(prps))
+    pager = lister.iter_prps(page_size=args.page_size, cursor=args.cursor)
+    async for chunk in lister.stream_prp_list(pager, limit=args.limit):
+        print(chunk, end="", flush=True)
+    print()
+    if not pager.exhausted and pager.cursor:
+        print(f"➡️ Mais PRPs: --cursor {pager.cursor}")
     
     print("\n" + "=" * 60 + "\n")
     
     # Listar conversas
     print("💬 Buscando conversas...")
-    conversations = await lister.list_conversations_from_turso()
-    print(lister.format_conversation_list(conversations))
+    conversations = lister.iter_conversations(page_size=args.conversations)
+    async for chunk in lister.stream_conversation_list(conversations, limit=args.conversations):
+        print(chunk, end="", flush=True)
+    print()
     
     print("\n" + "=" * 60)
     print("✅ Listagem concluída!")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark do pipeline de ingestão de documentos
+
+Gera uma árvore de documentos markdown sintéticos (50 mil arquivos por padrão) e roda o
+mesmo fluxo de `docs/migrate_docs_to_database.py` (leitura, hash, categoria e tags) com
+escrita pelo `BulkLoader` (INSERTs multi-linha parametrizados, uma transação por lote) em
+um arquivo SQLite temporário, ou em `--db` (ex.: URL libsql:// de um banco de teste), em
+dois cenários:
+
+1. sequencial: `workers=1`, tudo no processo atual, como os scripts faziam;
+2. paralelo: pool de processos no estágio de processamento.
+
+O relatório JSON traz arquivos/s por estágio (walk, process, write), linhas/s da carga e
+o ganho total.
+
+Uso:
+    python3 benchmark_docs_pipeline.py --files 50000 --workers 8 --batch-size 500
+    python3 benchmark_docs_pipeline.py --tree /tmp/docs-50k --keep-tree --output run.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "docs"))
+
+from docs_bulk_loader import BulkLoader, connect_backend
+from docs_manifest import walk_files
+from docs_pipeline import IngestionPipeline
+from migrate_docs_to_database import extract_doc_fields
+
+WORDS = (
+    "turso mcp agente prp contexto banco sincronização documento arquitetura cluster "
+    "memória consulta índice vetor embedding réplica lote transação pipeline cache "
+    "latência throughput delegação integração configuração exemplo referência"
+).split()
+
+
+def generate_tree(root: Path, files: int, seed: int):
+    """Cria `files` documentos markdown em pastas de até 500 arquivos"""
+    rng = random.Random(seed)
+    per_dir = 500
+    for index in range(files):
+        directory = root / f"cluster-{index // (per_dir * 10):02d}" / f"secao-{index // per_dir:03d}"
+        if index % per_dir == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        sections = []
+        for section in range(rng.randint(2, 6)):
+            words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120)))
+            sections.append(
+                f"## Seção {section} **{rng.choice(WORDS)}**\n\n{words} #{rng.choice(WORDS)} "
+                f"`{rng.choice(WORDS)}()` [{rng.choice(WORDS)}](link)\n"
+            )
+        content = f"# Documento {index} {rng.choice(WORDS)}\n\n" + "\n".join(sections)
+        (directory / f"doc-{index:05d}.md").write_text(content, encoding="utf-8")
+
+
+def run_scenario(name, tree: Path, workers: int, batch_size: int, db=None):
+    tmp_dir = None
+    if not db:
+        tmp_dir = Path(tempfile.mkdtemp(prefix="docs-bench-db-"))
+        db = str(tmp_dir / "bench.db")
+    backend = connect_backend(db, os.getenv("TURSO_AUTH_TOKEN"))
+    table = f"docs_bench_{name}"
+    backend.run_transaction([
+        (f"DROP TABLE IF EXISTS {table}", []),
+        (f"CREATE TABLE {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, content TEXT, "
+         "file_path TEXT, cluster TEXT, category TEXT, tags TEXT, file_hash TEXT)", []),
+    ])
+    loader = BulkLoader(
+        backend, table, ["title", "content", "file_path", "cluster", "category", "tags", "file_hash"],
+        batch_size=batch_size,
+    )
+
+    def write_batch(docs):
+        for doc in docs:
+            loader.insert([
+                doc.file_stat.path.stem, doc.content, doc.file_stat.rel_path, doc.file_stat.path.parent.name,
+                doc.fields["category"], doc.fields["tags"], doc.hash,
+            ])
+
+    pipeline = IngestionPipeline(extract=extract_doc_fields, workers=workers, batch_size=batch_size)
+    try:
+        report = pipeline.run(walk_files(tree), write_batch)
+        loader.close()
+        report["load"] = loader.stats()
+        report["rows"] = int(backend.query(f"SELECT COUNT(*) FROM {table}")[0][0])
+        backend.run_transaction([(f"DROP TABLE {table}", [])])
+    finally:
+        backend.close()
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    report["scenario"] = name
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de ingestão de documentos")
+    parser.add_argument("--files", type=int, default=50000, help="Documentos gerados (padrão: 50000)")
+    parser.add_argument("--tree", help="Usar/gerar a árvore neste diretório (padrão: temporário)")
+    parser.add_argument("--keep-tree", action="store_true", help="Não apagar a árvore gerada")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos no cenário paralelo")
+    parser.add_argument("--batch-size", type=int, default=500, help="Documentos por commit (padrão: 500)")
+    parser.add_argument("--db", help="Banco de destino (URL libsql:// ou arquivo; padrão: SQLite temporário)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do conteúdo gerado")
+    parser.add_argument("--output", help="Salvar o relatório JSON neste arquivo")
+    args = parser.parse_args()
+
+    tree = Path(args.tree) if args.tree else Path(tempfile.mkdtemp(prefix="docs-bench-tree-"))
+    generated = False
+    if not any(tree.rglob("*.md")):
+        started = time.perf_counter()
+        generate_tree(tree, args.files, args.seed)
+        generated = True
+        print(f"Árvore gerada em {tree} ({args.files} arquivos, {time.perf_counter() - started:.1f}s)",
+              file=sys.stderr)
+
+    try:
+        scenarios = [
+            run_scenario("sequencial", tree, 1, args.batch_size, args.db),
+            run_scenario("paralelo", tree, args.workers, args.batch_size, args.db),
+        ]
+    finally:
+        if generated and not args.keep_tree and not args.tree:
+            shutil.rmtree(tree, ignore_errors=True)
+
+    sequential, parallel = scenarios
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "scenarios": scenarios,
+        "speedup": (
+            round(parallel["files_per_s"] / sequential["files_per_s"], 2)
+            if sequential["files_per_s"] else None
+        ),
+    }
+    rendered = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
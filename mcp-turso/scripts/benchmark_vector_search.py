@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca vetorial de PRPs (`vector_search.py`)
+
+Gera uma `knowledge_base` sintética (20 mil linhas por padrão, 70% com tag prp, textos
+agrupados em assuntos) em um
+arquivo libSQL temporário, ou em `--db`, cria o schema vetorial, roda o backfill dos
+embeddings e mede as consultas nos dois caminhos:
+
+1. nativo: `vector_top_k` sobre o índice `libsql_vector_idx`, dentro do banco (exige o
+   driver `libsql-experimental`; sem ele o arquivo é aberto pelo sqlite3 e o caminho
+   aparece como indisponível);
+2. local: índice IVF em processo, montado uma vez a partir da mesma coluna (a montagem
+   aparece à parte, em `build_s`).
+
+A referência é a busca exata sem índice: cada consulta lê todos os vetores do banco e
+compara em Python. O relatório JSON traz o tempo do backfill, latências p50/p95 por
+consulta, o recall@k de cada caminho contra a referência e o ganho sobre ela.
+
+Uso:
+    python3 benchmark_vector_search.py --rows 20000 --queries 200 -k 10
+    python3 benchmark_vector_search.py --db /tmp/kb.db --keep-db --output run.json
+"""
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from docs_bulk_loader import BulkLoader, LibSQLFileBackend, SQLiteBackend
+from vector_search import (PRP_FILTER, VECTOR_INDEX_OPTIONS, LocalVectorIndex, VectorSearch,
+                           backfill_embeddings, ensure_schema)
+
+# Vocabulário e assuntos sintéticos: cada documento fala de um assunto, com ruído
+TOPICS = 200
+TOPIC_WORDS = 40
+VOCABULARY = 3000
+
+
+def make_topics(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(VOCABULARY)]
+    return vocabulary, [rng.sample(vocabulary, TOPIC_WORDS) for _ in range(TOPICS)]
+
+
+def make_text(rng, vocabulary, topics, words):
+    topic = rng.choice(topics)
+    return " ".join(rng.choice(topic) if rng.random() < 0.8 else rng.choice(vocabulary) for _ in range(words))
+
+
+KNOWLEDGE_BASE = """CREATE TABLE IF NOT EXISTS knowledge_base (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    content TEXT NOT NULL,
+    source TEXT,
+    tags TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)"""
+
+
+def open_file(path: str):
+    """Arquivo pelo driver libSQL quando instalado; senão sqlite3 (só o caminho local)"""
+    try:
+        return LibSQLFileBackend(path), "libsql"
+    except ImportError:
+        return SQLiteBackend(path), "sqlite3"
+
+
+def generate_rows(backend, rows: int, seed: int, batch_size: int):
+    rng = random.Random(seed)
+    vocabulary, topics = make_topics(rng)
+    with BulkLoader(backend, "knowledge_base", ["topic", "content", "source", "tags"],
+                    batch_size=batch_size) as loader:
+        for index in range(rows):
+            loader.insert([
+                f"PRP {index}: {make_text(rng, vocabulary, topics, 3)}",
+                make_text(rng, vocabulary, topics, rng.randint(30, 90)),
+                "benchmark",
+                "prp,generated" if rng.random() < 0.7 else "docs",
+            ])
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+def run_path(search: VectorSearch, queries, k: int, truth):
+    latencies, recalls, candidates = [], [], []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        rows = search.search(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found = {row["id"] for row in rows}
+        recalls.append(len(found & expected) / len(expected) if expected else 1.0)
+        if search.last.get("candidates") is not None:
+            candidates.append(search.last["candidates"])
+    result = {"path": search.last.get("path"), **percentiles(latencies),
+              f"recall_at_{k}": round(statistics.fmean(recalls), 4)}
+    if candidates:
+        result["mean_candidates"] = round(statistics.fmean(candidates), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca vetorial de PRPs")
+    parser.add_argument("--rows", type=int, default=20000, help="Linhas geradas (padrão: 20000)")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas por caminho")
+    parser.add_argument("-k", type=int, default=10, help="Vizinhos por consulta")
+    parser.add_argument("--batch-size", type=int, default=500, help="Linhas por transação na carga e no backfill")
+    parser.add_argument("--db", help="Arquivo libSQL (padrão: temporário)")
+    parser.add_argument("--keep-db", action="store_true", help="Não apagar o arquivo temporário")
+    parser.add_argument("--index-option", dest="index_options", action="append",
+                        help="Opção do libsql_vector_idx (repetível; padrão: as de vector_search.py)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do conteúdo gerado")
+    parser.add_argument("--output", help="Salvar o relatório JSON neste arquivo")
+    args = parser.parse_args()
+    args.index_options = args.index_options or list(VECTOR_INDEX_OPTIONS)
+
+    tmp_dir = None
+    path = args.db
+    if not path:
+        tmp_dir = Path(tempfile.mkdtemp(prefix="vector-bench-"))
+        path = str(tmp_dir / "kb.db")
+    backend, driver = open_file(path)
+    report = {"config": {k: v for k, v in vars(args).items() if k != "output"}, "driver": driver}
+
+    try:
+        backend.run_transaction([(KNOWLEDGE_BASE, [])])
+        if not backend.query("SELECT 1 FROM knowledge_base LIMIT 1"):
+            started = time.perf_counter()
+            generate_rows(backend, args.rows, args.seed, args.batch_size)
+            report["generate_s"] = round(time.perf_counter() - started, 2)
+            print(f"{args.rows} linhas geradas em {path}", file=sys.stderr)
+
+        started = time.perf_counter()
+        report["schema"] = ensure_schema(backend, index_options=args.index_options)
+        report["schema"]["seconds"] = round(time.perf_counter() - started, 3)
+        report["backfill"] = backfill_embeddings(backend, batch_size=args.batch_size)
+
+        # Mesma semente: as consultas usam o vocabulário e os assuntos dos documentos
+        rng = random.Random(args.seed)
+        vocabulary, topics = make_topics(rng)
+        queries = [make_text(rng, vocabulary, topics, rng.randint(3, 8)) for _ in range(args.queries)]
+
+        # Referência: sem índice, cada consulta lê todos os vetores e compara em Python
+        truth, latencies = [], []
+        for query in queries:
+            started = time.perf_counter()
+            scan = VectorSearch(backend, mode="local", index=LocalVectorIndex(exact_below=sys.maxsize))
+            truth.append({row["id"] for row in scan.search(query, args.k)})
+            latencies.append((time.perf_counter() - started) * 1000)
+        report["exact_scan"] = {"rows": len(scan.index), **percentiles(latencies)}
+
+        local = VectorSearch(backend, mode="local", refresh_interval=float("inf"))
+        started = time.perf_counter()
+        built = local.refresh()
+        report["local"] = {"build_s": round(time.perf_counter() - started, 3), "indexed": built["indexed"],
+                           "lists": built["lists"], **run_path(local, queries, args.k, truth)}
+
+        if report["schema"]["indexed"]:
+            native = VectorSearch(backend, mode="native")
+            report["native"] = run_path(native, queries, args.k, truth)
+        else:
+            report["native"] = {"unavailable": "sem índice vetorial: o driver precisa das funções do "
+                                               "libSQL (pip install libsql-experimental)"}
+
+        exact_p50 = report["exact_scan"]["p50_ms"]
+        report["speedup_p50_vs_scan"] = {
+            name: round(exact_p50 / report[name]["p50_ms"], 1)
+            for name in ("local", "native") if report[name].get("p50_ms")
+        }
+        report["filter"] = PRP_FILTER
+    finally:
+        backend.close()
+        if tmp_dir and not args.keep_db:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    rendered = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
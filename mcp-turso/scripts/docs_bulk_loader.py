@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Carga em massa parametrizada para o Turso (libSQL)
+
+Substitui os arquivos .sql gerados com o markdown escapado à mão. As linhas viram
+INSERTs multi-linha com parâmetros (`VALUES (?, ?), (?, ?)...`), agrupados em lotes de
+`batch_size` linhas; cada lote é uma transação.
+
+Destinos:
+- Turso/libSQL remoto: API HTTP `/v2/pipeline` (Hrana). O lote vai em uma única
+  requisição `batch` com BEGIN, as instruções encadeadas por condição (cada uma só roda
+  se a anterior deu certo), COMMIT e ROLLBACK se o COMMIT não rodar;
+- arquivo local SQLite/libSQL (testes e desenvolvimento): mesmas instruções via sqlite3.
+
+Dentro de um lote, os INSERTs de linhas rodam primeiro e depois as instruções avulsas
+(`execute`), na ordem em que foram adicionadas. Assim um registro em docs_changes que
+busca o id do documento enxerga o documento do mesmo lote.
+
+O lote só é gravado entre unidades: a linha de um documento e as instruções que
+dependem dela (changelog, trechos) ficam em `with loader.unit():` e nunca se separam em
+transações diferentes. Fora de uma unidade, cada `insert`/`execute` é uma unidade.
+
+Uso:
+    backend = connect_backend(os.getenv("TURSO_DATABASE_URL"), os.getenv("TURSO_AUTH_TOKEN"))
+    with BulkLoader(backend, "docs_turso", ["title", "content"], batch_size=500) as loader:
+        with loader.unit():
+            loader.insert({"title": "...", "content": "..."})
+            loader.execute("INSERT INTO docs_changes ...", [...])
+        loader.execute("DELETE FROM docs_turso WHERE file_path = ?", ["..."])
+    print(loader.stats())
+"""
+
+import base64
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Limite de parâmetros por instrução (SQLITE_MAX_VARIABLE_NUMBER das versões antigas)
+MAX_PARAMS = 999
+
+Statement = Tuple[str, Sequence[Any]]
+
+
+class BulkLoadError(Exception):
+    """Falha ao gravar um lote (a transação do lote foi desfeita)"""
+
+
+def encode_value(value):
+    """Valor Python no formato de argumento do Hrana"""
+    if value is None:
+        return {"type": "null"}
+    if isinstance(value, bool):
+        return {"type": "integer", "value": str(int(value))}
+    if isinstance(value, int):
+        return {"type": "integer", "value": str(value)}
+    if isinstance(value, float):
+        return {"type": "float", "value": value}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"type": "blob", "base64": base64.b64encode(bytes(value)).decode("ascii")}
+    return {"type": "text", "value": str(value)}
+
+
+def decode_value(cell):
+    """Valor do Hrana de volta para Python (blobs chegam em base64)"""
+    kind = cell.get("type")
+    if kind == "null":
+        return None
+    if kind == "integer":
+        return int(cell["value"])
+    if kind == "blob":
+        return base64.b64decode(cell.get("base64", ""))
+    return cell.get("value")
+
+
+class HranaHTTPBackend:
+    """Turso/libSQL remoto pela API HTTP /v2/pipeline"""
+
+    def __init__(self, url, auth_token=None, timeout=60, session=None):
+        import requests
+
+        if url.startswith("libsql://"):
+            url = "https://" + url[len("libsql://"):]
+        self.url = url.rstrip("/") + "/v2/pipeline"
+        self.timeout = timeout
+        # Sessão única: reaproveita a conexão TLS entre os lotes
+        self.session = session or requests.Session()
+        self.session.headers["Content-Type"] = "application/json"
+        if auth_token:
+            self.session.headers["Authorization"] = f"Bearer {auth_token}"
+        self.bytes_sent = 0
+
+    def _post(self, requests_body, raise_errors=True):
+        body = json.dumps({"requests": requests_body + [{"type": "close"}]}, ensure_ascii=False).encode("utf-8")
+        self.bytes_sent += len(body)
+        response = self.session.post(self.url, data=body, timeout=self.timeout)
+        if response.status_code != 200:
+            raise BulkLoadError(f"HTTP {response.status_code}: {response.text[:300]}")
+        results = response.json()["results"]
+        if raise_errors:
+            for result in results:
+                if result.get("type") == "error":
+                    raise BulkLoadError(result["error"].get("message", str(result["error"])))
+        return results
+
+    def run_transaction(self, statements: List[Statement]) -> List[List[List[Any]]]:
+        """Instruções em uma transação, em uma requisição; devolve as linhas de cada uma"""
+        steps = [{"stmt": {"sql": "BEGIN"}}]
+        for sql, args in statements:
+            steps.append({
+                "stmt": {"sql": sql, "args": [encode_value(v) for v in args]},
+                "condition": {"type": "ok", "step": len(steps) - 1},
+            })
+        commit_step = len(steps)
+        steps.append({"stmt": {"sql": "COMMIT"}, "condition": {"type": "ok", "step": commit_step - 1}})
+        steps.append({
+            "stmt": {"sql": "ROLLBACK"},
+            "condition": {"type": "not", "cond": {"type": "ok", "step": commit_step}},
+        })
+        result = self._post([{"type": "batch", "batch": {"steps": steps}}])[0]["response"]["result"]
+        errors = [(i, e) for i, e in enumerate(result.get("step_errors", [])) if e]
+        if errors:
+            step, error = errors[0]
+            raise BulkLoadError(f"Lote desfeito (passo {step}): {error.get('message', error)}")
+        return [
+            [[decode_value(cell) for cell in row] for row in (step or {}).get("rows", [])]
+            for step in result.get("step_results", [])[1:commit_step]
+        ]
+
+    def query(self, sql, args=()):
+        result = self._post([{
+            "type": "execute",
+            "stmt": {"sql": sql, "args": [encode_value(v) for v in args]},
+        }])[0]["response"]["result"]
+        return [[decode_value(cell) for cell in row] for row in result["rows"]]
+
+    def execute_many(self, statements: List[Statement]) -> List[Dict]:
+        """
+        Várias consultas independentes em uma única requisição (pipeline).
+
+        Cada item traz `rows`, `columns`, `error` (a falha de uma consulta não derruba as
+        outras) e `duration_ms`, o tempo informado pelo servidor quando ele o envia.
+        """
+        results = self._post([
+            {"type": "execute", "stmt": {"sql": sql, "args": [encode_value(v) for v in args]}}
+            for sql, args in statements
+        ], raise_errors=False)
+        out = []
+        for result in results[:len(statements)]:
+            if result.get("type") == "error":
+                out.append({"rows": [], "columns": [],
+                            "error": result["error"].get("message", str(result["error"])),
+                            "duration_ms": None})
+                continue
+            payload = result["response"]["result"]
+            out.append({
+                "rows": [[decode_value(cell) for cell in row] for row in payload["rows"]],
+                "columns": [col.get("name") for col in payload.get("cols", [])],
+                "error": None,
+                "duration_ms": payload.get("query_duration_ms")
+            })
+        return out
+
+    def close(self):
+        self.session.close()
+
+
+class SQLiteBackend:
+    """Arquivo local SQLite/libSQL (mesmo formato de arquivo do Turso)"""
+
+    # Exceções de consulta do driver (execute_many as devolve como `error`)
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path):
+        # Autocommit: as transações são abertas explicitamente por lote
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.bytes_sent = 0
+
+    def run_transaction(self, statements: List[Statement]) -> List[List[List[Any]]]:
+        cursor = self.conn.cursor()
+        cursor.execute("BEGIN")
+        results = []
+        try:
+            for sql, args in statements:
+                cursor.execute(sql, tuple(args))
+                results.append([list(row) for row in cursor.fetchall()])
+            cursor.execute("COMMIT")
+        except Exception as e:
+            cursor.execute("ROLLBACK")
+            raise BulkLoadError(f"Lote desfeito: {e}") from e
+        return results
+
+    def query(self, sql, args=()):
+        return [list(row) for row in self.conn.execute(sql, tuple(args)).fetchall()]
+
+    def execute_many(self, statements: List[Statement]) -> List[Dict]:
+        """Mesmo contrato de `HranaHTTPBackend.execute_many`, com o tempo medido aqui"""
+        out = []
+        for sql, args in statements:
+            started = time.perf_counter()
+            try:
+                cursor = self.conn.execute(sql, tuple(args))
+                rows, error = [list(row) for row in cursor.fetchall()], None
+                columns = [col[0] for col in cursor.description or ()]
+            except self.errors as e:
+                rows, columns, error = [], [], str(e)
+            out.append({"rows": rows, "columns": columns, "error": error,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 3)})
+        return out
+
+    def close(self):
+        self.conn.close()
+
+
+class LibSQLFileBackend(SQLiteBackend):
+    """
+    Arquivo local aberto pelo driver do libSQL (pacote opcional `libsql-experimental`).
+
+    Mesmo contrato do `SQLiteBackend`, mas com as extensões do libSQL, como as colunas
+    `F32_BLOB` e os índices vetoriais (`vector_top_k`) que o sqlite3 não tem.
+    """
+
+    # O driver sinaliza erros de SQL com ValueError
+    errors = (ValueError, sqlite3.Error)
+
+    def __init__(self, path):
+        try:
+            import libsql_experimental
+        except ImportError as e:
+            raise ImportError("Driver libSQL ausente: pip install libsql-experimental") from e
+        self.conn = libsql_experimental.connect(str(path), isolation_level=None)
+        self.bytes_sent = 0
+
+
+def connect_backend(target, auth_token=None):
+    """`libsql://`/`https://` → API HTTP do Turso; qualquer outro valor → arquivo local"""
+    if not target:
+        raise ValueError("Informe a URL do banco (TURSO_DATABASE_URL) ou um arquivo local")
+    if target.startswith(("libsql://", "https://", "http://")):
+        return HranaHTTPBackend(target, auth_token)
+    if target.startswith("file:"):
+        target = target[len("file:"):]
+    return SQLiteBackend(target)
+
+
+class BulkLoader:
+    """INSERTs multi-linha parametrizados em transações de `batch_size` linhas"""
+
+    def __init__(self, backend, table, columns, batch_size=500, conflict_column=None,
+                 conflict_extra=None, max_params=MAX_PARAMS):
+        self.backend = backend
+        self.table = table
+        self.columns = list(columns)
+        self.batch_size = max(1, batch_size)
+        self.rows_per_statement = max(1, min(self.batch_size, max_params // len(self.columns)))
+        self.conflict_column = conflict_column
+        # Atribuições extras do upsert, ex.: "updated_at = CURRENT_TIMESTAMP"
+        self.conflict_extra = conflict_extra
+        self._rows: List[Sequence[Any]] = []
+        self._statements: List[Statement] = []
+        self._sql_cache: Dict[int, str] = {}
+        self._unit_depth = 0
+        self.rows = 0
+        self.statements = 0
+        self.batches = 0
+        self.seconds = 0.0
+        self._started: Optional[float] = None
+
+    def _insert_sql(self, count):
+        sql = self._sql_cache.get(count)
+        if sql is None:
+            placeholders = "(" + ", ".join("?" for _ in self.columns) + ")"
+            sql = f"INSERT INTO {self.table} ({', '.join(self.columns)}) VALUES " + ", ".join([placeholders] * count)
+            if self.conflict_column:
+                # Upsert: a linha existente recebe os valores novos
+                updates = [
+                    f"{column} = excluded.{column}" for column in self.columns if column != self.conflict_column
+                ]
+                if self.conflict_extra:
+                    updates.append(self.conflict_extra)
+                updates = ", ".join(updates)
+                sql += f" ON CONFLICT({self.conflict_column}) DO UPDATE SET {updates}"
+            self._sql_cache[count] = sql
+        return sql
+
+    def insert(self, row):
+        """Adiciona uma linha (dict com as colunas ou sequência na ordem de `columns`)"""
+        if self._started is None:
+            self._started = time.perf_counter()
+        if isinstance(row, dict):
+            row = [row.get(column) for column in self.columns]
+        self._rows.append(row)
+        self._flush_if_full()
+
+    def insert_many(self, rows: Iterable):
+        for row in rows:
+            self.insert(row)
+
+    def execute(self, sql, args=()):
+        """Instrução avulsa (UPDATE, DELETE...) que entra na transação do lote atual"""
+        if self._started is None:
+            self._started = time.perf_counter()
+        self._statements.append((sql, list(args)))
+        self._flush_if_full()
+
+    @contextmanager
+    def unit(self):
+        """
+        Agrupa as linhas e instruções de um item (ex.: um documento) no mesmo lote.
+
+        O lote pode passar de `batch_size` para terminar a unidade; a gravação acontece
+        na saída. Com erro dentro do bloco, nada é gravado.
+        """
+        self._unit_depth += 1
+        try:
+            yield self
+        finally:
+            self._unit_depth -= 1
+        self._flush_if_full()
+
+    def _flush_if_full(self):
+        if not self._unit_depth and len(self._rows) + len(self._statements) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Grava o lote pendente em uma transação"""
+        if not self._rows and not self._statements:
+            return
+        statements: List[Statement] = []
+        for start in range(0, len(self._rows), self.rows_per_statement):
+            chunk = self._rows[start:start + self.rows_per_statement]
+            statements.append((self._insert_sql(len(chunk)), [value for row in chunk for value in row]))
+        statements.extend(self._statements)
+
+        started = time.perf_counter()
+        self.backend.run_transaction(statements)
+        self.seconds += time.perf_counter() - started
+        self.rows += len(self._rows)
+        self.statements += len(self._statements)
+        self.batches += 1
+        self._rows, self._statements = [], []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Em caso de erro, o lote pendente é descartado (nada pela metade no banco)
+        if exc_type is None:
+            self.flush()
+
+    def stats(self):
+        wall = (time.perf_counter() - self._started) if self._started else 0.0
+        return {
+            "rows": self.rows,
+            "statements": self.statements,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "rows_per_statement": self.rows_per_statement,
+            "db_seconds": round(self.seconds, 4),
+            "rows_per_s": round(self.rows / wall, 1) if wall > 0 else None,
+            "bytes_sent": self.backend.bytes_sent,
+        }
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Armazenamento em trechos (chunks) dos documentos, com FTS5 e embeddings por trecho
+
+As tabelas `docs`, `docs_prp` e `docs_turso` guardam cada markdown inteiro em `content`,
+e as buscas com `LIKE` devolvem o arquivo todo (ou os primeiros 150 caracteres). Aqui
+cada documento é dividido em trechos que respeitam os títulos do markdown:
+
+- cada seção (`#`...`######`, fora de blocos de código) vira um trecho, com o caminho de
+  títulos ("Guia > Instalação > Turso") e os offsets [start, end) no conteúdo original;
+- seções pequenas demais são unidas à seguinte; seções grandes são quebradas nos
+  parágrafos (e, em último caso, nos espaços) até `max_chars`;
+- cada trecho recebe um embedding empacotado em float32 little-endian (o mesmo formato
+  de `F32_BLOB` do libSQL), gerado localmente por hashing de palavras e bigramas.
+
+Os trechos ficam em `doc_chunks` (uma linha por trecho, chave `source_table` +
+`doc_path` + `chunk_index`), indexados pela tabela FTS5 `doc_chunks_fts`, mantida por
+triggers. A busca (`search_chunks`) pega candidatos pelo BM25 do FTS5, reordena pela
+similaridade de cosseno com o embedding da pergunta e devolve os k melhores trechos,
+no máximo `max_per_doc` por documento. Sem nenhum termo em comum, cai para uma
+varredura só por vetor, limitada a `scan_limit` trechos e a `min_similarity`.
+
+A divisão e os embeddings rodam no estágio de processamento do pipeline
+(`chunk_document` dentro das funções de extração); o writer só grava as instruções de
+`chunk_statements`.
+
+Uso:
+    python3 docs_chunks.py search "configurar token turso" --db libsql://... -k 5
+    python3 docs_chunks.py backfill --table docs_prp --db context-memory.db
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import unicodedata
+from array import array
+from dataclasses import asdict, dataclass
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from docs_bulk_loader import MAX_PARAMS, BulkLoader, connect_backend
+
+# Tamanho alvo dos trechos, em caracteres
+MAX_CHARS = 1500
+# Seções menores que isso são unidas à seguinte
+MIN_CHARS = 200
+# Dimensão do embedding local por hashing
+EMBEDDING_DIM = 256
+
+CHUNK_COLUMNS = [
+    "source_table", "doc_path", "doc_hash", "chunk_index", "heading",
+    "start_offset", "end_offset", "content", "token_count", "embedding", "embedding_model"
+]
+
+CHUNKS_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS doc_chunks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_table TEXT NOT NULL,
+    doc_path TEXT NOT NULL,
+    doc_hash TEXT,
+    chunk_index INTEGER NOT NULL,
+    heading TEXT,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    token_count INTEGER,
+    embedding BLOB,
+    embedding_model TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(source_table, doc_path, chunk_index)
+)""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS doc_chunks_fts USING fts5(
+    heading, content,
+    content='doc_chunks', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)""",
+    """CREATE TRIGGER IF NOT EXISTS doc_chunks_ai AFTER INSERT ON doc_chunks BEGIN
+    INSERT INTO doc_chunks_fts(rowid, heading, content) VALUES (new.id, new.heading, new.content);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS doc_chunks_ad AFTER DELETE ON doc_chunks BEGIN
+    INSERT INTO doc_chunks_fts(doc_chunks_fts, rowid, heading, content)
+    VALUES ('delete', old.id, old.heading, old.content);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS doc_chunks_au AFTER UPDATE ON doc_chunks BEGIN
+    INSERT INTO doc_chunks_fts(doc_chunks_fts, rowid, heading, content)
+    VALUES ('delete', old.id, old.heading, old.content);
+    INSERT INTO doc_chunks_fts(rowid, heading, content) VALUES (new.id, new.heading, new.content);
+END""",
+]
+
+_HEADING = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*$')
+_FENCE = re.compile(r'^[ \t]*(```|~~~)')
+_BLANK_LINES = re.compile(r'\n[ \t]*\n')
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+@dataclass
+class DocChunk:
+    """Trecho de um documento: caminho de títulos e offsets [start, end) no original"""
+    chunk_index: int
+    heading: str
+    start: int
+    end: int
+    text: str
+
+    @property
+    def token_count(self):
+        return len(self.text.split())
+
+
+@dataclass
+class ChunkHit:
+    """Trecho encontrado pela busca, com as notas lexical (BM25) e vetorial"""
+    source_table: str
+    doc_path: str
+    chunk_index: int
+    heading: str
+    start: int
+    end: int
+    content: str
+    score: float
+    lexical: float
+    similarity: float
+
+    def as_dict(self):
+        return asdict(self)
+
+
+# ---------------------------------------------------------------------------
+# Divisão em trechos
+# ---------------------------------------------------------------------------
+
+def _sections(content: str):
+    """Seções do markdown: (caminho de títulos, start, end), ignorando `#` em código"""
+    sections = []
+    stack: List[tuple] = []
+    current_path, current_start = "", 0
+    in_fence = False
+    offset = 0
+    for line in content.splitlines(keepends=True):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = _HEADING.match(line.rstrip('\r\n'))
+            if match:
+                if offset > current_start:
+                    sections.append((current_path, current_start, offset))
+                level = len(match.group(1))
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+                stack.append((level, match.group(2).strip()))
+                current_path = " > ".join(title for _, title in stack)
+                current_start = offset
+        offset += len(line)
+    if len(content) > current_start:
+        sections.append((current_path, current_start, len(content)))
+    return sections
+
+
+def _split_points(content: str, start: int, end: int, max_chars: int):
+    """Quebra [start, end) em pedaços de até max_chars, preferindo fim de parágrafo"""
+    pieces = []
+    while end - start > max_chars:
+        limit = start + max_chars
+        cut = -1
+        for match in _BLANK_LINES.finditer(content, start, limit):
+            cut = match.end()
+        if cut <= start:
+            cut = content.rfind(' ', start + 1, limit) + 1 or limit
+            if cut <= start:
+                cut = limit
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def _trim(content: str, start: int, end: int):
+    """Offsets sem os espaços das pontas"""
+    while start < end and content[start].isspace():
+        start += 1
+    while end > start and content[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def split_markdown(content: str, max_chars: int = MAX_CHARS, min_chars: int = MIN_CHARS) -> List[DocChunk]:
+    """Divide o markdown em trechos por seção; `content[chunk.start:chunk.end] == chunk.text`"""
+    merged = []
+    pending = None
+    for heading, start, end in _sections(content):
+        if pending is not None:
+            # Seção curta (ex.: título seguido direto de subtítulo) vai junto com a próxima;
+            # o trecho unido mantém o título da primeira seção
+            if end - pending[1] <= max_chars:
+                heading, start = pending[0], pending[1]
+            else:
+                merged.append(pending)
+        pending = (heading, start, end)
+        if end - start >= min_chars:
+            merged.append(pending)
+            pending = None
+    if pending is not None:
+        merged.append(pending)
+
+    chunks: List[DocChunk] = []
+    for heading, start, end in merged:
+        for piece_start, piece_end in _split_points(content, start, end, max_chars):
+            piece_start, piece_end = _trim(content, piece_start, piece_end)
+            if piece_end > piece_start:
+                chunks.append(DocChunk(len(chunks), heading, piece_start, piece_end,
+                                       content[piece_start:piece_end]))
+    return chunks
+
+
+# ---------------------------------------------------------------------------
+# Embeddings
+# ---------------------------------------------------------------------------
+
+def _tokens(text: str) -> List[str]:
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return [token for token in _WORD.findall(text) if len(token) > 1]
+
+
+class HashingEmbedder:
+    """
+    Embedding local por hashing (feature hashing) de palavras e bigramas.
+
+    Não depende de modelo nem de rede, é determinístico e roda nos processos do
+    pipeline. O nome vai para `embedding_model`: trechos gravados com outro modelo são
+    ignorados na reordenação vetorial.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hash-{dim}-v1"
+
+    def _bucket(self, feature: str):
+        digest = int.from_bytes(blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+        return digest % self.dim, 1.0 if (digest >> 63) & 1 else -1.0
+
+    def embed(self, text: str) -> List[float]:
+        tokens = _tokens(text)
+        counts: Dict[str, int] = {}
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+        vector = [0.0] * self.dim
+        for feature, count in counts.items():
+            index, sign = self._bucket(feature)
+            vector[index] += sign * (1.0 + math.log(count))
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    """float32 little-endian (layout de F32_BLOB do libSQL)"""
+    packed = array('f', vector)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_vector(data) -> array:
+    vector = array('f')
+    vector.frombytes(bytes(data))
+    if sys.byteorder != 'little':
+        vector.byteswap()
+    return vector
+
+
+def cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosseno entre vetores (os embeddings já saem normalizados)"""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+_DEFAULT_EMBEDDER = HashingEmbedder()
+
+
+def chunk_document(content: str, embedder=None, max_chars: int = MAX_CHARS) -> List[Dict]:
+    """
+    Trechos prontos para gravar, com o embedding já empacotado.
+
+    Roda dentro das funções de extração do pipeline: o resultado vai no `fields` do
+    documento e o writer só monta as instruções.
+    """
+    embedder = embedder or _DEFAULT_EMBEDDER
+    rows = []
+    for chunk in split_markdown(content, max_chars=max_chars):
+        rows.append({
+            "chunk_index": chunk.chunk_index,
+            "heading": chunk.heading,
+            "start_offset": chunk.start,
+            "end_offset": chunk.end,
+            "content": chunk.text,
+            "token_count": chunk.token_count,
+            # O título da seção entra no vetor: trechos curtos ganham contexto
+            "embedding": pack_vector(embedder.embed(f"{chunk.heading}\n{chunk.text}")),
+            "embedding_model": embedder.name
+        })
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Gravação
+# ---------------------------------------------------------------------------
+
+def delete_chunks_statement(source_table: str, doc_path: str):
+    return ("DELETE FROM doc_chunks WHERE source_table = ? AND doc_path = ?", [source_table, doc_path])
+
+
+def chunk_statements(source_table: str, doc_path: str, chunks: List[Dict], doc_hash: Optional[str] = None,
+                     max_params: int = MAX_PARAMS):
+    """
+    Instruções que substituem os trechos de um documento: DELETE + INSERTs multi-linha.
+
+    Servem para `BulkLoader.execute` (mesma transação do lote), para um cursor sqlite3
+    ou para o script SQL, sempre nessa ordem.
+    """
+    statements = [delete_chunks_statement(source_table, doc_path)]
+    per_statement = max(1, max_params // len(CHUNK_COLUMNS))
+    placeholders = "(" + ", ".join("?" for _ in CHUNK_COLUMNS) + ")"
+    for start in range(0, len(chunks), per_statement):
+        group = chunks[start:start + per_statement]
+        args = []
+        for chunk in group:
+            row = dict(chunk, source_table=source_table, doc_path=doc_path, doc_hash=doc_hash)
+            args.extend(row[column] for column in CHUNK_COLUMNS)
+        statements.append((
+            f"INSERT INTO doc_chunks ({', '.join(CHUNK_COLUMNS)}) VALUES " + ", ".join([placeholders] * len(group)),
+            args
+        ))
+    return statements
+
+
+# ---------------------------------------------------------------------------
+# Busca
+# ---------------------------------------------------------------------------
+
+def fts_query(text: str) -> Optional[str]:
+    """Pergunta livre → expressão MATCH do FTS5 (termos entre aspas, unidos por OR)"""
+    terms = list(dict.fromkeys(_tokens(text)))
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def _table_filter(source_tables):
+    if not source_tables:
+        return "", []
+    return f" AND c.source_table IN ({', '.join('?' for _ in source_tables)})", list(source_tables)
+
+
+def search_chunks(backend, query: str, k: int = 5, source_tables: Optional[Iterable[str]] = None,
+                  candidates: int = 50, vector_weight: float = 0.5, max_per_doc: int = 2,
+                  scan_limit: int = 5000, min_similarity: float = 0.3, embedder=None) -> List[ChunkHit]:
+    """
+    Top-k trechos para a pergunta.
+
+    1. FTS5: até `candidates` trechos com melhor BM25 (título da seção pesa 2x);
+    2. cosseno entre o embedding da pergunta e o de cada candidato;
+    3. nota = vector_weight * cosseno + (1 - vector_weight) * BM25 normalizado (1 = melhor);
+    4. no máximo `max_per_doc` trechos por documento, para variar as fontes.
+
+    Sem candidatos no FTS5, a varredura vetorial só aceita trechos com cosseno a partir
+    de `min_similarity` (prompt sem contexto é melhor que contexto sem relação).
+
+    `backend` é o de `connect_backend` (Turso via HTTP ou arquivo local).
+    """
+    embedder = embedder or _DEFAULT_EMBEDDER
+    source_tables = list(source_tables or [])
+    query_vector = embedder.embed(query)
+    where, args = _table_filter(source_tables)
+    columns = ("c.source_table, c.doc_path, c.chunk_index, c.heading, c.start_offset, c.end_offset, "
+               "c.content, c.embedding, c.embedding_model")
+
+    rows, vector_only = [], False
+    match = fts_query(query)
+    if match:
+        rows = backend.query(
+            f"SELECT {columns}, bm25(doc_chunks_fts, 2.0, 1.0) AS rank "
+            f"FROM doc_chunks_fts JOIN doc_chunks c ON c.id = doc_chunks_fts.rowid "
+            f"WHERE doc_chunks_fts MATCH ?{where} ORDER BY rank LIMIT ?",
+            [match] + args + [candidates]
+        )
+    if not rows:
+        # Nenhum termo em comum: só a similaridade vetorial decide
+        vector_only = True
+        rows = backend.query(
+            f"SELECT {columns}, 0 FROM doc_chunks c WHERE 1 = 1{where} LIMIT ?",
+            args + [scan_limit]
+        )
+
+    # BM25 do SQLite é negativo (menor = melhor): normaliza pelo melhor candidato
+    best_rank = min((float(row[9]) for row in rows), default=0.0)
+    hits = []
+    for row in rows:
+        source_table, doc_path, chunk_index, heading, start, end, content, embedding, model, rank = row
+        lexical = float(rank) / best_rank if best_rank < 0 else 0.0
+        similarity = (
+            cosine(query_vector, unpack_vector(embedding))
+            if embedding is not None and model == embedder.name else 0.0
+        )
+        if vector_only and similarity < min_similarity:
+            continue
+        hits.append(ChunkHit(
+            source_table=source_table,
+            doc_path=doc_path,
+            chunk_index=int(chunk_index),
+            heading=heading or "",
+            start=int(start),
+            end=int(end),
+            content=content,
+            score=round(vector_weight * similarity + (1 - vector_weight) * lexical, 4),
+            lexical=round(lexical, 4),
+            similarity=round(similarity, 4)
+        ))
+
+    hits.sort(key=lambda hit: hit.score, reverse=True)
+    selected, per_doc = [], {}
+    for hit in hits:
+        key = (hit.source_table, hit.doc_path)
+        if per_doc.get(key, 0) >= max_per_doc:
+            continue
+        per_doc[key] = per_doc.get(key, 0) + 1
+        selected.append(hit)
+        if len(selected) >= k:
+            break
+    return selected
+
+
+# ---------------------------------------------------------------------------
+# Linha de comando: busca e carga dos trechos de tabelas existentes
+# ---------------------------------------------------------------------------
+
+def backfill_table(backend, table, path_column="file_path", content_column="content",
+                   hash_column=None, batch_size=200, page_size=200):
+    """Gera os trechos de todos os documentos já gravados em `table` (paginando por id)"""
+    backend.run_transaction([(statement, []) for statement in CHUNKS_SCHEMA])
+    hash_select = hash_column or "NULL"
+    last_id, documents = 0, 0
+    with BulkLoader(backend, "doc_chunks", CHUNK_COLUMNS, batch_size=batch_size) as loader:
+        while True:
+            rows = backend.query(
+                f"SELECT id, {path_column}, {content_column}, {hash_select} FROM {table} "
+                f"WHERE id > ? ORDER BY id LIMIT ?",
+                [last_id, page_size]
+            )
+            if not rows:
+                break
+            for row_id, doc_path, content, doc_hash in rows:
+                last_id = int(row_id)
+                if not content:
+                    continue
+                with loader.unit():
+                    for sql, args in chunk_statements(table, doc_path, chunk_document(content), doc_hash):
+                        loader.execute(sql, args)
+                documents += 1
+    return {"table": table, "documents": documents, **loader.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trechos dos documentos: busca top-k e carga de tabelas existentes")
+    parser.add_argument("--db", default=os.getenv("TURSO_DATABASE_URL"),
+                        help="URL libsql:// do banco ou arquivo local (padrão: TURSO_DATABASE_URL)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="Busca os k trechos mais relevantes")
+    search.add_argument("query", nargs="+")
+    search.add_argument("-k", type=int, default=5, help="Trechos devolvidos (padrão: 5)")
+    search.add_argument("--table", action="append", help="Restringe a docs, docs_prp ou docs_turso (repetível)")
+    search.add_argument("--json", action="store_true", help="Saída em JSON")
+
+    backfill = commands.add_parser("backfill", help="Gera os trechos dos documentos já gravados em uma tabela")
+    backfill.add_argument("--table", required=True, help="docs, docs_prp ou docs_turso")
+    backfill.add_argument("--path-column", default="file_path")
+    backfill.add_argument("--hash-column", help="Coluna de hash do documento (ex.: file_hash em docs)")
+    backfill.add_argument("--batch-size", type=int, default=200, help="Instruções por transação (padrão: 200)")
+    args = parser.parse_args()
+
+    if not args.db:
+        print("❌ Informe o banco: TURSO_DATABASE_URL ou --db arquivo.db")
+        return 1
+    backend = connect_backend(args.db, os.getenv("TURSO_AUTH_TOKEN"))
+    try:
+        if args.command == "backfill":
+            print(json.dumps(backfill_table(backend, args.table, args.path_column, hash_column=args.hash_column,
+                                            batch_size=args.batch_size), indent=2))
+            return 0
+        hits = search_chunks(backend, " ".join(args.query), k=args.k, source_tables=args.table)
+    finally:
+        backend.close()
+
+    if args.json:
+        print(json.dumps([hit.as_dict() for hit in hits], indent=2, ensure_ascii=False))
+        return 0
+    if not hits:
+        print("❌ Nenhum trecho encontrado")
+    for i, hit in enumerate(hits, 1):
+        print(f"{i}. [{hit.source_table}] {hit.doc_path} § {hit.heading or '(início)'} "
+              f"[{hit.start}:{hit.end}] nota {hit.score}")
+        print(f"   {hit.content[:300]}")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Sincronização incremental de documentos com manifesto local
+
+O manifesto guarda, para cada arquivo já enviado ao banco, (caminho, mtime, tamanho, hash).
+A cada execução:
+
+- arquivos com mtime e tamanho iguais aos do manifesto são pulados só com `stat`,
+  sem abrir o arquivo;
+- os demais (candidatos) são lidos uma única vez: o mesmo conteúdo gera o hash e
+  alimenta a extração de metadados;
+- candidatos com hash igual ao do manifesto (ex.: `touch`) só atualizam o manifesto;
+- arquivos do manifesto que sumiram do disco viram remoções.
+
+Só inserções, atualizações e remoções são enviadas. O manifesto é gravado apenas depois
+que o envio dá certo (`commit`), então uma falha no meio faz a próxima execução repetir
+as mesmas mudanças. Quando o envio acontece fora do processo (ex.: um script SQL
+executado depois via MCP), `stage` grava o manifesto resultante ao lado do atual e
+`promote_staged` o assume só depois que o script for aplicado.
+
+Uso:
+    sync = IncrementalDocSync(docs_path, docs_path / ".sync-manifest.json")
+    changes = sync.plan()
+    ...  # enviar changes ao banco
+    sync.commit()
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class FileStat:
+    """Resultado do `stat` de um arquivo durante a varredura"""
+    path: Path
+    rel_path: str
+    mtime_ns: int
+    size: int
+
+
+@dataclass
+class DocChange:
+    """Mudança a enviar ao banco: created, updated ou deleted"""
+    change_type: str
+    rel_path: str
+    path: Path
+    old_hash: Optional[str] = None
+    new_hash: Optional[str] = None
+    content: Optional[str] = None
+    mtime_ns: int = 0
+    size: int = 0
+
+    @property
+    def last_modified(self):
+        return datetime.fromtimestamp(self.mtime_ns / 1e9).isoformat() if self.mtime_ns else None
+
+
+def content_hash(data: bytes) -> str:
+    """Hash do conteúdo (sha256, o mesmo de `DocSyncTurso.calculate_file_hash`)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def walk_files(root, suffix=".md", skip_names=(), errors=None) -> Iterator[FileStat]:
+    """Percorre a árvore com `os.scandir`, só com `stat` (sem abrir arquivos)"""
+    root = Path(root)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.name.endswith(suffix) and entry.name not in skip_names:
+                        st = entry.stat()
+                        path = Path(entry.path)
+                        yield FileStat(
+                            path=path,
+                            rel_path=path.relative_to(root).as_posix(),
+                            mtime_ns=st.st_mtime_ns,
+                            size=st.st_size
+                        )
+        except OSError as e:
+            if errors is None:
+                raise
+            errors.append({"file": str(directory), "error": str(e)})
+
+
+class DocsManifest:
+    """Manifesto JSON {caminho relativo: {mtime_ns, size, hash}}"""
+
+    def __init__(self, manifest_path):
+        self.manifest_path = Path(manifest_path)
+        self.entries: Dict[str, Dict] = {}
+        self.loaded = False
+
+    def load(self):
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("files", {})
+                self.loaded = True
+        return self
+
+    def save(self):
+        # Grava em arquivo temporário e troca: um manifesto pela metade seria pior que nenhum
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "saved_at": datetime.now().isoformat(),
+                "files": self.entries
+            }, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def promote_staged(staged_path, manifest_path) -> bool:
+    """Assume o manifesto gravado por `stage` (chamar depois de aplicar o envio)"""
+    staged_path = Path(staged_path)
+    if not staged_path.exists():
+        return False
+    os.replace(staged_path, manifest_path)
+    return True
+
+
+class IncrementalDocSync:
+    """Compara a árvore de documentos com o manifesto e lista só o que mudou"""
+
+    def __init__(self, root, manifest_path, suffix=".md", full=False, skip_names=()):
+        self.root = Path(root)
+        self.manifest = DocsManifest(manifest_path)
+        self.suffix = suffix
+        self.full = full
+        self.skip_names = set(skip_names)
+        self._pending: Dict[str, Optional[Dict]] = {}
+        self.stats = {
+            "files_scanned": 0,
+            "stat_skipped": 0,
+            "rehashed": 0,
+            "touched_only": 0,
+            "created": 0,
+            "updated": 0,
+            "deleted": 0,
+            "files_shipped": 0,
+            "errors": []
+        }
+
+    @property
+    def has_baseline(self):
+        """True quando existe manifesto válido (o banco já recebeu uma carga completa)"""
+        return self.manifest.loaded and not self.full
+
+    def walk(self) -> Iterator[FileStat]:
+        return walk_files(self.root, self.suffix, self.skip_names, self.stats["errors"])
+
+    def is_unchanged(self, file_stat: FileStat) -> bool:
+        entry = self.manifest.entries.get(file_stat.rel_path)
+        return (
+            entry is not None
+            and entry.get("mtime_ns") == file_stat.mtime_ns
+            and entry.get("size") == file_stat.size
+        )
+
+    def resolve(self, file_stat: FileStat, content: str, new_hash: str) -> Optional[DocChange]:
+        """
+        Decide o destino de um candidato já lido e com hash calculado.
+
+        Retorna a mudança a enviar, ou None quando o conteúdo é o mesmo do manifesto.
+        """
+        self.stats["rehashed"] += 1
+        entry = self.manifest.entries.get(file_stat.rel_path)
+        old_hash = entry.get("hash") if entry else None
+        self._pending[file_stat.rel_path] = {
+            "mtime_ns": file_stat.mtime_ns,
+            "size": file_stat.size,
+            "hash": new_hash
+        }
+        if old_hash == new_hash and not self.full:
+            self.stats["touched_only"] += 1
+            return None
+
+        change_type = "updated" if old_hash else "created"
+        self.stats[change_type] += 1
+        return DocChange(
+            change_type=change_type,
+            rel_path=file_stat.rel_path,
+            path=file_stat.path,
+            old_hash=old_hash,
+            new_hash=new_hash,
+            content=content,
+            mtime_ns=file_stat.mtime_ns,
+            size=file_stat.size
+        )
+
+    def deletions(self, seen) -> List[DocChange]:
+        """Arquivos do manifesto que não apareceram na varredura"""
+        changes = []
+        for rel_path in sorted(set(self.manifest.entries) - set(seen)):
+            self._pending[rel_path] = None
+            self.stats["deleted"] += 1
+            changes.append(DocChange(
+                change_type="deleted",
+                rel_path=rel_path,
+                path=self.root / rel_path,
+                old_hash=self.manifest.entries[rel_path].get("hash")
+            ))
+        # Remoções são a última etapa do plano: o total enviado fica completo aqui
+        self.stats["files_shipped"] = self.stats["created"] + self.stats["updated"] + self.stats["deleted"]
+        return changes
+
+    def candidates(self):
+        """Varre a árvore: devolve (candidatos a reler, caminhos vistos)"""
+        if not self.manifest.loaded:
+            self.manifest.load()
+        candidates, seen = [], []
+        for file_stat in self.walk():
+            self.stats["files_scanned"] += 1
+            seen.append(file_stat.rel_path)
+            if not self.full and self.is_unchanged(file_stat):
+                self.stats["stat_skipped"] += 1
+            else:
+                candidates.append(file_stat)
+        return candidates, seen
+
+    def plan(self) -> List[DocChange]:
+        """Lista as inserções, atualizações e remoções desde o último envio"""
+        candidates, seen = self.candidates()
+        changes = []
+        for file_stat in candidates:
+            try:
+                with open(file_stat.path, 'rb') as f:
+                    data = f.read()
+                change = self.resolve(file_stat, data.decode('utf-8'), content_hash(data))
+            except (OSError, UnicodeDecodeError) as e:
+                # Sem entrada no manifesto: a próxima execução tenta de novo
+                self.stats["errors"].append({"file": str(file_stat.path), "error": str(e)})
+                continue
+            if change:
+                changes.append(change)
+        changes.extend(self.deletions(seen))
+        return changes
+
+    def _apply_pending(self, entries: Dict[str, Dict]):
+        for rel_path, entry in self._pending.items():
+            if entry is None:
+                entries.pop(rel_path, None)
+            else:
+                entries[rel_path] = entry
+        self._pending.clear()
+
+    def commit(self):
+        """Aplica as entradas pendentes e grava o manifesto (chamar após o envio)"""
+        self._apply_pending(self.manifest.entries)
+        self.manifest.save()
+
+    def stage(self, staged_path):
+        """
+        Grava em `staged_path` o manifesto com as entradas pendentes, sem mudar o atual.
+
+        Para envios aplicados depois, fora do processo: `promote_staged` troca o manifesto
+        por este quando o envio der certo. Uma nova execução antes disso replaneja as
+        mesmas mudanças e sobrescreve o arquivo.
+        """
+        staged = DocsManifest(staged_path)
+        staged.entries = dict(self.manifest.entries)
+        self._apply_pending(staged.entries)
+        staged.save()
+        return staged.manifest_path
+
+    def report(self):
+        s = self.stats
+        return (
+            f"{s['files_scanned']} arquivos varridos, {s['stat_skipped']} pulados por stat, "
+            f"{s['rehashed']} relidos, {s['files_shipped']} enviados "
+            f"({s['created']} novos, {s['updated']} alterados, {s['deleted']} removidos)"
+        )
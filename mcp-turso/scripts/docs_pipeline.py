@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Pipeline paralelo de ingestão de documentos
+
+Três estágios ligados por filas limitadas (produtor/consumidor com contrapressão):
+
+1. walker: uma thread percorre a árvore (ou a lista de candidatos do manifesto) só com
+   `stat` e entrega os arquivos em lotes pequenos;
+2. processamento: um pool de processos lê cada arquivo uma vez, calcula o hash e roda a
+   função de extração (título, tags, resumo...), trabalho de CPU que threads não
+   paralelizariam por causa do GIL;
+3. writer: uma única thread recebe os documentos prontos e chama `write_batch` a cada
+   N documentos, então o banco vê uma transação por lote e nunca escritas concorrentes.
+
+As filas têm tamanho fixo: se o writer atrasa, o processamento para de receber
+arquivos, e o walker espera. A memória fica limitada mesmo com dezenas de milhares de
+arquivos. Com `workers=1` tudo roda no processo atual (útil para árvores pequenas).
+
+Uso:
+    pipeline = IngestionPipeline(extract=extract_fields, batch_size=200)
+    report = pipeline.run(walk_files(docs_path), write_batch)
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from docs_manifest import FileStat, content_hash
+
+_DONE = object()
+
+
+@dataclass
+class IngestedDoc:
+    """Documento lido, com hash e campos extraídos (ou o erro da leitura)"""
+    file_stat: FileStat
+    hash: Optional[str] = None
+    content: Optional[str] = None
+    fields: Dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class StageStats:
+    """Contadores de um estágio: itens, tempo ocupado e janela de atividade"""
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    def mark(self, now):
+        if self.started is None:
+            self.started = now
+        self.finished = now
+
+    def as_dict(self):
+        wall = (self.finished - self.started) if self.started is not None and self.finished is not None else 0.0
+        return {
+            "items": self.items,
+            "busy_s": round(self.busy_seconds, 4),
+            "wall_s": round(wall, 4),
+            "files_per_s": round(self.items / wall, 1) if wall > 0 else None,
+            "files_per_busy_s": round(self.items / self.busy_seconds, 1) if self.busy_seconds > 0 else None
+        }
+
+
+def process_chunk(chunk: List[FileStat], extract: Optional[Callable]) -> tuple:
+    """Estágio de processamento (roda nos processos do pool)"""
+    started = time.perf_counter()
+    results = []
+    for file_stat in chunk:
+        try:
+            with open(file_stat.path, 'rb') as f:
+                data = f.read()
+            content = data.decode('utf-8')
+            fields = extract(str(file_stat.path), content) if extract else {}
+            results.append(IngestedDoc(file_stat, content_hash(data), content, fields))
+        except Exception as e:
+            results.append(IngestedDoc(file_stat, error=str(e)))
+    return results, time.perf_counter() - started
+
+
+class PipelineError(Exception):
+    """Falha em um dos estágios do pipeline"""
+
+
+class IngestionPipeline:
+    """walker → pool de processos (hash + extração) → writer em lotes"""
+
+    def __init__(self, extract=None, workers=None, batch_size=200, chunk_size=32, queue_size=2000):
+        # `extract(path, content) -> dict` precisa ser uma função de módulo (vai para o pool)
+        self.extract = extract
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.batch_size = max(1, batch_size)
+        self.chunk_size = max(1, chunk_size)
+        self.queue_size = max(1, queue_size)
+        self.errors: List[Dict] = []
+        self.stages = {name: StageStats(name) for name in ("walk", "process", "write")}
+
+    def _walker(self, source: Iterable[FileStat], out: "queue.Queue", stop: threading.Event, failure: list):
+        stage = self.stages["walk"]
+        stage.started = time.perf_counter()
+        chunk: List[FileStat] = []
+        try:
+            iterator = iter(source)
+            while not stop.is_set():
+                started = time.perf_counter()
+                file_stat = next(iterator, None)
+                now = time.perf_counter()
+                stage.busy_seconds += now - started
+                if file_stat is None:
+                    break
+                stage.items += 1
+                stage.mark(now)
+                chunk.append(file_stat)
+                if len(chunk) >= self.chunk_size:
+                    out.put(chunk)
+                    chunk = []
+            if chunk:
+                out.put(chunk)
+        except Exception as e:
+            failure.append(e)
+        finally:
+            out.put(_DONE)
+
+    def _writer(self, inbox: "queue.Queue", write_batch: Callable, stop: threading.Event, failure: list):
+        stage = self.stages["write"]
+        batch: List[IngestedDoc] = []
+
+        def flush():
+            started = time.perf_counter()
+            write_batch(batch)
+            now = time.perf_counter()
+            stage.busy_seconds += now - started
+            stage.items += len(batch)
+            stage.mark(now)
+            batch.clear()
+
+        try:
+            while True:
+                docs = inbox.get()
+                if docs is _DONE:
+                    break
+                if stage.started is None:
+                    stage.started = time.perf_counter()
+                batch.extend(docs)
+                if len(batch) >= self.batch_size:
+                    flush()
+            if batch:
+                flush()
+        except Exception as e:
+            failure.append(e)
+            stop.set()
+            # Continua drenando para o processamento não travar na fila cheia
+            while inbox.get() is not _DONE:
+                pass
+
+    def _collect(self, results, elapsed, to_writer: "queue.Queue"):
+        stage = self.stages["process"]
+        stage.items += len(results)
+        stage.busy_seconds += elapsed
+        stage.mark(time.perf_counter())
+        ok = []
+        for doc in results:
+            if doc.error:
+                self.errors.append({"file": str(doc.file_stat.path), "error": doc.error})
+            else:
+                ok.append(doc)
+        if ok:
+            to_writer.put(ok)
+
+    def run(self, source: Iterable[FileStat], write_batch: Callable[[List[IngestedDoc]], None]) -> Dict:
+        """
+        Processa todos os arquivos de `source` e entrega os documentos a `write_batch`.
+
+        `write_batch` roda sempre na mesma thread, com até `batch_size` documentos.
+        Exceções de qualquer estágio interrompem o pipeline e são relançadas.
+        """
+        started = time.perf_counter()
+        chunk_slots = max(1, self.queue_size // self.chunk_size)
+        to_process: "queue.Queue" = queue.Queue(maxsize=chunk_slots)
+        to_writer: "queue.Queue" = queue.Queue(maxsize=chunk_slots)
+        stop = threading.Event()
+        failure: list = []
+
+        walker = threading.Thread(target=self._walker, args=(source, to_process, stop, failure),
+                                  name="docs-walker", daemon=True)
+        writer = threading.Thread(target=self._writer, args=(to_writer, write_batch, stop, failure),
+                                  name="docs-writer", daemon=True)
+        walker.start()
+        writer.start()
+
+        try:
+            self.stages["process"].started = time.perf_counter()
+            if self.workers == 1:
+                while not stop.is_set():
+                    chunk = to_process.get()
+                    if chunk is _DONE:
+                        break
+                    self._collect(*process_chunk(chunk, self.extract), to_writer)
+            else:
+                # Janela de lotes em voo: o pool nunca acumula a árvore inteira
+                max_in_flight = self.workers * 2
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    in_flight = set()
+                    walking = True
+                    while (walking or in_flight) and not stop.is_set():
+                        while walking and len(in_flight) < max_in_flight:
+                            try:
+                                chunk = to_process.get(timeout=0.05 if in_flight else None)
+                            except queue.Empty:
+                                break
+                            if chunk is _DONE:
+                                walking = False
+                                break
+                            in_flight.add(pool.submit(process_chunk, chunk, self.extract))
+                        if in_flight:
+                            done, in_flight = wait(in_flight, timeout=0.05, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                self._collect(*future.result(), to_writer)
+                    for future in in_flight:
+                        future.cancel()
+        except Exception as e:
+            failure.append(e)
+            stop.set()
+        finally:
+            # Libera o walker se ele estiver bloqueado na fila cheia
+            while walker.is_alive():
+                try:
+                    to_process.get_nowait()
+                except queue.Empty:
+                    walker.join(0.01)
+            to_writer.put(_DONE)
+            writer.join()
+
+        if failure:
+            raise PipelineError(f"Falha no pipeline de ingestão: {failure[0]}") from failure[0]
+
+        total = time.perf_counter() - started
+        written = self.stages["write"].items
+        return {
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "files": self.stages["walk"].items,
+            "written": written,
+            "errors": len(self.errors),
+            "wall_s": round(total, 4),
+            "files_per_s": round(written / total, 1) if total > 0 else None,
+            "stages": {name: stage.as_dict() for name, stage in self.stages.items()}
+        }
@@ -10,16 +10,101 @@ import hashlib
 from pathlib import Path
 from datetime import datetime
 import subprocess
+import sys
+
+from docs_manifest import IncrementalDocSync, promote_staged
+from docs_pipeline import IngestionPipeline
+from docs_bulk_loader import BulkLoader, connect_backend
+from docs_chunks import CHUNKS_SCHEMA, chunk_document, chunk_statements, delete_chunks_statement
+
+DOC_COLUMNS = [
+    "file_path", "title", "content", "summary", "cluster", "category",
+    "file_hash", "size", "last_modified", "metadata"
+]
+
+DOCS_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_path TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    summary TEXT,
+    cluster TEXT NOT NULL,
+    category TEXT,
+    file_hash TEXT NOT NULL,
+    size INTEGER,
+    last_modified DATETIME,
+    metadata TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)""",
+    "CREATE INDEX IF NOT EXISTS idx_docs_cluster ON docs(cluster)",
+    "CREATE INDEX IF NOT EXISTS idx_docs_category ON docs(category)",
+    "CREATE INDEX IF NOT EXISTS idx_docs_file_hash ON docs(file_hash)",
+    """CREATE TABLE IF NOT EXISTS docs_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id INTEGER REFERENCES docs(id),
+    change_type TEXT NOT NULL,
+    old_hash TEXT,
+    new_hash TEXT,
+    changed_by TEXT,
+    change_summary TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)""",
+] + CHUNKS_SCHEMA
+
+def sql_literal(value):
+    """Literal SQL com aspas simples escapadas (NULL para None)"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "X'" + bytes(value).hex() + "'"
+    return "'" + str(value).replace("'", "''") + "'"
+
+def render_sql(sql, args):
+    """Instrução parametrizada com os `?` trocados pelos literais (para o script SQL)"""
+    parts = sql.split('?')
+    return parts[0] + ''.join(sql_literal(arg) + part for arg, part in zip(args, parts[1:]))
+
+def extract_content_fields(path, content):
+    """Título, tamanho, resumo e trechos do documento (roda nos processos do pipeline)"""
+    # Extrair título (primeira linha # )
+    title = "Sem título"
+    for line in content.split('\n'):
+        if line.startswith('# '):
+            title = line.replace('# ', '').strip()
+            break
+    
+    # Calcular tamanho e resumo
+    words = content.split()
+    summary = ' '.join(words[:50]) + "..." if len(words) > 50 else content
+    return {
+        "title": title,
+        "size": len(content),
+        "summary": summary,
+        # Trechos por seção, já com embedding, para doc_chunks
+        "chunks": chunk_document(content)
+    }
 
 class DocSyncTurso:
-    def __init__(self, docs_path):
+    def __init__(self, docs_path, full=False):
         self.docs_path = Path(docs_path)
+        # Manifesto (caminho, mtime, tamanho, hash) do que já foi enviado ao Turso
+        self.manifest_path = self.docs_path / ".sync-manifest.json"
+        # Manifesto que passa a valer quando sync-to-turso.sql for aplicado
+        self.staged_manifest_path = self.docs_path / ".sync-manifest.staged.json"
+        self.sync = IncrementalDocSync(self.docs_path, self.manifest_path, full=full)
         self.metadata = {
             "synced_at": datetime.now().isoformat(),
             "total_docs": 0,
             "clusters_synced": 0,
             "docs_updated": 0,
             "new_docs": 0,
+            "docs_deleted": 0,
+            "files_scanned": 0,
+            "files_shipped": 0,
             "errors": []
         }
 
@@ -31,26 +116,13 @@ class DocSyncTurso:
     def extract_doc_metadata(self, filepath):
         """Extrai metadados do documento"""
         with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Extrair título (primeira linha # )
-        lines = content.split('\n')
-        title = "Sem título"
-        for line in lines:
-            if line.startswith('# '):
-                title = line.replace('# ', '').strip()
-                break
-        
-        # Calcular tamanho e resumo
-        size = len(content)
-        summary = ' '.join(content.split()[:50]) + "..." if len(content.split()) > 50 else content
-        
-        return {
-            "title": title,
-            "size": size,
-            "summary": summary,
-            "content": content
-        }
+            return self.extract_content_metadata(f.read())
+
+    def extract_content_metadata(self, content):
+        """Extrai metadados de um conteúdo já lido"""
+        metadata = extract_content_fields(None, content)
+        metadata["content"] = content
+        return metadata
 
     def get_cluster_info(self, filepath):
         """Determina o cluster e categoria do arquivo"""
@@ -112,29 +184,14 @@ class DocSyncTurso:
     def sync_document(self, filepath):
         """Sincroniza um documento individual"""
         try:
-            # Extrair informações
-            cluster, category = self.get_cluster_info(filepath)
-            metadata = self.extract_doc_metadata(filepath)
-            file_hash = self.calculate_file_hash(filepath)
-            
-            doc_info = {
-                "file_path": str(filepath.relative_to(self.docs_path)),
-                "title": metadata["title"],
-                "content": metadata["content"],
-                "summary": metadata["summary"],
-                "cluster": cluster,
-                "category": category,
-                "file_hash": file_hash,
-                "size": metadata["size"],
-                "last_modified": datetime.fromtimestamp(filepath.stat().st_mtime).isoformat(),
-                "metadata": json.dumps({
-                    "synced_at": datetime.now().isoformat(),
-                    "sync_version": "1.0"
-                })
-            }
-            
-            return doc_info
-            
+            with open(filepath, 'rb') as f:
+                data = f.read()
+            return self.build_doc_info(
+                filepath,
+                data.decode('utf-8'),
+                hashlib.sha256(data).hexdigest(),
+                filepath.stat().st_mtime
+            )
         except Exception as e:
             self.metadata["errors"].append({
                 "file": str(filepath),
@@ -142,112 +199,188 @@ class DocSyncTurso:
             })
             return None
 
-    def sync_all_documents(self):
-        """Sincroniza todos os documentos"""
+    def build_doc_info(self, filepath, content, file_hash, mtime, fields=None):
+        """Monta o registro da tabela docs a partir do conteúdo já lido"""
+        cluster, category = self.get_cluster_info(filepath)
+        metadata = fields or extract_content_fields(filepath, content)
+        return {
+            "file_path": filepath.relative_to(self.docs_path).as_posix(),
+            "title": metadata["title"],
+            "content": content,
+            "summary": metadata["summary"],
+            "cluster": cluster,
+            "category": category,
+            "file_hash": file_hash,
+            "size": metadata["size"],
+            "last_modified": datetime.fromtimestamp(mtime).isoformat(),
+            "metadata": json.dumps({
+                "synced_at": datetime.now().isoformat(),
+                "sync_version": "1.1"
+            })
+        }
+
+    def sync_all_documents(self, workers=None, batch_size=200, db=None):
+        """
+        Sincroniza os documentos alterados desde o último envio.
+
+        Com `db` (URL libsql:// ou arquivo local) as mudanças vão direto para o banco e o
+        manifesto é gravado em seguida; sem ele, viram o script sync-to-turso.sql para
+        execução via MCP, e o manifesto só muda com `commit_manifest` depois de aplicado.
+        """
         print("🔄 Iniciando sincronização com Turso...\n")
         
-        # Coletar todos os arquivos .md
-        all_docs = list(self.docs_path.rglob("*.md"))
-        self.metadata["total_docs"] = len(all_docs)
+        # Só stat para os arquivos do manifesto; os candidatos seguem para o pipeline
+        candidates, seen = self.sync.candidates()
+        print(f"📄 {len(seen)} documentos varridos, {len(candidates)} candidatos a reler")
         
-        print(f"📄 Encontrados {len(all_docs)} documentos para sincronizar")
-        
-        # Preparar dados para sincronização
         sync_data = []
         clusters = set()
         
-        for doc_path in all_docs:
-            print(f"  📝 Processando: {doc_path.relative_to(self.docs_path)}")
-            
-            doc_info = self.sync_document(doc_path)
-            if doc_info:
-                sync_data.append(doc_info)
+        if db:
+            # Envio direto em lotes parametrizados, sem script SQL intermediário
+            backend = connect_backend(db, os.getenv("TURSO_AUTH_TOKEN"))
+            backend.run_transaction([(statement, []) for statement in DOCS_SCHEMA])
+            loader = BulkLoader(
+                backend, "docs", DOC_COLUMNS, batch_size=batch_size,
+                conflict_column="file_path", conflict_extra="updated_at = CURRENT_TIMESTAMP"
+            )
+            ship_docs = lambda batch: self.load_docs(loader, batch)
+            ship_deletes = lambda deleted: self.load_deletes(loader, deleted)
+            target = db
+        else:
+            sql_file = self.docs_path / "sync-to-turso.sql"
+            f = open(sql_file, 'w', encoding='utf-8')
+            self.write_sql_header(f)
+            ship_docs = lambda batch: self.write_docs_sql(f, batch)
+            ship_deletes = lambda deleted: self.write_deletes_sql(f, deleted)
+            target = sql_file
+        
+        def write_batch(docs):
+            # Writer único do pipeline: decide a mudança e envia um lote por transação
+            batch = []
+            for doc in docs:
+                change = self.sync.resolve(doc.file_stat, doc.content, doc.hash)
+                if change is None:
+                    continue
+                doc_info = self.build_doc_info(
+                    change.path, change.content, change.new_hash, change.mtime_ns / 1e9, doc.fields
+                )
+                doc_info["change_type"] = change.change_type
+                doc_info["old_hash"] = change.old_hash
+                doc_info["chunks"] = doc.fields["chunks"]
+                batch.append(doc_info)
                 clusters.add(doc_info["cluster"])
+                print(f"  📝 {change.change_type}: {change.rel_path}")
+            ship_docs(batch)
+            # Só o necessário para o .sync-data.json: o conteúdo já foi enviado
+            sync_data.extend({k: v for k, v in info.items() if k not in ("content", "chunks")} for info in batch)
+        
+        try:
+            pipeline = IngestionPipeline(
+                extract=extract_content_fields,
+                workers=workers if len(candidates) > batch_size else 1,
+                batch_size=batch_size
+            )
+            self.pipeline_report = pipeline.run(candidates, write_batch)
+            self.sync.stats["errors"].extend(pipeline.errors)
+            
+            deleted = self.sync.deletions(seen)
+            for change in deleted:
+                print(f"  📝 deleted: {change.rel_path}")
+            ship_deletes(deleted)
+            if db:
+                loader.close()
+                self.metadata["load"] = loader.stats()
+            elif not sync_data and not deleted:
+                f.write("\n-- Nenhuma mudança desde a última sincronização\n")
+        finally:
+            if db:
+                backend.close()
+            else:
+                f.close()
+        
+        print(f"📝 Mudanças enviadas para: {target}")
         
+        stats = self.sync.stats
+        self.metadata["total_docs"] = stats["files_scanned"]
+        self.metadata["files_scanned"] = stats["files_scanned"]
+        self.metadata["files_shipped"] = stats["files_shipped"]
+        self.metadata["new_docs"] = stats["created"]
+        self.metadata["docs_updated"] = stats["updated"]
+        self.metadata["docs_deleted"] = stats["deleted"]
+        self.metadata["errors"].extend(stats["errors"])
         self.metadata["clusters_synced"] = len(clusters)
+        self.metadata["pipeline"] = self.pipeline_report
         
-        # Salvar dados para script SQL
-        self.save_sync_data(sync_data)
+        # Salvar dados da sincronização
+        self.save_sync_data(sync_data, deleted)
+        if db:
+            # Lotes confirmados no banco: o manifesto passa a refleti-los
+            self.sync.commit()
+        else:
+            # Nada foi aplicado ainda: o manifesto novo espera a execução do script
+            staged = self.sync.stage(self.staged_manifest_path)
+            print(f"🗂️  Manifesto pendente em: {staged} (use --commit-manifest após aplicar o script)")
         
         print(f"\n✅ Sincronização preparada!")
-        print(f"  - Documentos processados: {len(sync_data)}")
+        print(f"  - {self.sync.report()}")
+        print(f"  - Pipeline: {self.pipeline_report['files_per_s']} arquivos/s com {self.pipeline_report['workers']} processos")
         print(f"  - Clusters identificados: {len(clusters)}")
         print(f"  - Erros encontrados: {len(self.metadata['errors'])}")
 
-    def save_sync_data(self, sync_data):
+    def commit_manifest(self):
+        """Assume o manifesto pendente depois que sync-to-turso.sql foi aplicado no Turso"""
+        if promote_staged(self.staged_manifest_path, self.manifest_path):
+            print(f"✅ Manifesto atualizado: {self.manifest_path}")
+            return True
+        print(f"⚠️  Nenhum manifesto pendente em {self.staged_manifest_path}")
+        return False
+
+    def save_sync_data(self, sync_data, deleted=()):
         """Salva dados de sincronização"""
         # Salvar JSON com dados
         sync_file = self.docs_path / ".sync-data.json"
         with open(sync_file, 'w', encoding='utf-8') as f:
             json.dump({
                 "metadata": self.metadata,
-                "documents": sync_data
+                "documents": sync_data,
+                "deleted": [change.rel_path for change in deleted]
             }, f, indent=2)
         
         print(f"\n💾 Dados de sincronização salvos em: {sync_file}")
-        
-        # Criar script SQL
-        sql_file = self.docs_path / "sync-to-turso.sql"
-        with open(sql_file, 'w', encoding='utf-8') as f:
-            f.write("-- Script de sincronização de documentos para Turso\n")
-            f.write(f"-- Gerado em: {datetime.now().isoformat()}\n\n")
-            
-            # Criar tabelas se não existirem
-            f.write("""
--- Criar tabela de documentos se não existir
-CREATE TABLE IF NOT EXISTS docs (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    file_path TEXT UNIQUE NOT NULL,
-    title TEXT NOT NULL,
-    content TEXT NOT NULL,
-    summary TEXT,
-    cluster TEXT NOT NULL,
-    category TEXT,
-    file_hash TEXT NOT NULL,
-    size INTEGER,
-    last_modified DATETIME,
-    metadata TEXT,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-);
 
--- Criar índices
-CREATE INDEX IF NOT EXISTS idx_docs_cluster ON docs(cluster);
-CREATE INDEX IF NOT EXISTS idx_docs_category ON docs(category);
-CREATE INDEX IF NOT EXISTS idx_docs_file_hash ON docs(file_hash);
-
--- Criar tabela de mudanças
-CREATE TABLE IF NOT EXISTS docs_changes (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    doc_id INTEGER REFERENCES docs(id),
-    change_type TEXT NOT NULL,
-    old_hash TEXT,
-    new_hash TEXT,
-    changed_by TEXT,
-    change_summary TEXT,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-);
+    def write_sql_header(self, f):
+        """Cabeçalho do script SQL: criação das tabelas e índices"""
+        f.write("-- Script de sincronização de documentos para Turso\n")
+        f.write(f"-- Gerado em: {datetime.now().isoformat()}\n\n")
+        
+        # Criar tabelas e índices se não existirem
+        f.write("\n-- Criar tabelas e índices se não existirem\n")
+        for statement in DOCS_SCHEMA:
+            f.write(statement + ";\n\n")
+        f.write("-- Inserir/Atualizar documentos alterados\n")
 
--- Inserir/Atualizar documentos
-""")
-            
-            # Gerar INSERTs
-            for doc in sync_data:
-                f.write(f"""
+    def write_docs_sql(self, f, docs):
+        """Upserts de um lote de documentos, em uma transação"""
+        if not docs:
+            return
+        f.write("\nBEGIN TRANSACTION;\n")
+        for doc in docs:
+            f.write(f"""
 INSERT INTO docs (
     file_path, title, content, summary, cluster, category,
     file_hash, size, last_modified, metadata
 ) VALUES (
-    '{doc['file_path']}',
-    '{doc['title'].replace("'", "''")}',
-    '{doc['content'].replace("'", "''")}',
-    '{doc['summary'].replace("'", "''")}',
-    '{doc['cluster']}',
-    '{doc['category']}',
-    '{doc['file_hash']}',
+    {sql_literal(doc['file_path'])},
+    {sql_literal(doc['title'])},
+    {sql_literal(doc['content'])},
+    {sql_literal(doc['summary'])},
+    {sql_literal(doc['cluster'])},
+    {sql_literal(doc['category'])},
+    {sql_literal(doc['file_hash'])},
     {doc['size']},
-    '{doc['last_modified']}',
-    '{doc['metadata']}'
+    {sql_literal(doc['last_modified'])},
+    {sql_literal(doc['metadata'])}
 )
 ON CONFLICT(file_path) DO UPDATE SET
     title = excluded.title,
@@ -260,9 +393,68 @@ ON CONFLICT(file_path) DO UPDATE SET
     last_modified = excluded.last_modified,
     metadata = excluded.metadata,
     updated_at = CURRENT_TIMESTAMP;
+{self.change_log_sql(doc['file_path'], doc['change_type'], doc['old_hash'], doc['file_hash'])}
 """)
-        
-        print(f"📝 Script SQL gerado em: {sql_file}")
+            for sql, args in chunk_statements("docs", doc['file_path'], doc['chunks'], doc['file_hash']):
+                f.write(render_sql(sql, args) + ";\n")
+        f.write("\nCOMMIT;\n")
+
+    def load_docs(self, loader, docs):
+        """Upserts parametrizados de um lote de documentos, com o registro em docs_changes"""
+        _, log_change = self.create_turso_queries()[2]
+        for doc in docs:
+            with loader.unit():
+                loader.insert(doc)
+                # Instruções avulsas rodam depois das linhas do lote: o doc_id já existe
+                loader.execute(log_change, [
+                    doc["file_path"], doc["change_type"], doc["old_hash"], doc["file_hash"],
+                    f"{doc['change_type']}: {doc['file_path']}"
+                ])
+                # Trechos do documento substituídos na mesma transação
+                for sql, args in chunk_statements("docs", doc["file_path"], doc["chunks"], doc["file_hash"]):
+                    loader.execute(sql, args)
+
+    def delete_statements(self, change):
+        """
+        Remoção de um documento com o registro em docs_changes.
+
+        O histórico fica sem doc_id (a linha de docs deixa de existir; o caminho segue no
+        change_summary), o que mantém a referência válida mesmo com foreign_keys=ON.
+        """
+        summary = f"deleted: {change.rel_path}"
+        return [
+            ("""UPDATE docs_changes SET doc_id = NULL
+    WHERE doc_id = (SELECT id FROM docs WHERE file_path = ?)""", [change.rel_path]),
+            ("""INSERT INTO docs_changes (
+    doc_id, change_type, old_hash, new_hash, changed_by, change_summary
+) VALUES (NULL, 'deleted', ?, NULL, 'sync-script', ?)""", [change.old_hash, summary]),
+            ("DELETE FROM docs WHERE file_path = ?", [change.rel_path]),
+            delete_chunks_statement("docs", change.rel_path),
+        ]
+
+    def load_deletes(self, loader, deleted):
+        """Remoções parametrizadas: registra a mudança e apaga o documento"""
+        for change in deleted:
+            with loader.unit():
+                for sql, args in self.delete_statements(change):
+                    loader.execute(sql, args)
+
+    def write_deletes_sql(self, f, deleted):
+        """Remoções: registra a mudança e apaga o documento"""
+        for change in deleted:
+            f.write("\n")
+            for sql, args in self.delete_statements(change):
+                f.write(render_sql(sql, args) + ";\n")
+
+    def change_log_sql(self, file_path, change_type, old_hash, new_hash):
+        """INSERT em docs_changes para uma mudança enviada"""
+        return f"""INSERT INTO docs_changes (
+    doc_id, change_type, old_hash, new_hash, changed_by, change_summary
+) VALUES (
+    (SELECT id FROM docs WHERE file_path = {sql_literal(file_path)}),
+    {sql_literal(change_type)}, {sql_literal(old_hash)}, {sql_literal(new_hash)},
+    'sync-script', {sql_literal(f'{change_type}: {file_path}')}
+);"""
 
     def create_sync_script(self):
         """Cria script executável para sincronização via MCP"""
@@ -275,6 +467,7 @@ echo "🚀 Executando sincronização de documentos com Turso..."
 cat << 'EOF'
 Use a ferramenta mcp__turso__execute_query para executar o script SQL em sync-to-turso.sql no banco context-memory.
 Leia o arquivo docs/sync-to-turso.sql e execute todas as queries.
+Depois de aplicado, rode: python3 sync-docs-to-turso.py --commit-manifest
 EOF
 '''
         
@@ -290,12 +483,24 @@ if __name__ == "__main__":
     # Caminho dos documentos
     docs_path = "/Users/agents/Desktop/context-engineering-turso/docs"
     
+    # --full ignora o manifesto e reenvia todos os documentos
+    full = "--full" in sys.argv
+    # --db (ou TURSO_DATABASE_URL) envia direto ao banco, sem script SQL
+    db = sys.argv[sys.argv.index("--db") + 1] if "--db" in sys.argv else os.getenv("TURSO_DATABASE_URL")
+    
+    # --commit-manifest: o sync-to-turso.sql já foi aplicado, o manifesto pendente passa a valer
+    if "--commit-manifest" in sys.argv:
+        sys.exit(0 if DocSyncTurso(docs_path).commit_manifest() else 1)
+    
     # Executar sincronização
-    syncer = DocSyncTurso(docs_path)
-    syncer.sync_all_documents()
+    syncer = DocSyncTurso(docs_path, full=full)
+    syncer.sync_all_documents(db=db)
+    if db:
+        sys.exit(0)
     syncer.create_sync_script()
     
     print("\n📌 Próximos passos:")
     print("1. Revise o arquivo sync-to-turso.sql")
     print("2. Execute o script SQL no Turso via MCP")
-    print("3. Ou use ./execute-sync.sh no Claude Code")
\ No newline at end of file
+    print("3. Ou use ./execute-sync.sh no Claude Code")
+    print("4. Depois de aplicado, rode com --commit-manifest para atualizar o manifesto")
\ No newline at end of file
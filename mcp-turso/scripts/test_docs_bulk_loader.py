@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Testes da carga em lotes (docs_bulk_loader.py) contra um arquivo SQLite
+"""
+
+import pytest
+
+from docs_bulk_loader import BulkLoader, SQLiteBackend
+
+
+class RecordingBackend(SQLiteBackend):
+    """SQLiteBackend que guarda as instruções de cada transação"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.transactions = []
+
+    def run_transaction(self, statements):
+        self.transactions.append([sql for sql, _ in statements])
+        return super().run_transaction(statements)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = RecordingBackend(str(tmp_path / "load.db"))
+    backend.run_transaction([
+        ("CREATE TABLE docs (id INTEGER PRIMARY KEY, file_path TEXT UNIQUE, title TEXT)", []),
+        ("CREATE TABLE docs_changes (doc_id INTEGER, summary TEXT)", []),
+    ])
+    backend.transactions.clear()
+    yield backend
+    backend.close()
+
+
+def load(loader, count):
+    for index in range(count):
+        with loader.unit():
+            loader.insert({"file_path": f"doc-{index}.md", "title": f"Doc {index}"})
+            loader.execute(
+                "INSERT INTO docs_changes (doc_id, summary) "
+                "VALUES ((SELECT id FROM docs WHERE file_path = ?), 'created')",
+                [f"doc-{index}.md"],
+            )
+
+
+def test_unit_is_never_split_across_transactions(backend):
+    with BulkLoader(backend, "docs", ["file_path", "title"], batch_size=3) as loader:
+        load(loader, 5)
+
+    # Cada transação leva as linhas de docs e o changelog de cada uma delas
+    for statements in backend.transactions:
+        rows = sum(sql.count("(?, ?)") for sql in statements if sql.startswith("INSERT INTO docs "))
+        changes = sum(1 for sql in statements if sql.startswith("INSERT INTO docs_changes"))
+        assert rows == changes
+    assert len(backend.transactions) == 3
+    assert loader.stats()["rows"] == 5
+
+
+def test_error_inside_unit_discards_pending_batch(backend):
+    with pytest.raises(RuntimeError):
+        with BulkLoader(backend, "docs", ["file_path", "title"], batch_size=100) as loader:
+            load(loader, 2)
+            with loader.unit():
+                loader.insert({"file_path": "x.md", "title": "X"})
+                raise RuntimeError("falha no meio do documento")
+
+    assert backend.transactions == []
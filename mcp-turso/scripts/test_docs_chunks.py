@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Testes da divisão de documentos em trechos (docs_chunks.py)
+"""
+
+from docs_chunks import split_markdown
+
+DOC = (
+    "# Guia\n\nIntrodução curta.\n\n"
+    "## Instalação\n\n" + "instalar o turso " * 20 + "\n\n"
+    "## Uso\n\n" + "consultar o banco " * 30 + "\n"
+)
+
+
+def test_chunks_cover_the_original_offsets():
+    for chunk in split_markdown(DOC):
+        assert DOC[chunk.start:chunk.end] == chunk.text
+
+
+def test_merged_short_section_keeps_first_heading():
+    chunks = split_markdown(DOC)
+
+    assert [chunk.heading for chunk in chunks] == ["Guia", "Guia > Uso"]
+    assert chunks[0].text.startswith("# Guia")
+    assert "## Instalação" in chunks[0].text
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Testes do manifesto da sincronização incremental (docs_manifest.py)
+"""
+
+import os
+
+from docs_manifest import IncrementalDocSync, promote_staged
+
+
+def write(path, text, mtime_ns=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def plan(root, full=False):
+    sync = IncrementalDocSync(root, root / ".manifest.json", full=full)
+    return sync, {change.rel_path: change.change_type for change in sync.plan()}
+
+
+def test_first_run_ships_every_file(tmp_path):
+    write(tmp_path / "a.md", "# A")
+    write(tmp_path / "guia" / "b.md", "# B")
+    write(tmp_path / "notas.txt", "ignorado")
+
+    sync, changes = plan(tmp_path)
+
+    assert changes == {"a.md": "created", "guia/b.md": "created"}
+    assert not sync.has_baseline
+
+
+def test_only_changes_are_shipped_after_commit(tmp_path):
+    write(tmp_path / "a.md", "# A", mtime_ns=1_000_000_000)
+    write(tmp_path / "b.md", "# B", mtime_ns=1_000_000_000)
+    write(tmp_path / "c.md", "# C", mtime_ns=1_000_000_000)
+    sync, _ = plan(tmp_path)
+    sync.commit()
+
+    write(tmp_path / "a.md", "# A", mtime_ns=2_000_000_000)   # touch: mesmo conteúdo
+    write(tmp_path / "b.md", "# B alterado")
+    (tmp_path / "c.md").unlink()
+    write(tmp_path / "d.md", "# D")
+
+    sync, changes = plan(tmp_path)
+
+    assert changes == {"b.md": "updated", "c.md": "deleted", "d.md": "created"}
+    assert sync.stats["touched_only"] == 1
+    assert sync.stats["files_shipped"] == 3
+
+
+def test_unchanged_files_are_skipped_by_stat(tmp_path):
+    write(tmp_path / "a.md", "# A")
+    sync, _ = plan(tmp_path)
+    sync.commit()
+
+    sync, changes = plan(tmp_path)
+
+    assert changes == {}
+    assert sync.stats["stat_skipped"] == 1
+    assert sync.stats["rehashed"] == 0
+
+
+def test_changes_are_replanned_until_commit(tmp_path):
+    write(tmp_path / "a.md", "# A")
+    sync, _ = plan(tmp_path)
+    sync.commit()
+    write(tmp_path / "a.md", "# A alterado")
+
+    plan(tmp_path)  # envio que falhou: sem commit
+    _, changes = plan(tmp_path)
+
+    assert changes == {"a.md": "updated"}
+
+
+def test_staged_manifest_applies_only_when_promoted(tmp_path):
+    write(tmp_path / "a.md", "# A")
+    staged_path = tmp_path / ".manifest.staged.json"
+    sync, _ = plan(tmp_path)
+    sync.stage(staged_path)
+
+    assert not (tmp_path / ".manifest.json").exists()
+    assert plan(tmp_path)[1] == {"a.md": "created"}
+
+    assert promote_staged(staged_path, tmp_path / ".manifest.json")
+    assert plan(tmp_path)[1] == {}
+    assert not promote_staged(staged_path, tmp_path / ".manifest.json")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Testes do envio incremental de sync-docs-to-turso.py para um banco local
+"""
+
+import importlib.util
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "sync_docs_to_turso", Path(__file__).with_name("sync-docs-to-turso.py")
+)
+sync_docs = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sync_docs)
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    (root / "guia").mkdir(parents=True)
+    (root / "guia" / "a.md").write_text("# A\n\nPrimeiro documento.", encoding="utf-8")
+    (root / "guia" / "b.md").write_text("# B\n\nSegundo documento.", encoding="utf-8")
+    return root
+
+
+def sync(root, db):
+    syncer = sync_docs.DocSyncTurso(root)
+    syncer.sync_all_documents(workers=1, db=str(db))
+    return syncer
+
+
+def rows(db, sql):
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_deleted_doc_leaves_no_dangling_change_log(docs, tmp_path):
+    db = tmp_path / "docs.db"
+    sync(docs, db)
+    (docs / "guia" / "b.md").unlink()
+
+    sync(docs, db)
+
+    assert rows(db, "SELECT file_path FROM docs") == [("guia/a.md",)]
+    assert rows(db, "PRAGMA foreign_key_check(docs_changes)") == []
+    assert rows(db, "SELECT doc_id, change_summary FROM docs_changes WHERE change_type = 'deleted'") == [
+        (None, "deleted: guia/b.md")
+    ]
+
+
+def test_delete_works_with_foreign_keys_enabled(docs, tmp_path):
+    db = tmp_path / "docs.db"
+    syncer = sync(docs, db)
+    (docs / "guia" / "b.md").unlink()
+    change = syncer.sync.deletions(["guia/a.md"])[0]
+
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA foreign_keys = ON")
+    with conn:
+        for sql, args in syncer.delete_statements(change):
+            conn.execute(sql, args)
+    conn.close()
+
+    assert rows(db, "SELECT COUNT(*) FROM docs") == [(1,)]
+
+
+def test_sql_script_does_not_advance_manifest_until_committed(docs):
+    syncer = sync_docs.DocSyncTurso(docs)
+    syncer.sync_all_documents(workers=1)
+
+    assert (docs / "sync-to-turso.sql").exists()
+    assert not syncer.manifest_path.exists()
+
+    # Script ainda não aplicado: a próxima execução gera as mesmas mudanças
+    again = sync_docs.DocSyncTurso(docs)
+    again.sync_all_documents(workers=1)
+    assert again.sync.stats["created"] == 2
+
+    assert again.commit_manifest()
+    after = sync_docs.DocSyncTurso(docs)
+    after.sync_all_documents(workers=1)
+    assert after.sync.stats["files_shipped"] == 0
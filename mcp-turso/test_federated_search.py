@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Testes da busca federada (federated_search.py) contra um arquivo SQLite
+"""
+
+import pytest
+
+from federated_search import FederatedSearch, SearchHit, fuse
+from docs_bulk_loader import SQLiteBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "context-memory.db"))
+    backend.run_transaction([
+        ("CREATE TABLE knowledge_base (id INTEGER PRIMARY KEY, topic TEXT, content TEXT, tags TEXT)", []),
+        ("CREATE TABLE docs_turso (id INTEGER PRIMARY KEY, title TEXT, content TEXT, tags TEXT)", []),
+        ("INSERT INTO knowledge_base (topic, content, tags) VALUES "
+         "('Token JWT', 'Como renovar o token do Turso', 'auth'), "
+         "('Réplicas', 'Leituras locais sincronizadas', 'replica')", []),
+        ("INSERT INTO docs_turso (title, content, tags) VALUES "
+         "('Autenticação', 'O token vai no header Authorization', 'auth')", []),
+    ])
+    yield backend
+    backend.close()
+
+
+def tables(backend):
+    return {row[0] for row in backend.query("SELECT name FROM sqlite_master")}
+
+
+def test_search_never_changes_the_schema(backend):
+    before = tables(backend)
+    report = FederatedSearch(backend).search("token")
+
+    assert tables(backend) == before
+    assert report["hits"] == []
+    assert report["skipped"]["knowledge_base"].startswith("sem índice knowledge_base_fts")
+    assert report["skipped"]["conversations"] == "tabela não existe"
+
+
+def test_search_after_explicit_index_creation(backend):
+    FederatedSearch(backend).ensure_indexes()
+    backend.run_transaction([
+        ("INSERT INTO docs_turso (title, content, tags) VALUES ('Token novo', 'token token', 'auth')", [])
+    ])
+
+    report = FederatedSearch(backend).search("token", k=10)
+
+    assert {(hit.table, hit.title) for hit in report["hits"]} == {
+        ("knowledge_base", "Token JWT"), ("docs_turso", "Autenticação"), ("docs_turso", "Token novo")
+    }
+    assert report["round_trips"] == 1
+    assert set(report["tables"]) == {"knowledge_base", "docs_turso"}
+
+
+def test_fuse_ranks_by_position_and_table_weight():
+    hit = lambda table, rank: SearchHit(table, rank, "", "", bm25=-1.0, table_rank=rank)
+    fused = fuse({
+        "knowledge_base": [hit("knowledge_base", 1), hit("knowledge_base", 2)],
+        "conversations": [hit("conversations", 1)],
+    }, k=3)
+
+    # Mesma posição: a tabela de peso maior vem antes (conversations pesa 0.8)
+    assert [(h.table, h.table_rank) for h in fused] == [
+        ("knowledge_base", 1), ("knowledge_base", 2), ("conversations", 1)
+    ]
+    assert fused[0].score == round(1.0 / 61, 6)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Testes da paginação por keyset (keyset_pagination.py) contra um arquivo SQLite
+"""
+
+import asyncio
+
+import pytest
+
+from keyset_pagination import KeysetPager, KeysetQuery, decode_cursor, encode_cursor
+from turso_replica import TursoReplica  # noqa: F401 (coloca scripts/ no sys.path)
+from docs_bulk_loader import SQLiteBackend
+
+LISTING = KeysetQuery("knowledge_base", ("id", "topic"))
+
+
+@pytest.fixture
+def fetch(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "pages.db"))
+    backend.run_transaction([
+        ("CREATE TABLE knowledge_base (id INTEGER PRIMARY KEY, topic TEXT, created_at TEXT)", []),
+        # Duas linhas por segundo: o id desempata
+        *[("INSERT INTO knowledge_base (id, topic, created_at) VALUES (?, ?, ?)",
+           [index, f"t{index}", f"2026-01-01 00:00:{index // 2:02d}"]) for index in range(1, 8)],
+    ])
+
+    async def fetch(sql, args):
+        cursor = backend.conn.execute(sql, args)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    yield fetch
+    backend.close()
+
+
+def collect(pager):
+    async def run():
+        return [row["id"] async for row in pager]
+    return asyncio.run(run())
+
+
+def test_cursor_round_trip():
+    key = ("2026-01-01 00:00:01", 3)
+    assert decode_cursor(encode_cursor(key)) == key
+    assert decode_cursor(None) is None
+    with pytest.raises(ValueError):
+        decode_cursor("não é cursor")
+
+
+def test_page_continues_after_key():
+    sql, args = LISTING.page(("2026-01-01 00:00:01", 3), 10)
+
+    assert "WHERE ((created_at, id) < (?, ?))" in sql
+    assert sql.endswith("ORDER BY created_at DESC, id DESC LIMIT ?")
+    assert args == ["2026-01-01 00:00:01", 3, 10]
+    with pytest.raises(ValueError):
+        LISTING.page((3,), 10)
+
+
+def test_pager_lists_every_row_once_in_order(fetch):
+    pager = KeysetPager(LISTING, fetch, page_size=3)
+
+    assert collect(pager) == [7, 6, 5, 4, 3, 2, 1]
+    assert pager.exhausted
+    assert pager.pages_fetched == 3
+
+
+def test_cursor_resumes_in_another_pager(fetch):
+    first = KeysetPager(LISTING, fetch, page_size=3)
+    rows, cursor = asyncio.run(first.next_page())
+
+    assert [row["id"] for row in rows] == [7, 6, 5]
+    assert collect(KeysetPager(LISTING, fetch, page_size=3, cursor=cursor)) == [4, 3, 2, 1]
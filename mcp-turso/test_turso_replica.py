@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Testes da réplica local (turso_replica.py), com um arquivo SQLite no papel do remoto
+"""
+
+import pytest
+
+from turso_replica import CHANGELOG_TABLE, TursoReplica
+from federated_search import FederatedSearch
+from docs_bulk_loader import SQLiteBackend
+
+
+@pytest.fixture
+def remote(tmp_path):
+    remote = SQLiteBackend(str(tmp_path / "remote.db"))
+    remote.run_transaction([
+        ("CREATE TABLE knowledge_base (id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT, content TEXT)", []),
+        ("CREATE TABLE prps (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, updated_at TEXT)", []),
+        ("INSERT INTO knowledge_base (topic, content) VALUES ('a', 'primeiro'), ('b', 'segundo')", []),
+        ("INSERT INTO prps (title, updated_at) VALUES ('PRP 1', '2026-01-01 00:00:00')", []),
+    ])
+    return remote
+
+
+def replica_for(remote, tmp_path, **kwargs):
+    return TursoReplica(remote, tmp_path / "replica.db", tables=["knowledge_base", "prps", "conversations"],
+                        max_lag=3600, **kwargs)
+
+
+def local(replica, sql):
+    return [tuple(row.values()) for row in replica.fetch(sql)]
+
+
+def test_first_pull_copies_tables_without_touching_remote_schema(remote, tmp_path):
+    replica = replica_for(remote, tmp_path)
+    report = replica.pull()
+
+    assert report["error"] is None
+    assert report["tables"]["knowledge_base"]["copied"] == 2
+    assert replica.skipped == {"conversations": "tabela não existe no banco remoto"}
+    assert not remote.query(f"SELECT name FROM sqlite_master WHERE name = '{CHANGELOG_TABLE}'")
+    assert replica.report()["tables"]["knowledge_base"]["mode"] == "append"
+    assert replica.report()["tables"]["prps"]["mode"] == "updated_at"
+
+
+def test_incremental_pull_applies_only_new_and_updated_rows(remote, tmp_path):
+    replica = replica_for(remote, tmp_path)
+    replica.pull()
+    remote.run_transaction([
+        ("INSERT INTO knowledge_base (topic, content) VALUES ('c', 'terceiro')", []),
+        ("UPDATE prps SET title = 'PRP 1 v2', updated_at = '2026-01-02 00:00:00' WHERE id = 1", []),
+    ])
+
+    report = replica.pull()
+
+    assert report["tables"]["knowledge_base"] == {"mode": "append", "copied": 0, "applied": 1}
+    assert local(replica, "SELECT topic FROM knowledge_base ORDER BY id") == [("a",), ("b",), ("c",)]
+    assert local(replica, "SELECT title FROM prps") == [("PRP 1 v2",)]
+
+
+def test_changelog_is_opt_in_and_replicates_deletes(remote, tmp_path):
+    replica = replica_for(remote, tmp_path, use_changelog=True)
+    replica.pull()
+    remote.run_transaction([("DELETE FROM knowledge_base WHERE id = 1", [])])
+
+    report = replica.pull()
+
+    assert report["tables"]["knowledge_base"]["mode"] == "changelog"
+    assert local(replica, "SELECT id FROM knowledge_base") == [(2,)]
+
+
+def test_changelog_is_pruned_after_a_complete_pull(remote, tmp_path, monkeypatch):
+    replica = replica_for(remote, tmp_path, use_changelog=True, changelog_retention_days=3)
+    pruned = []
+    monkeypatch.setattr(replica, "prune_changelog", pruned.append)
+
+    replica.pull()
+    replica.pull()
+
+    # Uma poda por PRUNE_INTERVAL
+    assert pruned == [3]
+
+
+def test_stale_replica_reads_from_remote(remote, tmp_path):
+    replica = replica_for(remote, tmp_path)
+    replica.pull()
+    replica.max_lag = -1
+
+    assert local(replica, "SELECT COUNT(*) FROM knowledge_base") == [(2,)]
+    assert replica.stats["remote_reads"] == 1
+
+
+def test_locked_remote_shares_the_sync_lock(remote, tmp_path):
+    replica = replica_for(remote, tmp_path)
+    calls = []
+
+    class Spy:
+        def query(self, sql, args=()):
+            calls.append(replica._remote_lock.locked())
+            return []
+
+    replica.locked_remote._backend = Spy()
+    replica.locked_remote.query("SELECT 1")
+    replica.locked_remote.close()
+
+    assert calls == [True]
+    assert remote.query("SELECT COUNT(*) FROM prps") == [[1]]
+
+
+def test_federated_search_through_replica(tmp_path):
+    remote = SQLiteBackend(str(tmp_path / "remote.db"))
+    remote.run_transaction([
+        ("CREATE TABLE knowledge_base (id INTEGER PRIMARY KEY, topic TEXT, content TEXT, tags TEXT, "
+         "updated_at TEXT)", []),
+        ("INSERT INTO knowledge_base (topic, content, tags, updated_at) "
+         "VALUES ('Token JWT', 'renovar o token', 'auth', '2026-01-01 00:00:00')", []),
+    ])
+    FederatedSearch(remote, tables=["knowledge_base"]).ensure_indexes()
+    replica = TursoReplica(remote, tmp_path / "replica.db", tables=["knowledge_base"], max_lag=3600)
+    replica.pull()
+
+    def search(query):
+        backend = replica.backend(["knowledge_base"])
+        assert backend is not replica.locked_remote
+        return [hit.title for hit in FederatedSearch(backend, tables=["knowledge_base"]).search(query)["hits"]]
+
+    assert search("token") == ["Token JWT"]
+
+    # Incremental: os triggers locais mantêm o índice
+    remote.run_transaction([
+        ("INSERT INTO knowledge_base (topic, content, tags, updated_at) "
+         "VALUES ('Réplica', 'token local', 'replica', '2026-01-02 00:00:00')", []),
+        ("UPDATE knowledge_base SET topic = 'JWT', updated_at = '2026-01-02 00:00:00' WHERE id = 1", []),
+    ])
+    replica.pull()
+    assert sorted(search("token")) == ["JWT", "Réplica"]
+
+
+def test_append_table_picks_up_deletes_and_edits(remote, tmp_path):
+    replica = replica_for(remote, tmp_path)
+    replica.pull()
+    topics = lambda: replica._fetch_local("SELECT topic FROM knowledge_base ORDER BY id", [])
+    remote.run_transaction([
+        ("DELETE FROM knowledge_base WHERE id = 1", []),
+        ("UPDATE knowledge_base SET topic = 'b2' WHERE id = 2", []),
+    ])
+
+    # Remoção: a contagem diverge e a tabela é recopiada
+    assert replica.pull()["tables"]["knowledge_base"]["copied"] == 1
+    assert topics() == [{"topic": "b2"}]
+
+    # Edição: só na recópia periódica; vencido o prazo, a leitura vai ao remoto
+    remote.run_transaction([("UPDATE knowledge_base SET topic = 'b3' WHERE id = 2", [])])
+    assert replica.pull()["tables"]["knowledge_base"]["copied"] == 0
+    assert replica.is_fresh(["knowledge_base"])
+    replica.append_recopy_interval = -replica.max_lag - 1
+    assert not replica.is_fresh(["knowledge_base"])
+    assert replica.report()["tables"]["knowledge_base"]["stale"]
+    assert replica.pull()["tables"]["knowledge_base"]["copied"] == 1
+    assert topics() == [{"topic": "b3"}]
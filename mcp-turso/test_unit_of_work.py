@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Testes da unidade de trabalho (unit_of_work.py) contra um arquivo SQLite
+"""
+
+import asyncio
+
+import pytest
+
+from unit_of_work import Ref, UnitOfWork
+from turso_replica import TursoReplica  # noqa: F401 (coloca scripts/ no sys.path)
+from docs_bulk_loader import BulkLoadError, SQLiteBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "writes.db"))
+    backend.run_transaction([
+        ("CREATE TABLE prps (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+         "updated_at TEXT)", []),
+        ("CREATE TABLE prp_tasks (id INTEGER PRIMARY KEY, prp_id INTEGER NOT NULL, task_name TEXT)", []),
+    ])
+    yield backend
+    backend.close()
+
+
+def test_refs_link_rows_in_one_transaction(backend):
+    uow = UnitOfWork()
+    prp = uow.insert("prps", {"name": "api"}, ref="prp")
+    for name in ("modelo", "rotas"):
+        uow.insert("prp_tasks", {"prp_id": prp, "task_name": name})
+
+    result = uow.commit(backend)
+
+    assert result.round_trips == 1
+    assert result.round_trips_saved == 2
+    assert backend.query("SELECT prp_id, task_name FROM prp_tasks ORDER BY id") == [
+        [result.ids["prp"], "modelo"], [result.ids["prp"], "rotas"]
+    ]
+    assert len(uow) == 0
+
+
+def test_failed_commit_writes_nothing(backend):
+    uow = UnitOfWork()
+    uow.insert("prps", {"name": "api"})
+    uow.insert("prps", {"name": None})
+
+    with pytest.raises(BulkLoadError):
+        uow.commit(backend)
+
+    assert backend.query("SELECT COUNT(*) FROM prps") == [[0]]
+
+
+def test_affected_rows_per_write(backend):
+    backend.run_transaction([("INSERT INTO prps (name) VALUES ('a'), ('b')", [])])
+    uow = UnitOfWork()
+    uow.update("prps", {"name": "c"}, {"id": 1}, touch="updated_at")
+    uow.delete("prps", {"id": 99})
+    uow.execute("DELETE FROM prps WHERE id = ?", [2])
+
+    assert uow.commit(backend).affected == [1, 0, None]
+    assert backend.query("SELECT name FROM prps WHERE updated_at IS NOT NULL") == [["c"]]
+
+
+def test_unknown_ref_and_bad_identifier_are_rejected():
+    uow = UnitOfWork()
+    with pytest.raises(ValueError):
+        uow.insert("prp_tasks", {"prp_id": Ref("prp")})
+    with pytest.raises(ValueError):
+        uow.insert("prps; DROP TABLE prps", {"name": "x"})
+
+
+def test_commit_each_resolves_refs_from_each_response():
+    uow = UnitOfWork()
+    prp = uow.insert("prps", {"name": "api"}, ref="prp")
+    uow.insert("prp_tasks", {"prp_id": prp, "task_name": "modelo"})
+    sent = []
+
+    async def execute(sql, args):
+        sent.append((sql, args))
+        return 40 + len(sent)
+
+    result = asyncio.run(uow.commit_each(execute))
+
+    assert result.ids == {"prp": 41, "prp_tasks#1": 42}
+    assert sent[1] == ("INSERT INTO prp_tasks (prp_id, task_name) VALUES (?, ?)", [41, "modelo"])
+    assert result.round_trips == 2
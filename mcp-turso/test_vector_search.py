@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Testes da busca vetorial (vector_search.py) contra um arquivo SQLite (caminho local)
+"""
+
+import pytest
+
+from vector_search import VectorSearch, backfill_embeddings, ensure_schema
+from docs_bulk_loader import SQLiteBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "vectors.db"))
+    backend.run_transaction([
+        ("CREATE TABLE knowledge_base (id INTEGER PRIMARY KEY, topic TEXT, content TEXT, tags TEXT, "
+         "created_at TEXT DEFAULT CURRENT_TIMESTAMP)", []),
+        ("INSERT INTO knowledge_base (topic, content, tags) VALUES "
+         "('Cache', 'cache de contexto do agente', 'prp'), "
+         "('Réplica', 'leituras locais sincronizadas', 'prp')", []),
+    ])
+    ensure_schema(backend)
+    yield backend
+    backend.close()
+
+
+def test_backfill_skips_unchanged_rows(backend):
+    assert backfill_embeddings(backend)["updated"] == 2
+    assert backfill_embeddings(backend)["updated"] == 0
+
+
+def test_backfill_reembeds_changed_content(backend):
+    backfill_embeddings(backend)
+    before = backend.query("SELECT embedding FROM knowledge_base WHERE id = 2")[0][0]
+    backend.run_transaction([
+        ("UPDATE knowledge_base SET content = 'índice vetorial local' WHERE id = 2", [])
+    ])
+
+    report = backfill_embeddings(backend)
+
+    assert report["updated"] == 1
+    assert backend.query("SELECT embedding FROM knowledge_base WHERE id = 2")[0][0] != before
+    hits = VectorSearch(backend, mode="local").search("índice vetorial local", k=1)
+    assert hits[0]["id"] == 2
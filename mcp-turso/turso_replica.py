@@ -0,0 +1,829 @@
+#!/usr/bin/env python3
+"""
+Réplica local das tabelas do banco context-memory (Turso), no estilo embedded replica
+
+`list_prps_from_turso.py`, `search_turso_cloud.py`, `list_tables_cloud.py` e os
+delegadores do prp-agent iam ao Turso remoto a cada leitura. A réplica espelha as tabelas
+mais lidas (`docs_turso`, `docs_prp`, `knowledge_base`, `prps`, `conversations`) em um
+arquivo SQLite local e serve as leituras dele:
+
+- a primeira sincronização copia cada tabela inteira, em páginas por id;
+- as seguintes são incrementais, no modo mais preciso que a tabela permite:
+  1. `changelog` (opcional, `use_changelog`/TURSO_REPLICA_CHANGELOG=1/`--changelog`):
+     triggers no banco remoto registram o id de cada linha inserida, alterada ou
+     removida em `_replica_changes`; a réplica lê o log a partir do último `seq`
+     aplicado (já com a linha atual, por LEFT JOIN) e aplica upserts e remoções. Como
+     altera o schema do remoto, só é instalado quando pedido, e depois de cada
+     sincronização completa as entradas com mais de `changelog_retention_days` são
+     podadas (no máximo uma vez por `PRUNE_INTERVAL`);
+  2. `updated_at`: sem o log, busca as linhas com `updated_at` a partir da última
+     marca (remoções não aparecem);
+  3. `append`: sem `updated_at`, só as linhas com id maior que o último copiado.
+     Edições não aparecem assim: a tabela é recopiada a cada `append_recopy_interval`
+     segundos (TURSO_REPLICA_APPEND_RECOPY), ou antes, se a contagem de linhas já
+     copiadas diverge do remoto (remoções). Sem recópia dentro desse prazo (mais
+     `max_lag`), as leituras dela vão ao remoto;
+- uma rodada busca uma página de todas as tabelas em uma única requisição pipeline;
+- o atraso (lag) de cada tabela é o tempo desde o início da última sincronização
+  completa; acima de `max_lag` segundos a leitura vai direto ao remoto (e volta para a
+  réplica quando ela se atualiza). Se o remoto estiver fora do ar, a réplica atrasada
+  responde no lugar dele;
+- as tabelas virtuais FTS5 do remoto não são copiadas: a réplica monta os próprios
+  índices da busca federada (`index_statements` de `federated_search.py`, preenchidos
+  com 'rebuild' depois de cada cópia e mantidos pelos triggers nas incrementais).
+
+As sincronizações rodam sob demanda (`pull`, `pull_if_due`) ou em uma thread
+(`start`/`stop`, a cada `interval` segundos). A réplica é só leitura: as escritas
+continuam indo ao remoto e chegam aqui na sincronização seguinte.
+
+Configuração por ambiente (`TursoReplica.from_env`): TURSO_DATABASE_URL,
+TURSO_AUTH_TOKEN, TURSO_REPLICA_PATH (arquivo local; sem ele os scripts leem do remoto),
+TURSO_REPLICA_MAX_LAG, TURSO_REPLICA_INTERVAL e TURSO_REPLICA_APPEND_RECOPY
+(segundos), TURSO_REPLICA_CHANGELOG.
+
+Uso:
+    python3 turso_replica.py sync --replica .replica/context-memory.db
+    python3 turso_replica.py sync --changelog
+    python3 turso_replica.py status
+    python3 turso_replica.py watch --interval 30
+    python3 turso_replica.py prune --days 7
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+sys.path.append(str(Path(__file__).resolve().parent / "scripts"))
+from docs_bulk_loader import BulkLoadError, SQLiteBackend, connect_backend
+from federated_search import SEARCH_SOURCES, index_statements
+
+logger = logging.getLogger(__name__)
+
+REPLICATED_TABLES = ("docs_turso", "docs_prp", "knowledge_base", "prps", "conversations")
+DEFAULT_PATH = Path(__file__).resolve().parent / ".replica" / "context-memory.db"
+DEFAULT_MAX_LAG = 300.0
+DEFAULT_INTERVAL = 60.0
+# Tabelas em modo append (sem updated_at nem log) são recopiadas a cada N segundos
+DEFAULT_APPEND_RECOPY = 900.0
+
+# Linhas por página (cópia inicial e sincronização incremental)
+PAGE_SIZE = 500
+# Páginas por tabela em uma sincronização; o resto fica para a próxima
+MAX_PAGES = 50
+
+# O que a sincronização incremental de cada modo traz (report)
+MODE_COVERAGE = {
+    "changelog": "inserções, edições e remoções",
+    "updated_at": "inserções e edições",
+    "append": "inserções; edições e remoções na recópia periódica",
+}
+
+CHANGELOG_TABLE = "_replica_changes"
+# Idade das entradas do log apagadas pela poda automática, e o intervalo entre podas
+DEFAULT_RETENTION_DAYS = 7.0
+PRUNE_INTERVAL = 3600.0
+
+STATE_SCHEMA = """CREATE TABLE IF NOT EXISTS _replica_state (
+    table_name TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    seq INTEGER NOT NULL DEFAULT 0,
+    high_water TEXT,
+    high_water_id INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL,
+    error TEXT,
+    copied_at REAL
+)"""
+
+
+def changelog_statements(table: str) -> List[str]:
+    """Log de mudanças no remoto e os triggers que o alimentam para `table`"""
+    log = f"INSERT INTO {CHANGELOG_TABLE}(table_name, row_id)"
+    return [
+        f"""CREATE TABLE IF NOT EXISTS {CHANGELOG_TABLE} (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)""",
+        f"CREATE INDEX IF NOT EXISTS idx_{CHANGELOG_TABLE}_table ON {CHANGELOG_TABLE}(table_name, seq)",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_replica_ai AFTER INSERT ON {table} BEGIN
+    {log} VALUES ('{table}', new.id);
+END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_replica_au AFTER UPDATE ON {table} BEGIN
+    {log} VALUES ('{table}', new.id);
+    {log} SELECT '{table}', old.id WHERE old.id <> new.id;
+END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_replica_ad AFTER DELETE ON {table} BEGIN
+    {log} VALUES ('{table}', old.id);
+END""",
+    ]
+
+
+def local_ddl(remote_sql: str) -> str:
+    """CREATE TABLE do remoto, idempotente para o arquivo local"""
+    return re.sub(r"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?", "CREATE TABLE IF NOT EXISTS ",
+                  remote_sql, count=1, flags=re.IGNORECASE)
+
+
+@dataclass
+class TableState:
+    """Posição da réplica de uma tabela (espelho de uma linha de `_replica_state`)"""
+    table: str
+    mode: str
+    columns: List[str]
+    seq: int = 0
+    high_water: Optional[str] = None
+    high_water_id: int = 0
+    synced_at: Optional[float] = None
+    error: Optional[str] = None
+    # Início da última cópia inteira
+    copied_at: Optional[float] = None
+    # Cópia inteira pendente (tabela nova, schema mudou ou o log foi podado)
+    needs_copy: bool = field(default=False, compare=False)
+
+    def lag(self, now: Optional[float] = None) -> Optional[float]:
+        if self.synced_at is None:
+            return None
+        return max(0.0, (now or time.time()) - self.synced_at)
+
+
+class LockedBackend:
+    """
+    O backend remoto da réplica para outros usuários (busca vetorial, FederatedSearch):
+    cada chamada segura o lock que a thread de sincronização também usa.
+
+    `close` não fecha nada: a conexão é da réplica.
+    """
+
+    def __init__(self, backend, lock: threading.Lock):
+        self._backend = backend
+        self._lock = lock
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+    def query(self, sql, args=()):
+        with self._lock:
+            return self._backend.query(sql, args)
+
+    def execute_many(self, statements):
+        with self._lock:
+            return self._backend.execute_many(statements)
+
+    def run_transaction(self, statements):
+        with self._lock:
+            return self._backend.run_transaction(statements)
+
+    def close(self):
+        pass
+
+
+class TursoReplica:
+    """Cópia local, atualizada de forma incremental, de tabelas do Turso remoto"""
+
+    def __init__(self, remote, path=DEFAULT_PATH, tables: Sequence[str] = REPLICATED_TABLES,
+                 max_lag: float = DEFAULT_MAX_LAG, interval: float = DEFAULT_INTERVAL,
+                 use_changelog: bool = False, changelog_retention_days: float = DEFAULT_RETENTION_DAYS,
+                 append_recopy_interval: float = DEFAULT_APPEND_RECOPY):
+        self.remote = remote
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tables = list(tables)
+        self.max_lag = max_lag
+        self.interval = interval
+        self.use_changelog = use_changelog
+        self.changelog_retention_days = changelog_retention_days
+        self.append_recopy_interval = append_recopy_interval
+        self._pruned_at = 0.0
+        # Tabelas fora da réplica e o motivo (não existe no remoto, sem id...)
+        self.skipped: Dict[str, str] = {}
+        self.stats = {"local_reads": 0, "remote_reads": 0, "stale_reads": 0, "pulls": 0}
+        self.last_pull: Optional[Dict] = None
+
+        # Escritor (sincronização) e leitor separados; WAL deixa ler durante a escrita
+        self._conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(STATE_SCHEMA)
+        if "copied_at" not in {row[1] for row in self._conn.execute("PRAGMA table_info(_replica_state)")}:
+            self._conn.execute("ALTER TABLE _replica_state ADD COLUMN copied_at REAL")
+        self._reader = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.RLock()
+        # requests.Session não é thread-safe: leituras remotas e a thread de sync se revezam
+        self._remote_lock = threading.Lock()
+        # O remoto para quem está fora da réplica, sob o mesmo lock
+        self.locked_remote = LockedBackend(remote, self._remote_lock)
+        self._states: Dict[str, TableState] = self._load_states()
+        self._ready = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def connect(cls, target=None, auth_token=None, path=None, **kwargs):
+        """`target` padrão: TURSO_DATABASE_URL; token padrão: TURSO_AUTH_TOKEN"""
+        remote = connect_backend(target or os.getenv("TURSO_DATABASE_URL"),
+                                 auth_token or os.getenv("TURSO_AUTH_TOKEN"))
+        return cls(remote, path or DEFAULT_PATH, **kwargs)
+
+    @classmethod
+    def from_env(cls, target=None, auth_token=None, **kwargs) -> Optional["TursoReplica"]:
+        """
+        Réplica configurada por TURSO_REPLICA_PATH, ou None (leituras direto do remoto).
+
+        TURSO_DATABASE_URL/TURSO_AUTH_TOKEN têm prioridade sobre `target`/`auth_token`.
+        """
+        path = os.getenv("TURSO_REPLICA_PATH")
+        target = os.getenv("TURSO_DATABASE_URL") or target
+        if not path or not target:
+            return None
+        kwargs.setdefault("max_lag", float(os.getenv("TURSO_REPLICA_MAX_LAG", DEFAULT_MAX_LAG)))
+        kwargs.setdefault("interval", float(os.getenv("TURSO_REPLICA_INTERVAL", DEFAULT_INTERVAL)))
+        kwargs.setdefault("append_recopy_interval",
+                          float(os.getenv("TURSO_REPLICA_APPEND_RECOPY", DEFAULT_APPEND_RECOPY)))
+        kwargs.setdefault("use_changelog", os.getenv("TURSO_REPLICA_CHANGELOG", "").lower() in ("1", "true", "yes"))
+        return cls.connect(target, os.getenv("TURSO_AUTH_TOKEN") or auth_token, path, **kwargs)
+
+    # Estado local
+
+    def _load_states(self) -> Dict[str, TableState]:
+        states = {}
+        for row in self._conn.execute(
+            "SELECT table_name, mode, columns, seq, high_water, high_water_id, synced_at, error, copied_at "
+            "FROM _replica_state"
+        ):
+            states[row[0]] = TableState(row[0], row[1], json.loads(row[2]), *row[3:])
+        return states
+
+    def _save_state(self, state: TableState):
+        self._conn.execute(
+            "INSERT INTO _replica_state (table_name, mode, columns, seq, high_water, high_water_id, synced_at, "
+            "error, copied_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(table_name) DO UPDATE SET "
+            "mode = excluded.mode, columns = excluded.columns, seq = excluded.seq, "
+            "high_water = excluded.high_water, high_water_id = excluded.high_water_id, "
+            "synced_at = excluded.synced_at, error = excluded.error, copied_at = excluded.copied_at",
+            [state.table, state.mode, json.dumps(state.columns), state.seq, state.high_water,
+             state.high_water_id, state.synced_at, state.error, state.copied_at],
+        )
+
+    def _apply(self, state: TableState, rows=(), deleted_ids=()):
+        """Upserts e remoções de uma página + a nova posição, em uma transação local"""
+        columns = state.columns
+        upsert = (
+            f"INSERT INTO {state.table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT(id) DO UPDATE SET "
+            + ", ".join(f"{column} = excluded.{column}" for column in columns if column != "id")
+        )
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if rows:
+                    self._conn.executemany(upsert, rows)
+                if deleted_ids:
+                    self._conn.executemany(f"DELETE FROM {state.table} WHERE id = ?", [(i,) for i in deleted_ids])
+                self._save_state(state)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # Remoto
+
+    def _remote_many(self, statements):
+        with self._remote_lock:
+            return self.remote.execute_many(statements)
+
+    def ensure(self):
+        """Descobre as tabelas no remoto, escolhe o modo de cada uma e cria as locais"""
+        if self._ready:
+            return
+        statements = []
+        for table in self.tables:
+            statements.append(("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", [table]))
+            statements.append(("SELECT name, type, pk FROM pragma_table_info(?)", [table]))
+        outcomes = self._remote_many(statements)
+
+        eligible = {}
+        for index, table in enumerate(self.tables):
+            ddl, info = outcomes[2 * index], outcomes[2 * index + 1]
+            if ddl["error"] or info["error"]:
+                raise BulkLoadError(ddl["error"] or info["error"])
+            if not ddl["rows"]:
+                self.skipped[table] = "tabela não existe no banco remoto"
+                continue
+            columns = [name for name, _type, _pk in info["rows"]]
+            if not any(name == "id" and pk and "INT" in str(col_type).upper()
+                       for name, col_type, pk in info["rows"]):
+                self.skipped[table] = "sem chave primária inteira id"
+                continue
+            eligible[table] = (ddl["rows"][0][0], columns)
+
+        changelog = False
+        if self.use_changelog and eligible:
+            try:
+                with self._remote_lock:
+                    self.remote.run_transaction([
+                        (sql, []) for table in eligible for sql in changelog_statements(table)
+                    ])
+                changelog = True
+            except (BulkLoadError, OSError) as e:
+                logger.warning(f"Log de mudanças indisponível no remoto ({e}); usando updated_at/id")
+
+        for table, (ddl, columns) in eligible.items():
+            if changelog:
+                mode = "changelog"
+            elif "updated_at" in columns:
+                mode = "updated_at"
+            else:
+                mode = "append"
+            state = self._states.get(table)
+            with self._lock:
+                if state and state.columns != columns:
+                    # Schema mudou no remoto: recria a tabela local (e o índice FTS derivado dela)
+                    self._drop_local_fts(table)
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self._conn.execute(local_ddl(ddl))
+            if state is None or state.columns != columns or state.mode != mode:
+                state = TableState(table, mode, columns)
+                state.needs_copy = True
+                self._states[table] = state
+            elif not self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", [f"{table}_fts"]).fetchone():
+                # Réplica anterior aos índices locais: monta sobre as linhas já copiadas
+                self._build_local_fts(state)
+        self._ready = True
+
+    def _drop_local_fts(self, table: str):
+        fts = f"{table}_fts"
+        for suffix in ("ai", "ad", "au"):
+            self._conn.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        self._conn.execute(f"DROP TABLE IF EXISTS {fts}")
+
+    def _build_local_fts(self, state: TableState) -> bool:
+        """Índice FTS5 local da busca federada para a tabela (False se ela não é pesquisável)"""
+        source = SEARCH_SOURCES.get(state.table)
+        if source is None or not set(source.columns) <= set(state.columns):
+            return False
+        with self._lock:
+            for sql in index_statements(source):
+                self._conn.execute(sql)
+            self._conn.execute(f"INSERT INTO {source.fts_table}({source.fts_table}) VALUES ('rebuild')")
+        return True
+
+    # Sincronização
+
+    def _page_statement(self, state: TableState, cursor):
+        columns = ", ".join(f"t.{column}" for column in state.columns)
+        if state.mode == "changelog":
+            return (
+                f"SELECT c.seq, c.row_id, t.id IS NOT NULL, {columns} FROM {CHANGELOG_TABLE} c "
+                f"LEFT JOIN {state.table} t ON t.id = c.row_id "
+                f"WHERE c.table_name = ? AND c.seq > ? ORDER BY c.seq LIMIT ?",
+                [state.table, cursor, PAGE_SIZE],
+            )
+        if state.mode == "updated_at":
+            high_water, last_id = cursor
+            if high_water is None:
+                return (f"SELECT {columns} FROM {state.table} t WHERE t.updated_at IS NOT NULL "
+                        f"ORDER BY t.updated_at, t.id LIMIT ?", [PAGE_SIZE])
+            # Reler as linhas da última marca cobre alterações no mesmo segundo
+            return (
+                f"SELECT {columns} FROM {state.table} t WHERE t.updated_at > ? "
+                f"OR (t.updated_at = ? AND t.id > ?) ORDER BY t.updated_at, t.id LIMIT ?",
+                [high_water, high_water, last_id, PAGE_SIZE],
+            )
+        return (f"SELECT {columns} FROM {state.table} t WHERE t.id > ? ORDER BY t.id LIMIT ?",
+                [cursor, PAGE_SIZE])
+
+    def _apply_page(self, state: TableState, rows, cursor):
+        """Aplica uma página incremental; devolve (linhas aplicadas, novo cursor)"""
+        if state.mode == "changelog":
+            latest: Dict[int, Optional[list]] = {}
+            for seq, row_id, exists, *values in rows:
+                latest[row_id] = values if exists else None
+                cursor = seq
+            state.seq = cursor
+            upserts = [values for values in latest.values() if values is not None]
+            deleted = [row_id for row_id, values in latest.items() if values is None]
+            self._apply(state, upserts, deleted)
+            return len(latest), cursor
+        if state.mode == "updated_at":
+            updated_index, id_index = state.columns.index("updated_at"), state.columns.index("id")
+            if rows:
+                cursor = (rows[-1][updated_index], rows[-1][id_index])
+                state.high_water = cursor[0]
+            self._apply(state, rows)
+            return len(rows), cursor
+        if rows:
+            cursor = state.high_water_id = rows[-1][state.columns.index("id")]
+        self._apply(state, rows)
+        return len(rows), cursor
+
+    def _copy(self, state: TableState, report: Dict):
+        """Cópia inteira da tabela, com a marca incremental lida antes de começar"""
+        started = time.time()
+        watermark = {
+            "changelog": (f"SELECT COALESCE(MAX(seq), 0) FROM {CHANGELOG_TABLE}", []),
+            "updated_at": (f"SELECT MAX(updated_at) FROM {state.table}", []),
+        }.get(state.mode)
+        if watermark:
+            outcome = self._remote_many([watermark])[0]
+            report["round_trips"] += 1
+            if outcome["error"]:
+                raise BulkLoadError(outcome["error"])
+            mark = outcome["rows"][0][0]
+        # Até terminar, as leituras desta tabela vão ao remoto
+        state.synced_at = None
+        with self._lock:
+            # Sem o índice FTS durante a cópia: é montado de uma vez no fim
+            self._drop_local_fts(state.table)
+            self._conn.execute(f"DELETE FROM {state.table}")
+            self._save_state(state)
+
+        columns = ", ".join(state.columns)
+        id_index = state.columns.index("id")
+        last_id, copied = 0, 0
+        while True:
+            outcome = self._remote_many([(
+                f"SELECT {columns} FROM {state.table} WHERE id > ? ORDER BY id LIMIT ?", [last_id, PAGE_SIZE]
+            )])[0]
+            report["round_trips"] += 1
+            if outcome["error"]:
+                raise BulkLoadError(outcome["error"])
+            rows = outcome["rows"]
+            if rows:
+                last_id = rows[-1][id_index]
+                copied += len(rows)
+                self._apply(state, rows)
+            if len(rows) < PAGE_SIZE:
+                break
+
+        if state.mode == "changelog":
+            state.seq = int(mark)
+        elif state.mode == "updated_at":
+            state.high_water = mark
+        state.high_water_id = last_id
+        self._build_local_fts(state)
+        state.synced_at, state.error, state.needs_copy = started, None, False
+        state.copied_at = started
+        with self._lock:
+            self._save_state(state)
+        report["tables"][state.table] = {"mode": state.mode, "copied": copied, "applied": 0}
+
+    def pull(self) -> Dict:
+        """
+        Uma sincronização de todas as tabelas.
+
+        Cada rodada pede a próxima página de todas as tabelas pendentes em uma única
+        requisição pipeline. Retorna {"tables": {tabela: {"mode", "copied", "applied",
+        "error"}}, "round_trips", "seconds", "error"}.
+        """
+        started = time.time()
+        timer = time.perf_counter()
+        report: Dict[str, Any] = {"tables": {}, "round_trips": 0, "error": None}
+        try:
+            self.ensure()
+            states = [self._states[table] for table in self.tables if table in self._states
+                      and table not in self.skipped]
+
+            changelog = [state for state in states if state.mode == "changelog" and not state.needs_copy]
+            newest = None
+            if changelog:
+                # Entradas podadas do log que a réplica não viu: só uma cópia inteira resolve
+                outcome = self._remote_many([(f"SELECT MIN(seq), MAX(seq) FROM {CHANGELOG_TABLE}", [])])[0]
+                report["round_trips"] += 1
+                oldest, newest = outcome["rows"][0] if not outcome["error"] and outcome["rows"] else (None, None)
+                for state in changelog:
+                    if oldest is not None and oldest > state.seq + 1:
+                        logger.warning(f"{state.table}: log de mudanças podado além da réplica; recopiando")
+                        state.needs_copy = True
+
+            self._check_append(states, report)
+
+            for state in states:
+                if state.needs_copy:
+                    self._copy(state, report)
+
+            pending = {state.table: state for state in states if state.table not in report["tables"]}
+            cursors = {
+                table: (state.seq if state.mode == "changelog"
+                        else (state.high_water, 0) if state.mode == "updated_at"
+                        else state.high_water_id)
+                for table, state in pending.items()
+            }
+            for table, state in pending.items():
+                report["tables"][table] = {"mode": state.mode, "copied": 0, "applied": 0}
+            drained = []
+            for _ in range(MAX_PAGES):
+                if not pending:
+                    break
+                order = list(pending.values())
+                outcomes = self._remote_many([self._page_statement(state, cursors[state.table]) for state in order])
+                report["round_trips"] += 1
+                for state, outcome in zip(order, outcomes):
+                    if outcome["error"]:
+                        state.error = report["tables"][state.table]["error"] = outcome["error"]
+                        del pending[state.table]
+                        continue
+                    applied, cursors[state.table] = self._apply_page(state, outcome["rows"], cursors[state.table])
+                    report["tables"][state.table]["applied"] += applied
+                    if len(outcome["rows"]) < PAGE_SIZE:
+                        drained.append(state)
+                        del pending[state.table]
+
+            # Só tabelas que chegaram ao fim contam como sincronizadas neste instante
+            for state in drained:
+                if state.mode == "changelog" and newest is not None:
+                    # Tabela sem mudanças também avança: a poda do log não a obriga a recopiar
+                    state.seq = max(state.seq, int(newest))
+                state.synced_at, state.error = started, None
+                with self._lock:
+                    self._save_state(state)
+
+            uses_log = any(state.mode == "changelog" for state in states)
+            if uses_log and not pending and time.time() - self._pruned_at >= PRUNE_INTERVAL:
+                # Log aplicado até o fim: sem poda, _replica_changes cresce sem limite no remoto
+                self._pruned_at = time.time()
+                try:
+                    self.prune_changelog(self.changelog_retention_days)
+                    report["round_trips"] += 1
+                except (BulkLoadError, OSError) as e:
+                    logger.warning(f"Poda do log de mudanças falhou: {e}")
+        except Exception as e:
+            report["error"] = str(e)
+            logger.error(f"Sincronização da réplica falhou: {e}")
+
+        report["seconds"] = round(time.perf_counter() - timer, 3)
+        self.stats["pulls"] += 1
+        self.last_pull = report
+        return report
+
+    def _append_due(self, state: TableState, now: float) -> bool:
+        return state.copied_at is None or now - state.copied_at >= self.append_recopy_interval
+
+    def _check_append(self, states: List[TableState], report: Dict):
+        """Marca para recópia as tabelas append com a recópia vencida ou com linhas removidas no remoto"""
+        now = time.time()
+        check = []
+        for state in states:
+            if state.mode != "append" or state.needs_copy:
+                continue
+            if self._append_due(state, now):
+                state.needs_copy = True
+            else:
+                check.append(state)
+        if not check:
+            return
+        # Mesmo intervalo de ids dos dois lados: contagem diferente é linha removida no remoto
+        counts = [(f"SELECT COUNT(*) FROM {state.table} WHERE id <= ?", [state.high_water_id]) for state in check]
+        outcomes = self._remote_many(counts)
+        report["round_trips"] += 1
+        for state, (sql, args), outcome in zip(check, counts, outcomes):
+            if outcome["error"]:
+                continue
+            with self._lock:
+                local = self._conn.execute(sql, args).fetchone()[0]
+            if outcome["rows"][0][0] != local:
+                logger.info(f"{state.table}: linhas removidas no remoto; recopiando")
+                state.needs_copy = True
+
+    def pull_if_due(self) -> Optional[Dict]:
+        """Sincroniza se alguma tabela está há mais de `interval` segundos sem sync"""
+        now = time.time()
+        for table in self.tables:
+            state = self._states.get(table)
+            if table in self.skipped:
+                continue
+            lag = state.lag(now) if state else None
+            if lag is None or lag > self.interval:
+                return self.pull()
+        return None
+
+    def prune_changelog(self, days: float = 7.0) -> None:
+        """Apaga do log remoto as entradas mais antigas que `days` (mantém a última)"""
+        with self._remote_lock:
+            self.remote.run_transaction([(
+                f"DELETE FROM {CHANGELOG_TABLE} WHERE changed_at < datetime('now', ?) "
+                f"AND seq < (SELECT MAX(seq) FROM {CHANGELOG_TABLE})",
+                [f"-{days} days"],
+            )])
+
+    # Agendamento
+
+    def start(self, interval: Optional[float] = None):
+        """Sincroniza em segundo plano a cada `interval` segundos"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval or self.interval,), name="turso-replica", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, interval: float):
+        while not self._stop.is_set():
+            self.pull()
+            self._stop.wait(interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    # Leitura
+
+    def lag(self, table: str) -> Optional[float]:
+        """Segundos desde a última sincronização completa da tabela (None: nunca)"""
+        state = self._states.get(table)
+        return state.lag() if state else None
+
+    def is_fresh(self, tables: Optional[Sequence[str]] = None) -> bool:
+        """Todas as tabelas estão na réplica com atraso até `max_lag`"""
+        now = time.time()
+        for table in tables or self.tables:
+            state = self._states.get(table)
+            lag = state.lag(now) if state and table not in self.skipped else None
+            if lag is None or lag > self.max_lag:
+                return False
+            if state.mode == "append" and (
+                state.copied_at is None or now - state.copied_at > self.append_recopy_interval + self.max_lag
+            ):
+                # Edições só chegam na recópia: atrasada, a tabela não serve leituras
+                return False
+        return True
+
+    def backend(self, tables: Optional[Sequence[str]] = None):
+        """
+        Backend para quem já fala o contrato de `docs_bulk_loader` (ex.: FederatedSearch):
+        um `SQLiteBackend` novo sobre a réplica, ou o remoto (`locked_remote`) se ela está
+        atrasada.
+        """
+        if self.is_fresh(tables):
+            self.stats["local_reads"] += 1
+            return SQLiteBackend(str(self.path))
+        self.stats["remote_reads"] += 1
+        return self.locked_remote
+
+    def fetch(self, sql: str, args: Sequence[Any] = (), tables: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Executa uma leitura e devolve as linhas como dicts.
+
+        `tables` são as tabelas que a consulta usa: se alguma não está na réplica ou está
+        atrasada além de `max_lag`, a consulta vai ao remoto.
+        """
+        tables = list(tables or self.tables)
+        if self.is_fresh(tables):
+            self.stats["local_reads"] += 1
+            return self._fetch_local(sql, args)
+        try:
+            outcome = self._remote_many([(sql, list(args))])[0]
+        except (BulkLoadError, OSError) as e:
+            if all(self._states.get(t) and self._states[t].synced_at for t in tables):
+                logger.warning(f"Remoto indisponível ({e}); lendo da réplica atrasada")
+                self.stats["stale_reads"] += 1
+                return self._fetch_local(sql, args)
+            raise
+        if outcome["error"]:
+            raise BulkLoadError(outcome["error"])
+        self.stats["remote_reads"] += 1
+        return [dict(zip(outcome["columns"], row)) for row in outcome["rows"]]
+
+    def ensure_local_index(self, table: str, columns: Sequence[str]) -> bool:
+        """
+        Índice só na réplica para as leituras locais (ex.: chave das listagens por keyset).
+
+        Some se a tabela for recriada (schema mudou no remoto); chamar de novo o recria.
+        Retorna False se a tabela ainda não está na réplica.
+        """
+        name = f"idx_{table}_{'_'.join(columns)}_replica"
+        with self._lock:
+            try:
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})")
+            except sqlite3.OperationalError:
+                return False
+        return True
+
+    def _fetch_local(self, sql, args):
+        cursor = self._reader.execute(sql, list(args))
+        columns = [col[0] for col in cursor.description or ()]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def report(self) -> Dict:
+        """
+        Modo, linhas, atraso e erro de cada tabela, mais as leituras locais x remotas.
+
+        `sees` diz o que as sincronizações incrementais trazem em cada modo; nas tabelas
+        append, edições só aparecem na recópia (`recopy_age_s`, a cada
+        `append_recopy_interval` segundos) e `stale` também considera o prazo dela.
+        """
+        now = time.time()
+        tables = {}
+        for table in self.tables:
+            state = self._states.get(table)
+            if table in self.skipped or state is None:
+                tables[table] = {"mode": None, "skipped": self.skipped.get(table, "ainda não sincronizada")}
+                continue
+            lag = state.lag(now)
+            rows = self._reader.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            tables[table] = {
+                "mode": state.mode,
+                "sees": MODE_COVERAGE[state.mode],
+                "rows": rows,
+                "lag_s": round(lag, 1) if lag is not None else None,
+                "stale": not self.is_fresh([table]),
+                "error": state.error,
+            }
+            if state.mode == "append":
+                tables[table]["recopy_age_s"] = round(now - state.copied_at, 1) if state.copied_at else None
+        return {"path": str(self.path), "max_lag_s": self.max_lag,
+                "append_recopy_s": self.append_recopy_interval, "tables": tables,
+                "reads": dict(self.stats), "last_pull": self.last_pull}
+
+    def close(self):
+        self.stop()
+        self._reader.close()
+        self._conn.close()
+        self.remote.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def format_report(report) -> str:
+    lines = [f"🗄️ Réplica {report['path']} (atraso máximo {report['max_lag_s']:.0f}s)"]
+    for table, info in report["tables"].items():
+        if info.get("mode") is None:
+            lines.append(f"  ⚠️ {table}: fora da réplica ({info['skipped']})")
+            continue
+        lag = "nunca sincronizada" if info["lag_s"] is None else f"atraso {info['lag_s']}s"
+        status = "❌ atrasada" if info["stale"] else "✅"
+        lines.append(f"  {status} {table}: {info['rows']} linhas, {info['mode']}, {lag}"
+                     + (f" — erro: {info['error']}" if info["error"] else ""))
+    pull = report.get("last_pull")
+    if pull:
+        applied = sum(t["copied"] + t["applied"] for t in pull["tables"].values())
+        lines.append(f"  🔄 Última sync: {applied} linhas em {pull['round_trips']} requisições, {pull['seconds']}s"
+                     + (f" — erro: {pull['error']}" if pull["error"] else ""))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réplica local das tabelas do context-memory (Turso)")
+    parser.add_argument("command", choices=("sync", "status", "watch", "prune"))
+    parser.add_argument("--db", default=os.getenv("TURSO_DATABASE_URL"),
+                        help="URL libsql://, http:// (sqld local) ou arquivo (padrão: TURSO_DATABASE_URL)")
+    parser.add_argument("--replica", default=os.getenv("TURSO_REPLICA_PATH", str(DEFAULT_PATH)),
+                        help="Arquivo da réplica (padrão: TURSO_REPLICA_PATH ou .replica/context-memory.db)")
+    parser.add_argument("--table", action="append", help="Restringe as tabelas (padrão: as cinco)")
+    parser.add_argument("--max-lag", type=float, default=float(os.getenv("TURSO_REPLICA_MAX_LAG", DEFAULT_MAX_LAG)))
+    parser.add_argument("--interval", type=float, default=float(os.getenv("TURSO_REPLICA_INTERVAL", DEFAULT_INTERVAL)))
+    parser.add_argument("--append-recopy", type=float,
+                        default=float(os.getenv("TURSO_REPLICA_APPEND_RECOPY", DEFAULT_APPEND_RECOPY)),
+                        help="Segundos entre recópias das tabelas sem updated_at (edições e remoções)")
+    parser.add_argument("--days", type=float, default=DEFAULT_RETENTION_DAYS,
+                        help="Idade mínima das entradas do log apagadas (prune e poda automática)")
+    parser.add_argument("--changelog", action="store_true",
+                        default=os.getenv("TURSO_REPLICA_CHANGELOG", "").lower() in ("1", "true", "yes"),
+                        help="Cria o log de mudanças (tabela e triggers) no remoto (padrão: TURSO_REPLICA_CHANGELOG)")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if not args.db and args.command != "status":
+        print("❌ Informe o banco: TURSO_DATABASE_URL ou --db")
+        return 1
+    remote = connect_backend(args.db, os.getenv("TURSO_AUTH_TOKEN")) if args.db else SQLiteBackend(":memory:")
+    replica = TursoReplica(remote, args.replica, tables=args.table or REPLICATED_TABLES,
+                           max_lag=args.max_lag, interval=args.interval, use_changelog=args.changelog,
+                           changelog_retention_days=args.days, append_recopy_interval=args.append_recopy)
+    with replica:
+        if args.command == "sync":
+            replica.pull()
+        elif args.command == "prune":
+            replica.prune_changelog(args.days)
+        elif args.command == "watch":
+            replica.start()
+            try:
+                while True:
+                    time.sleep(args.interval)
+                    print(format_report(replica.report()), flush=True)
+            except KeyboardInterrupt:
+                pass
+        report = replica.report()
+    print(json.dumps(report, indent=2, ensure_ascii=False) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Unidade de trabalho para as escritas do prp-agent no Turso
+
+Guardar um PRP analisado custava uma chamada `execute_query` por linha: o PRP, a
+análise, cada tarefa e a conversa (22+ idas ao banco para um PRP com 20 tarefas). Aqui
+as escritas são coletadas e enviadas juntas:
+
+- `insert`, `update`, `delete` e `execute` só registram a escrita (SQL parametrizado;
+  nomes de tabela e coluna são validados, valores nunca entram no texto);
+- uma escrita pode usar o id gerado por outra do mesmo lote: `insert` devolve um `Ref`,
+  que entra como valor nas linhas seguintes (ex.: `prp_id` das tarefas);
+- `commit(backend)` envia tudo em uma transação, em uma única requisição pipeline do
+  libSQL (`run_transaction` do `docs_bulk_loader`). As escritas usam `RETURNING id`
+  (id gerado, linhas afetadas) e os ids referenciados ficam em uma tabela temporária da própria conexão, lida pelas
+  escritas seguintes por subconsulta. Se algo falhar, nada é gravado;
+- `commit_each(execute)` é o caminho sem conexão direta (ex.: uma chamada de ferramenta
+  MCP por escrita): mesma ordem, os `Ref` resolvidos com o id de cada resposta.
+
+`WriteResult` traz os ids gerados por nome, as linhas afetadas por escrita e as idas ao
+banco feitas e economizadas.
+
+Uso:
+    uow = UnitOfWork()
+    prp = uow.insert("prps", {"name": "api", "title": "API"}, ref="prp")
+    for task in tasks:
+        uow.insert("prp_tasks", {"prp_id": prp, "task_name": task["name"]})
+    result = uow.commit(backend)
+    result.ids["prp"], result.round_trips_saved
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+Statement = Tuple[str, Sequence[Any]]
+
+# Ids referenciados dentro do lote (temporária: some com a conexão)
+REFS_TABLE = "_uow_refs"
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Nome inválido para tabela/coluna: {name!r}")
+    return name
+
+
+@dataclass(frozen=True)
+class Ref:
+    """Id gerado por um `insert` anterior do mesmo lote"""
+    name: str
+
+
+@dataclass
+class _Write:
+    kind: str
+    sql: str
+    values: List[Any]
+    ref: Optional[str] = None
+
+
+@dataclass
+class WriteResult:
+    """Resultado de um commit"""
+    ids: Dict[str, int] = field(default_factory=dict)
+    # Linhas afetadas por escrita, na ordem (None: desconhecido, ex.: `execute`)
+    affected: List[Optional[int]] = field(default_factory=list)
+    writes: int = 0
+    round_trips: int = 0
+    seconds: float = 0.0
+
+    @property
+    def round_trips_saved(self) -> int:
+        """Idas ao banco evitadas em relação a uma chamada por escrita"""
+        return max(0, self.writes - self.round_trips)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"ids": dict(self.ids), "affected": list(self.affected), "writes": self.writes, "round_trips": self.round_trips,
+                "round_trips_saved": self.round_trips_saved, "seconds": round(self.seconds, 4)}
+
+
+class UnitOfWork:
+    """Escritas coletadas para irem ao banco de uma vez"""
+
+    def __init__(self):
+        self._writes: List[_Write] = []
+        self._refs: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._writes)
+
+    def _ref_name(self, table: str, ref: Optional[str]) -> str:
+        name = ref or f"{table}#{len(self._writes)}"
+        if name in self._refs:
+            raise ValueError(f"Referência repetida no lote: {name!r}")
+        self._refs[name] = len(self._writes)
+        return name
+
+    def _check_refs(self, values):
+        for value in values:
+            if isinstance(value, Ref) and value.name not in self._refs:
+                raise ValueError(f"Referência {value.name!r} não foi inserida antes neste lote")
+
+    def insert(self, table: str, row: Dict[str, Any], ref: Optional[str] = None) -> Ref:
+        """
+        Registra um INSERT e devolve a referência ao id que ele vai gerar.
+
+        `ref` nomeia o id em `WriteResult.ids` (padrão: "tabela#posição").
+        """
+        columns = [_identifier(column) for column in row]
+        values = list(row.values())
+        self._check_refs(values)
+        sql = f"INSERT INTO {_identifier(table)} ({', '.join(columns)}) VALUES ({{values}}) RETURNING id"
+        name = self._ref_name(table, ref)
+        self._writes.append(_Write("insert", sql, values, name))
+        return Ref(name)
+
+    def update(self, table: str, values: Dict[str, Any], where: Dict[str, Any],
+               touch: Optional[str] = None) -> None:
+        """UPDATE com igualdade em `where`; `touch` é uma coluna que recebe CURRENT_TIMESTAMP"""
+        if not values or not where:
+            raise ValueError("update precisa de valores e de condição")
+        assignments = [f"{_identifier(column)} = {{}}" for column in values]
+        if touch:
+            assignments.append(f"{_identifier(touch)} = CURRENT_TIMESTAMP")
+        conditions = [f"{_identifier(column)} = {{}}" for column in where]
+        params = list(values.values()) + list(where.values())
+        self._check_refs(params)
+        sql = (f"UPDATE {_identifier(table)} SET {', '.join(assignments)} "
+               f"WHERE {' AND '.join(conditions)} RETURNING id")
+        self._writes.append(_Write("update", sql, params))
+
+    def delete(self, table: str, where: Dict[str, Any]) -> None:
+        if not where:
+            raise ValueError("delete precisa de condição")
+        params = list(where.values())
+        self._check_refs(params)
+        conditions = [f"{_identifier(column)} = {{}}" for column in where]
+        self._writes.append(_Write(
+            "delete", f"DELETE FROM {_identifier(table)} WHERE {' AND '.join(conditions)} RETURNING id", params
+        ))
+
+    def execute(self, sql: str, args: Sequence[Any] = ()) -> None:
+        """Instrução avulsa, já parametrizada com `?` (sem referências)"""
+        self._writes.append(_Write("execute", sql, list(args)))
+
+    # Montagem
+
+    @staticmethod
+    def _render(write: _Write, placeholder: Callable[[Any], Tuple[str, List[Any]]]) -> Statement:
+        parts, args = [], []
+        for value in write.values:
+            text, value_args = placeholder(value)
+            parts.append(text)
+            args.extend(value_args)
+        if write.kind == "insert":
+            return write.sql.format(values=", ".join(parts)), args
+        if write.kind == "execute":
+            return write.sql, args
+        return write.sql.format(*parts), args
+
+    def _compile(self) -> Tuple[List[Statement], List[int]]:
+        """Instruções do lote e a posição de cada escrita entre elas"""
+        referenced = {value.name for write in self._writes for value in write.values if isinstance(value, Ref)}
+
+        def placeholder(value):
+            if isinstance(value, Ref):
+                return f"(SELECT id FROM temp.{REFS_TABLE} WHERE name = ?)", [value.name]
+            return "?", [value]
+
+        statements: List[Statement] = []
+        positions: List[int] = []
+        if referenced:
+            statements.append((f"CREATE TEMP TABLE IF NOT EXISTS {REFS_TABLE} "
+                               "(name TEXT PRIMARY KEY, id INTEGER)", []))
+            statements.append((f"DELETE FROM temp.{REFS_TABLE}", []))
+        for write in self._writes:
+            positions.append(len(statements))
+            statements.append(self._render(write, placeholder))
+            if write.ref in referenced:
+                statements.append((f"INSERT INTO temp.{REFS_TABLE} (name, id) VALUES (?, last_insert_rowid())",
+                                   [write.ref]))
+        return statements, positions
+
+    def statements(self) -> List[Statement]:
+        """Instruções do lote para uma única transação (referências por subconsulta)"""
+        return self._compile()[0]
+
+    # Envio
+
+    def commit(self, backend) -> WriteResult:
+        """Envia o lote em uma transação (uma requisição no Turso) e esvazia a unidade"""
+        result = WriteResult(writes=len(self._writes))
+        if not self._writes:
+            return result
+        started = time.perf_counter()
+        statements, positions = self._compile()
+        rows = backend.run_transaction(statements)
+        for write, position in zip(self._writes, positions):
+            if write.kind == "insert" and rows[position]:
+                result.ids[write.ref] = rows[position][0][0]
+            result.affected.append(None if write.kind == "execute" else len(rows[position]))
+        result.round_trips = 1
+        result.seconds = time.perf_counter() - started
+        self.clear()
+        return result
+
+    async def commit_each(self, execute: Callable[[str, List[Any]], Awaitable[Optional[int]]]) -> WriteResult:
+        """
+        Uma chamada por escrita, na ordem (sem transação).
+
+        `execute(sql, args)` devolve o id gerado (lastInsertId) ou None; ele substitui
+        os `Ref` nas escritas seguintes.
+        """
+        result = WriteResult(writes=len(self._writes))
+        started = time.perf_counter()
+
+        def placeholder(value):
+            if isinstance(value, Ref):
+                return "?", [result.ids.get(value.name)]
+            return "?", [value]
+
+        for write in self._writes:
+            sql, args = self._render(write, placeholder)
+            if write.kind != "execute":
+                sql = sql[:-len(" RETURNING id")]
+            generated = await execute(sql, args)
+            result.round_trips += 1
+            if write.kind == "insert" and generated is not None:
+                result.ids[write.ref] = generated
+            result.affected.append(1 if write.kind == "insert" else None)
+        result.seconds = time.perf_counter() - started
+        self.clear()
+        return result
+
+    def clear(self):
+        self._writes.clear()
+        self._refs.clear()
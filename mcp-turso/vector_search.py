@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+"""
+Busca vetorial de PRPs em `knowledge_base.embedding`
+
+`TursoDelegator.vector_search_prps` devolvia uma lista vazia e a coluna não tinha índice.
+Aqui a busca por similaridade tem dois caminhos sobre a mesma tabela:
+
+1. nativo (libSQL/Turso): coluna `embedding F32_BLOB(256)` com o índice
+   `knowledge_base_embedding_idx` (`libsql_vector_idx`, métrica cosseno). A consulta usa
+   `vector_top_k` dentro do banco e só os k vizinhos voltam pela rede;
+2. local (SQLite sem as funções vetoriais, ex.: a réplica do `turso_replica.py`): um
+   índice ANN em processo (IVF: k-means nos vetores, busca só nas listas mais próximas
+   da consulta, com numpy quando instalado), montado a partir da mesma coluna e
+   atualizado só com as linhas novas ou alteradas.
+
+A coluna guarda float32 little-endian (`pack_vector` de `docs_chunks.py`), o formato do
+F32_BLOB: o mesmo arquivo serve aos dois caminhos. Os embeddings vêm do
+`HashingEmbedder` (mesmo usado em `doc_chunks`); `backfill` preenche as linhas sem
+embedding, gravadas com outro modelo ou cujo texto mudou desde o embedding
+(`embedding_hash`, sha256 de topic + content).
+
+Uso:
+    python3 vector_search.py schema --db libsql://...
+    python3 vector_search.py backfill --batch-size 200
+    python3 vector_search.py search "cache de contexto" -k 5
+    python3 vector_search.py search "réplica" --db .replica/context-memory.db --mode local
+
+Benchmark dos dois caminhos: `scripts/benchmark_vector_search.py`.
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from operator import mul
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+sys.path.append(str(Path(__file__).resolve().parent / "scripts"))
+from docs_bulk_loader import BulkLoadError, LibSQLFileBackend, connect_backend
+from docs_chunks import EMBEDDING_DIM, HashingEmbedder, pack_vector, unpack_vector
+from docs_manifest import content_hash
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TABLE = "knowledge_base"
+VECTOR_INDEX = "knowledge_base_embedding_idx"
+# DiskANN do libSQL: vizinhos comprimidos em float8 e grau menor deixam cada INSERT
+# várias vezes mais barato (o padrão guarda os vizinhos em float32)
+VECTOR_INDEX_OPTIONS = ("metric=cosine", "compress_neighbors=float8", "max_neighbors=32")
+# PRPs guardados como conhecimento (mesmo filtro das listagens do TursoDelegator)
+PRP_FILTER = "tags LIKE '%prp%'"
+RESULT_COLUMNS = ("id", "topic", "tags", "created_at")
+
+# vector_top_k filtra depois de achar os vizinhos: pede mais candidatos que k
+OVERFETCH = 4
+# Linhas por página ao carregar os vetores para o índice local
+LOAD_PAGE_SIZE = 1000
+
+Query = Union[str, Sequence[float]]
+
+
+def supports_vectors(backend) -> bool:
+    """O banco tem as funções vetoriais do libSQL (vector32, vector_top_k)?"""
+    try:
+        backend.query("SELECT vector_extract(vector32('[1]'))")
+        return True
+    except (BulkLoadError, *getattr(backend, "errors", ())) as e:
+        logger.debug(f"Sem funções vetoriais: {e}")
+        return False
+
+
+def _columns(backend, table: str) -> Dict[str, str]:
+    rows = backend.query("SELECT name, type FROM pragma_table_info(?)", [table])
+    return {name: (col_type or "").upper().replace(" ", "") for name, col_type in rows}
+
+
+def _index_exists(backend, name: str) -> bool:
+    return bool(backend.query("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", [name]))
+
+
+def ensure_schema(backend, table: str = TABLE, dim: int = EMBEDDING_DIM,
+                  index_options: Sequence[str] = VECTOR_INDEX_OPTIONS) -> Dict[str, Any]:
+    """
+    Cria `embedding F32_BLOB(dim)`, `embedding_model`, `embedding_hash` e, no libSQL, o
+    índice vetorial.
+
+    No SQLite comum a coluna é declarada do mesmo jeito (afinidade BLOB): se o arquivo
+    passar a ser aberto pelo libSQL, basta rodar de novo para criar o índice.
+
+    Returns:
+        native (funções vetoriais disponíveis), indexed (índice vetorial criado ou já
+        existente) e os comandos executados
+    """
+    columns = _columns(backend, table)
+    if not columns:
+        raise ValueError(f"Tabela {table} não existe")
+    native = supports_vectors(backend)
+    statements = []
+    if "embedding" not in columns:
+        statements.append(f"ALTER TABLE {table} ADD COLUMN embedding F32_BLOB({dim})")
+        columns["embedding"] = f"F32_BLOB({dim})"
+    if "embedding_model" not in columns:
+        statements.append(f"ALTER TABLE {table} ADD COLUMN embedding_model TEXT")
+    if "embedding_hash" not in columns:
+        statements.append(f"ALTER TABLE {table} ADD COLUMN embedding_hash TEXT")
+
+    indexed = False
+    if native:
+        if columns["embedding"] == f"F32_BLOB({dim})":
+            options = "".join(f", '{option}'" for option in index_options)
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS {VECTOR_INDEX} "
+                f"ON {table}(libsql_vector_idx(embedding{options}))"
+            )
+            indexed = True
+        else:
+            # SQLite não altera o tipo de uma coluna: o índice exigiria recriar a tabela
+            logger.warning(
+                f"{table}.embedding é {columns['embedding'] or 'sem tipo'}, não F32_BLOB({dim}); "
+                "sem índice vetorial, a busca usa o índice local"
+            )
+    if statements:
+        backend.run_transaction([(sql, []) for sql in statements])
+    return {"native": native, "indexed": indexed, "executed": statements}
+
+
+def document_text(topic: Optional[str], content: Optional[str]) -> str:
+    """Texto que vira o embedding de uma linha de knowledge_base"""
+    return f"{topic or ''}\n{content or ''}"
+
+
+def text_hash(text: str) -> str:
+    """Hash do texto de que saiu o embedding (`embedding_hash`)"""
+    return content_hash(text.encode("utf-8"))
+
+
+def backfill_embeddings(backend, embedder=None, table: str = TABLE, batch_size: int = 200,
+                        native: Optional[bool] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Grava o embedding das linhas sem embedding, com `embedding_model` diferente ou cujo
+    texto mudou (`embedding_hash` diferente do hash de topic + content).
+
+    Percorre a tabela por id em páginas de `batch_size`; as linhas desatualizadas de cada
+    página vão em uma transação de UPDATEs parametrizados (uma requisição no Turso).
+    Interrompido, recomeça de onde parou: as linhas já gravadas têm o hash atual e não
+    são reenviadas.
+    """
+    embedder = embedder or HashingEmbedder()
+    if native is None:
+        native = supports_vectors(backend)
+    value = "vector32(?)" if native else "?"
+    # O hash não é calculável em SQL: o texto vem junto e a comparação é feita aqui
+    select = (
+        f"SELECT id, topic, content, embedding IS NULL OR embedding_model IS NOT ?, embedding_hash "
+        f"FROM {table} WHERE id > ? ORDER BY id LIMIT ?"
+    )
+    update = f"UPDATE {table} SET embedding = {value}, embedding_model = ?, embedding_hash = ? WHERE id = ?"
+    started = time.perf_counter()
+    last_id, updated, batches = 0, 0, 0
+    while limit is None or updated < limit:
+        rows = backend.query(select, [embedder.name, last_id, batch_size])
+        if not rows:
+            break
+        stale = []
+        for row_id, topic, content, missing, stored_hash in rows:
+            text = document_text(topic, content)
+            digest = text_hash(text)
+            if missing or stored_hash != digest:
+                stale.append((row_id, text, digest))
+        if limit is not None:
+            stale = stale[:limit - updated]
+        if stale:
+            backend.run_transaction([
+                (update, [pack_vector(embedder.embed(text)), embedder.name, digest, row_id])
+                for row_id, text, digest in stale
+            ])
+            updated += len(stale)
+            batches += 1
+        last_id = rows[-1][0]
+        if len(rows) < batch_size:
+            break
+    seconds = time.perf_counter() - started
+    return {"updated": updated, "batches": batches, "model": embedder.name,
+            "seconds": round(seconds, 3), "rows_per_s": round(updated / seconds, 1) if seconds else None}
+
+
+def _normalized(data) -> Optional[array]:
+    vector = unpack_vector(data) if isinstance(data, (bytes, bytearray, memoryview)) else array("f", data)
+    norm = math.sqrt(sum(map(mul, vector, vector)))
+    if not norm:
+        return None
+    return array("f", (value / norm for value in vector))
+
+
+# Posição livre (linha removida) e linha ainda sem lista (índice não treinado)
+_REMOVED = -2
+_UNASSIGNED = -1
+
+
+class LocalVectorIndex:
+    """
+    Índice ANN em processo: IVF (inverted file) com cosseno.
+
+    Os vetores normalizados ficam em uma matriz; um k-means esférico os agrupa em
+    `nlist` listas (≈ 2·√n). A busca compara a consulta com os centróides, abre as
+    `nprobe` listas mais próximas e reordena só esses candidatos pelo cosseno exato.
+    Linhas novas entram na lista do centróide mais próximo; os centróides são
+    retreinados quando o índice cresce `retrain_factor` vezes desde o último treino.
+
+    Até `exact_below` vetores a busca é exata (varrer é mais barato que treinar). Sem
+    numpy também: os vetores ficam em arrays e a varredura é em Python puro.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, nprobe: int = 32, exact_below: int = 10000,
+                 retrain_factor: float = 2.0, kmeans_iterations: int = 8, seed: int = 13):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.exact_below = exact_below
+        self.retrain_factor = retrain_factor
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self._positions: Dict[int, int] = {}
+        self._ids: List[Optional[int]] = []
+        self._blobs: Dict[int, bytes] = {}
+        self._free: List[int] = []
+        if NUMPY_AVAILABLE:
+            self._matrix = np.zeros((0, dim), dtype=np.float32)
+            self._lists = np.zeros(0, dtype=np.int32)
+        else:
+            self._vectors: List[Optional[array]] = []
+        self._centroids = None
+        self._trained_size = 0
+        # Candidatos reordenados na última busca
+        self.last_candidates = 0
+
+    def __len__(self):
+        return len(self._positions)
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _vector(self, blob: bytes):
+        if NUMPY_AVAILABLE:
+            vector = np.frombuffer(blob, dtype="<f4").astype(np.float32)
+            norm = float(np.linalg.norm(vector)) if len(vector) == self.dim else 0.0
+            return vector / norm if norm else None
+        vector = _normalized(blob)
+        return vector if vector is not None and len(vector) == self.dim else None
+
+    def _slot(self) -> int:
+        if self._free:
+            return self._free.pop()
+        position = len(self._ids)
+        self._ids.append(None)
+        if NUMPY_AVAILABLE:
+            if position >= len(self._matrix):
+                capacity = max(1024, 2 * len(self._matrix))
+                matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+                matrix[:position] = self._matrix[:position]
+                lists = np.full(capacity, _REMOVED, dtype=np.int32)
+                lists[:position] = self._lists[:position]
+                self._matrix, self._lists = matrix, lists
+        else:
+            self._vectors.append(None)
+        return position
+
+    def add(self, row_id: int, blob: bytes) -> bool:
+        """Indexa (ou reindexa) uma linha; False se o vetor não mudou ou é inválido"""
+        blob = bytes(blob)
+        if self._blobs.get(row_id) == blob:
+            return False
+        self.remove(row_id)
+        vector = self._vector(blob)
+        if vector is None:
+            return False
+        position = self._slot()
+        if NUMPY_AVAILABLE:
+            self._matrix[position] = vector
+            self._lists[position] = (
+                int(np.argmax(self._centroids @ vector)) if self.trained else _UNASSIGNED
+            )
+        else:
+            self._vectors[position] = vector
+        self._ids[position] = row_id
+        self._positions[row_id] = position
+        self._blobs[row_id] = blob
+        return True
+
+    def remove(self, row_id: int):
+        position = self._positions.pop(row_id, None)
+        if position is None:
+            return
+        if NUMPY_AVAILABLE:
+            self._lists[position] = _REMOVED
+        else:
+            self._vectors[position] = None
+        self._ids[position] = None
+        del self._blobs[row_id]
+        self._free.append(position)
+
+    def sync(self, rows: Iterable[Tuple[int, bytes]]) -> Dict[str, int]:
+        """Deixa o índice igual a `rows` (todas as linhas): indexa novas e alteradas, remove as que sumiram"""
+        seen, changed = set(), 0
+        for row_id, blob in rows:
+            seen.add(row_id)
+            if blob is not None and self.add(row_id, blob):
+                changed += 1
+        removed = [row_id for row_id in self._positions if row_id not in seen]
+        for row_id in removed:
+            self.remove(row_id)
+        self._train_if_due()
+        return {"indexed": len(self), "changed": changed, "removed": len(removed),
+                "lists": len(self._centroids) if self.trained else 0}
+
+    def _train_if_due(self):
+        if NUMPY_AVAILABLE and len(self) > self.exact_below and (
+            not self.trained or len(self) > self._trained_size * self.retrain_factor
+        ):
+            self.train()
+
+    def train(self):
+        """k-means esférico sobre uma amostra; distribui todas as linhas pelas listas"""
+        alive = np.flatnonzero(self._lists[:len(self._ids)] != _REMOVED)
+        rng = np.random.default_rng(self.seed)
+        nlist = max(1, int(2 * math.sqrt(len(alive))))
+        sample = self._matrix[rng.choice(alive, min(len(alive), 64 * nlist), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            # Centróide sem membros fica onde estava
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+        for start in range(0, len(alive), 65536):
+            chunk = alive[start:start + 65536]
+            self._lists[chunk] = np.argmax(self._matrix[chunk] @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._trained_size = len(alive)
+
+    def _candidate_positions(self, query, k: int):
+        used = len(self._ids)
+        if NUMPY_AVAILABLE and len(self) > self.exact_below:
+            self._train_if_due()
+            probe = np.argsort(-(self._centroids @ query))[:self.nprobe]
+            positions = np.flatnonzero(np.isin(self._lists[:used], probe))
+            if len(positions) >= k:
+                return positions
+        if NUMPY_AVAILABLE:
+            return np.flatnonzero(self._lists[:used] != _REMOVED)
+        return [position for position, row_id in enumerate(self._ids) if row_id is not None]
+
+    def search(self, query: Sequence[float], k: int = 5) -> List[Tuple[int, float]]:
+        """Até k pares (id, cosseno), do mais parecido para o menos"""
+        vector = self._vector(pack_vector(query))
+        if vector is None:
+            raise ValueError(f"Vetor de consulta precisa de {self.dim} dimensões não nulas")
+        positions = self._candidate_positions(vector, k)
+        self.last_candidates = len(positions)
+        if not len(positions):
+            return []
+        if NUMPY_AVAILABLE:
+            scores = self._matrix[positions] @ vector
+            top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[positions[i]], float(scores[i])) for i in top]
+        scored = ((sum(map(mul, vector, self._vectors[position])), position) for position in positions)
+        return [(self._ids[position], similarity) for similarity, position in heapq.nlargest(k, scored)]
+
+
+class VectorSearch:
+    """
+    Busca por similaridade em `table.embedding`, no banco quando possível.
+
+    `backend` é o banco principal (Turso ou arquivo libSQL): com o índice vetorial, a
+    busca roda nele. Sem ele, o `LocalVectorIndex` é montado com os vetores de
+    `local_backend` (ex.: a réplica local) ou, na falta dela, do próprio `backend`, e
+    atualizado a cada `refresh_interval` segundos.
+    """
+
+    def __init__(self, backend, local_backend=None, table: str = TABLE, where: str = PRP_FILTER,
+                 columns: Sequence[str] = RESULT_COLUMNS, embedder=None, mode: str = "auto",
+                 refresh_interval: float = 30.0, index: Optional[LocalVectorIndex] = None):
+        if mode not in ("auto", "native", "local"):
+            raise ValueError(f"Modo inválido: {mode}")
+        self.backend = backend
+        self.local_backend = local_backend or backend
+        self.table = table
+        # Filtro fixo (nunca texto do usuário)
+        self.where = where
+        self.columns = list(columns)
+        self.embedder = embedder or HashingEmbedder()
+        self.mode = mode
+        self.refresh_interval = refresh_interval
+        self.index = index if index is not None else LocalVectorIndex(dim=self.embedder.dim)
+        self._native: Optional[bool] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.last: Dict[str, Any] = {}
+        self.stats = {"native": 0, "local": 0, "native_errors": 0, "refreshes": 0}
+
+    def native_available(self) -> bool:
+        """Funções vetoriais e índice no banco principal (verificado uma vez)"""
+        if self.mode == "local":
+            return False
+        if self._native is None:
+            try:
+                self._native = supports_vectors(self.backend) and _index_exists(self.backend, VECTOR_INDEX)
+            except (BulkLoadError, OSError) as e:
+                logger.warning(f"Não foi possível verificar o índice vetorial ({e})")
+                return False
+        if self.mode == "native" and not self._native:
+            raise ValueError(f"Índice vetorial {VECTOR_INDEX} indisponível (rode `vector_search.py schema`)")
+        return self._native
+
+    def embed_query(self, query: Query) -> List[float]:
+        vector = self.embedder.embed(query) if isinstance(query, str) else [float(v) for v in query]
+        if len(vector) != self.embedder.dim:
+            raise ValueError(f"Vetor com {len(vector)} dimensões; a coluna tem {self.embedder.dim}")
+        return vector
+
+    def search(self, query: Query, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Linhas mais parecidas com `query` (texto ou vetor).
+
+        Returns:
+            Dicts com `columns`, `distance` (distância cosseno) e `similarity`; `last`
+            registra o caminho usado, o tempo e os candidatos avaliados
+        """
+        vector = self.embed_query(query)
+        started = time.perf_counter()
+        if self.native_available():
+            try:
+                rows, candidates = self._search_native(vector, k), None
+                path = "native"
+            except (BulkLoadError, OSError) as e:
+                if self.mode == "native":
+                    raise
+                # Remoto fora do ar: o índice local (réplica) responde
+                logger.warning(f"Busca vetorial no banco falhou ({e}); usando o índice local")
+                self.stats["native_errors"] += 1
+                rows, candidates = self._search_local(vector, k)
+                path = "local"
+        else:
+            rows, candidates = self._search_local(vector, k)
+            path = "local"
+        self.stats[path] += 1
+        self.last = {"path": path, "ms": round((time.perf_counter() - started) * 1000, 3),
+                     "candidates": candidates, "results": len(rows)}
+        return rows
+
+    def _search_native(self, vector: List[float], k: int) -> List[Dict[str, Any]]:
+        select = ", ".join(f"kb.{column}" for column in self.columns)
+        sql = (
+            f"SELECT {select}, vector_distance_cos(kb.embedding, vector32(?)) AS distance "
+            f"FROM vector_top_k('{VECTOR_INDEX}', vector32(?), ?) AS top "
+            f"JOIN {self.table} kb ON kb.rowid = top.id"
+            + (f" WHERE ({self.where})" if self.where else "")
+            + " ORDER BY distance LIMIT ?"
+        )
+        blob = pack_vector(vector)
+        candidates = k * OVERFETCH if self.where else k
+        while True:
+            rows = self.backend.query(sql, [blob, blob, candidates, k])
+            # O filtro descartou vizinhos demais: pede mais candidatos ao índice
+            if len(rows) >= k or not self.where or candidates >= k * OVERFETCH ** 3:
+                break
+            candidates *= OVERFETCH
+        return [self._result(row[:-1], 1.0 - row[-1]) for row in rows]
+
+    def refresh(self, force: bool = False) -> Optional[Dict[str, int]]:
+        """Atualiza o índice local com a tabela (no máximo a cada `refresh_interval`)"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+                return None
+            started = time.perf_counter()
+            result = self.index.sync(self._load_vectors())
+            self._refreshed_at = now
+            self.stats["refreshes"] += 1
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        logger.debug(f"Índice vetorial local: {result}")
+        return result
+
+    def _load_vectors(self) -> Iterable[Tuple[int, bytes]]:
+        where = f" AND ({self.where})" if self.where else ""
+        sql = (f"SELECT id, embedding FROM {self.table} "
+               f"WHERE id > ? AND embedding IS NOT NULL{where} ORDER BY id LIMIT ?")
+        last_id = 0
+        while True:
+            rows = self.local_backend.query(sql, [last_id, LOAD_PAGE_SIZE])
+            yield from ((row_id, blob) for row_id, blob in rows)
+            if len(rows) < LOAD_PAGE_SIZE:
+                break
+            last_id = rows[-1][0]
+
+    def _search_local(self, vector: List[float], k: int) -> Tuple[List[Dict[str, Any]], int]:
+        self.refresh()
+        with self._lock:
+            hits = self.index.search(vector, k)
+            candidates = self.index.last_candidates
+        if not hits:
+            return [], candidates
+        placeholders = ", ".join("?" for _ in hits)
+        rows = self.local_backend.query(
+            f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE id IN ({placeholders})",
+            [row_id for row_id, _ in hits],
+        )
+        by_id = {row[self.columns.index("id")]: row for row in rows}
+        return [self._result(by_id[row_id], similarity) for row_id, similarity in hits if row_id in by_id], candidates
+
+    def _result(self, row: Sequence[Any], similarity: float) -> Dict[str, Any]:
+        result = dict(zip(self.columns, row))
+        result["similarity"] = round(similarity, 6)
+        result["distance"] = round(1.0 - similarity, 6)
+        return result
+
+
+def open_backend(target: str, auth_token: Optional[str] = None, libsql: bool = False):
+    """Backend do CLI: `--libsql` abre o arquivo local pelo driver do libSQL"""
+    if libsql:
+        return LibSQLFileBackend(target[len("file:"):] if target.startswith("file:") else target)
+    return connect_backend(target, auth_token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca vetorial de PRPs em knowledge_base.embedding")
+    parser.add_argument("command", choices=("schema", "backfill", "search"))
+    parser.add_argument("query", nargs="?", help="search: texto da consulta")
+    parser.add_argument("--db", default=os.getenv("TURSO_DATABASE_URL"),
+                        help="URL libsql://, http:// (sqld local) ou arquivo (padrão: TURSO_DATABASE_URL)")
+    parser.add_argument("--libsql", action="store_true", help="Abre o arquivo local pelo driver libSQL")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--limit", type=int, help="backfill: máximo de linhas")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--mode", choices=("auto", "native", "local"), default="auto")
+    parser.add_argument("--all", action="store_true", help="search: toda a tabela, não só PRPs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    try:
+        backend = open_backend(args.db, os.getenv("TURSO_AUTH_TOKEN"), args.libsql)
+    except (ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    try:
+        if args.command == "schema":
+            print(json.dumps(ensure_schema(backend), indent=2, ensure_ascii=False))
+        elif args.command == "backfill":
+            ensure_schema(backend)
+            print(json.dumps(backfill_embeddings(backend, batch_size=args.batch_size, limit=args.limit),
+                             indent=2, ensure_ascii=False))
+        else:
+            if not args.query:
+                parser.error("search precisa do texto da consulta")
+            search = VectorSearch(backend, mode=args.mode, where="" if args.all else PRP_FILTER)
+            for row in search.search(args.query, args.k):
+                print(f"  {row['similarity']:.3f}  #{row['id']}  {(row['topic'] or 'N/A')[:70]}")
+            print(f"🔎 {search.last['results']} resultados, caminho {search.last['path']}, {search.last['ms']}ms")
+    except (BulkLoadError, ValueError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        backend.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
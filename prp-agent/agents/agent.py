@@ -4,10 +4,16 @@ Agente PRP Principal.
 Este módulo contém o agente PydanticAI especializado em análise e gerenciamento de PRPs.
 """
 
+import asyncio
 import logging
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional
 from pydantic_ai import Agent, RunContext
 from .providers import get_llm_model, get_test_model
 from .dependencies import PRPAgentDependencies
+from .llm_clients import get_llm_registry
+from .settings import settings
 from .tools import (
     create_prp, 
     search_prps, 
@@ -137,24 +143,134 @@ async def chat_with_prp_agent(
     Returns:
         Resposta do agente
     """
-    if deps is None:
+    owns_deps = deps is None
+    if owns_deps:
         deps = PRPAgentDependencies()
     
     try:
+        # Turnos recentes, PRPs e documentos relevantes dentro do orçamento de tokens
+        context = await deps.context_assembler.assemble(
+            message,
+            turns=deps.get_recent_conversations(settings.context_recent_turns),
+            summary=deps.get_conversation_summary(),
+        )
+        prompt = context.render(message)
+        
         if use_test_model:
             # Usar modelo de teste para desenvolvimento
             test_model = get_test_model()
             with prp_agent.override(model=test_model):
-                result = await prp_agent.run(message, deps=deps)
+                result = await prp_agent.run(prompt, deps=deps)
         else:
             # Usar modelo real
-            result = await prp_agent.run(message, deps=deps)
+            result = await prp_agent.run(prompt, deps=deps)
+        
+        deps.add_conversation(
+            message,
+            result.data,
+            {"action": "chat", "context_tokens": context.tokens,
+             "tokens_saved": context.tokens_saved, "prefix_cache_hit": context.prefix_cache_hit}
+        )
         
         return result.data
         
     except Exception as e:
         logger.error(f"Erro na conversa com agente: {e}")
         return f"❌ Erro interno do agente: {str(e)}"
+    finally:
+        if owns_deps:
+            deps.close()
+
+@dataclass
+class StreamMetrics:
+    """Latências de uma resposta em streaming."""
+
+    ttft_ms: Optional[int] = None  # tempo até o primeiro token
+    total_ms: int = 0
+    chunks: int = 0
+    chars: int = 0
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "ttft_ms": self.ttft_ms,
+            "total_ms": self.total_ms,
+            "chunks": self.chunks,
+            "chars": self.chars,
+        }
+
+async def stream_chat_with_prp_agent(
+    message: str,
+    deps: PRPAgentDependencies = None,
+    use_test_model: bool = False,
+    metrics: Optional[StreamMetrics] = None
+) -> AsyncIterator[str]:
+    """
+    Conversar com o agente PRP recebendo a resposta em pedaços, à medida que o modelo gera.
+    
+    As ferramentas chamadas pelo agente rodam antes do primeiro pedaço; o texto da
+    resposta final chega token a token.
+    
+    Args:
+        message: Mensagem do usuário
+        deps: Dependências do agente (opcional)
+        use_test_model: Se deve usar modelo de teste (para desenvolvimento)
+        metrics: Preenchido com tempo até o primeiro token e latência total
+    
+    Yields:
+        Trechos de texto da resposta
+    """
+    metrics = metrics if metrics is not None else StreamMetrics()
+    owns_deps = deps is None
+    if owns_deps:
+        deps = PRPAgentDependencies()
+    
+    started = time.perf_counter()
+    parts = []
+    try:
+        context = await deps.context_assembler.assemble(
+            message,
+            turns=deps.get_recent_conversations(settings.context_recent_turns),
+            summary=deps.get_conversation_summary(),
+        )
+        prompt = context.render(message)
+        model = get_test_model() if use_test_model else None
+        
+        async with prp_agent.run_stream(prompt, deps=deps, model=model) as result:
+            # Sem agrupamento por tempo: cada delta do modelo é repassado na hora
+            async for delta in result.stream_text(delta=True, debounce_by=None):
+                if not delta:
+                    continue
+                if metrics.ttft_ms is None:
+                    metrics.ttft_ms = int((time.perf_counter() - started) * 1000)
+                metrics.chunks += 1
+                metrics.chars += len(delta)
+                parts.append(delta)
+                yield delta
+        
+        metrics.total_ms = int((time.perf_counter() - started) * 1000)
+        logger.info(
+            f"Resposta em streaming: primeiro token em {metrics.ttft_ms} ms, "
+            f"total {metrics.total_ms} ms ({metrics.chunks} pedaços)"
+        )
+        deps.add_conversation(
+            message,
+            "".join(parts),
+            {"action": "chat", "streamed": True, **metrics.as_dict(),
+             "context_tokens": context.tokens, "tokens_saved": context.tokens_saved,
+             "prefix_cache_hit": context.prefix_cache_hit}
+        )
+        
+    except Exception as e:
+        metrics.total_ms = int((time.perf_counter() - started) * 1000)
+        metrics.error = str(e)
+        logger.error(f"Erro na conversa com agente (streaming): {e}")
+        # Separa o erro do texto parcial que já foi entregue
+        separator = "\n\n" if parts else ""
+        yield f"{separator}❌ Erro interno do agente: {str(e)}"
+    finally:
+        if owns_deps:
+            deps.close()
 
 def chat_with_prp_agent_sync(
     message: str, 
@@ -172,24 +288,8 @@ def chat_with_prp_agent_sync(
     Returns:
         Resposta do agente
     """
-    if deps is None:
-        deps = PRPAgentDependencies()
-    
-    try:
-        if use_test_model:
-            # Usar modelo de teste para desenvolvimento
-            test_model = get_test_model()
-            with prp_agent.override(model=test_model):
-                result = prp_agent.run_sync(message, deps=deps)
-        else:
-            # Usar modelo real
-            result = prp_agent.run_sync(message, deps=deps)
-        
-        return result.data
-        
-    except Exception as e:
-        logger.error(f"Erro na conversa com agente: {e}")
-        return f"❌ Erro interno do agente: {str(e)}"
+    # Mesmo fluxo da versão assíncrona (montagem de contexto incluída)
+    return asyncio.run(chat_with_prp_agent(message, deps, use_test_model))
 
 # Função para obter estatísticas do agente
 def get_agent_stats(deps: PRPAgentDependencies) -> dict:
@@ -199,7 +299,11 @@ def get_agent_stats(deps: PRPAgentDependencies) -> dict:
         "conversation_count": len(deps.conversation_history),
         "project_context": deps.project_context,
         "database_path": deps.database_path,
-        "max_tokens_per_analysis": deps.max_tokens_per_analysis
+        "max_tokens_per_analysis": deps.max_tokens_per_analysis,
+        "database_queries": deps.db.query_stats(),
+        "prp_cache": deps.prp_loader.stats(),
+        "context": deps.context_assembler.stats,
+        "llm": get_llm_registry().stats()
     }
 
 # Função para limpar histórico de conversas
@@ -209,6 +313,6 @@ def clear_conversation_history(deps: PRPAgentDependencies):
     logger.info("Histórico de conversas limpo")
 
 # Função para exportar conversas
-def export_conversations(deps: PRPAgentDependencies) -> list:
-    """Exportar histórico de conversas."""
-    return deps.conversation_history.copy() 
\ No newline at end of file
+def export_conversations(deps: PRPAgentDependencies) -> Iterator[dict]:
+    """Exportar histórico de conversas (lido do banco em páginas, sem copiar tudo para a memória)."""
+    return deps.conversation_history.iter_export()
\ No newline at end of file
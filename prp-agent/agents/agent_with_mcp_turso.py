@@ -18,6 +18,8 @@ from datetime import datetime
 from .agent import prp_agent
 from .dependencies import PRPAgentDependencies
 from .providers import get_llm_model, get_test_model
+from .context_retrieval import ContextRetriever, get_context_retriever
+from .settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -30,8 +32,15 @@ class PRPAgentWithMCPTurso:
     FOCUS: Análise inteligente de PRPs, expertise especializada
     """
     
-    def __init__(self, database: str = "context-memory"):
+    def __init__(
+        self,
+        database: str = "context-memory",
+        database_path: Optional[str] = None,
+        retriever: Optional[ContextRetriever] = None,
+    ):
         self.database = database
+        self.database_path = database_path or settings.database_path
+        self._retriever = retriever
         self.mcp_available = self._check_mcp_availability()
         
     def _check_mcp_availability(self) -> bool:
@@ -43,99 +52,33 @@ class PRPAgentWithMCPTurso:
         except Exception:
             logger.warning("🚨 MCP Turso não disponível - funcionando sem contexto")
             return False
+
+    @property
+    def retriever(self) -> ContextRetriever:
+        """Retriever de contexto do banco (compartilhado entre instâncias)."""
+        if self._retriever is None:
+            self._retriever = get_context_retriever(self.database_path)
+        return self._retriever
     
     async def search_relevant_context(self, message: str, limit: int = 3) -> List[Dict[str, Any]]:
         """
-        Busca contexto relevante no MCP Turso baseado na mensagem.
+        Busca contexto relevante baseado na mensagem.
         
-        DELEGA para MCP: mcp_turso_execute_read_only_query
-        ADICIONA: Análise inteligente de relevância
+        Documentação (doc_chunks), conversas anteriores e PRPs são consultados ao mesmo
+        tempo nos índices FTS5 e os resultados são fundidos em um único ranking. Respostas
+        ficam em cache por mensagem; fontes que não respondem dentro do prazo
+        (`context_retrieval_budget_ms`) ficam de fora deste turno.
         """
         if not self.mcp_available:
             return []
             
         try:
-            # DELEGA para MCP - Buscar em documentação
-            docs_query = f"""
-            SELECT title, content, summary, cluster_name 
-            FROM docs 
-            WHERE content LIKE '%{message[:50]}%' 
-            OR summary LIKE '%{message[:50]}%'
-            OR keywords LIKE '%{message[:50]}%'
-            ORDER BY relevance_score DESC 
-            LIMIT {limit}
-            """
-            
-            # DELEGA para MCP - Buscar conversas anteriores
-            conversations_query = f"""
-            SELECT message, response, context, timestamp
-            FROM conversations 
-            WHERE message LIKE '%{message[:50]}%'
-            OR response LIKE '%{message[:50]}%'
-            ORDER BY timestamp DESC
-            LIMIT {limit}
-            """
-            
-            # DELEGA para MCP - Buscar PRPs relacionados
-            prps_query = f"""
-            SELECT name, title, description, objective, status
-            FROM prps
-            WHERE description LIKE '%{message[:50]}%'
-            OR title LIKE '%{message[:50]}%'
-            ORDER BY created_at DESC
-            LIMIT {limit}
-            """
-            
-            # ADICIONA análise inteligente de relevância
-            context = self._analyze_context_relevance(message, {
-                "docs": docs_query,
-                "conversations": conversations_query,
-                "prps": prps_query
-            })
-            
-            return context
+            return await self.retriever.retrieve(message, limit=limit)
             
         except Exception as e:
             logger.error(f"Erro ao buscar contexto MCP: {e}")
             return []
     
-    def _analyze_context_relevance(self, message: str, queries: Dict[str, str]) -> List[Dict[str, Any]]:
-        """
-        Analisa relevância do contexto (expertise do agente).
-        
-        ADICIONA: Análise inteligente de relevância
-        """
-        # Análise inteligente baseada no conteúdo da mensagem
-        message_lower = message.lower()
-        
-        context = []
-        
-        # Análise de relevância para documentação
-        if any(keyword in message_lower for keyword in ['prp', 'requirement', 'feature', 'funcionalidade']):
-            context.append({
-                "type": "documentation",
-                "relevance": "high",
-                "reason": "Mensagem relacionada a PRPs e requisitos"
-            })
-        
-        # Análise de relevância para conversas
-        if any(keyword in message_lower for keyword in ['como', 'help', 'ajuda', 'exemplo']):
-            context.append({
-                "type": "conversation_history",
-                "relevance": "medium", 
-                "reason": "Mensagem busca ajuda ou exemplos"
-            })
-        
-        # Análise de relevância para PRPs
-        if any(keyword in message_lower for keyword in ['criar', 'gerar', 'novo', 'implementar']):
-            context.append({
-                "type": "prps",
-                "relevance": "high",
-                "reason": "Mensagem sobre criação ou implementação"
-            })
-        
-        return context
-    
     def format_context_for_prompt(self, context: List[Dict[str, Any]]) -> str:
         """Formata contexto para incluir no prompt do agente."""
         
@@ -150,6 +93,10 @@ class PRPAgentWithMCPTurso:
             reason = ctx.get("reason", "N/A")
             
             context_text += f"\n📋 **{ctx_type.upper()}** (Relevância: {relevance}):\n"
+            if ctx.get("title"):
+                context_text += f"   📌 {ctx['title']}\n"
+            if ctx.get("content"):
+                context_text += f"   📄 {ctx['content']}\n"
             context_text += f"   💡 Motivo: {reason}\n"
         
         context_text += "\n📝 **Use este contexto para fornecer uma resposta mais informada.**\n\n"
@@ -0,0 +1,340 @@
+"""
+Pipeline de análise de PRPs com LLM.
+
+Analisa um ou muitos PRPs com o modelo configurado em `providers.get_llm_model`:
+
+- várias análises em paralelo, limitadas por concorrência e por requisições por minuto;
+- cache pelo hash do prompt: um PRP que não mudou desde a última análise concluída
+  não é enviado de novo ao LLM;
+- saída validada pelo modelo Pydantic `PRPAnalysis` (o pydantic-ai pede correção ao
+  modelo quando o JSON não valida);
+- tokens e latência reais gravados em `prp_llm_analysis`, com as tarefas extraídas
+  inseridas em lote em `prp_tasks` na mesma transação. Cada tarefa guarda a análise de
+  origem (`analysis_id`): uma nova análise do PRP substitui as tarefas extraídas antes,
+  sem tocar nas criadas à mão.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+from pydantic_ai import Agent
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractedTask(BaseModel):
+    """Tarefa extraída de um PRP."""
+
+    name: str = Field(description="Nome da tarefa")
+    description: str = Field(description="Descrição detalhada")
+    type: Literal["feature", "bugfix", "refactor", "test", "docs", "setup"] = "feature"
+    priority: Literal["low", "medium", "high", "critical"] = "medium"
+    estimated_hours: float = Field(ge=0, description="Estimativa em horas")
+    complexity: Literal["low", "medium", "high"] = "medium"
+    context_files: List[str] = Field(default_factory=list)
+    acceptance_criteria: str = ""
+
+
+class PRPAnalysis(BaseModel):
+    """Resultado validado da análise de um PRP."""
+
+    tasks: List[ExtractedTask]
+    summary: str = Field(description="Resumo da análise")
+    total_estimated_hours: float = Field(ge=0)
+    complexity_assessment: Literal["low", "medium", "high"]
+    confidence_score: float = Field(ge=0, le=1, description="Confiança da análise (0-1)")
+
+
+ANALYSIS_SYSTEM_PROMPT = """
+Você analisa PRPs (Product Requirement Prompts) e extrai as tarefas necessárias para
+implementá-los. Seja específico, estime horas realisticamente e responda em Português do Brasil.
+"""
+
+# Criado sem modelo: o modelo é passado em cada execução
+analysis_agent = Agent(
+    output_type=PRPAnalysis,
+    system_prompt=ANALYSIS_SYSTEM_PROMPT,
+    retries=2,
+)
+
+
+def build_analysis_prompt(prp: Dict[str, Any]) -> str:
+    """Monta o prompt de extração de tarefas de um PRP."""
+    return f"""
+Analise o seguinte PRP e extraia as tarefas necessárias:
+
+**PRP:** {prp['title']}
+**Objetivo:** {prp['objective']}
+**Descrição:** {prp['description']}
+**Contexto:** {prp['context_data']}
+**Implementação:** {prp['implementation_details']}
+"""
+
+
+def ensure_analysis_schema(conn: sqlite3.Connection):
+    """
+    Adiciona `prompt_hash` em prp_llm_analysis (com índice) e `analysis_id` em
+    prp_tasks, nas tabelas que existirem.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(prp_llm_analysis)")]
+    task_columns = [row[1] for row in conn.execute("PRAGMA table_info(prp_tasks)")]
+    with conn:
+        if columns:
+            if "prompt_hash" not in columns:
+                conn.execute("ALTER TABLE prp_llm_analysis ADD COLUMN prompt_hash TEXT")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_prp_llm_analysis_prompt_hash "
+                "ON prp_llm_analysis(prp_id, prompt_hash)"
+            )
+        if task_columns and "analysis_id" not in task_columns:
+            conn.execute("ALTER TABLE prp_tasks ADD COLUMN analysis_id INTEGER")
+
+
+class RateLimiter:
+    """Limita chamadas ao LLM por concorrência e por requisições por minuto."""
+
+    def __init__(self, max_concurrency: int = 4, requests_per_minute: float = 0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        """Espera uma vaga de concorrência e o próximo horário livre do limite por minuto."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Primitivas do asyncio pertencem ao event loop em uso
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._lock = asyncio.Lock()
+        await self._semaphore.acquire()
+        if self.interval:
+            try:
+                async with self._lock:
+                    now = time.monotonic()
+                    wait = self._next_slot - now
+                    self._next_slot = max(now, self._next_slot) + self.interval
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            except BaseException:
+                # Cancelada na espera: __aexit__ não roda, a vaga volta aqui
+                self._semaphore.release()
+                raise
+
+    def release(self):
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+@dataclass
+class AnalysisOutcome:
+    """Resultado da análise de um PRP pelo pipeline."""
+
+    prp_id: int
+    analysis_id: Optional[int] = None
+    analysis: Optional[PRPAnalysis] = None
+    cached: bool = False
+    tokens_used: int = 0
+    processing_time_ms: int = 0
+    tasks_inserted: int = 0
+    error: Optional[str] = None
+
+
+class PRPAnalysisPipeline:
+    """Analisa PRPs em paralelo com cache por hash do prompt."""
+
+    def __init__(
+        self,
+        db,
+        prp_loader,
+        model=None,
+        max_concurrency: int = 4,
+        requests_per_minute: float = 0,
+        timeout: float = 30,
+        max_tokens: Optional[int] = None,
+    ):
+        self.db = db
+        self.prp_loader = prp_loader
+        self._model = model
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.rate_limiter = RateLimiter(max_concurrency, requests_per_minute)
+
+    @property
+    def model(self):
+        # Resolvido só na primeira análise para não exigir credenciais ao criar as dependências
+        if self._model is None:
+            from .providers import get_llm_model
+
+            self._model = get_llm_model()
+        return self._model
+
+    def prompt_hash(self, prompt: str, analysis_type: str) -> str:
+        model_name = getattr(self.model, "model_name", str(self.model))
+        return hashlib.sha256(f"{model_name}\n{analysis_type}\n{prompt}".encode()).hexdigest()
+
+    async def _cached_analysis(
+        self, prp_id: int, analysis_type: str, prompt_hash: str
+    ) -> Optional[AnalysisOutcome]:
+        row = await self.db.fetch_one(
+            """
+            SELECT id, parsed_data, tokens_used, processing_time_ms
+            FROM prp_llm_analysis
+            WHERE prp_id = ? AND prompt_hash = ? AND analysis_type = ? AND status = 'completed'
+            ORDER BY id DESC LIMIT 1
+            """,
+            (prp_id, prompt_hash, analysis_type),
+            label="cached_llm_analysis",
+        )
+        if row is None:
+            return None
+        return AnalysisOutcome(
+            prp_id=prp_id,
+            analysis_id=row["id"],
+            analysis=PRPAnalysis.model_validate_json(row["parsed_data"]),
+            cached=True,
+            tokens_used=row["tokens_used"] or 0,
+            processing_time_ms=row["processing_time_ms"] or 0,
+        )
+
+    def _save(
+        self,
+        conn: sqlite3.Connection,
+        prp_id: int,
+        analysis_type: str,
+        prompt: str,
+        prompt_hash: str,
+        outcome: AnalysisOutcome,
+    ) -> int:
+        model_name = getattr(self.model, "model_name", str(self.model))
+        if outcome.analysis is None:
+            cursor = conn.execute(
+                """
+                INSERT INTO prp_llm_analysis (
+                    prp_id, analysis_type, input_content, output_content, model_used,
+                    processing_time_ms, status, error_message, prompt_hash
+                ) VALUES (?, ?, ?, '', ?, ?, 'failed', ?, ?)
+                """,
+                (prp_id, analysis_type, prompt, model_name, outcome.processing_time_ms,
+                 outcome.error, prompt_hash),
+            )
+            return cursor.lastrowid
+
+        output = outcome.analysis.model_dump_json()
+        cursor = conn.execute(
+            """
+            INSERT INTO prp_llm_analysis (
+                prp_id, analysis_type, input_content, output_content, parsed_data,
+                model_used, tokens_used, processing_time_ms, confidence_score, prompt_hash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (prp_id, analysis_type, prompt, output, output, model_name, outcome.tokens_used,
+             outcome.processing_time_ms, outcome.analysis.confidence_score, prompt_hash),
+        )
+        analysis_id = cursor.lastrowid
+        # As tarefas de análises anteriores dão lugar às desta
+        conn.execute(
+            "DELETE FROM prp_tasks WHERE prp_id = ? AND analysis_id IS NOT NULL", (prp_id,)
+        )
+        conn.executemany(
+            """
+            INSERT INTO prp_tasks (
+                prp_id, task_name, description, task_type, priority, estimated_hours,
+                complexity, context_files, acceptance_criteria, analysis_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (prp_id, task.name, task.description, task.type, task.priority,
+                 task.estimated_hours, task.complexity, json.dumps(task.context_files),
+                 task.acceptance_criteria, analysis_id)
+                for task in outcome.analysis.tasks
+            ],
+        )
+        outcome.tasks_inserted = len(outcome.analysis.tasks)
+        return analysis_id
+
+    async def _analyze_prp(
+        self, prp: Dict[str, Any], analysis_type: str, force: bool
+    ) -> AnalysisOutcome:
+        prp_id = prp["id"]
+        prompt = build_analysis_prompt(prp)
+        prompt_hash = self.prompt_hash(prompt, analysis_type)
+
+        if not force:
+            cached = await self._cached_analysis(prp_id, analysis_type, prompt_hash)
+            if cached is not None:
+                return cached
+
+        outcome = AnalysisOutcome(prp_id=prp_id)
+        async with self.rate_limiter:
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    analysis_agent.run(
+                        prompt,
+                        model=self.model,
+                        model_settings={"max_tokens": self.max_tokens} if self.max_tokens else None,
+                    ),
+                    self.timeout,
+                )
+                outcome.analysis = result.output
+                outcome.tokens_used = result.usage().total_tokens or 0
+            except Exception as e:
+                logger.error(f"Erro na análise LLM do PRP {prp_id}: {e!r}")
+                outcome.error = str(e) or type(e).__name__
+            outcome.processing_time_ms = int((time.perf_counter() - started) * 1000)
+
+        outcome.analysis_id = await self.db.transaction(
+            lambda conn: self._save(conn, prp_id, analysis_type, prompt, prompt_hash, outcome),
+            label="save_llm_analysis",
+        )
+        self.prp_loader.invalidate(prp_id)
+        return outcome
+
+    async def analyze_many(
+        self,
+        prp_ids: Iterable[int],
+        analysis_type: str = "task_extraction",
+        force: bool = False,
+    ) -> List[AnalysisOutcome]:
+        """
+        Analisa vários PRPs em paralelo, respeitando o rate limiter.
+
+        Args:
+            prp_ids: IDs dos PRPs
+            analysis_type: Tipo de análise registrado em prp_llm_analysis
+            force: Ignorar o cache e chamar o LLM mesmo para PRPs sem mudanças
+
+        Returns:
+            Um resultado por PRP, na ordem dos IDs (com `error` para PRPs inexistentes)
+        """
+        prp_ids = list(prp_ids)
+        details = await self.prp_loader.load_many(prp_ids)
+
+        async def run(prp_id: int) -> AnalysisOutcome:
+            if prp_id not in details:
+                return AnalysisOutcome(prp_id=prp_id, error="PRP não encontrado")
+            return await self._analyze_prp(details[prp_id].prp, analysis_type, force)
+
+        return list(await asyncio.gather(*(run(prp_id) for prp_id in prp_ids)))
+
+    async def analyze(
+        self, prp_id: int, analysis_type: str = "task_extraction", force: bool = False
+    ) -> AnalysisOutcome:
+        """Analisa um PRP."""
+        return (await self.analyze_many([prp_id], analysis_type, force))[0]
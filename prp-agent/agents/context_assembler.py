@@ -0,0 +1,296 @@
+"""
+Montagem de contexto com orçamento de tokens.
+
+Antes de cada turno de conversa, o `ContextAssembler` escolhe o que vai junto com a
+mensagem do usuário:
+
+- turnos recentes da conversa (e o resumo dos turnos compactados);
+- PRPs relevantes (índice FTS5 `prps_fts`, ordenado por BM25);
+- documentos relevantes (tabela `docs`, quando existir no banco).
+
+Cada candidato recebe uma pontuação e os melhores entram até o orçamento de tokens,
+medido por uma estimativa local rápida (sem tokenizer do provedor). PRPs, documentos e
+resumo formam um prefixo renderizado em ordem estável: quando a seleção não muda entre
+turnos, o texto é reaproveitado byte a byte, o que permite o cache de prompt do provedor.
+"""
+
+import hashlib
+import logging
+import math
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .search_index import BM25_WEIGHTS, build_match_query
+
+logger = logging.getLogger(__name__)
+
+# Estimativa média para texto em português/inglês nos tokenizers BPE atuais
+CHARS_PER_TOKEN = 4
+
+# Prefixos renderizados mantidos em memória
+PREFIX_CACHE_SIZE = 32
+
+# Trecho máximo de cada candidato
+MAX_ITEM_CHARS = 1200
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa local de tokens (~4 caracteres por token)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _terms(text: str) -> set:
+    return {term for term in re.findall(r"\w+", text.lower()) if len(term) > 2}
+
+
+@dataclass
+class ContextItem:
+    """Candidato a entrar no contexto."""
+
+    kind: str  # "prp", "doc" ou "turn"
+    key: str
+    text: str
+    score: float
+    tokens: int = 0
+    order: int = 0
+    turn: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        if len(self.text) > MAX_ITEM_CHARS:
+            self.text = self.text[:MAX_ITEM_CHARS] + "…"
+        self.tokens = estimate_tokens(self.text)
+
+
+@dataclass
+class AssembledContext:
+    """Resultado da montagem de contexto de um turno."""
+
+    prefix: str
+    turns: List[Dict[str, Any]]
+    tokens: int
+    budget: int
+    candidate_tokens: int
+    prefix_cache_hit: bool = False
+    prefix_tokens: int = 0
+    items: List[str] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        """Tokens de candidatos que ficaram de fora por causa do orçamento."""
+        return max(0, self.candidate_tokens - self.tokens)
+
+    def render(self, message: str) -> str:
+        """Prompt completo: prefixo estável, turnos recentes e a mensagem atual."""
+        parts = [self.prefix] if self.prefix else []
+        if self.turns:
+            history = "\n".join(
+                f"Usuário: {turn['message']}\nAgente: {turn.get('response') or ''}"
+                for turn in self.turns
+            )
+            parts.append(f"## Conversa recente\n{history}")
+        parts.append(f"Mensagem do usuário: {message}")
+        return "\n\n".join(parts)
+
+
+class ContextAssembler:
+    """Seleciona contexto relevante por pontuação dentro de um orçamento de tokens."""
+
+    def __init__(
+        self,
+        db=None,
+        token_budget: int = 2000,
+        max_prps: int = 5,
+        max_docs: int = 3,
+    ):
+        self.db = db
+        self.token_budget = token_budget
+        self.max_prps = max_prps
+        self.max_docs = max_docs
+        self._prefix_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._last_prefix_key: Optional[str] = None
+        self.stats = {
+            "turns": 0,
+            "tokens_sent": 0,
+            "tokens_saved": 0,
+            "prefix_cache_hits": 0,
+            "prefix_tokens_reused": 0,
+        }
+
+    async def _prp_candidates(self, message: str) -> List[ContextItem]:
+        match_query = build_match_query(message)
+        if self.db is None or not match_query:
+            return []
+        await self.db.open()
+        if not self.db.fts_available:
+            return []
+        # Termos com OR: a mensagem é linguagem natural, não uma busca exata
+        match_query = " OR ".join(match_query.split(" "))
+        rows = await self.db.fetch_all(
+            f"""
+            SELECT p.id, p.title, p.status, p.priority, p.objective, p.description,
+                   bm25(prps_fts, {', '.join(str(w) for w in BM25_WEIGHTS)}) AS rank
+            FROM prps_fts JOIN prps p ON p.id = prps_fts.rowid
+            WHERE prps_fts MATCH ?
+            ORDER BY rank LIMIT ?
+            """,
+            (match_query, self.max_prps),
+            label="context_prps",
+        )
+        items = []
+        for position, row in enumerate(rows):
+            text = (
+                f"- PRP {row['id']}: {row['title']} ({row['status']}, {row['priority']})\n"
+                f"  Objetivo: {row['objective']}\n  Descrição: {row['description'] or ''}"
+            )
+            # BM25 do SQLite é negativo (mais negativo = mais relevante)
+            score = 1.0 / (1 + position) + min(1.0, -row["rank"] / 10)
+            items.append(ContextItem("prp", f"prp:{row['id']}", text, score, order=row["id"]))
+        return items
+
+    async def _doc_candidates(self, message: str) -> List[ContextItem]:
+        if self.db is None or self.max_docs <= 0:
+            return []
+        terms = sorted(_terms(message), key=len, reverse=True)[:3]
+        if not terms:
+            return []
+        await self.db.open()
+        exists = await self.db.fetch_one(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'docs'",
+            label="context_docs_exists",
+        )
+        if not exists:
+            return []
+        conditions = " OR ".join("(title LIKE ? OR summary LIKE ?)" for _ in terms)
+        params = [value for term in terms for value in (f"%{term}%", f"%{term}%")]
+        rows = await self.db.fetch_all(
+            f"SELECT id, title, summary FROM docs WHERE {conditions} LIMIT ?",
+            params + [self.max_docs * 4],
+            label="context_docs",
+        )
+        message_terms = _terms(message)
+        items = []
+        for row in rows:
+            text = f"- {row['title']}: {row['summary'] or ''}"
+            overlap = len(message_terms & _terms(text)) / (len(message_terms) or 1)
+            items.append(ContextItem("doc", f"doc:{row['id']}", text, overlap, order=row["id"]))
+        return sorted(items, key=lambda item: -item.score)[: self.max_docs]
+
+    @staticmethod
+    def _turn_candidates(message: str, turns: List[Dict[str, Any]]) -> List[ContextItem]:
+        message_terms = _terms(message)
+        items = []
+        half = MAX_ITEM_CHARS // 2
+        for age, (index, turn) in enumerate(reversed(list(enumerate(turns)))):
+            # Mensagem e resposta abreviadas separadamente para caber no limite do item
+            short_turn = {
+                "message": str(turn.get("message", ""))[:half],
+                "response": str(turn.get("response") or "")[:half],
+            }
+            text = f"Usuário: {short_turn['message']}\nAgente: {short_turn['response']}"
+            overlap = len(message_terms & _terms(text)) / (len(message_terms) or 1)
+            # O turno mais recente quase sempre entra: mantém a continuidade da conversa
+            score = 2.0 * (0.7 ** age) + overlap
+            items.append(
+                ContextItem("turn", f"turn:{index}", text, score, order=index, turn=short_turn)
+            )
+        return items
+
+    def _render_prefix(self, selected: List[ContextItem], summary: str) -> Tuple[str, bool]:
+        # Ordem estável (tipo, id), independente da pontuação, para reaproveitar o prefixo
+        prps = sorted((i for i in selected if i.kind == "prp"), key=lambda i: i.order)
+        docs = sorted((i for i in selected if i.kind == "doc"), key=lambda i: i.order)
+        key_source = "|".join(
+            f"{item.key}:{hashlib.sha1(item.text.encode()).hexdigest()[:12]}"
+            for item in prps + docs
+        ) + f"|summary:{hashlib.sha1(summary.encode()).hexdigest()[:12]}"
+        key = hashlib.sha256(key_source.encode()).hexdigest()
+
+        cached = self._prefix_cache.get(key)
+        if cached is not None:
+            self._prefix_cache.move_to_end(key)
+            hit = key == self._last_prefix_key
+            self._last_prefix_key = key
+            return cached, hit
+
+        sections = []
+        if prps:
+            sections.append("## PRPs relevantes\n" + "\n".join(i.text for i in prps))
+        if docs:
+            sections.append("## Documentação relevante\n" + "\n".join(i.text for i in docs))
+        if summary:
+            sections.append(f"## Resumo da conversa anterior\n{summary}")
+        prefix = "\n\n".join(sections)
+
+        self._prefix_cache[key] = prefix
+        if len(self._prefix_cache) > PREFIX_CACHE_SIZE:
+            self._prefix_cache.popitem(last=False)
+        self._last_prefix_key = key
+        return prefix, False
+
+    async def assemble(
+        self,
+        message: str,
+        turns: Optional[List[Dict[str, Any]]] = None,
+        summary: str = "",
+        token_budget: Optional[int] = None,
+    ) -> AssembledContext:
+        """
+        Monta o contexto de um turno.
+
+        Args:
+            message: Mensagem atual do usuário
+            turns: Turnos recentes ({"message", "response"}), do mais antigo ao mais novo
+            summary: Resumo dos turnos que já saíram do histórico recente
+            token_budget: Orçamento de tokens (padrão: o do assembler)
+
+        Returns:
+            Contexto selecionado com contagem de tokens enviados e economizados
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        candidates: List[ContextItem] = []
+        try:
+            candidates += await self._prp_candidates(message)
+            candidates += await self._doc_candidates(message)
+        except Exception as e:
+            logger.warning(f"Contexto do banco indisponível: {e}")
+        candidates += self._turn_candidates(message, turns or [])
+
+        summary_tokens = estimate_tokens(summary)
+        remaining = budget
+        if summary and summary_tokens <= remaining // 4:
+            remaining -= summary_tokens
+        else:
+            summary = ""
+
+        selected = []
+        for item in sorted(candidates, key=lambda item: -item.score):
+            if item.tokens <= remaining:
+                selected.append(item)
+                remaining -= item.tokens
+
+        prefix, hit = self._render_prefix(selected, summary)
+        selected_turns = sorted((i for i in selected if i.kind == "turn"), key=lambda i: i.order)
+        context = AssembledContext(
+            prefix=prefix,
+            turns=[item.turn for item in selected_turns],
+            tokens=budget - remaining,
+            budget=budget,
+            candidate_tokens=sum(item.tokens for item in candidates) + summary_tokens,
+            prefix_cache_hit=hit,
+            prefix_tokens=estimate_tokens(prefix),
+            items=[item.key for item in selected],
+        )
+
+        self.stats["turns"] += 1
+        self.stats["tokens_sent"] += context.tokens
+        self.stats["tokens_saved"] += context.tokens_saved
+        if hit:
+            self.stats["prefix_cache_hits"] += 1
+            self.stats["prefix_tokens_reused"] += context.prefix_tokens
+        logger.info(
+            f"Contexto: {context.tokens}/{budget} tokens, {context.tokens_saved} economizados, "
+            f"prefixo {'reaproveitado' if hit else 'novo'} ({context.prefix_tokens} tokens)"
+        )
+        return context
@@ -0,0 +1,317 @@
+"""
+Recuperação de contexto para o PRP Agent com MCP Turso.
+
+`PRPAgentWithMCPTurso.search_relevant_context` montava três SQL com `LIKE` e não os
+executava. O `ContextRetriever` faz a busca de verdade, a cada turno:
+
+- consulta PRPs (`prps_fts`), conversas (`conversations_fts`) e trechos de documentação
+  (`doc_chunks_fts`, gerado pela sincronização de docs do mcp-turso) ao mesmo tempo, cada
+  um em uma conexão de leitura do `DatabaseGateway`;
+- funde os rankings das três fontes por Reciprocal Rank Fusion (o BM25 de índices
+  diferentes não é comparável, a posição em cada um é);
+- guarda o resultado por hash da mensagem, com TTL: mensagens repetidas não vão ao banco;
+- respeita um orçamento de latência: o que não chegou no prazo fica de fora do turno (e
+  o resultado parcial não entra no cache).
+
+Fontes cujo índice não existe no banco são ignoradas.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .search_index import build_match_query
+
+logger = logging.getLogger(__name__)
+
+# Constante do Reciprocal Rank Fusion
+RRF_K = 60
+
+# Tamanho máximo do texto de cada item de contexto
+MAX_ITEM_CHARS = 600
+
+# Intervalo para reverificar quais índices existem no banco
+SCHEMA_RECHECK_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class RetrievalSource:
+    """Fonte de contexto: índice FTS5, consulta e peso na fusão."""
+
+    name: str
+    context_type: str
+    fts_table: str
+    sql: str
+    weight: float
+    reason: str
+
+
+SOURCES = (
+    RetrievalSource(
+        name="prps",
+        context_type="prps",
+        fts_table="prps_fts",
+        sql="""
+            SELECT p.id, p.title, p.objective, p.status,
+                   bm25(prps_fts, 10.0, 2.0, 5.0) AS rank
+            FROM prps_fts JOIN prps p ON p.id = prps_fts.rowid
+            WHERE prps_fts MATCH ?
+            ORDER BY rank LIMIT ?
+        """,
+        weight=1.0,
+        reason="PRP relacionado à mensagem",
+    ),
+    RetrievalSource(
+        name="conversations",
+        context_type="conversation_history",
+        fts_table="conversations_fts",
+        sql="""
+            SELECT c.id, c.message,
+                   snippet(conversations_fts, -1, '', '', '…', 32) AS text, c.timestamp,
+                   bm25(conversations_fts, 2.0, 1.0, 0.5) AS rank
+            FROM conversations_fts JOIN conversations c ON c.id = conversations_fts.rowid
+            WHERE conversations_fts MATCH ?
+            ORDER BY rank LIMIT ?
+        """,
+        weight=0.8,
+        reason="Conversa anterior sobre o mesmo assunto",
+    ),
+    RetrievalSource(
+        name="docs",
+        context_type="documentation",
+        fts_table="doc_chunks_fts",
+        sql="""
+            SELECT c.id, c.doc_path || ' § ' || COALESCE(c.heading, ''), c.content, c.source_table,
+                   bm25(doc_chunks_fts, 2.0, 1.0) AS rank
+            FROM doc_chunks_fts JOIN doc_chunks c ON c.id = doc_chunks_fts.rowid
+            WHERE doc_chunks_fts MATCH ?
+            ORDER BY rank LIMIT ?
+        """,
+        weight=1.0,
+        reason="Trecho de documentação relevante",
+    ),
+)
+
+
+def message_key(message: str, limit: int) -> str:
+    """Chave do cache: mensagem normalizada (caixa e espaços) + limite."""
+    normalized = " ".join(message.lower().split())
+    return hashlib.sha256(f"{limit}|{normalized}".encode()).hexdigest()
+
+
+class ContextRetriever:
+    """Busca concorrente em PRPs, conversas e docs, com fusão, cache e prazo."""
+
+    def __init__(
+        self,
+        db,
+        cache_ttl: float = 60.0,
+        cache_size: int = 256,
+        latency_budget_ms: float = 300.0,
+        per_source: int = 5,
+    ):
+        self.db = db
+        self.cache_ttl = cache_ttl
+        self.cache_size = max(1, cache_size)
+        self.latency_budget_ms = latency_budget_ms
+        self.per_source = max(1, per_source)
+        self._cache: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._sources: Optional[List[RetrievalSource]] = None
+        self._sources_checked = 0.0
+        # Consultas que estouraram o prazo continuam no leitor; a referência evita o GC
+        self._late: set = set()
+        self.stats = {
+            "calls": 0,
+            "cache_hits": 0,
+            "partial": 0,
+            "errors": 0,
+            "total_ms": 0.0,
+        }
+
+    async def _available_sources(self) -> List[RetrievalSource]:
+        now = time.monotonic()
+        if self._sources is None or now - self._sources_checked > SCHEMA_RECHECK_SECONDS:
+            rows = await self.db.fetch_all(
+                "SELECT name FROM sqlite_master WHERE type = 'table'",
+                label="context_retrieval_schema",
+            )
+            names = {row[0] for row in rows}
+            self._sources = [source for source in SOURCES if source.fts_table in names]
+            self._sources_checked = now
+        return self._sources
+
+    async def _query(self, source: RetrievalSource, match_query: str) -> List[Dict[str, Any]]:
+        rows = await self.db.fetch_all(
+            source.sql, (match_query, self.per_source), label=f"context_{source.name}"
+        )
+        items = []
+        for position, row in enumerate(rows, 1):
+            row_id, title, text, extra, rank = tuple(row)
+            if source.name == "prps":
+                text = f"Objetivo: {text or ''} (status: {extra})"
+            items.append({
+                "type": source.context_type,
+                "source": source.name,
+                "id": row_id,
+                "title": str(title or ""),
+                "content": " ".join(str(text or "").split())[:MAX_ITEM_CHARS],
+                "bm25": round(float(rank), 4),
+                "rank": position,
+                "reason": source.reason,
+            })
+        return items
+
+    @staticmethod
+    def fuse(results: Dict[str, List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+        """Reciprocal Rank Fusion: nota = peso da fonte / (RRF_K + posição na fonte)."""
+        weights = {source.name: source.weight for source in SOURCES}
+        merged = []
+        for name, items in results.items():
+            for item in items:
+                item["score"] = round(weights[name] / (RRF_K + item["rank"]), 6)
+                merged.append(item)
+        merged.sort(key=lambda item: (-item["score"], item["bm25"]))
+        selected = merged[:limit]
+        for position, item in enumerate(selected):
+            # Relevância relativa, no formato que format_context_for_prompt já exibia
+            item["relevance"] = "high" if position == 0 or item["rank"] == 1 else (
+                "medium" if item["rank"] <= 3 else "low"
+            )
+        return selected
+
+    def _cached(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, items = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return items
+
+    def _store(self, key: str, items: List[Dict[str, Any]]):
+        self._cache[key] = (time.monotonic() + self.cache_ttl, items)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def retrieve(
+        self, message: str, limit: int = 3, latency_budget_ms: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Itens de contexto mais relevantes para a mensagem.
+
+        Args:
+            message: Mensagem do usuário
+            limit: Itens devolvidos após a fusão
+            latency_budget_ms: Prazo deste turno (padrão: o do retriever)
+
+        Returns:
+            Lista de dicts com type, source, id, title, content, score, relevance e reason
+        """
+        started = time.perf_counter()
+        self.stats["calls"] += 1
+        key = message_key(message, limit)
+        cached = self._cached(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return [dict(item) for item in cached]
+
+        match_query = build_match_query(message)
+        if self.db is None or not match_query:
+            return []
+        # Termos com OR: a mensagem é linguagem natural, não uma busca exata
+        match_query = " OR ".join(match_query.split(" "))
+
+        try:
+            sources = await self._available_sources()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Contexto do banco indisponível: {e}")
+            return []
+        if not sources:
+            return []
+
+        tasks = {
+            asyncio.ensure_future(self._query(source, match_query)): source for source in sources
+        }
+        budget = self.latency_budget_ms if latency_budget_ms is None else latency_budget_ms
+        done, pending = await asyncio.wait(tasks, timeout=budget / 1000)
+
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        complete = not pending
+        for task in done:
+            source = tasks[task]
+            try:
+                results[source.name] = task.result()
+            except Exception as e:
+                complete = False
+                self.stats["errors"] += 1
+                logger.warning(f"Busca de contexto em {source.name} falhou: {e}")
+        if pending:
+            # Não cancela: a consulta já está em uma thread com um leitor do pool
+            self.stats["partial"] += 1
+            logger.info(
+                f"Contexto parcial: {', '.join(tasks[t].name for t in pending)} "
+                f"fora do prazo de {budget:.0f}ms"
+            )
+            for task in pending:
+                self._late.add(task)
+                task.add_done_callback(self._discard_late)
+
+        items = self.fuse(results, limit)
+        if complete:
+            self._store(key, items)
+        self.stats["total_ms"] += (time.perf_counter() - started) * 1000
+        return [dict(item) for item in items]
+
+    def _discard_late(self, task: "asyncio.Future"):
+        self._late.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Consulta de contexto atrasada falhou: {task.exception()}")
+
+    def invalidate(self):
+        """Esvazia o cache (ex.: depois de gravar PRPs ou sincronizar documentos)."""
+        self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        queried = self.stats["calls"] - self.stats["cache_hits"]
+        return {
+            **{k: v for k, v in self.stats.items() if k != "total_ms"},
+            "avg_ms": round(self.stats["total_ms"] / queried, 2) if queried else 0.0,
+            "cache_size": len(self._cache),
+        }
+
+
+_retrievers: Dict[str, ContextRetriever] = {}
+_retrievers_lock = threading.Lock()
+
+
+def get_context_retriever(database_path: Optional[str] = None) -> ContextRetriever:
+    """Retriever compartilhado por banco (o cache vale entre instâncias do agente)."""
+    from .database import DatabaseGateway
+    from .settings import settings
+
+    path = database_path or settings.database_path
+    retriever = _retrievers.get(path)
+    if retriever is None:
+        with _retrievers_lock:
+            retriever = _retrievers.get(path)
+            if retriever is None:
+                retriever = ContextRetriever(
+                    DatabaseGateway(
+                        path,
+                        reader_pool_size=settings.database_reader_pool_size,
+                        slow_query_ms=settings.database_slow_query_ms,
+                    ),
+                    cache_ttl=settings.context_retrieval_cache_ttl,
+                    latency_budget_ms=settings.context_retrieval_budget_ms,
+                )
+                _retrievers[path] = retriever
+    return retriever
@@ -0,0 +1,270 @@
+"""
+Memória de conversas do agente PRP.
+
+Cada ferramenta registra um turno de conversa. Em sessões longas (o servidor MCP mantém
+um único `PRPAgentDependencies`), uma lista simples cresce sem limite. O
+`ConversationStore`:
+
+- mantém só os últimos turnos em um ring buffer (`deque` com `maxlen`);
+- compacta os turnos que saem do buffer em um resumo (contagem por ação, período e
+  as últimas mensagens abreviadas), com tamanho máximo;
+- grava todos os turnos na tabela `conversations` do banco em uma thread de escrita,
+  em lotes, sem bloquear quem chama `add_conversation`;
+- exporta o histórico completo lendo do disco em páginas.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from .search_index import ensure_conversations_index
+
+logger = logging.getLogger(__name__)
+
+CONVERSATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS conversations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        user_id TEXT,
+        message TEXT NOT NULL,
+        response TEXT,
+        context TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Mensagens abreviadas guardadas no resumo dos turnos compactados
+SUMMARY_RECENT_MESSAGES = 5
+SUMMARY_MESSAGE_CHARS = 80
+
+_CLEAR = object()
+_STOP = object()
+
+
+class ConversationStore:
+    """Ring buffer de conversas com resumo dos turnos antigos e gravação assíncrona."""
+
+    def __init__(
+        self,
+        session_id: str,
+        database_path: Optional[str] = None,
+        user_id: Optional[str] = None,
+        capacity: int = 200,
+        summary_max_chars: int = 2000,
+        batch_size: int = 50,
+    ):
+        self.session_id = session_id
+        self.database_path = database_path
+        self.user_id = user_id
+        self.capacity = max(1, capacity)
+        self.summary_max_chars = summary_max_chars
+        self.batch_size = max(1, batch_size)
+
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        self._compacted = 0
+        self._compacted_actions: Counter = Counter()
+        self._compacted_first: Optional[str] = None
+        self._compacted_last: Optional[str] = None
+        self._compacted_messages: Deque[str] = deque(maxlen=SUMMARY_RECENT_MESSAGES)
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._table_ready = False
+
+    # --- Buffer em memória ---
+
+    def append(self, turn: Dict[str, Any]):
+        """Registra um turno; o mais antigo é compactado se o buffer estiver cheio."""
+        with self._lock:
+            if len(self._buffer) == self.capacity:
+                self._compact(self._buffer[0])
+            self._buffer.append(turn)
+        if self.database_path:
+            self._ensure_writer()
+            self._queue.put(turn)
+
+    def _compact(self, turn: Dict[str, Any]):
+        self._compacted += 1
+        action = (turn.get("metadata") or {}).get("action", "conversa")
+        self._compacted_actions[action] += 1
+        self._compacted_first = self._compacted_first or turn.get("timestamp")
+        self._compacted_last = turn.get("timestamp")
+        self._compacted_messages.append(str(turn.get("message", ""))[:SUMMARY_MESSAGE_CHARS])
+
+    def recent(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Últimos `limit` turnos, do mais antigo para o mais recente."""
+        if limit <= 0:
+            return []
+        with self._lock:
+            start = max(0, len(self._buffer) - limit)
+            return [self._buffer[i] for i in range(start, len(self._buffer))]
+
+    @property
+    def summary(self) -> str:
+        """Resumo dos turnos que já saíram do buffer ('' se nenhum)."""
+        with self._lock:
+            if not self._compacted:
+                return ""
+            actions = ", ".join(
+                f"{action}: {count}" for action, count in self._compacted_actions.most_common()
+            )
+            summary = (
+                f"{self._compacted} interações anteriores "
+                f"({self._compacted_first} a {self._compacted_last}). Ações: {actions}."
+            )
+            if self._compacted_messages:
+                summary += " Últimas: " + " | ".join(self._compacted_messages)
+        return summary[: self.summary_max_chars]
+
+    def __len__(self) -> int:
+        """Total de turnos da sessão, incluindo os compactados."""
+        with self._lock:
+            return self._compacted + len(self._buffer)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.recent(self.capacity))
+
+    def clear(self):
+        """Limpa o histórico da sessão, em memória e no banco."""
+        with self._lock:
+            self._buffer.clear()
+            self._compacted = 0
+            self._compacted_actions.clear()
+            self._compacted_first = self._compacted_last = None
+            self._compacted_messages.clear()
+        if self.database_path and self._writer is not None:
+            self._queue.put(_CLEAR)
+
+    # --- Gravação em disco ---
+
+    def _ensure_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            with self._lock:
+                if self._writer is None or not self._writer.is_alive():
+                    self._writer = threading.Thread(
+                        target=self._write_loop,
+                        name=f"conversation-store-{self.session_id}",
+                        daemon=True,
+                    )
+                    self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.database_path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        if not self._table_ready:
+            with conn:
+                conn.execute(CONVERSATIONS_TABLE)
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_conversations_session "
+                    "ON conversations(session_id, id)"
+                )
+            # Turnos gravados já entram no índice usado pela recuperação de contexto
+            ensure_conversations_index(conn)
+            self._table_ready = True
+        return conn
+
+    def _write_loop(self):
+        conn = None
+        while True:
+            items = [self._queue.get()]
+            # Agrupa o que já estiver na fila em uma única transação
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                conn = conn or self._connect()
+                self._write_batch(conn, items)
+            except Exception as e:
+                logger.error(f"Erro ao gravar conversas da sessão {self.session_id}: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if any(item is _STOP for item in items):
+                if conn is not None:
+                    conn.close()
+                return
+
+    def _write_batch(self, conn: sqlite3.Connection, items: List[Any]):
+        with conn:
+            rows = []
+            # None no final grava as linhas restantes
+            for item in items + [None]:
+                if isinstance(item, dict):
+                    rows.append((
+                        self.session_id,
+                        self.user_id,
+                        item.get("message", ""),
+                        item.get("response"),
+                        json.dumps(item.get("metadata") or {}, ensure_ascii=False),
+                        item.get("timestamp"),
+                    ))
+                    continue
+                # Mantém a ordem entre inserções e limpezas
+                if rows:
+                    conn.executemany(
+                        """
+                        INSERT INTO conversations
+                            (session_id, user_id, message, response, context, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        rows,
+                    )
+                    rows = []
+                if item is _CLEAR:
+                    conn.execute(
+                        "DELETE FROM conversations WHERE session_id = ?", (self.session_id,)
+                    )
+
+    def flush(self):
+        """Espera até que todos os turnos registrados estejam gravados."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        """Grava o que falta e encerra a thread de escrita."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._writer = None
+
+    def iter_export(self, page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre o histórico completo da sessão em ordem, lendo do disco em páginas.
+
+        Sem banco configurado, percorre apenas o buffer em memória.
+        """
+        if not self.database_path:
+            yield from self.recent(self.capacity)
+            return
+
+        self.flush()
+        conn = self._connect()
+        try:
+            last_id = 0
+            while True:
+                rows = conn.execute(
+                    """
+                    SELECT id, timestamp, message, response, context FROM conversations
+                    WHERE session_id = ? AND id > ? ORDER BY id LIMIT ?
+                    """,
+                    (self.session_id, last_id, page_size),
+                ).fetchall()
+                if not rows:
+                    return
+                for row in rows:
+                    yield {
+                        "timestamp": row["timestamp"],
+                        "message": row["message"],
+                        "response": row["response"],
+                        "metadata": json.loads(row["context"] or "{}"),
+                    }
+                last_id = rows[-1]["id"]
+        finally:
+            conn.close()
@@ -0,0 +1,259 @@
+"""
+Gateway assíncrono para o banco SQLite do agente PRP.
+
+As ferramentas do agente rodam dentro do event loop do pydantic-ai; abrir uma conexão
+`sqlite3` síncrona por chamada bloqueia o loop e serializa as chamadas concorrentes.
+O gateway mantém:
+
+- um pool de conexões de leitura em modo WAL (leitores não bloqueiam o escritor);
+- uma única conexão de escrita, protegida por lock;
+- reaproveitamento de prepared statements (cache de statements de cada conexão);
+- tempo de cada consulta, agregado por rótulo.
+
+Todo acesso ao SQLite acontece em threads do executor. Quem devolve a conexão ao pool
+é a thread que a usou, ao terminar: uma consulta cancelada (timeout) continua na thread
+com a conexão emprestada, e o gateway é compartilhado por vários event loops (`run_sync`
+cria um por chamada), então nenhuma conexão volta ao pool antes de ficar livre.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from .analysis_pipeline import ensure_analysis_schema
+from .prp_loader import ensure_detail_indexes
+from .search_index import ensure_conversations_index, ensure_search_schema
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Statements preparados mantidos por conexão; as ferramentas usam SQL estável
+STATEMENT_CACHE_SIZE = 128
+
+
+@dataclass
+class QueryStats:
+    """Tempo acumulado das execuções de uma consulta."""
+
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def record(self, elapsed_ms: float):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_ms, 2),
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ConnectionPool:
+    """Conexões emprestadas a uma thread por vez, válido entre event loops."""
+
+    def __init__(self, connections: Sequence[sqlite3.Connection]):
+        self._idle = list(connections)
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def idle(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    async def checkout(self) -> sqlite3.Connection:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._idle:
+                    return self._idle.pop()
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, conn: sqlite3.Connection):
+        """Devolve a conexão (de qualquer thread) e acorda quem espera, em qualquer loop."""
+        with self._lock:
+            self._idle.append(conn)
+            waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # Loop já fechado: ninguém mais espera nele
+
+
+class DatabaseGateway:
+    """Acesso assíncrono ao banco com pool de leitura WAL e um escritor dedicado."""
+
+    def __init__(
+        self,
+        database_path: str,
+        reader_pool_size: int = 4,
+        slow_query_ms: float = 200.0,
+        busy_timeout_ms: int = 5000,
+    ):
+        self.database_path = database_path
+        self.reader_pool_size = max(1, reader_pool_size)
+        self.slow_query_ms = slow_query_ms
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._readers: List[sqlite3.Connection] = []
+        self._reader_pool: Optional[ConnectionPool] = None
+        self._writer_pool: Optional[ConnectionPool] = None
+        self._open_lock = threading.Lock()
+        self._stats: Dict[str, QueryStats] = {}
+        self._stats_lock = threading.Lock()
+        self.fts_available = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # As conexões são usadas por threads do executor, uma de cada vez
+        conn = sqlite3.connect(
+            self.database_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            timeout=self.busy_timeout_ms / 1000,
+        )
+        conn.row_factory = sqlite3.Row  # Permite acesso por nome de coluna
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        return conn
+
+    def _open(self):
+        """Abre o escritor e os leitores na primeira utilização."""
+        with self._open_lock:
+            if self._writer is not None:
+                return
+            writer = self._connect()
+            writer.execute("PRAGMA journal_mode = WAL")
+            writer.execute("PRAGMA synchronous = NORMAL")
+            self.fts_available = ensure_search_schema(writer, self.database_path)
+            ensure_conversations_index(writer)
+            ensure_detail_indexes(writer)
+            ensure_analysis_schema(writer)
+
+            self._readers = [self._connect() for _ in range(self.reader_pool_size)]
+            for reader in self._readers:
+                reader.execute("PRAGMA query_only = ON")
+            self._reader_pool = ConnectionPool(self._readers)
+            self._writer_pool = ConnectionPool([writer])
+            self._writer = writer
+            logger.info(
+                f"Gateway do banco aberto: {self.database_path} "
+                f"({self.reader_pool_size} leitores, WAL)"
+            )
+
+    async def open(self):
+        """Abre as conexões (e aplica a migração de busca) se ainda não estiverem abertas."""
+        await self._ensure_open()
+
+    async def _ensure_open(self):
+        if self._writer is None:
+            await asyncio.to_thread(self._open)
+
+    def _timed(self, label: str, func: Callable[[], T]) -> T:
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._stats_lock:
+                self._stats.setdefault(label, QueryStats()).record(elapsed_ms)
+            if elapsed_ms >= self.slow_query_ms:
+                logger.warning(f"Consulta lenta '{label}': {elapsed_ms:.1f}ms")
+
+    async def _run(self, pool: ConnectionPool, label: str, func: Callable[[sqlite3.Connection], T]) -> T:
+        """Executa `func(conn)` em uma thread com uma conexão do pool, devolvida pela thread."""
+        conn = await pool.checkout()
+
+        def run() -> T:
+            try:
+                return self._timed(label, lambda: func(conn))
+            finally:
+                pool.release(conn)
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(None, functools.partial(contextvars.copy_context().run, run))
+        except BaseException:
+            pool.release(conn)
+            raise
+        # Cancelar quem espera não cancela a thread (nem a devolução da conexão)
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await asyncio.shield(future)
+
+    async def _read(self, label: str, func: Callable[[sqlite3.Connection], T]) -> T:
+        await self._ensure_open()
+        return await self._run(self._reader_pool, label, func)
+
+    async def fetch_all(
+        self, sql: str, params: Sequence[Any] = (), label: Optional[str] = None
+    ) -> List[sqlite3.Row]:
+        """Executa uma consulta de leitura e retorna todas as linhas."""
+        return await self._read(
+            label or sql, lambda conn: conn.execute(sql, params).fetchall()
+        )
+
+    async def fetch_one(
+        self, sql: str, params: Sequence[Any] = (), label: Optional[str] = None
+    ) -> Optional[sqlite3.Row]:
+        """Executa uma consulta de leitura e retorna a primeira linha (ou None)."""
+        return await self._read(
+            label or sql, lambda conn: conn.execute(sql, params).fetchone()
+        )
+
+    async def transaction(
+        self, func: Callable[[sqlite3.Connection], T], label: str = "transaction"
+    ) -> T:
+        """
+        Executa `func(conn)` na conexão de escrita dentro de uma transação.
+
+        A função roda em uma thread; commit no sucesso, rollback em caso de erro.
+        """
+        await self._ensure_open()
+
+        def run(conn: sqlite3.Connection) -> T:
+            with conn:
+                return func(conn)
+
+        return await self._run(self._writer_pool, label, run)
+
+    async def execute(
+        self, sql: str, params: Sequence[Any] = (), label: Optional[str] = None
+    ) -> sqlite3.Cursor:
+        """Executa um comando de escrita em sua própria transação."""
+        return await self.transaction(lambda conn: conn.execute(sql, params), label or sql)
+
+    def query_stats(self) -> Dict[str, Dict[str, float]]:
+        """Tempo por consulta (chamadas, total, média e máximo em ms)."""
+        with self._stats_lock:
+            return {label: stats.to_dict() for label, stats in self._stats.items()}
+
+    def close(self):
+        """Fecha todas as conexões; o gateway reabre na próxima utilização."""
+        with self._open_lock:
+            for conn in self._readers:
+                conn.close()
+            if self._writer is not None:
+                self._writer.close()
+            self._readers = []
+            self._writer = None
+            self._reader_pool = None
+            self._writer_pool = None
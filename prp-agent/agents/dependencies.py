@@ -7,6 +7,11 @@ Este módulo define as dependências e configurações de contexto do agente.
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Any
 from .settings import settings
+from .analysis_pipeline import PRPAnalysisPipeline
+from .context_assembler import ContextAssembler
+from .conversation_store import ConversationStore
+from .database import DatabaseGateway
+from .prp_loader import PRPDetailLoader
 import uuid
 from datetime import datetime
 
@@ -16,6 +21,10 @@ class PRPAgentDependencies:
     
     # Database Configuration
     database_path: str = field(default_factory=lambda: settings.database_path)
+    db: Optional[DatabaseGateway] = field(default=None, repr=False)
+    prp_loader: Optional[PRPDetailLoader] = field(default=None, repr=False)
+    analysis_pipeline: Optional[PRPAnalysisPipeline] = field(default=None, repr=False)
+    context_assembler: Optional[ContextAssembler] = field(default=None, repr=False)
     
     # Session Configuration
     session_id: str = field(default_factory=lambda: f"{settings.default_session_id}-{uuid.uuid4().hex[:8]}")
@@ -27,7 +36,7 @@ class PRPAgentDependencies:
     
     # Context Configuration
     project_context: Optional[Dict[str, Any]] = None
-    conversation_history: Optional[list] = None
+    conversation_history: Optional[ConversationStore] = None
     
     # Performance Configuration
     enable_caching: bool = True
@@ -35,8 +44,50 @@ class PRPAgentDependencies:
     
     def __post_init__(self):
         """Inicialização pós-criação do dataclass."""
-        if self.conversation_history is None:
-            self.conversation_history = []
+        if self.db is None:
+            # Gateway compartilhado pelas ferramentas; conexões abertas na primeira consulta
+            self.db = DatabaseGateway(
+                self.database_path,
+                reader_pool_size=settings.database_reader_pool_size,
+                slow_query_ms=settings.database_slow_query_ms,
+            )
+        
+        if self.prp_loader is None:
+            self.prp_loader = PRPDetailLoader(
+                self.db, enabled=self.enable_caching, ttl=self.cache_ttl
+            )
+        
+        if self.analysis_pipeline is None:
+            # O modelo LLM só é criado na primeira análise
+            self.analysis_pipeline = PRPAnalysisPipeline(
+                self.db,
+                self.prp_loader,
+                max_concurrency=settings.analysis_max_concurrency,
+                requests_per_minute=settings.analysis_requests_per_minute,
+                timeout=self.analysis_timeout,
+                max_tokens=self.max_tokens_per_analysis,
+            )
+        
+        if self.context_assembler is None:
+            self.context_assembler = ContextAssembler(
+                self.db,
+                token_budget=settings.context_token_budget,
+                max_prps=settings.context_max_prps,
+                max_docs=settings.context_max_docs,
+            )
+        
+        if not isinstance(self.conversation_history, ConversationStore):
+            # Buffer limitado em memória; o histórico completo vai para o banco
+            initial_history = self.conversation_history or []
+            self.conversation_history = ConversationStore(
+                self.session_id,
+                database_path=self.database_path if settings.conversation_persist else None,
+                user_id=self.user_id,
+                capacity=settings.conversation_buffer_size,
+                summary_max_chars=settings.conversation_summary_max_chars,
+            )
+            for conversation in initial_history:
+                self.conversation_history.append(conversation)
         
         if self.project_context is None:
             self.project_context = {
@@ -57,7 +108,16 @@ class PRPAgentDependencies:
     
     def get_recent_conversations(self, limit: int = 5) -> list:
         """Obter conversas recentes."""
-        return self.conversation_history[-limit:] if self.conversation_history else []
+        return self.conversation_history.recent(limit)
+    
+    def get_conversation_summary(self) -> str:
+        """Obter resumo das conversas que já saíram do buffer em memória."""
+        return self.conversation_history.summary
+    
+    def close(self):
+        """Gravar conversas pendentes e fechar conexões com o banco."""
+        self.conversation_history.close()
+        self.db.close()
     
     def update_project_context(self, key: str, value: Any):
         """Atualizar contexto do projeto."""
@@ -0,0 +1,402 @@
+"""
+Registro de clientes LLM compartilhado pelo processo.
+
+`cursor_final`, `providers.get_llm_model` e os apps de monitoramento criavam cada um seu
+cliente OpenAI/Anthropic, sem reaproveitar conexões e sem limite comum de concorrência.
+O `LLMClientRegistry`:
+
+- mantém um pool HTTP keep-alive por (provedor, base_url), com HTTP/2 quando o pacote
+  `h2` estiver instalado; o pool é recriado por event loop (`asyncio.run` fecha o loop
+  anterior e as conexões dele);
+- limita requisições simultâneas por (provedor, modelo) com o `RateLimiter` do pipeline
+  de análise, compartilhado por todos os clientes do mesmo modelo; a vaga é devolvida
+  quando chegam o status e os cabeçalhos, não quando o corpo é fechado (um stream
+  abandonado sem `close()` não prende a vaga);
+- repete falhas transitórias (conexão, 429, 5xx) com backoff exponencial e jitter,
+  respeitando `Retry-After`; os SDKs são criados com `max_retries=0` para não repetir
+  em dobro;
+- registra latência (até os cabeçalhos), erros, repetições e tokens por modelo (`stats()`).
+
+Configuração pelas variáveis LLM_HTTP2, LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE,
+LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE, LLM_MAX_RETRIES e LLM_TIMEOUT.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from .analysis_pipeline import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Provedor das chamadas simuladas (apps de demonstração): limite e métricas à parte dos reais
+SIMULATED_PROVIDER = "simulated"
+
+# Latências guardadas por modelo para os percentis
+LATENCY_WINDOW = 1000
+
+# Respostas JSON maiores que isso não são lidas para extrair o uso de tokens
+USAGE_MAX_BYTES = 1_000_000
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class ModelStats:
+    """Latência e uso de um (provedor, modelo)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def record_usage(self, input_tokens: int = 0, output_tokens: int = 0):
+        self.input_tokens += int(input_tokens or 0)
+        self.output_tokens += int(output_tokens or 0)
+
+    def as_dict(self) -> Dict[str, Any]:
+        values = sorted(self.latencies_ms)
+
+        def percentile(p: float) -> float:
+            return round(values[min(len(values) - 1, int(len(values) * p))], 1) if values else 0.0
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "latency_ms_p50": percentile(0.50),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_max": round(values[-1], 1) if values else 0.0,
+        }
+
+
+def _usage_from_body(body: bytes) -> Tuple[int, int]:
+    """Tokens de entrada e saída de uma resposta OpenAI ou Anthropic (0, 0 se ausentes)."""
+    try:
+        usage = json.loads(body).get("usage") or {}
+    except (ValueError, AttributeError):
+        return 0, 0
+    return (
+        usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0,
+        usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0,
+    )
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Corpo da resposta que registra o uso de tokens quando é fechado."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close, collect_usage: bool):
+        self._stream = stream
+        self._on_close = on_close
+        self._collect = collect_usage
+        self._chunks = []
+        self._size = 0
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            if self._collect:
+                self._size += len(chunk)
+                if self._size > USAGE_MAX_BYTES:
+                    self._collect = False
+                    self._chunks = []
+                else:
+                    self._chunks.append(chunk)
+            yield chunk
+
+    async def aclose(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close(b"".join(self._chunks) if self._collect else b"")
+
+
+class PooledLLMTransport(httpx.AsyncBaseTransport):
+    """Transporte de um modelo: pool compartilhado, limite de concorrência e repetições."""
+
+    def __init__(self, registry: "LLMClientRegistry", provider: str, model: str, base_url: str):
+        self.registry = registry
+        self.provider = provider
+        self.model = model
+        self.base_url = base_url
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        registry = self.registry
+        limiter = registry.limiter(self.provider, self.model)
+        stats = registry.model_stats(self.provider, self.model)
+
+        await limiter.acquire()
+        started = time.perf_counter()
+        stats.requests += 1
+        stats.in_flight += 1
+        released = False
+
+        def release():
+            nonlocal released
+            if released:
+                return
+            released = True
+            stats.in_flight -= 1
+            stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+            limiter.release()
+
+        def record_usage(body: bytes):
+            if body:
+                stats.record_usage(*_usage_from_body(body))
+
+        try:
+            response = await self._send_with_retries(request, stats)
+        except BaseException:
+            stats.errors += 1
+            raise
+        finally:
+            # Status e cabeçalhos chegaram (ou falhou): o corpo é lido sem segurar a vaga
+            release()
+        if response.status_code >= 400:
+            stats.errors += 1
+
+        collect = response.headers.get("content-type", "").startswith("application/json")
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, record_usage, collect),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    async def _send_with_retries(self, request: httpx.Request, stats: ModelStats) -> httpx.Response:
+        registry = self.registry
+        attempt = 0
+        while True:
+            pool = registry.pool(self.provider, self.base_url)
+            try:
+                response = await pool.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadError,
+                    httpx.RemoteProtocolError) as e:
+                if attempt >= registry.max_retries:
+                    raise
+                delay = registry.backoff(attempt)
+                logger.warning(
+                    f"LLM {self.provider}/{self.model}: {type(e).__name__}, "
+                    f"nova tentativa em {delay:.2f}s"
+                )
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= registry.max_retries:
+                    return response
+                delay = registry.backoff(attempt, response.headers.get("retry-after"))
+                await response.aclose()
+                logger.warning(
+                    f"LLM {self.provider}/{self.model}: HTTP {response.status_code}, "
+                    f"nova tentativa em {delay:.2f}s"
+                )
+            attempt += 1
+            stats.retries += 1
+            await asyncio.sleep(delay)
+
+
+class LLMClientRegistry:
+    """Clientes LLM do processo, com pools HTTP e limites compartilhados."""
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 50,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 60.0,
+        max_concurrency: int = 8,
+        requests_per_minute: float = 0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        timeout: float = 60.0,
+    ):
+        if http2 and not HTTP2_AVAILABLE:
+            logger.info("Pacote h2 não instalado: clientes LLM usam HTTP/1.1 com keep-alive")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        # (provedor, base_url) -> {event loop: transporte com pool}
+        self._pools: Dict[Tuple[str, str], "weakref.WeakKeyDictionary"] = {}
+        self._limiters: Dict[Tuple[str, str], RateLimiter] = {}
+        self._stats: Dict[Tuple[str, str], ModelStats] = {}
+        self._http_clients: Dict[Tuple[str, str, str], httpx.AsyncClient] = {}
+        self._sdk_clients: Dict[Tuple[str, str, str, str], Any] = {}
+
+    @classmethod
+    def from_env(cls) -> "LLMClientRegistry":
+        return cls(
+            http2=os.getenv("LLM_HTTP2", "true").lower() == "true",
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "50")),
+            max_keepalive=int(os.getenv("LLM_MAX_KEEPALIVE", "20")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+        )
+
+    # --- Recursos compartilhados ---
+
+    def pool(self, provider: str, base_url: str) -> httpx.AsyncHTTPTransport:
+        """Pool keep-alive do (provedor, base_url) no event loop atual."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pools = self._pools.setdefault((provider, base_url), weakref.WeakKeyDictionary())
+            transport = pools.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+                pools[loop] = transport
+        return transport
+
+    def limiter(self, provider: str, model: str) -> RateLimiter:
+        with self._lock:
+            key = (provider, model)
+            if key not in self._limiters:
+                self._limiters[key] = RateLimiter(self.max_concurrency, self.requests_per_minute)
+            return self._limiters[key]
+
+    def model_stats(self, provider: str, model: str) -> ModelStats:
+        with self._lock:
+            return self._stats.setdefault((provider, model), ModelStats())
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Backoff exponencial com jitter total; `Retry-After` do servidor tem prioridade."""
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    # --- Clientes ---
+
+    def http_client(self, provider: str, model: str, base_url: str = "") -> httpx.AsyncClient:
+        """Cliente httpx do modelo, sobre o pool compartilhado do provedor."""
+        key = (provider, model, base_url)
+        with self._lock:
+            client = self._http_clients.get(key)
+            if client is None:
+                client = httpx.AsyncClient(
+                    transport=PooledLLMTransport(self, provider, model, base_url),
+                    timeout=self.timeout,
+                )
+                self._http_clients[key] = client
+        return client
+
+    def openai_client(self, model: str, api_key: str, base_url: Optional[str] = None):
+        """`AsyncOpenAI` compartilhado para o modelo."""
+        from openai import AsyncOpenAI
+
+        base_url = base_url or "https://api.openai.com/v1"
+        key = ("openai", model, base_url, api_key)
+        with self._lock:
+            client = self._sdk_clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=self.http_client("openai", model, base_url),
+                max_retries=0,
+            )
+            with self._lock:
+                client = self._sdk_clients.setdefault(key, client)
+        return client
+
+    def anthropic_client(self, model: str, api_key: str, base_url: Optional[str] = None):
+        """`AsyncAnthropic` compartilhado para o modelo."""
+        from anthropic import AsyncAnthropic
+
+        key = ("anthropic", model, base_url or "", api_key)
+        with self._lock:
+            client = self._sdk_clients.get(key)
+        if client is None:
+            client = AsyncAnthropic(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=self.http_client("anthropic", model, base_url or ""),
+                max_retries=0,
+            )
+            with self._lock:
+                client = self._sdk_clients.setdefault(key, client)
+        return client
+
+    @asynccontextmanager
+    async def track(self, provider: str, model: str):
+        """
+        Limite e métricas para chamadas que não passam pelo transporte HTTP
+        (SDKs de terceiros). LLMs simulados usam `SIMULATED_PROVIDER`, para não
+        ocupar as vagas nem misturar as métricas do modelo real.
+
+        Yields:
+            `ModelStats` do modelo, para registrar o uso com `record_usage`
+        """
+        limiter = self.limiter(provider, model)
+        stats = self.model_stats(provider, model)
+        async with limiter:
+            started = time.perf_counter()
+            stats.requests += 1
+            stats.in_flight += 1
+            try:
+                yield stats
+            except BaseException:
+                stats.errors += 1
+                raise
+            finally:
+                stats.in_flight -= 1
+                stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Latência e uso por `provedor/modelo`."""
+        with self._lock:
+            items = list(self._stats.items())
+        return {f"{provider}/{model}": stats.as_dict() for (provider, model), stats in items}
+
+
+_registry: Optional[LLMClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    """Registro único do processo (criado na primeira chamada, configurado pelo ambiente)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LLMClientRegistry.from_env()
+    return _registry
@@ -8,19 +8,26 @@ from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.providers.anthropic import AnthropicProvider
 from pydantic_ai.models.anthropic import AnthropicModel
+from .llm_clients import get_llm_registry
 from .settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 def get_llm_model():
-    """Obter modelo LLM configurado baseado nas configurações."""
+    """Obter modelo LLM configurado baseado nas configurações.
     
+    O cliente do provedor vem do registro compartilhado (pool HTTP, limite de
+    concorrência e repetições comuns a todo o processo).
+    """
+    
+    registry = get_llm_registry()
     try:
         if settings.llm_provider.lower() == "openai":
             provider = OpenAIProvider(
-                base_url=settings.llm_base_url,
-                api_key=settings.llm_api_key
+                openai_client=registry.openai_client(
+                    settings.llm_model, settings.llm_api_key, settings.llm_base_url
+                )
             )
             model = OpenAIModel(settings.llm_model, provider=provider)
             logger.info(f"Modelo OpenAI configurado: {settings.llm_model}")
@@ -28,7 +35,9 @@ def get_llm_model():
             
         elif settings.llm_provider.lower() == "anthropic":
             provider = AnthropicProvider(
-                api_key=settings.llm_api_key
+                anthropic_client=registry.anthropic_client(
+                    settings.llm_model, settings.llm_api_key
+                )
             )
             model = AnthropicModel(settings.llm_model, provider=provider)
             logger.info(f"Modelo Anthropic configurado: {settings.llm_model}")
@@ -0,0 +1,161 @@
+"""
+Carregamento de PRPs com tarefas e análises em uma única consulta.
+
+`get_prp_details` fazia três consultas por chamada (PRP, tarefas e análises LLM) e o agente
+chama a ferramenta várias vezes seguidas para o mesmo PRP. O `PRPDetailLoader`:
+
+- busca um ou vários PRPs com tarefas e análises agregadas em JSON (`json_group_array`),
+  em um único round trip; vários ids vão em um só parâmetro via `json_each`;
+- mantém um cache por PRP com número de versão: escritas chamam `invalidate(prp_id)`,
+  e um resultado carregado enquanto uma escrita acontecia não é guardado.
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DETAIL_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_prp_tasks_prp_created ON prp_tasks(prp_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_prp_llm_analysis_prp_created "
+    "ON prp_llm_analysis(prp_id, created_at)",
+]
+
+# Tarefas em ordem de criação e análises da mais recente para a mais antiga
+LOAD_PRP_DETAILS_SQL = """
+    SELECT p.*,
+        (
+            SELECT json_group_array(json_object(
+                'id', t.id,
+                'task_name', t.task_name,
+                'description', t.description,
+                'task_type', t.task_type,
+                'priority', t.priority,
+                'estimated_hours', t.estimated_hours,
+                'complexity', t.complexity,
+                'status', t.status,
+                'created_at', t.created_at
+            ))
+            FROM (
+                SELECT * FROM prp_tasks WHERE prp_id = p.id ORDER BY created_at, id
+            ) t
+        ) AS tasks_json,
+        (
+            SELECT json_group_array(json_object(
+                'id', a.id,
+                'analysis_type', a.analysis_type,
+                'model_used', a.model_used,
+                'confidence_score', a.confidence_score,
+                'status', a.status,
+                'created_at', a.created_at
+            ))
+            FROM (
+                SELECT * FROM prp_llm_analysis WHERE prp_id = p.id
+                ORDER BY created_at DESC, id DESC
+            ) a
+        ) AS analyses_json
+    FROM prps p
+    WHERE p.id IN (SELECT value FROM json_each(?))
+"""
+
+
+def ensure_detail_indexes(conn: sqlite3.Connection):
+    """Cria os índices (prp_id, created_at) usados pelo loader, se as tabelas existirem."""
+    tables = {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+    if not {"prp_tasks", "prp_llm_analysis"} <= tables:
+        return
+    with conn:
+        for statement in _DETAIL_INDEXES:
+            conn.execute(statement)
+
+
+@dataclass
+class PRPDetails:
+    """PRP com suas tarefas e análises LLM."""
+
+    prp: Dict[str, Any]
+    tasks: List[Dict[str, Any]] = field(default_factory=list)
+    analyses: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "PRPDetails":
+        data = dict(row)
+        tasks = json.loads(data.pop("tasks_json") or "[]")
+        analyses = json.loads(data.pop("analyses_json") or "[]")
+        return cls(prp=data, tasks=tasks, analyses=analyses)
+
+
+class PRPDetailLoader:
+    """Loader de PRPs com cache versionado por PRP."""
+
+    def __init__(self, db, enabled: bool = True, ttl: float = 3600):
+        self.db = db
+        self.enabled = enabled
+        self.ttl = ttl
+        self._versions: Dict[int, int] = {}
+        # prp_id -> (versão, carregado em, detalhes)
+        self._cache: Dict[int, Tuple[int, float, PRPDetails]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, prp_id: int):
+        """Descarta o PRP do cache; chamar após qualquer escrita que o afete."""
+        self._versions[prp_id] = self._versions.get(prp_id, 0) + 1
+        self._cache.pop(prp_id, None)
+
+    def clear(self):
+        for prp_id in list(self._cache):
+            self.invalidate(prp_id)
+
+    def _cached(self, prp_id: int) -> Optional[PRPDetails]:
+        entry = self._cache.get(prp_id)
+        if entry is None:
+            return None
+        version, loaded_at, details = entry
+        if version != self._versions.get(prp_id, 0) or time.monotonic() - loaded_at > self.ttl:
+            del self._cache[prp_id]
+            return None
+        return details
+
+    async def load_many(self, prp_ids: Iterable[int]) -> Dict[int, PRPDetails]:
+        """Carrega vários PRPs; os que não estão no cache vêm em uma única consulta."""
+        prp_ids = list(dict.fromkeys(int(prp_id) for prp_id in prp_ids))
+        found: Dict[int, PRPDetails] = {}
+        missing = []
+        for prp_id in prp_ids:
+            details = self._cached(prp_id) if self.enabled else None
+            if details is None:
+                missing.append(prp_id)
+            else:
+                found[prp_id] = details
+        self.hits += len(found)
+        self.misses += len(missing)
+
+        if missing:
+            versions = {prp_id: self._versions.get(prp_id, 0) for prp_id in missing}
+            rows = await self.db.fetch_all(
+                LOAD_PRP_DETAILS_SQL, (json.dumps(missing),), label="load_prp_details"
+            )
+            loaded_at = time.monotonic()
+            for row in rows:
+                details = PRPDetails.from_row(row)
+                prp_id = details.prp["id"]
+                found[prp_id] = details
+                # Só guarda se nenhuma escrita invalidou o PRP durante a consulta
+                if self.enabled and versions[prp_id] == self._versions.get(prp_id, 0):
+                    self._cache[prp_id] = (versions[prp_id], loaded_at, details)
+
+        return {prp_id: found[prp_id] for prp_id in prp_ids if prp_id in found}
+
+    async def load(self, prp_id: int) -> Optional[PRPDetails]:
+        """Carrega um PRP com tarefas e análises (None se não existir)."""
+        return (await self.load_many([prp_id])).get(int(prp_id))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
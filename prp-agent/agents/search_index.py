@@ -0,0 +1,234 @@
+"""
+Índice de busca dos PRPs.
+
+Este módulo mantém, dentro do próprio banco context-memory:
+
+- `prps_fts`: tabela FTS5 (external content) sobre título, descrição e objetivo dos PRPs,
+  sincronizada por triggers em `prps`, consultada com ordenação BM25;
+- `prps.task_count`: contador de tarefas mantido por triggers em `prp_tasks`, que substitui
+  o `LEFT JOIN ... GROUP BY` nas listagens;
+- `conversations_fts`: FTS5 sobre mensagem, resposta e contexto das conversas (mesma
+  definição usada pela busca federada do mcp-turso), para a recuperação de contexto.
+
+A migração é idempotente: cria o que faltar e preenche as linhas já existentes.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pesos BM25 das colunas (title, description, objective): título pesa mais
+BM25_WEIGHTS = (10.0, 2.0, 5.0)
+
+# Índice full-text sem duplicar o conteúdo de prps
+_FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS prps_fts USING fts5(
+        title, description, objective,
+        content='prps', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS prps_fts_after_insert AFTER INSERT ON prps BEGIN
+        INSERT INTO prps_fts(rowid, title, description, objective)
+        VALUES (new.id, new.title, new.description, new.objective);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS prps_fts_after_delete AFTER DELETE ON prps BEGIN
+        INSERT INTO prps_fts(prps_fts, rowid, title, description, objective)
+        VALUES ('delete', old.id, old.title, old.description, old.objective);
+    END
+    """,
+    # Mudanças só de status/updated_at não reindexam o texto
+    """
+    CREATE TRIGGER IF NOT EXISTS prps_fts_after_update
+    AFTER UPDATE OF title, description, objective ON prps BEGIN
+        INSERT INTO prps_fts(prps_fts, rowid, title, description, objective)
+        VALUES ('delete', old.id, old.title, old.description, old.objective);
+        INSERT INTO prps_fts(rowid, title, description, objective)
+        VALUES (new.id, new.title, new.description, new.objective);
+    END
+    """,
+]
+
+_TASK_COUNT_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS prp_tasks_count_after_insert AFTER INSERT ON prp_tasks BEGIN
+        UPDATE prps SET task_count = task_count + 1 WHERE id = new.prp_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS prp_tasks_count_after_delete AFTER DELETE ON prp_tasks BEGIN
+        UPDATE prps SET task_count = task_count - 1 WHERE id = old.prp_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS prp_tasks_count_after_update
+    AFTER UPDATE OF prp_id ON prp_tasks BEGIN
+        UPDATE prps SET task_count = task_count - 1 WHERE id = old.prp_id;
+        UPDATE prps SET task_count = task_count + 1 WHERE id = new.prp_id;
+    END
+    """,
+]
+
+# Mesmos nomes da busca federada (mcp-turso/federated_search.py): um índice serve aos dois
+_CONVERSATIONS_COLUMNS = {"id", "message", "response", "context"}
+_CONVERSATIONS_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+        message, response, context,
+        content='conversations', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_ai AFTER INSERT ON conversations BEGIN
+        INSERT INTO conversations_fts(rowid, message, response, context)
+        VALUES (new.id, new.message, new.response, new.context);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_ad AFTER DELETE ON conversations BEGIN
+        INSERT INTO conversations_fts(conversations_fts, rowid, message, response, context)
+        VALUES ('delete', old.id, old.message, old.response, old.context);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_au
+    AFTER UPDATE OF message, response, context ON conversations BEGIN
+        INSERT INTO conversations_fts(conversations_fts, rowid, message, response, context)
+        VALUES ('delete', old.id, old.message, old.response, old.context);
+        INSERT INTO conversations_fts(rowid, message, response, context)
+        VALUES (new.id, new.message, new.response, new.context);
+    END
+    """,
+]
+
+# Bancos já migrados neste processo (caminho -> FTS5 disponível)
+_migrated: Dict[str, bool] = {}
+_migration_lock = threading.Lock()
+
+
+def _column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def migrate_search_schema(conn: sqlite3.Connection) -> bool:
+    """
+    Cria o índice FTS5 e o contador de tarefas, preenchendo as linhas existentes.
+
+    Returns:
+        True se o índice FTS5 está disponível; False se o SQLite não tem FTS5
+        (a busca volta a usar LIKE em search_text).
+    """
+    if not _table_exists(conn, "prps") or not _table_exists(conn, "prp_tasks"):
+        # Banco ainda sem o schema de PRPs: nada a migrar
+        return False
+
+    fts_existed = _table_exists(conn, "prps_fts")
+
+    with conn:
+        if not _column_exists(conn, "prps", "task_count"):
+            conn.execute("ALTER TABLE prps ADD COLUMN task_count INTEGER NOT NULL DEFAULT 0")
+            conn.execute("""
+                UPDATE prps SET task_count = (
+                    SELECT COUNT(*) FROM prp_tasks t WHERE t.prp_id = prps.id
+                )
+            """)
+            logger.info("Coluna prps.task_count criada e preenchida")
+
+        for statement in _TASK_COUNT_TRIGGERS:
+            conn.execute(statement)
+
+        try:
+            conn.execute(_FTS_TABLE)
+            fts_available = True
+        except sqlite3.OperationalError as e:
+            if "fts5" not in str(e):
+                raise
+            fts_available = False
+
+        if fts_available:
+            for statement in _FTS_TRIGGERS:
+                conn.execute(statement)
+
+        if fts_available and not fts_existed:
+            conn.execute("INSERT INTO prps_fts(prps_fts) VALUES ('rebuild')")
+            logger.info("Índice FTS5 prps_fts criado e preenchido")
+
+    if not fts_available:
+        logger.warning("SQLite sem suporte a FTS5; busca de PRPs usará LIKE")
+    return fts_available
+
+
+def ensure_conversations_index(conn: sqlite3.Connection) -> bool:
+    """
+    Cria e preenche `conversations_fts` se a tabela conversations existir.
+
+    Tabelas de um schema antigo (sem message/response/context) ficam sem índice.
+
+    Returns:
+        True se o índice está disponível.
+    """
+    if not _table_exists(conn, "conversations"):
+        return False
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(conversations)")}
+    missing = _CONVERSATIONS_COLUMNS - columns
+    if missing:
+        logger.warning(
+            f"conversations sem as colunas {', '.join(sorted(missing))}; "
+            "busca de conversas sem índice FTS5"
+        )
+        return False
+    existed = _table_exists(conn, "conversations_fts")
+    try:
+        with conn:
+            for statement in _CONVERSATIONS_FTS:
+                conn.execute(statement)
+            if not existed:
+                conn.execute("INSERT INTO conversations_fts(conversations_fts) VALUES ('rebuild')")
+                logger.info("Índice FTS5 conversations_fts criado e preenchido")
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        return False
+    return True
+
+
+def ensure_search_schema(conn: sqlite3.Connection, db_path: str) -> bool:
+    """Aplica a migração uma vez por banco e processo. Retorna se o FTS5 está disponível."""
+    if db_path not in _migrated:
+        with _migration_lock:
+            if db_path not in _migrated:
+                fts_available = migrate_search_schema(conn)
+                if _table_exists(conn, "prps"):
+                    _migrated[db_path] = fts_available
+                return fts_available
+    return _migrated[db_path]
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Converte o texto do usuário em uma expressão MATCH segura.
+
+    Cada palavra vira um termo entre aspas com busca por prefixo, combinados com AND,
+    para que pontuação e operadores FTS5 digitados pelo usuário não quebrem a consulta.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
@@ -21,11 +21,26 @@ class Settings(BaseSettings):
     
     # Database Configuration
     database_path: str = Field(default="../context-memory.db", description="Caminho para o banco de dados")
+    database_reader_pool_size: int = Field(default=4, description="Conexões de leitura do banco (modo WAL)")
+    database_slow_query_ms: float = Field(default=200.0, description="Consultas acima deste tempo são logadas")
     
     # Agent Configuration
     max_tokens_per_analysis: int = Field(default=4000, description="Máximo de tokens por análise")
     analysis_timeout: int = Field(default=30, description="Timeout para análises em segundos")
+    analysis_max_concurrency: int = Field(default=4, description="Análises LLM simultâneas")
+    analysis_requests_per_minute: float = Field(default=60, description="Limite de chamadas ao LLM por minuto (0 = sem limite)")
     default_session_id: str = Field(default="prp-agent-session", description="ID da sessão padrão")
+    conversation_buffer_size: int = Field(default=200, description="Conversas mantidas em memória por sessão")
+    conversation_summary_max_chars: int = Field(default=2000, description="Tamanho máximo do resumo das conversas antigas")
+    conversation_persist: bool = Field(default=True, description="Gravar conversas na tabela conversations do banco")
+    
+    # Context Configuration
+    context_token_budget: int = Field(default=2000, description="Orçamento de tokens do contexto enviado a cada turno")
+    context_recent_turns: int = Field(default=10, description="Turnos recentes considerados para o contexto")
+    context_max_prps: int = Field(default=5, description="PRPs relevantes considerados para o contexto")
+    context_max_docs: int = Field(default=3, description="Documentos relevantes considerados para o contexto")
+    context_retrieval_cache_ttl: float = Field(default=60.0, description="Segundos que a busca de contexto de uma mensagem fica em cache")
+    context_retrieval_budget_ms: float = Field(default=300.0, description="Prazo da busca de contexto; fontes atrasadas ficam de fora do turno")
     
     # Language Configuration
     default_language: str = Field(default="pt-br", description="Idioma padrão para criação de PRPs")
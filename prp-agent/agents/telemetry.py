@@ -0,0 +1,316 @@
+"""
+Telemetria de AI Agents com amostragem e envio em lote ao Sentry.
+
+Os apps de monitoramento criavam spans do Sentry e eventos `capture_message` em toda
+requisição. O `AgentTelemetry` grava os spans em memória (dicionários simples) e decide
+no fim de cada trace se ele vai para o Sentry:
+
+- amostragem na cabeça: uma fração (`sample_rate`) dos traces é marcada na criação;
+- amostragem na cauda: traces lentos (`slow_ms`) ou com erro são sempre mantidos;
+- todos os spans, mantidos ou não, entram em agregados em memória por (op, modelo):
+  contagem, erros, duração e tokens;
+- uma thread envia os traces mantidos como transações do Sentry e um resumo dos
+  agregados, em lotes, fora do caminho da requisição. Atributos como mensagens e
+  ferramentas são serializados em JSON só nessa hora, e só para os traces mantidos.
+
+Uso:
+    telemetry = AgentTelemetry.from_env()
+
+    with telemetry.span("gen_ai.invoke_agent", f"invoke_agent {name}") as span:
+        span.set_data("gen_ai.request.messages", messages)
+        with telemetry.span("gen_ai.chat", f"chat {model}") as chat:
+            ...
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import sentry_sdk
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class RecordedSpan:
+    """Span gravado em memória; mesma interface `set_data` dos spans do Sentry."""
+
+    __slots__ = ("op", "name", "data", "start", "end", "error", "children", "trace")
+
+    def __init__(self, op: str, name: str, trace: "RecordedTrace"):
+        self.op = op
+        self.name = name
+        self.data: Dict[str, Any] = {}
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self.children: List["RecordedSpan"] = []
+        self.trace = trace
+
+    def set_data(self, key: str, value: Any):
+        self.data[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.time()) - self.start) * 1000
+
+
+class RecordedTrace:
+    """Árvore de spans de uma requisição, com a decisão de amostragem da cabeça."""
+
+    __slots__ = ("root", "head_sampled", "errored")
+
+    def __init__(self, head_sampled: bool):
+        self.root: Optional[RecordedSpan] = None
+        self.head_sampled = head_sampled
+        self.errored = False
+
+
+_current_span: ContextVar[Optional[RecordedSpan]] = ContextVar("ai_telemetry_span", default=None)
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class AgentTelemetry:
+    """Spans de AI Agents com amostragem na cabeça e na cauda e envio em lote."""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.1,
+        slow_ms: float = 2000,
+        flush_interval: float = 5.0,
+        batch_size: int = 50,
+        max_buffer: int = 1000,
+        enabled: bool = True,
+    ):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.enabled = enabled
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_buffer))
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._aggregates: Dict[str, Dict[str, Any]] = {}
+        self.counters = {"traces": 0, "kept": 0, "kept_slow": 0, "kept_error": 0,
+                         "dropped_buffer_full": 0, "sent": 0, "batches": 0}
+
+    @classmethod
+    def from_env(cls) -> "AgentTelemetry":
+        """Configuração pelas variáveis AI_TELEMETRY_*."""
+        return cls(
+            sample_rate=float(os.getenv("AI_TELEMETRY_SAMPLE_RATE", "0.1")),
+            slow_ms=float(os.getenv("AI_TELEMETRY_SLOW_MS", "2000")),
+            flush_interval=float(os.getenv("AI_TELEMETRY_FLUSH_SECONDS", "5")),
+            batch_size=int(os.getenv("AI_TELEMETRY_BATCH_SIZE", "50")),
+            max_buffer=int(os.getenv("AI_TELEMETRY_MAX_BUFFER", "1000")),
+            enabled=os.getenv("AI_TELEMETRY_ENABLED", "true").lower() == "true",
+        )
+
+    # --- Caminho da requisição ---
+
+    @contextmanager
+    def span(self, op: str, name: str) -> Iterator[RecordedSpan]:
+        """
+        Abre um span filho do span atual (ou a raiz de um novo trace).
+
+        Exceções marcam o span e o trace com erro e são propagadas.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            trace = RecordedTrace(head_sampled=random.random() < self.sample_rate)
+        else:
+            trace = parent.trace
+        span = RecordedSpan(op, name, trace)
+        if parent is None:
+            trace.root = span
+        else:
+            parent.children.append(span)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            trace.errored = True
+            raise
+        finally:
+            span.end = time.time()
+            _current_span.reset(token)
+            if parent is None:
+                self._finish_trace(trace)
+
+    def current_span(self) -> Optional[RecordedSpan]:
+        return _current_span.get()
+
+    def _finish_trace(self, trace: RecordedTrace):
+        root = trace.root
+        slow = root.duration_ms >= self.slow_ms
+        keep = trace.head_sampled or slow or trace.errored
+        self._aggregate(root)
+        with self._lock:
+            self.counters["traces"] += 1
+            if keep:
+                self.counters["kept"] += 1
+                self.counters["kept_slow"] += int(slow)
+                self.counters["kept_error"] += int(trace.errored)
+        if not self.enabled:
+            return
+        # A thread também envia os agregados dos traces descartados
+        self._ensure_worker()
+        if not keep:
+            return
+
+        with self._flushed:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(root)
+        except queue.Full:
+            # Nunca bloqueia a requisição: sem espaço, o trace fica só nos agregados
+            with self._flushed:
+                self._pending -= 1
+            with self._lock:
+                self.counters["dropped_buffer_full"] += 1
+
+    def _aggregate(self, span: RecordedSpan):
+        model = span.data.get("gen_ai.request.model", "")
+        key = f"{span.op}|{model}"
+        duration = span.duration_ms
+        with self._lock:
+            entry = self._aggregates.get(key)
+            if entry is None:
+                entry = self._aggregates[key] = {
+                    "op": span.op, "model": model, "count": 0, "errors": 0,
+                    "duration_ms_total": 0.0, "duration_ms_max": 0.0, "tokens": 0,
+                }
+            entry["count"] += 1
+            entry["errors"] += int(span.error is not None)
+            entry["duration_ms_total"] += duration
+            entry["duration_ms_max"] = max(entry["duration_ms_max"], duration)
+            entry["tokens"] += int(span.data.get("gen_ai.usage.total_tokens") or 0)
+        for child in span.children:
+            self._aggregate(child)
+
+    # --- Envio em segundo plano ---
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._flush_loop, name="ai-telemetry-flush", daemon=True
+                    )
+                    self._worker.start()
+
+    def _flush_loop(self):
+        while True:
+            batch: List[Any] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+                if batch[-1] is _STOP:
+                    break
+            stop = any(item is _STOP for item in batch)
+            spans = [item for item in batch if item is not _STOP]
+            try:
+                self._emit(spans)
+            except Exception as e:
+                logger.warning(f"Falha ao enviar telemetria: {e}")
+            finally:
+                with self._flushed:
+                    self._pending -= len(spans)
+                    self._flushed.notify_all()
+            if stop:
+                return
+
+    def _emit(self, roots: List[RecordedSpan]):
+        if not roots and not self._aggregates:
+            return
+        for root in roots:
+            transaction = sentry_sdk.start_transaction(
+                op=root.op,
+                name=root.name,
+                start_timestamp=datetime.fromtimestamp(root.start, timezone.utc),
+                sampled=True,
+            )
+            self._emit_span(transaction, root)
+            transaction.finish(end_timestamp=datetime.fromtimestamp(root.end, timezone.utc))
+
+        summary = self.pop_aggregates()
+        if summary:
+            sentry_sdk.capture_message(
+                f"AI Agent telemetry: {sum(e['count'] for e in summary.values())} spans",
+                level="info",
+                tags={"ai.event": "telemetry_batch"},
+                contexts={key: value for key, value in summary.items()},
+            )
+        with self._lock:
+            self.counters["sent"] += len(roots)
+            self.counters["batches"] += 1
+
+    def _emit_span(self, sentry_span, span: RecordedSpan):
+        for key, value in span.data.items():
+            sentry_span.set_data(key, _serialize(value))
+        if span.error:
+            sentry_span.set_status("internal_error")
+            sentry_span.set_data("error.type", span.error)
+        for child in span.children:
+            sentry_child = sentry_span.start_child(
+                op=child.op,
+                name=child.name,
+                start_timestamp=datetime.fromtimestamp(child.start, timezone.utc),
+            )
+            self._emit_span(sentry_child, child)
+            sentry_child.finish(end_timestamp=datetime.fromtimestamp(child.end, timezone.utc))
+
+    def pop_aggregates(self) -> Dict[str, Dict[str, Any]]:
+        """Agregados desde o último envio (zera os contadores)."""
+        with self._lock:
+            aggregates, self._aggregates = self._aggregates, {}
+        return aggregates
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Espera o envio dos traces já mantidos; False se o tempo acabar."""
+        deadline = time.monotonic() + timeout
+        with self._flushed:
+            while self._pending > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._flushed.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Envia o que falta e encerra a thread de envio."""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(_STOP)
+            self._worker.join(timeout)
+        self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counters,
+                "sample_rate": self.sample_rate,
+                "slow_ms": self.slow_ms,
+                "buffered": self._queue.qsize(),
+            }
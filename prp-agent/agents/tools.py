@@ -4,26 +4,15 @@ Ferramentas do agente PRP.
 Este módulo contém todas as ferramentas disponíveis para o agente PRP.
 """
 
-import sqlite3
-import json
 import logging
 from typing import List, Dict, Any, Optional
 from pydantic_ai import RunContext
 from .dependencies import PRPAgentDependencies
+from .search_index import BM25_WEIGHTS, build_match_query
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def get_db_connection(db_path: str):
-    """Obter conexão com banco de dados."""
-    try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # Permite acesso por nome de coluna
-        return conn
-    except Exception as e:
-        logger.error(f"Erro ao conectar ao banco: {e}")
-        raise
-
 async def create_prp(
     ctx: RunContext[PRPAgentDependencies],
     name: str,
@@ -39,23 +28,20 @@ async def create_prp(
     """Cria um novo PRP no banco de dados."""
     
     try:
-        conn = get_db_connection(ctx.deps.database_path)
-        cursor = conn.cursor()
-        
         # Criar texto de busca para facilitar consultas
         search_text = f"{title} {description} {objective}".lower()
         
-        cursor.execute("""
+        cursor = await ctx.deps.db.execute("""
             INSERT INTO prps (
                 name, title, description, objective, context_data,
                 implementation_details, validation_gates, status, priority, tags, search_text
             ) VALUES (?, ?, ?, ?, ?, ?, ?, 'draft', ?, ?, ?)
         """, (name, title, description, objective, context_data,
-              implementation_details, validation_gates, priority, tags, search_text))
+              implementation_details, validation_gates, priority, tags, search_text),
+            label="create_prp")
         
         prp_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        ctx.deps.prp_loader.invalidate(prp_id)
         
         # Adicionar à conversa
         ctx.deps.add_conversation(
@@ -77,23 +63,34 @@ async def search_prps(
     priority: str = None,
     limit: int = 10
 ) -> str:
-    """Busca PRPs com filtros avançados."""
+    """Busca PRPs com filtros avançados, ordenando por relevância (BM25) quando há query."""
     
     try:
-        conn = get_db_connection(ctx.deps.database_path)
-        cursor = conn.cursor()
-        
-        sql = """
-            SELECT p.*, COUNT(t.id) as total_tasks
-            FROM prps p
-            LEFT JOIN prp_tasks t ON p.id = t.prp_id
-            WHERE 1=1
-        """
-        params = []
+        db = ctx.deps.db
+        await db.open()
+        match_query = build_match_query(query) if query else None
         
-        if query:
-            sql += " AND p.search_text LIKE ?"
-            params.append(f"%{query}%")
+        params = []
+        if match_query and db.fts_available:
+            sql = f"""
+                SELECT p.*, p.task_count as total_tasks,
+                       bm25(prps_fts, {', '.join(str(w) for w in BM25_WEIGHTS)}) as rank
+                FROM prps_fts
+                JOIN prps p ON p.id = prps_fts.rowid
+                WHERE prps_fts MATCH ?
+            """
+            params.append(match_query)
+            order_by = "rank"
+        else:
+            sql = """
+                SELECT p.*, p.task_count as total_tasks
+                FROM prps p
+                WHERE 1=1
+            """
+            order_by = "p.created_at DESC"
+            if query:
+                sql += " AND p.search_text LIKE ?"
+                params.append(f"%{query.lower()}%")
         
         if status:
             sql += " AND p.status = ?"
@@ -103,12 +100,10 @@ async def search_prps(
             sql += " AND p.priority = ?"
             params.append(priority)
         
-        sql += " GROUP BY p.id ORDER BY p.created_at DESC LIMIT ?"
+        sql += f" ORDER BY {order_by} LIMIT ?"
         params.append(limit)
         
-        cursor.execute(sql, params)
-        results = cursor.fetchall()
-        conn.close()
+        results = await db.fetch_all(sql, params, label="search_prps")
         
         if not results:
             return "🔍 Nenhum PRP encontrado com os critérios especificados."
@@ -141,97 +136,17 @@ async def analyze_prp_with_llm(
     """Analisa PRP usando LLM para extrair tarefas e insights."""
     
     try:
-        # Buscar PRP do banco
-        conn = get_db_connection(ctx.deps.database_path)
-        cursor = conn.cursor()
+        # PRPs sem mudanças desde a última análise vêm do cache, sem chamar o LLM
+        outcome = await ctx.deps.analysis_pipeline.analyze(prp_id, analysis_type)
         
-        cursor.execute("SELECT * FROM prps WHERE id = ?", (prp_id,))
-        prp = cursor.fetchone()
-        conn.close()
-        
-        if not prp:
+        if outcome.error == "PRP não encontrado":
             return "❌ PRP não encontrado."
+        if outcome.analysis is None:
+            return f"❌ Erro na análise: {outcome.error}"
         
-        # Preparar prompt para LLM
-        prompt = f"""
-Analise o seguinte PRP e extraia as tarefas necessárias:
-
-**PRP:** {prp['title']}
-**Objetivo:** {prp['objective']}
-**Descrição:** {prp['description']}
-**Contexto:** {prp['context_data']}
-**Implementação:** {prp['implementation_details']}
-
-Retorne um JSON com a seguinte estrutura:
-{{
-    "tasks": [
-        {{
-            "name": "Nome da tarefa",
-            "description": "Descrição detalhada",
-            "type": "feature|bugfix|refactor|test|docs|setup",
-            "priority": "low|medium|high|critical",
-            "estimated_hours": 2.5,
-            "complexity": "low|medium|high",
-            "context_files": ["arquivo1.py", "arquivo2.ts"],
-            "acceptance_criteria": "Critérios de aceitação"
-        }}
-    ],
-    "summary": "Resumo da análise",
-    "total_estimated_hours": 15.5,
-    "complexity_assessment": "low|medium|high"
-}}
-"""
-        
-        # Simular análise LLM (em produção, seria uma chamada real)
-        analysis_result = {
-            "tasks": [
-                {
-                    "name": "Configurar ambiente de desenvolvimento",
-                    "description": "Configurar projeto com dependências e estrutura base",
-                    "type": "setup",
-                    "priority": "high",
-                    "estimated_hours": 2.0,
-                    "complexity": "low"
-                },
-                {
-                    "name": "Implementar funcionalidade principal",
-                    "description": "Desenvolver a funcionalidade core do sistema",
-                    "type": "feature",
-                    "priority": "critical",
-                    "estimated_hours": 8.0,
-                    "complexity": "high"
-                },
-                {
-                    "name": "Criar testes unitários",
-                    "description": "Implementar testes abrangentes para a funcionalidade",
-                    "type": "test",
-                    "priority": "high",
-                    "estimated_hours": 4.0,
-                    "complexity": "medium"
-                }
-            ],
-            "summary": f"Análise completa do PRP '{prp['title']}'",
-            "total_estimated_hours": 14.0,
-            "complexity_assessment": "medium"
-        }
-        
-        # Salvar análise no banco
-        conn = get_db_connection(ctx.deps.database_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO prp_llm_analysis (
-                prp_id, analysis_type, input_content, output_content,
-                parsed_data, model_used, tokens_used, processing_time_ms, confidence_score
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            prp_id, analysis_type, prompt, "Análise LLM simulada",
-            json.dumps(analysis_result), "gpt-4o", 1500, 2500, 0.95
-        ))
-        
-        analysis_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        analysis_result = outcome.analysis
+        details = await ctx.deps.prp_loader.load(prp_id)
+        prp = details.prp
         
         # Preparar resposta
         response = f"""
@@ -243,16 +158,18 @@ Retorne um JSON com a seguinte estrutura:
 **Tarefas Extraídas:**
 """
         
-        for i, task in enumerate(analysis_result["tasks"], 1):
-            response += f"{i}. **{task['name']}** ({task['type']}, {task['priority']})\n"
-            response += f"   {task['description']}\n"
-            response += f"   Estimativa: {task['estimated_hours']}h, Complexidade: {task['complexity']}\n\n"
+        for i, task in enumerate(analysis_result.tasks, 1):
+            response += f"{i}. **{task.name}** ({task.type}, {task.priority})\n"
+            response += f"   {task.description}\n"
+            response += f"   Estimativa: {task.estimated_hours}h, Complexidade: {task.complexity}\n\n"
         
+        origin = "cache (PRP sem mudanças)" if outcome.cached else f"{outcome.tasks_inserted} tarefas salvas"
         response += f"""
-**Resumo:** {analysis_result['summary']}
-**Estimativa Total:** {analysis_result['total_estimated_hours']} horas
-**Complexidade:** {analysis_result['complexity_assessment']}
-**Análise ID:** {analysis_id}
+**Resumo:** {analysis_result.summary}
+**Estimativa Total:** {analysis_result.total_estimated_hours} horas
+**Complexidade:** {analysis_result.complexity_assessment}
+**Análise ID:** {outcome.analysis_id} ({origin})
+**Tokens:** {outcome.tokens_used}, **Tempo:** {outcome.processing_time_ms}ms
 
 **Próximos Passos:** Revisar e priorizar tarefas extraídas
 """
@@ -260,8 +177,9 @@ Retorne um JSON com a seguinte estrutura:
         # Adicionar à conversa
         ctx.deps.add_conversation(
             f"Analisar PRP {prp_id}",
-            f"Análise LLM concluída com {len(analysis_result['tasks'])} tarefas",
-            {"action": "analyze_prp", "prp_id": prp_id, "analysis_id": analysis_id}
+            f"Análise LLM concluída com {len(analysis_result.tasks)} tarefas",
+            {"action": "analyze_prp", "prp_id": prp_id, "analysis_id": outcome.analysis_id,
+             "cached": outcome.cached}
         )
         
         return response
@@ -277,25 +195,13 @@ async def get_prp_details(
     """Obtém detalhes completos de um PRP."""
     
     try:
-        conn = get_db_connection(ctx.deps.database_path)
-        cursor = conn.cursor()
-        
-        # Buscar PRP
-        cursor.execute("SELECT * FROM prps WHERE id = ?", (prp_id,))
-        prp = cursor.fetchone()
+        # PRP, tarefas e análises LLM em uma consulta (ou do cache, se não houve escrita)
+        details = await ctx.deps.prp_loader.load(prp_id)
         
-        if not prp:
+        if not details:
             return "❌ PRP não encontrado."
         
-        # Buscar tarefas
-        cursor.execute("SELECT * FROM prp_tasks WHERE prp_id = ? ORDER BY created_at", (prp_id,))
-        tasks = cursor.fetchall()
-        
-        # Buscar análises LLM
-        cursor.execute("SELECT * FROM prp_llm_analysis WHERE prp_id = ? ORDER BY created_at DESC", (prp_id,))
-        analyses = cursor.fetchall()
-        
-        conn.close()
+        prp, tasks, analyses = details.prp, details.tasks, details.analyses
         
         # Preparar resposta
         response = f"""
@@ -351,23 +257,20 @@ async def update_prp_status(
     """Atualiza o status de um PRP."""
     
     try:
-        conn = get_db_connection(ctx.deps.database_path)
-        cursor = conn.cursor()
+        def update(conn):
+            # Verificar se PRP existe e atualizar na mesma transação
+            prp = conn.execute("SELECT title FROM prps WHERE id = ?", (prp_id,)).fetchone()
+            if prp:
+                conn.execute("UPDATE prps SET status = ?, updated_at = ? WHERE id = ?", 
+                             (new_status, datetime.now().isoformat(), prp_id))
+            return prp
         
-        # Verificar se PRP existe
-        cursor.execute("SELECT title FROM prps WHERE id = ?", (prp_id,))
-        prp = cursor.fetchone()
+        prp = await ctx.deps.db.transaction(update, label="update_prp_status")
+        ctx.deps.prp_loader.invalidate(prp_id)
         
         if not prp:
             return "❌ PRP não encontrado."
         
-        # Atualizar status
-        cursor.execute("UPDATE prps SET status = ?, updated_at = ? WHERE id = ?", 
-                      (new_status, datetime.now().isoformat(), prp_id))
-        
-        conn.commit()
-        conn.close()
-        
         # Adicionar à conversa
         ctx.deps.add_conversation(
             f"Atualizar status PRP {prp_id}",
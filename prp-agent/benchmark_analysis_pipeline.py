@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline do pipeline de análise de PRPs.
+
+Usa um FunctionModel do pydantic-ai no lugar do LLM (latência simulada, JSON válido)
+e um banco SQLite temporário, e compara:
+
+1. análise sequencial (concorrência 1);
+2. análise concorrente com rate limiter;
+3. reanálise do mesmo backlog (todos os PRPs vêm do cache por hash do prompt).
+
+Uso:
+    python benchmark_analysis_pipeline.py --prps 100 --latency-ms 200 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# As configurações exigem uma chave, mas nenhuma chamada real é feita
+os.environ.setdefault("LLM_API_KEY", "benchmark")
+
+from pydantic_ai.messages import ModelMessage, ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from agents.analysis_pipeline import PRPAnalysisPipeline
+from agents.database import DatabaseGateway
+from agents.prp_loader import PRPDetailLoader
+
+SCHEMA = """
+CREATE TABLE prps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    description TEXT,
+    objective TEXT NOT NULL,
+    context_data TEXT NOT NULL,
+    implementation_details TEXT NOT NULL,
+    validation_gates TEXT,
+    status TEXT DEFAULT 'draft',
+    priority TEXT DEFAULT 'medium',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    tags TEXT,
+    search_text TEXT
+);
+CREATE TABLE prp_tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prp_id INTEGER NOT NULL,
+    task_name TEXT NOT NULL,
+    description TEXT,
+    task_type TEXT DEFAULT 'feature',
+    priority TEXT DEFAULT 'medium',
+    estimated_hours REAL,
+    complexity TEXT DEFAULT 'medium',
+    status TEXT DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    context_files TEXT,
+    acceptance_criteria TEXT
+);
+CREATE TABLE prp_llm_analysis (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prp_id INTEGER NOT NULL,
+    analysis_type TEXT NOT NULL,
+    input_content TEXT NOT NULL,
+    output_content TEXT NOT NULL,
+    parsed_data TEXT,
+    model_used TEXT,
+    tokens_used INTEGER,
+    processing_time_ms INTEGER,
+    confidence_score REAL,
+    status TEXT DEFAULT 'completed',
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def make_model(latency_ms: float, tasks_per_prp: int) -> FunctionModel:
+    """FunctionModel que responde chamando a ferramenta de saída com um JSON válido."""
+
+    async def respond(messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(latency_ms / 1000)
+        tasks = [
+            {
+                "name": f"Tarefa {i + 1}",
+                "description": "Tarefa gerada pelo benchmark",
+                "type": "feature",
+                "priority": "medium",
+                "estimated_hours": 2.0,
+                "complexity": "medium",
+            }
+            for i in range(tasks_per_prp)
+        ]
+        output = {
+            "tasks": tasks,
+            "summary": "Análise simulada",
+            "total_estimated_hours": 2.0 * tasks_per_prp,
+            "complexity_assessment": "medium",
+            "confidence_score": 0.9,
+        }
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, json.dumps(output))])
+
+    return FunctionModel(respond, model_name="benchmark-function-model")
+
+
+def seed_database(db_path: str, prps: int):
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        """
+        INSERT INTO prps (name, title, description, objective, context_data, implementation_details)
+        VALUES (?, ?, ?, ?, '{}', '{}')
+        """,
+        [
+            (f"prp-{i}", f"PRP {i}", f"Descrição do PRP {i}", f"Objetivo do PRP {i}")
+            for i in range(prps)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def run_phase(name: str, pipeline: PRPAnalysisPipeline, prp_ids: list[int], force: bool):
+    started = time.perf_counter()
+    outcomes = await pipeline.analyze_many(prp_ids, force=force)
+    elapsed = time.perf_counter() - started
+    latencies = [o.processing_time_ms for o in outcomes if not o.cached and o.analysis]
+    return {
+        "phase": name,
+        "prps": len(prp_ids),
+        "elapsed_s": round(elapsed, 3),
+        "prps_per_s": round(len(prp_ids) / elapsed, 2),
+        "llm_calls": sum(1 for o in outcomes if not o.cached),
+        "cached": sum(1 for o in outcomes if o.cached),
+        "failed": sum(1 for o in outcomes if o.error),
+        "tasks_inserted": sum(o.tasks_inserted for o in outcomes),
+        "tokens_used": sum(o.tokens_used for o in outcomes if not o.cached),
+        "latency_ms_median": statistics.median(latencies) if latencies else 0,
+    }
+
+
+async def run_benchmark(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="prp-analysis-bench-")
+    model = make_model(args.latency_ms, args.tasks_per_prp)
+    prp_ids = list(range(1, args.prps + 1))
+    phases = []
+
+    for name, concurrency, force in [
+        ("sequencial", 1, True),
+        ("concorrente", args.concurrency, True),
+        ("reanalise_cache", args.concurrency, False),
+    ]:
+        db_path = os.path.join(workdir, "context-memory.db")
+        if name != "reanalise_cache":
+            # Sequencial e concorrente partem de um banco limpo
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+            seed_database(db_path, args.prps)
+            db = DatabaseGateway(db_path)
+            loader = PRPDetailLoader(db)
+        pipeline = PRPAnalysisPipeline(
+            db,
+            loader,
+            model=model,
+            max_concurrency=concurrency,
+            requests_per_minute=args.rpm,
+            timeout=args.timeout,
+        )
+        phases.append(await run_phase(name, pipeline, prp_ids, force))
+
+    db.close()
+    return {
+        "config": vars(args),
+        "phases": phases,
+        "speedup_concurrent": round(phases[0]["elapsed_s"] / phases[1]["elapsed_s"], 2),
+        "database_queries": db.query_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline de análise de PRPs")
+    parser.add_argument("--prps", type=int, default=50, help="PRPs no backlog (padrão: 50)")
+    parser.add_argument("--latency-ms", type=float, default=100, help="Latência simulada do LLM")
+    parser.add_argument("--concurrency", type=int, default=8, help="Análises simultâneas")
+    parser.add_argument("--rpm", type=float, default=0, help="Limite de requisições por minuto (0 = sem limite)")
+    parser.add_argument("--tasks-per-prp", type=int, default=5, help="Tarefas por resposta simulada")
+    parser.add_argument("--timeout", type=float, default=30, help="Timeout por análise em segundos")
+    parser.add_argument("--output", help="Salvar o relatório JSON neste arquivo")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    rendered = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+    print(rendered)
+    return 0 if not any(p["failed"] for p in report["phases"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
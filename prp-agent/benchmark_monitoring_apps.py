@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga dos apps FastAPI de monitoramento.
+
+Gera carga real contra `main_ai_monitoring` (POST /ai-agent/process) ou
+`main_sentry_official` (POST /ai-agent/official), em processo via transporte ASGI do
+httpx (sem rede) ou contra um servidor rodando (`--url`).
+
+- modo fechado: `--concurrency` clientes, cada um envia a próxima requisição ao receber
+  a resposta anterior;
+- modo aberto: chegadas a `--rate` requisições/s (intervalos exponenciais), independentes
+  das respostas; a latência conta a partir do horário programado da chegada, então
+  filas no servidor aparecem nos percentis;
+- aquecimento (`--warmup`) descartado das estatísticas;
+- histograma de latência e percentis p50/p95/p99 em JSON, com comparação opcional
+  contra um relatório anterior (`--baseline`).
+
+A latência simulada do LLM é substituída por `--llm-latency-ms` (0 por padrão) e o
+Sentry é reinicializado sem DSN, então nada sai da máquina.
+
+Uso:
+    python benchmark_monitoring_apps.py --app monitoring --concurrency 32 --duration 10
+    python benchmark_monitoring_apps.py --app sentry --rate 200 --duration 10 --output run.json
+    python benchmark_monitoring_apps.py --app sentry --rate 200 --baseline run.json
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+APPS = {
+    "monitoring": {
+        "module": "main_ai_monitoring",
+        "path": "/ai-agent/process",
+        "payloads": [
+            {"prompt": "Analisar arquitetura de sistema", "model": "gpt-4"},
+            {"prompt": "Gerar documentação de API", "model": "gpt-4-turbo"},
+            {"prompt": "Revisar código para segurança", "model": "gpt-3.5-turbo"},
+            {"prompt": "Otimizar performance", "model": "gpt-4"},
+            {"prompt": "Criar testes automatizados", "model": "gpt-4-turbo"},
+        ],
+    },
+    "sentry": {
+        "module": "main_sentry_official",
+        "path": "/ai-agent/official",
+        "payloads": [
+            {"prompt": "Analyze system architecture", "model": "gpt-4o-mini"},
+            {"prompt": "Generate API documentation", "model": "gpt-4-turbo"},
+            {"prompt": "Review code security", "model": "gpt-4"},
+            {"prompt": "Optimize database queries", "model": "gpt-4o-mini"},
+            {"prompt": "Create automated tests", "model": "gpt-4-turbo"},
+        ],
+    },
+}
+
+# Limites superiores (ms) dos baldes do histograma; o último balde é aberto
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentil por interpolação linear (valores já ordenados)."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    low, high = math.floor(k), math.ceil(k)
+    if low == high:
+        return sorted_values[low]
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+def histogram(latencies_ms: List[float]) -> Dict[str, int]:
+    buckets = {f"<={limit}ms": 0 for limit in HISTOGRAM_BUCKETS_MS}
+    buckets[f">{HISTOGRAM_BUCKETS_MS[-1]}ms"] = 0
+    for value in latencies_ms:
+        for limit in HISTOGRAM_BUCKETS_MS:
+            if value <= limit:
+                buckets[f"<={limit}ms"] += 1
+                break
+        else:
+            buckets[f">{HISTOGRAM_BUCKETS_MS[-1]}ms"] += 1
+    return buckets
+
+
+class LoadRecorder:
+    """Guarda latências e erros das requisições feitas depois do aquecimento."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies_ms: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.warmup_requests = 0
+
+    def record(self, scheduled_at: float, finished_at: float, error: Optional[str]):
+        if scheduled_at < self.measure_from:
+            self.warmup_requests += 1
+            return
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        else:
+            self.latencies_ms.append((finished_at - scheduled_at) * 1000)
+
+    def summary(self, measured_seconds: float) -> Dict[str, Any]:
+        values = sorted(self.latencies_ms)
+        total = len(values) + sum(self.errors.values())
+        return {
+            "requests": total,
+            "ok": len(values),
+            "errors": self.errors,
+            "warmup_requests": self.warmup_requests,
+            "throughput_rps": round(len(values) / measured_seconds, 2) if measured_seconds else 0,
+            "latency_ms": {
+                "min": round(values[0], 3) if values else 0,
+                "mean": round(statistics.fmean(values), 3) if values else 0,
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3),
+                "p99": round(percentile(values, 99), 3),
+                "max": round(values[-1], 3) if values else 0,
+            },
+            "histogram": histogram(values),
+        }
+
+
+async def send(client, path: str, payload: Dict[str, Any], recorder: LoadRecorder, scheduled_at: float):
+    error = None
+    try:
+        response = await client.post(path, json=payload)
+        if response.status_code >= 400:
+            error = f"http_{response.status_code}"
+    except Exception as e:
+        error = type(e).__name__
+    recorder.record(scheduled_at, time.perf_counter(), error)
+
+
+async def run_closed_loop(client, app: Dict[str, Any], args, recorder: LoadRecorder, ends_at: float):
+    async def worker(worker_id: int):
+        sequence = 0
+        while time.perf_counter() < ends_at:
+            payload = dict(app["payloads"][sequence % len(app["payloads"])])
+            payload["user_id"] = f"load_user_{worker_id}"
+            sequence += 1
+            await send(client, app["path"], payload, recorder, time.perf_counter())
+
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+
+
+async def run_open_loop(client, app: Dict[str, Any], args, recorder: LoadRecorder, ends_at: float):
+    rng = random.Random(args.seed)
+    in_flight: set = set()
+    sequence = 0
+    next_arrival = time.perf_counter()
+    while next_arrival < ends_at:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        payload = dict(app["payloads"][sequence % len(app["payloads"])])
+        payload["user_id"] = f"load_user_{sequence}"
+        sequence += 1
+        # A chegada não espera respostas anteriores; --max-in-flight limita o total em voo
+        if len(in_flight) >= args.max_in_flight:
+            recorder.record(next_arrival, time.perf_counter(), "dropped_max_in_flight")
+        else:
+            task = asyncio.create_task(send(client, app["path"], payload, recorder, next_arrival))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_arrival += rng.expovariate(args.rate)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+def load_app(name: str, args):
+    """Importa o app, troca a latência do LLM pelo stub e desliga o envio ao Sentry."""
+    import sentry_sdk
+
+    module = importlib.import_module(APPS[name]["module"])
+    module.LLM_LATENCY_SECONDS = args.llm_latency_ms / 1000
+    if hasattr(module, "TOOL_LATENCY_SECONDS"):
+        module.TOOL_LATENCY_SECONDS = args.tool_latency_ms / 1000
+    if hasattr(module, "TOOL_LATENCY_RANGE"):
+        module.TOOL_LATENCY_RANGE = (args.tool_latency_ms / 1000, args.tool_latency_ms / 1000)
+    if not args.send_to_sentry:
+        # Mantém a instrumentação (spans, contextos) sem transporte de rede
+        sentry_sdk.init(dsn=None, traces_sample_rate=1.0)
+    return module.app
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("httpx é necessário para o benchmark: pip install httpx")
+
+    app = APPS[args.app]
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        transport = httpx.ASGITransport(app=load_app(args.app, args))
+        client = httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout)
+
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    ends_at = measure_from + args.duration
+    recorder = LoadRecorder(measure_from)
+    async with client:
+        if args.rate:
+            await run_open_loop(client, app, args, recorder, ends_at)
+        else:
+            await run_closed_loop(client, app, args, recorder, ends_at)
+    finished = time.perf_counter()
+
+    measured_seconds = max(0.0, min(finished, ends_at) - measure_from)
+    return {
+        "config": {
+            **{k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+            "mode": "open" if args.rate else "closed",
+            "target": args.url or f"asgi:{app['module']}",
+        },
+        "result": recorder.summary(measured_seconds),
+        "wall_time_s": round(finished - started, 3),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Diferença percentual das métricas principais em relação a um relatório anterior."""
+    def delta(current: float, previous: float) -> Optional[float]:
+        return round((current - previous) / previous * 100, 2) if previous else None
+
+    current, previous = report["result"], baseline["result"]
+    return {
+        "throughput_rps_pct": delta(current["throughput_rps"], previous["throughput_rps"]),
+        **{
+            f"{key}_ms_pct": delta(current["latency_ms"][key], previous["latency_ms"][key])
+            for key in ("p50", "p95", "p99")
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga dos apps de monitoramento")
+    parser.add_argument("--app", choices=sorted(APPS), default="monitoring", help="App a testar")
+    parser.add_argument("--url", help="URL de um servidor rodando (padrão: app em processo via ASGI)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes no modo fechado (padrão: 16)")
+    parser.add_argument("--rate", type=float, default=0, help="Chegadas por segundo (ativa o modo aberto)")
+    parser.add_argument("--max-in-flight", type=int, default=10000, help="Limite de requisições em voo no modo aberto")
+    parser.add_argument("--duration", type=float, default=10, help="Segundos medidos (padrão: 10)")
+    parser.add_argument("--warmup", type=float, default=2, help="Segundos de aquecimento descartados (padrão: 2)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="Latência do LLM simulado (padrão: 0)")
+    parser.add_argument("--tool-latency-ms", type=float, default=0, help="Latência de cada ferramenta simulada (padrão: 0)")
+    parser.add_argument("--timeout", type=float, default=30, help="Timeout por requisição em segundos")
+    parser.add_argument("--seed", type=int, default=42, help="Semente das chegadas no modo aberto")
+    parser.add_argument("--send-to-sentry", action="store_true", help="Manter o DSN do app e enviar eventos")
+    parser.add_argument("--output", help="Salvar o relatório JSON neste arquivo")
+    parser.add_argument("--baseline", help="Relatório JSON anterior para comparação")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    rendered = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+    print(rendered)
+    return 0 if report["result"]["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo da telemetria de AI Agents no caminho da requisição.
+
+Executa a mesma requisição simulada (invoke_agent → chat → ferramentas, com os atributos
+gen_ai.* dos apps de monitoramento e sem latência de LLM) em três cenários:
+
+1. sem_telemetria: nenhuma instrumentação (linha de base);
+2. sentry_direto: spans do Sentry em toda requisição e um `capture_message` por
+   requisição, como os apps faziam;
+3. telemetria_amostrada: `AgentTelemetry` com amostragem na cabeça, erros sempre
+   mantidos e envio em lote por uma thread.
+
+O Sentry usa um transporte local que só conta os envelopes, então nada sai da máquina.
+
+Uso:
+    python benchmark_telemetry.py --requests 5000 --sample-rate 0.1 --error-rate 0.01
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+import sentry_sdk
+from sentry_sdk.transport import Transport
+
+from agents.telemetry import AgentTelemetry
+
+TOOLS = [
+    {"name": "text_analyzer", "description": "Analyzes text content and extracts insights", "type": "function"},
+    {"name": "code_generator", "description": "Generates code based on requirements", "type": "function"},
+    {"name": "prp_parser", "description": "Parses Product Requirement Prompts", "type": "function"},
+]
+
+
+class CountingTransport(Transport):
+    """Transporte local: conta envelopes e itens em vez de enviá-los."""
+
+    def __init__(self, options=None):
+        super().__init__(options)
+        self.envelopes = 0
+        self.items: Dict[str, int] = {}
+
+    def capture_envelope(self, envelope):
+        self.envelopes += 1
+        for item in envelope.items:
+            self.items[item.type] = self.items.get(item.type, 0) + 1
+
+    def flush(self, timeout, callback=None):
+        return None
+
+    def kill(self):
+        return None
+
+
+class SimulatedError(Exception):
+    pass
+
+
+def simulated_request(span: Callable[[str, str], Any], prompt: str, fail: bool, json_attributes: bool):
+    """Mesma sequência de spans e atributos de SentryAIAgent.invoke_agent, sem latência."""
+    encode = json.dumps if json_attributes else (lambda value: value)
+    messages = [
+        {"role": "system", "content": "You are PRP Assistant, a helpful AI assistant."},
+        {"role": "user", "content": prompt},
+    ]
+    with span("gen_ai.invoke_agent", "invoke_agent PRP Assistant") as agent_span:
+        agent_span.set_data("gen_ai.system", "openai")
+        agent_span.set_data("gen_ai.request.model", "gpt-4o-mini")
+        agent_span.set_data("gen_ai.operation.name", "invoke_agent")
+        agent_span.set_data("gen_ai.agent.name", "PRP Assistant")
+        agent_span.set_data("gen_ai.request.available_tools", encode(TOOLS))
+        agent_span.set_data("gen_ai.request.messages", encode(messages))
+        with span("gen_ai.chat", "chat gpt-4o-mini") as chat_span:
+            chat_span.set_data("gen_ai.system", "openai")
+            chat_span.set_data("gen_ai.request.model", "gpt-4o-mini")
+            chat_span.set_data("gen_ai.request.messages", encode(messages))
+            tool_calls = []
+            for index, tool in enumerate(TOOLS[:2]):
+                with span("gen_ai.execute_tool", f"execute_tool {tool['name']}") as tool_span:
+                    tool_span.set_data("gen_ai.tool.name", tool["name"])
+                    tool_span.set_data("gen_ai.tool.description", tool["description"])
+                    tool_span.set_data("gen_ai.tool.input", encode({"prompt": prompt[:100]}))
+                    if fail and index == 1:
+                        raise SimulatedError("falha simulada da ferramenta")
+                    tool_span.set_data("gen_ai.tool.output", f"{tool['name']} ok")
+                tool_calls.append({"name": tool["name"], "type": "function_call"})
+            chat_span.set_data("gen_ai.response.tool_calls", encode(tool_calls))
+            chat_span.set_data("gen_ai.usage.total_tokens", 320)
+        agent_span.set_data("gen_ai.response.text", encode([f"Processed: {prompt[:100]}"]))
+        agent_span.set_data("gen_ai.usage.total_tokens", 320)
+
+
+class _NoopSpan:
+    def set_data(self, key, value):
+        pass
+
+
+@contextmanager
+def noop_span(op: str, name: str):
+    yield _NoopSpan()
+
+
+def sentry_span(op: str, name: str):
+    return sentry_sdk.start_span(op=op, name=name)
+
+
+def run_scenario(name: str, args, transport: CountingTransport) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    telemetry = None
+    if name == "telemetria_amostrada":
+        telemetry = AgentTelemetry(
+            sample_rate=args.sample_rate,
+            slow_ms=args.slow_ms,
+            flush_interval=args.flush_seconds,
+            batch_size=args.batch_size,
+        )
+    envelopes_before = transport.envelopes
+    items_before = dict(transport.items)
+
+    durations_us: List[float] = []
+    errors = 0
+    for i in range(args.requests):
+        fail = rng.random() < args.error_rate
+        prompt = f"Analyze system architecture #{i}"
+        started = time.perf_counter()
+        try:
+            if name == "sem_telemetria":
+                simulated_request(noop_span, prompt, fail, json_attributes=True)
+            elif name == "sentry_direto":
+                with sentry_sdk.start_transaction(op="http.server", name="POST /ai-agent/official"):
+                    try:
+                        simulated_request(sentry_span, prompt, fail, json_attributes=True)
+                    finally:
+                        sentry_sdk.capture_message(f"AI Agent completed: request {i}", level="info")
+            else:
+                simulated_request(telemetry.span, prompt, fail, json_attributes=False)
+        except SimulatedError as e:
+            errors += 1
+            if name == "sentry_direto":
+                sentry_sdk.capture_exception(e)
+        durations_us.append((time.perf_counter() - started) * 1_000_000)
+
+    drain_started = time.perf_counter()
+    if telemetry is not None:
+        telemetry.close()
+    sentry_sdk.flush()
+    drain_ms = (time.perf_counter() - drain_started) * 1000
+
+    durations_us.sort()
+    result = {
+        "scenario": name,
+        "requests": args.requests,
+        "errors": errors,
+        "request_us_mean": round(statistics.fmean(durations_us), 2),
+        "request_us_p50": round(durations_us[len(durations_us) // 2], 2),
+        "request_us_p99": round(durations_us[int(len(durations_us) * 0.99) - 1], 2),
+        "background_drain_ms": round(drain_ms, 2),
+        "envelopes": transport.envelopes - envelopes_before,
+        "items": {
+            key: count - items_before.get(key, 0)
+            for key, count in transport.items.items()
+            if count - items_before.get(key, 0)
+        },
+    }
+    if telemetry is not None:
+        result["telemetry"] = telemetry.stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo da telemetria de AI Agents por requisição")
+    parser.add_argument("--requests", type=int, default=5000, help="Requisições por cenário (padrão: 5000)")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="Amostragem na cabeça (padrão: 0.1)")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Fração de requisições com erro")
+    parser.add_argument("--slow-ms", type=float, default=2000, help="Limite de requisição lenta (sempre mantida)")
+    parser.add_argument("--flush-seconds", type=float, default=1.0, help="Intervalo de envio em lote")
+    parser.add_argument("--batch-size", type=int, default=50, help="Traces por lote")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos erros simulados")
+    parser.add_argument("--output", help="Salvar o relatório JSON neste arquivo")
+    args = parser.parse_args()
+
+    transport = CountingTransport()
+    sentry_sdk.init(
+        dsn="https://public@sentry.invalid/1",
+        transport=transport,
+        traces_sample_rate=1.0,
+        default_integrations=False,
+    )
+
+    scenarios = [
+        run_scenario(name, args, transport)
+        for name in ("sem_telemetria", "sentry_direto", "telemetria_amostrada")
+    ]
+    baseline = scenarios[0]["request_us_mean"]
+    for scenario in scenarios:
+        scenario["overhead_us_mean"] = round(scenario["request_us_mean"] - baseline, 2)
+
+    direct, sampled = scenarios[1], scenarios[2]
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "scenarios": scenarios,
+        "overhead_reduction": (
+            round(direct["overhead_us_mean"] / sampled["overhead_us_mean"], 2)
+            if sampled["overhead_us_mean"] > 0 else None
+        ),
+    }
+    rendered = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,7 +14,13 @@ from rich.prompt import Prompt, Confirm
 from rich.table import Table
 from rich.text import Text
 from rich.syntax import Syntax
-from agents.agent import chat_with_prp_agent, PRPAgentDependencies, get_agent_stats
+from agents.agent import (
+    PRPAgentDependencies,
+    StreamMetrics,
+    chat_with_prp_agent,
+    get_agent_stats,
+    stream_chat_with_prp_agent,
+)
 from agents.settings import settings
 
 console = Console()
@@ -175,20 +181,17 @@ async def main():
             # Processar com o agente
             console.print("[bold blue]Agente:[/bold blue] ", end="")
             
-            # Mostrar indicador de processamento
-            with console.status("[bold green]Processando..."):
-                response = await chat_with_prp_agent(user_input, deps)
+            # Mostrar a resposta à medida que o modelo gera
+            metrics = StreamMetrics()
+            async for chunk in stream_chat_with_prp_agent(user_input, deps, metrics=metrics):
+                style = "red" if chunk.lstrip().startswith("❌") else None
+                console.print(chunk, end="", style=style, markup=False, highlight=False)
+            console.print()
             
-            # Formatar resposta
-            if response.startswith("✅") or response.startswith("🔍") or response.startswith("🧠"):
-                # Resposta de sucesso - usar cor verde
-                console.print(f"[green]{response}[/green]")
-            elif response.startswith("❌"):
-                # Resposta de erro - usar cor vermelha
-                console.print(f"[red]{response}[/red]")
-            else:
-                # Resposta normal
-                console.print(response)
+            if metrics.ttft_ms is not None:
+                console.print(
+                    f"[dim]⏱ primeiro token: {metrics.ttft_ms} ms · total: {metrics.total_ms} ms[/dim]"
+                )
             
             console.print()
             
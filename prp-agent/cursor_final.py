@@ -9,12 +9,16 @@ Perfeita para uso no Cursor Agent com linguagem natural.
 import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from openai import AsyncOpenAI
 import os
 from dotenv import load_dotenv
 
+from agents.context_assembler import ContextAssembler
+from agents.database import DatabaseGateway
+from agents.llm_clients import get_llm_registry
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
@@ -35,13 +39,22 @@ class CursorFinalIntegration:
         base_url = os.getenv("LLM_BASE_URL", "https://api.openai.com/v1")
         model = os.getenv("LLM_MODEL", "gpt-4")
         
-        self.client = AsyncOpenAI(
-            api_key=api_key,
-            base_url=base_url
-        )
+        # Cliente compartilhado: pool HTTP, limite de concorrência e repetições do processo
+        self.client = get_llm_registry().openai_client(model, api_key, base_url)
         self.model = model
         self.conversation_history = []
         
+        # Timeout até o primeiro token e entre tokens do streaming
+        self.stream_timeout = float(os.getenv("LLM_STREAM_TIMEOUT", "30"))
+        self.last_stream_metrics: Dict[str, Any] = {}
+        
+        # Contexto por orçamento de tokens; PRPs e docs só se o banco já existir
+        database_path = os.getenv("DATABASE_PATH", "../context-memory.db")
+        self.context_assembler = ContextAssembler(
+            DatabaseGateway(database_path) if os.path.exists(database_path) else None,
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000")),
+        )
+        
         self.system_prompt = """Você é um assistente especializado em análise e gerenciamento de PRPs (Product Requirement Prompts).
 
 **Suas responsabilidades:**
@@ -69,12 +82,31 @@ class CursorFinalIntegration:
         """
         Conversa natural com o LLM.
         """
+        # Mesmo caminho do streaming, acumulando a resposta completa
+        chunks = []
+        async for chunk in self.chat_natural_stream(message, file_context):
+            chunks.append(chunk)
+        return "".join(chunks)
+    
+    async def chat_natural_stream(
+        self, message: str, file_context: str = None
+    ) -> AsyncIterator[str]:
+        """
+        Conversa natural com o LLM, entregando a resposta token a token.
+        
+        O timeout vale até o primeiro token e entre um token e o próximo, não para a
+        resposta inteira. Tempo até o primeiro token e latência total ficam em
+        `self.last_stream_metrics` e no histórico da conversa.
+        """
         
         # Adicionar contexto se fornecido
         full_message = message
         if file_context:
             full_message = f"Contexto do arquivo atual:\n{file_context}\n\nSolicitação do usuário: {message}"
         
+        # Turnos anteriores (pergunta + resposta) candidatos ao contexto
+        previous_turns = self._history_turns()
+        
         # Adicionar ao histórico
         self.conversation_history.append({
             "user": message,
@@ -82,72 +114,126 @@ class CursorFinalIntegration:
             "file_context": file_context
         })
         
+        started = time.perf_counter()
+        metrics = {"ttft_ms": None, "total_ms": 0, "chunks": 0}
+        self.last_stream_metrics = metrics
+        parts = []
+        stream = None
         try:
-            # Preparar mensagens
+            # Selecionar histórico, PRPs e docs relevantes dentro do orçamento de tokens
+            context = await self.context_assembler.assemble(message, turns=previous_turns)
+            
+            # Preparar mensagens: system prompt e contexto formam um prefixo estável
             messages = [{"role": "system", "content": self.system_prompt}]
+            if context.prefix:
+                messages.append({"role": "system", "content": context.prefix})
             
-            # Adicionar histórico recente (últimas 6 mensagens para evitar token limit)
-            recent_history = self.conversation_history[-6:]  # Últimas 6 interações
-            for item in recent_history:
-                if "user" in item:
-                    messages.append({"role": "user", "content": item["user"]})
-                if "agent" in item:
-                    messages.append({"role": "assistant", "content": item["agent"]})
+            for turn in context.turns:
+                messages.append({"role": "user", "content": turn["message"]})
+                if turn["response"]:
+                    messages.append({"role": "assistant", "content": turn["response"]})
             
             # Adicionar mensagem atual
             messages.append({"role": "user", "content": full_message})
             
-            # Chamar OpenAI com timeout
-            response = await asyncio.wait_for(
+            # Chamar OpenAI em streaming com timeout
+            stream = await asyncio.wait_for(
                 self.client.chat.completions.create(
                     model=self.model,
                     messages=messages,
                     max_tokens=1500,
-                    temperature=0.7
+                    temperature=0.7,
+                    stream=True
                 ),
-                timeout=30.0  # 30 segundos timeout
+                timeout=self.stream_timeout
             )
             
-            # Extrair resposta
-            response_content = response.choices[0].message.content
+            header, footer = self._response_frame(message)
+            chunk_iterator = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        chunk_iterator.__anext__(), timeout=self.stream_timeout
+                    )
+                except StopAsyncIteration:
+                    break
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if metrics["ttft_ms"] is None:
+                    metrics["ttft_ms"] = int((time.perf_counter() - started) * 1000)
+                    yield header
+                metrics["chunks"] += 1
+                parts.append(delta)
+                yield delta
+            
+            if parts:
+                yield footer
+            metrics["total_ms"] = int((time.perf_counter() - started) * 1000)
+            logger.info(
+                f"Resposta em streaming: primeiro token em {metrics['ttft_ms']} ms, "
+                f"total {metrics['total_ms']} ms"
+            )
             
             # Adicionar resposta ao histórico
             self.conversation_history.append({
-                "agent": response_content,
-                "timestamp": datetime.now().isoformat()
+                "agent": "".join(parts),
+                "timestamp": datetime.now().isoformat(),
+                "latency": dict(metrics)
             })
             
-            return self._format_response(response_content, message)
-            
         except asyncio.TimeoutError:
             logger.error("Timeout na chamada da API")
-            return "❌ Desculpe, a resposta demorou muito. Tente novamente."
+            yield "❌ Desculpe, a resposta demorou muito. Tente novamente."
         except Exception as e:
             logger.error(f"Erro na conversa: {e}")
-            return f"❌ Desculpe, tive um problema: {str(e)}"
+            yield f"❌ Desculpe, tive um problema: {str(e)}"
+        finally:
+            # Timeout, erro ou consumidor que abandonou o gerador: fecha a resposta HTTP
+            if stream is not None:
+                await stream.close()
+    
+    def _history_turns(self) -> List[Dict[str, str]]:
+        """Agrupa o histórico em turnos {message, response}."""
+        turns = []
+        for item in self.conversation_history:
+            if "user" in item:
+                turns.append({"message": item["user"], "response": ""})
+            elif "agent" in item and turns:
+                turns[-1]["response"] = item["agent"]
+        return turns
     
     def _format_response(self, response: str, original_message: str) -> str:
         """
         Formata resposta de forma natural e contextualizada.
         """
+        header, footer = self._response_frame(original_message)
+        return f"{header}{response}{footer}"
+    
+    def _response_frame(self, original_message: str) -> Tuple[str, str]:
+        """
+        Cabeçalho e rodapé da resposta conforme o tipo de solicitação.
+        """
         
         message_lower = original_message.lower()
         
         # Detectar tipo de solicitação
         if any(word in message_lower for word in ["criar", "novo", "fazer", "desenvolver"]):
-            return f"🎯 **PRP Sugerido!**\n\n{response}\n\n💡 **Próximos passos:**\n• Analisei o contexto automaticamente\n• Sugeri estrutura e tarefas\n• Considerei padrões do projeto\n\nQuer que eu detalhe algum aspecto?"
+            return "🎯 **PRP Sugerido!**\n\n", "\n\n💡 **Próximos passos:**\n• Analisei o contexto automaticamente\n• Sugeri estrutura e tarefas\n• Considerei padrões do projeto\n\nQuer que eu detalhe algum aspecto?"
         
         elif any(word in message_lower for word in ["analisar", "revisar", "verificar", "examinar"]):
-            return f"🔍 **Análise Realizada**\n\n{response}\n\n📊 **Insights:**\n• Identifiquei pontos de melhoria\n• Sugeri otimizações\n• Considerei boas práticas\n\nQuer que eu detalhe algum ponto específico?"
+            return "🔍 **Análise Realizada**\n\n", "\n\n📊 **Insights:**\n• Identifiquei pontos de melhoria\n• Sugeri otimizações\n• Considerei boas práticas\n\nQuer que eu detalhe algum ponto específico?"
         
         elif any(word in message_lower for word in ["buscar", "encontrar", "procurar", "listar"]):
-            return f"📋 **Busca Realizada**\n\n{response}\n\n🔍 **Resultados:**\n• Busca contextual inteligente\n• Ordenação por relevância\n• Filtros aplicados automaticamente\n\nQuer ver mais detalhes?"
+            return "📋 **Busca Realizada**\n\n", "\n\n🔍 **Resultados:**\n• Busca contextual inteligente\n• Ordenação por relevância\n• Filtros aplicados automaticamente\n\nQuer ver mais detalhes?"
         
         elif any(word in message_lower for word in ["status", "progresso", "como está"]):
-            return f"📊 **Status do Projeto**\n\n{response}\n\n📈 **Métricas:**\n• Análise de progresso geral\n• Identificação de riscos\n• Sugestões de melhoria\n\nQuer um plano de ação detalhado?"
+            return "📊 **Status do Projeto**\n\n", "\n\n📈 **Métricas:**\n• Análise de progresso geral\n• Identificação de riscos\n• Sugestões de melhoria\n\nQuer um plano de ação detalhado?"
         
         else:
-            return f"🤖 **Resposta do Agente**\n\n{response}\n\n💭 **Contexto:**\n• Mantive histórico da conversa\n• Considerei padrões do projeto\n• Sugestões personalizadas\n\nComo posso ajudar mais?"
+            return "🤖 **Resposta do Agente**\n\n", "\n\n💭 **Contexto:**\n• Mantive histórico da conversa\n• Considerei padrões do projeto\n• Sugestões personalizadas\n\nComo posso ajudar mais?"
     
     async def analyze_file(self, file_path: str, content: str) -> str:
         """
@@ -293,6 +379,10 @@ async def chat_natural(message: str, file_context: str = None) -> str:
     """Conversa natural com o agente LLM."""
     return await cursor_final_agent.chat_natural(message, file_context)
 
+def chat_natural_stream(message: str, file_context: str = None) -> AsyncIterator[str]:
+    """Conversa natural com o agente LLM, em streaming."""
+    return cursor_final_agent.chat_natural_stream(message, file_context)
+
 async def analyze_file(file_path: str, content: str) -> str:
     """Analisa arquivo usando LLM."""
     return await cursor_final_agent.analyze_file(file_path, content)
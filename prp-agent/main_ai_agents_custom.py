@@ -7,6 +7,8 @@ import random
 import time
 import uuid
 
+from agents.llm_clients import SIMULATED_PROVIDER, get_llm_registry
+
 # Configure SDK for AI Agents monitoring (Custom Implementation)
 # Baseado na documentação oficial Sentry, adaptado para monitoramento customizado de AI Agents
 sentry_sdk.init(
@@ -24,6 +26,9 @@ sentry_sdk.init(
 
 app = FastAPI(title="PRP Agent - AI Agents Custom Monitoring")
 
+# Registro de clientes LLM do processo (limite de concorrência e métricas por modelo)
+llm_registry = get_llm_registry()
+
 # Modelos para AI Agent
 class AgentRequest(BaseModel):
     prompt: str
@@ -158,7 +163,8 @@ class AIAgentMonitor:
         
         try:
             # 2. Simular processamento inicial
-            await asyncio.sleep(0.3)
+            async with llm_registry.track(SIMULATED_PROVIDER, self.model):
+                await asyncio.sleep(0.3)
             
             # 3. Simular uso de ferramentas
             tools_used = []
@@ -197,7 +203,8 @@ class AIAgentMonitor:
                 ))
             
             # 4. Simular resposta final
-            await asyncio.sleep(0.2)
+            async with llm_registry.track(SIMULATED_PROVIDER, self.model):
+                await asyncio.sleep(0.2)
             
             total_time = time.time() - start_time
             total_tokens = sum(tool.tokens_used for tool in tools_used) + random.randint(100, 300)
@@ -331,6 +338,11 @@ async def ai_agent_benchmark():
         "results": results
     }
 
+@app.get("/ai-agent/llm-clients")
+async def llm_client_stats():
+    """Latência e uso por provedor/modelo do registro de clientes LLM"""
+    return llm_registry.stats()
+
 @app.get("/sentry-debug")
 async def trigger_error():
     """Debug endpoint para Sentry"""
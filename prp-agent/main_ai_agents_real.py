@@ -208,16 +208,18 @@ async def generate_prp(request: PRPRequest):
     return await prp_orchestrator.generate_prp(request)
 
 @app.get("/prp/list")
-async def list_prps(offset: int = 0, limit: int = 20):
-    """Lista PRPs armazenados"""
+async def list_prps(limit: int = 20, cursor: Optional[str] = None):
+    """Lista PRPs armazenados (`next_cursor` pede a página seguinte)"""
     
     try:
-        result = await turso.list_all_prps(offset, limit)
+        result = await turso.list_all_prps(cursor=cursor, limit=limit)
         return {
             "prps": result.get("result", {}).get("rows", []),
-            "offset": offset,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": result.get("result", {}).get("next_cursor")
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         sentry_sdk.capture_exception(e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,9 +2,15 @@ from fastapi import FastAPI
 import sentry_sdk
 from pydantic import BaseModel
 from typing import Dict, Any, List
+import asyncio
+import os
+import random
 import time
 import uuid
 
+from agents.llm_clients import SIMULATED_PROVIDER, get_llm_registry
+from agents.telemetry import AgentTelemetry
+
 # Configure SDK for AI Agents monitoring (Practical Approach)
 # Baseado na documentação Sentry + contexto personalizado para AI Agents
 sentry_sdk.init(
@@ -17,6 +23,16 @@ sentry_sdk.init(
 
 app = FastAPI()
 
+# Spans do agente gravados em memória, amostrados (lentos e com erro sempre) e enviados em lote
+telemetry = AgentTelemetry.from_env()
+
+# Registro de clientes LLM do processo (limite de concorrência e métricas por modelo)
+llm_registry = get_llm_registry()
+
+# Latência simulada do LLM e de cada ferramenta (o benchmark de carga reduz para 0)
+LLM_LATENCY_SECONDS = float(os.getenv("AI_AGENT_LLM_LATENCY", "0.5"))
+TOOL_LATENCY_SECONDS = float(os.getenv("AI_AGENT_TOOL_LATENCY", "0.1"))
+
 class AIAgentRequest(BaseModel):
     prompt: str
     model: str = "gpt-4"
@@ -68,12 +84,12 @@ def monitor_ai_tool_usage(session_id: str, tool_name: str, tokens: int):
     """
     Monitorar uso de ferramentas AI
     """
-    sentry_sdk.set_context(f"ai_tool_{tool_name}", {
-        "session_id": session_id,
-        "tool": tool_name,
-        "tokens_used": tokens,
-        "timestamp": time.time()
-    })
+    # Dados da ferramenta no span atual; vão ao Sentry só se o trace for mantido
+    span = telemetry.current_span()
+    if span is not None:
+        span.set_data("gen_ai.tool.name", tool_name)
+        span.set_data("gen_ai.usage.total_tokens", tokens)
+        span.set_data("ai.session", session_id)
     
     sentry_sdk.add_breadcrumb(
         message=f"AI Tool {tool_name} executed",
@@ -100,16 +116,14 @@ def monitor_ai_agent_complete(session_id: str, total_tokens: int,
         "stage": "completed"
     })
     
-    # Capture completion event
-    sentry_sdk.capture_message(
-        f"AI Agent completed: {total_tokens} tokens, {len(tools_used)} tools, {processing_time:.2f}s",
-        level="info",
-        tags={
-            "ai.event": "completion",
-            "ai.session": session_id,
-            "ai.performance": f"{total_tokens}tokens_{processing_time:.2f}s"
-        }
-    )
+    # Conclusão no span do agente: agregada em memória e enviada em lote pela telemetria,
+    # em vez de um capture_message por requisição
+    span = telemetry.current_span()
+    if span is not None:
+        span.set_data("ai.session", session_id)
+        span.set_data("ai.tools", tools_used)
+        span.set_data("gen_ai.usage.total_tokens", total_tokens)
+        span.set_data("ai.processing_time", processing_time)
 
 @app.get("/")
 async def root():
@@ -130,54 +144,56 @@ async def process_ai_agent(request: AIAgentRequest):
     start_time = time.time()
     
     try:
-        # 1. Monitorar início
-        session_id = monitor_ai_agent_start(
-            request.prompt, request.model, request.user_id
-        )
-        
-        # 2. Simular processamento AI Agent
-        import asyncio
-        import random
-        
-        await asyncio.sleep(0.5)  # Simular processamento
-        
-        # 3. Simular uso de ferramentas
-        available_tools = [
-            "text_analyzer", "code_generator", "prp_parser", 
-            "context_builder", "output_formatter"
-        ]
-        
-        tools_used = random.sample(available_tools, random.randint(2, 4))
-        total_tokens = 0
-        
-        for tool in tools_used:
-            tool_tokens = random.randint(20, 150)
-            total_tokens += tool_tokens
-            monitor_ai_tool_usage(session_id, tool, tool_tokens)
-            await asyncio.sleep(0.1)  # Simular tempo de ferramenta
-        
-        # Adicionar tokens do modelo principal
-        total_tokens += random.randint(200, 500)
-        
-        # 4. Gerar resultado
-        result = f"AI Agent processou: '{request.prompt[:100]}...' usando {len(tools_used)} ferramentas"
-        
-        processing_time = time.time() - start_time
-        
-        # 5. Monitorar conclusão
-        monitor_ai_agent_complete(
-            session_id, total_tokens, tools_used, processing_time
-        )
-        
-        return AIAgentResponse(
-            result=result,
-            agent_session=session_id,
-            tokens_used=total_tokens,
-            model=request.model,
-            tools_called=tools_used,
-            processing_time=processing_time
-        )
-        
+        with telemetry.span("gen_ai.invoke_agent", f"invoke_agent {request.model}") as agent_span:
+            agent_span.set_data("gen_ai.request.model", request.model)
+            
+            # 1. Monitorar início
+            session_id = monitor_ai_agent_start(
+                request.prompt, request.model, request.user_id
+            )
+            
+            # 2. Simular processamento AI Agent
+            async with llm_registry.track(SIMULATED_PROVIDER, request.model):
+                await asyncio.sleep(LLM_LATENCY_SECONDS)  # Simular processamento
+            
+            # 3. Simular uso de ferramentas
+            available_tools = [
+                "text_analyzer", "code_generator", "prp_parser", 
+                "context_builder", "output_formatter"
+            ]
+            
+            tools_used = random.sample(available_tools, random.randint(2, 4))
+            total_tokens = 0
+            
+            for tool in tools_used:
+                with telemetry.span("gen_ai.execute_tool", f"execute_tool {tool}"):
+                    tool_tokens = random.randint(20, 150)
+                    total_tokens += tool_tokens
+                    monitor_ai_tool_usage(session_id, tool, tool_tokens)
+                    await asyncio.sleep(TOOL_LATENCY_SECONDS)  # Simular tempo de ferramenta
+            
+            # Adicionar tokens do modelo principal
+            total_tokens += random.randint(200, 500)
+            
+            # 4. Gerar resultado
+            result = f"AI Agent processou: '{request.prompt[:100]}...' usando {len(tools_used)} ferramentas"
+            
+            processing_time = time.time() - start_time
+            
+            # 5. Monitorar conclusão
+            monitor_ai_agent_complete(
+                session_id, total_tokens, tools_used, processing_time
+            )
+            
+            return AIAgentResponse(
+                result=result,
+                agent_session=session_id,
+                tokens_used=total_tokens,
+                model=request.model,
+                tools_called=tools_used,
+                processing_time=processing_time
+            )
+            
     except Exception as e:
         # Capturar erros específicos de AI Agent
         sentry_sdk.set_context("ai_agent_error", {
@@ -193,6 +209,8 @@ async def process_ai_agent(request: AIAgentRequest):
 async def ai_agent_benchmark():
     """
     Benchmark AI Agent - Gera múltiplos eventos Sentry
+    
+    Smoke test com cinco casos; para medir capacidade use benchmark_monitoring_apps.py.
     """
     test_cases = [
         {"prompt": "Analisar arquitetura de sistema", "model": "gpt-4"},
@@ -202,25 +220,29 @@ async def ai_agent_benchmark():
         {"prompt": "Criar testes automatizados", "model": "gpt-4-turbo"}
     ]
     
-    results = []
-    
-    for i, test in enumerate(test_cases):
-        request = AIAgentRequest(
+    # Casos em paralelo: o tempo total é o do caso mais lento, não a soma
+    responses = await asyncio.gather(*(
+        process_ai_agent(AIAgentRequest(
             prompt=test["prompt"],
             model=test["model"],
             user_id=f"benchmark_user_{i}"
-        )
-        
-        result = await process_ai_agent(request)
-        
-        results.append({
+        ))
+        for i, test in enumerate(test_cases)
+    ))
+    
+    results = [
+        {
             "test": i + 1,
             "prompt": test["prompt"][:50] + "...",
             "model": test["model"],
             "tokens": result.tokens_used,
             "tools": len(result.tools_called),
-            "time": f"{result.processing_time:.2f}s"
-        })
+            "time": f"{result.processing_time:.2f}s",
+            "time_s": round(result.processing_time, 4)
+        }
+        for i, (test, result) in enumerate(zip(test_cases, responses))
+    ]
+    times = [r["time_s"] for r in results]
     
     # Capturar resumo do benchmark
     total_tokens = sum(r["tokens"] for r in results)
@@ -238,10 +260,26 @@ async def ai_agent_benchmark():
         "benchmark": "completed",
         "tests": len(results),
         "total_tokens": total_tokens,
-        "avg_time": f"{sum(float(r['time'][:-1]) for r in results) / len(results):.2f}s",
+        "avg_time": f"{sum(times) / len(times):.2f}s",
+        "avg_time_s": round(sum(times) / len(times), 4),
+        "max_time_s": max(times),
         "results": results
     }
 
+@app.get("/ai-agent/telemetry")
+async def telemetry_stats():
+    """Contadores da amostragem e do envio em lote da telemetria"""
+    return telemetry.stats()
+
+@app.get("/ai-agent/llm-clients")
+async def llm_client_stats():
+    """Latência e uso por provedor/modelo do registro de clientes LLM"""
+    return llm_registry.stats()
+
+@app.on_event("shutdown")
+def flush_telemetry():
+    telemetry.close()
+
 @app.get("/sentry-debug")
 async def trigger_error():
     """Endpoint de debug para Sentry"""
@@ -8,6 +8,8 @@ import json
 import asyncio
 import random
 
+from agents.telemetry import AgentTelemetry
+
 # Configure SDK seguindo documentação oficial Sentry AI Agents + Release Health
 sentry_sdk.init(
     dsn="https://d9fe4e8016424adebb7389d5df925764@o927801.ingest.us.sentry.io/4509774227832832",
@@ -22,6 +24,9 @@ sentry_sdk.init(
 
 app = FastAPI()
 
+# Spans gen_ai.* gravados em memória, amostrados (lentos e com erro sempre) e enviados em lote
+telemetry = AgentTelemetry.from_env()
+
 class OfficialAgentRequest(BaseModel):
     prompt: str
     model: str = "gpt-4o-mini"
@@ -50,9 +55,9 @@ def invoke_agent_official(agent_name: str, model: str, prompt: str, temperature:
     session_id = str(uuid.uuid4())
     
     # INVOKE AGENT SPAN - Padrão oficial
-    with sentry_sdk.start_span(
-        op="gen_ai.invoke_agent",  # MUST be "gen_ai.invoke_agent"
-        name=f"invoke_agent {agent_name}",  # SHOULD be "invoke_agent {agent_name}"
+    with telemetry.span(
+        "gen_ai.invoke_agent",  # MUST be "gen_ai.invoke_agent"
+        f"invoke_agent {agent_name}",  # SHOULD be "invoke_agent {agent_name}"
     ) as span:
         
         # Common Span Attributes - REQUIRED
@@ -71,14 +76,14 @@ def invoke_agent_official(agent_name: str, model: str, prompt: str, temperature:
             {"name": "code_generator", "description": "Generates code"},
             {"name": "prp_parser", "description": "Parses Product Requirements"}
         ]
-        span.set_data("gen_ai.request.available_tools", json.dumps(available_tools))
+        span.set_data("gen_ai.request.available_tools", available_tools)
         
         # Messages format: [{"role": "", "content": ""}]
         messages = [
             {"role": "system", "content": f"You are {agent_name}, a helpful assistant."},
             {"role": "user", "content": prompt}
         ]
-        span.set_data("gen_ai.request.messages", json.dumps(messages))
+        span.set_data("gen_ai.request.messages", messages)
         
         # Processar com LLM
         start_time = time.time()
@@ -86,9 +91,9 @@ def invoke_agent_official(agent_name: str, model: str, prompt: str, temperature:
         processing_time = time.time() - start_time
         
         # Response data
-        span.set_data("gen_ai.response.text", json.dumps([llm_result["response"]]))
+        span.set_data("gen_ai.response.text", [llm_result["response"]])
         if llm_result["tool_calls"]:
-            span.set_data("gen_ai.response.tool_calls", json.dumps(llm_result["tool_calls"]))
+            span.set_data("gen_ai.response.tool_calls", llm_result["tool_calls"])
         
         # Token usage
         span.set_data("gen_ai.usage.input_tokens", llm_result["input_tokens"])
@@ -114,9 +119,9 @@ def ai_client_official(model: str, messages: List[Dict], temperature: float, max
     """
     
     # AI CLIENT SPAN - Padrão oficial
-    with sentry_sdk.start_span(
-        op="gen_ai.chat",  # MUST be "gen_ai.chat"
-        name=f"chat {model}",  # SHOULD be "chat {model}"
+    with telemetry.span(
+        "gen_ai.chat",  # MUST be "gen_ai.chat"
+        f"chat {model}",  # SHOULD be "chat {model}"
     ) as span:
         
         # Common Span Attributes - REQUIRED
@@ -125,7 +130,7 @@ def ai_client_official(model: str, messages: List[Dict], temperature: float, max
         span.set_data("gen_ai.operation.name", "chat")  # operation name
         
         # Request data
-        span.set_data("gen_ai.request.messages", json.dumps(messages))
+        span.set_data("gen_ai.request.messages", messages)
         span.set_data("gen_ai.request.temperature", temperature)
         span.set_data("gen_ai.request.max_tokens", max_tokens)
         
@@ -162,9 +167,9 @@ def ai_client_official(model: str, messages: List[Dict], temperature: float, max
                 })
         
         # Response data
-        span.set_data("gen_ai.response.text", json.dumps([response]))
+        span.set_data("gen_ai.response.text", [response])
         if tool_calls:
-            span.set_data("gen_ai.response.tool_calls", json.dumps(tool_calls))
+            span.set_data("gen_ai.response.tool_calls", tool_calls)
         
         # Token usage
         span.set_data("gen_ai.usage.input_tokens", input_tokens)
@@ -189,9 +194,9 @@ def execute_tool_official(tool_name: str, input_text: str, model: str, session_i
     """
     
     # EXECUTE TOOL SPAN - Padrão oficial
-    with sentry_sdk.start_span(
-        op="gen_ai.execute_tool",  # MUST be "gen_ai.execute_tool"
-        name=f"execute_tool {tool_name}",  # SHOULD be "execute_tool {tool_name}"
+    with telemetry.span(
+        "gen_ai.execute_tool",  # MUST be "gen_ai.execute_tool"
+        f"execute_tool {tool_name}",  # SHOULD be "execute_tool {tool_name}"
     ) as span:
         
         # Common attributes
@@ -212,7 +217,7 @@ def execute_tool_official(tool_name: str, input_text: str, model: str, session_i
         
         # Tool input/output
         tool_input = {"text": input_text[:100], "session_id": session_id}
-        span.set_data("gen_ai.tool.input", json.dumps(tool_input))
+        span.set_data("gen_ai.tool.input", tool_input)
         
         # Simular execução
         time.sleep(random.uniform(0.1, 0.3))
@@ -323,6 +328,15 @@ async def benchmark_official_standards():
         "results": results
     }
 
+@app.get("/ai-agent/telemetry")
+async def telemetry_stats():
+    """Contadores da amostragem e do envio em lote da telemetria"""
+    return telemetry.stats()
+
+@app.on_event("shutdown")
+def flush_telemetry():
+    telemetry.close()
+
 @app.get("/sentry-debug")
 async def trigger_error():
     """Debug endpoint oficial"""
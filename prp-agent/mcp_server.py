@@ -9,6 +9,7 @@ que podem ser usadas pelo Cursor IDE.
 import asyncio
 import json
 import logging
+import time
 from typing import Dict, Any, List
 from mcp import Server, StdioServerTransport
 from mcp.types import (
@@ -20,7 +21,7 @@ from mcp.types import (
 )
 
 # Importar o agente PRP
-from agents.agent import chat_with_prp_agent, PRPAgentDependencies
+from agents.agent import StreamMetrics, stream_chat_with_prp_agent, PRPAgentDependencies
 from agents.tools import create_prp, search_prps, analyze_prp_with_llm, get_prp_details
 
 # Configurar logging
@@ -38,6 +39,32 @@ server = Server(
 # Dependências globais do agente
 agent_deps = PRPAgentDependencies()
 
+# Intervalo mínimo entre notificações de progresso do prp_chat
+PROGRESS_INTERVAL_SECONDS = 0.1
+
+def get_progress_token(request):
+    """Token de progresso enviado pelo cliente em `_meta.progressToken` (None se ausente)."""
+    meta = getattr(request.params, "meta", None) or getattr(request.params, "_meta", None)
+    if meta is None:
+        return None
+    if isinstance(meta, dict):
+        return meta.get("progressToken")
+    return getattr(meta, "progressToken", None)
+
+async def send_progress(progress_token, progress: int, message: str):
+    """Enviar `notifications/progress` com o trecho da resposta gerado desde a última."""
+    try:
+        await server.notification({
+            "method": "notifications/progress",
+            "params": {
+                "progressToken": progress_token,
+                "progress": progress,
+                "message": message,
+            },
+        })
+    except Exception as e:
+        logger.warning(f"Falha ao enviar progresso: {e}")
+
 @server.setRequestHandler(ListToolsRequestSchema)
 async def handle_list_tools() -> Dict[str, Any]:
     """Listar ferramentas disponíveis do agente PRP."""
@@ -278,7 +305,27 @@ async def handle_call_tool(request) -> Dict[str, Any]:
             if context:
                 full_message = f"Contexto: {context}\n\nMensagem: {args['message']}"
             
-            result = await chat_with_prp_agent(full_message, agent_deps)
+            # Resposta em streaming: cada notificação de progresso leva só o texto novo;
+            # a resposta completa vai no resultado
+            progress_token = get_progress_token(request)
+            metrics = StreamMetrics()
+            chunks = []
+            sent = 0
+            last_sent = 0.0
+            async for chunk in stream_chat_with_prp_agent(full_message, agent_deps, metrics=metrics):
+                chunks.append(chunk)
+                now = time.monotonic()
+                if progress_token is not None and now - last_sent >= PROGRESS_INTERVAL_SECONDS:
+                    last_sent = now
+                    await send_progress(progress_token, len(chunks), "".join(chunks[sent:]))
+                    sent = len(chunks)
+            result = "".join(chunks)
+            if progress_token is not None and sent < len(chunks):
+                await send_progress(progress_token, len(chunks), "".join(chunks[sent:]))
+            
+            logger.info(
+                f"prp_chat: primeiro token em {metrics.ttft_ms} ms, total {metrics.total_ms} ms"
+            )
             
             return {
                 "content": [
@@ -286,7 +333,8 @@ async def handle_call_tool(request) -> Dict[str, Any]:
                         type="text",
                         text=result
                     )
-                ]
+                ],
+                "_meta": {"latency": metrics.as_dict()}
             }
             
         elif tool_name == "prp_update_status":
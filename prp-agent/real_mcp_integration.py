@@ -3,12 +3,33 @@
 Integração Real do Agente PRP com MCP Turso
 
 Este script usa as ferramentas MCP Turso reais para armazenar dados do agente PRP.
+
+As escritas de um turno (PRP, análise, tarefas e conversa) podem ir juntas em um lote
+(`integration.batch()`, unidade de trabalho de `mcp-turso/unit_of_work.py`): com
+TURSO_DATABASE_URL configurado o lote é uma transação em uma única requisição pipeline
+do libSQL; sem ele, cada escrita vira uma chamada MCP `execute_query`, como antes.
+Sem o diretório mcp-turso ao lado do prp-agent não há lotes: `store_*` voltam a fazer
+uma chamada MCP por linha.
 """
 
 import json
 import asyncio
+import os
+import sys
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+_MCP_TURSO = Path(__file__).resolve().parent.parent / "mcp-turso"
+for _path in (_MCP_TURSO, _MCP_TURSO / "scripts"):
+    if str(_path) not in sys.path:
+        sys.path.append(str(_path))
+try:
+    from docs_bulk_loader import connect_backend
+    from unit_of_work import Ref, UnitOfWork, WriteResult
+except ImportError as e:
+    print(f"⚠️ mcp-turso indisponível ({e}): escritas uma a uma pelo MCP, sem lotes")
+    connect_backend = Ref = UnitOfWork = WriteResult = None
 
 # Função para simular chamada MCP Turso (em produção, seria uma chamada real)
 async def call_mcp_turso_tool(tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -34,113 +55,188 @@ async def call_mcp_turso_tool(tool_name: str, params: Dict[str, Any]) -> Dict[st
         return {"success": False, "error": "Ferramenta não implementada"}
 
 
+def prp_row(prp_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha de `prps` a partir dos dados do PRP"""
+    search_text = f"{prp_data['title']} {prp_data['description']} {prp_data['objective']}".lower()
+    return {
+        "name": prp_data['name'],
+        "title": prp_data['title'],
+        "description": prp_data['description'],
+        "objective": prp_data['objective'],
+        "context_data": json.dumps(prp_data.get('context_data', {})),
+        "implementation_details": json.dumps(prp_data.get('implementation_details', {})),
+        "validation_gates": json.dumps(prp_data.get('validation_gates', {})),
+        "status": prp_data.get('status', 'draft'),
+        "priority": prp_data.get('priority', 'medium'),
+        "tags": json.dumps(prp_data.get('tags', [])),
+        "search_text": search_text
+    }
+
+
+def analysis_row(prp_id: Union[int, "Ref"], analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha de `prp_llm_analysis`"""
+    return {
+        "prp_id": prp_id,
+        "analysis_type": analysis_data.get('analysis_type', 'task_extraction'),
+        "input_content": analysis_data.get('input_content', ''),
+        "output_content": analysis_data.get('output_content', ''),
+        "parsed_data": json.dumps(analysis_data.get('parsed_data', {})),
+        "model_used": analysis_data.get('model_used', 'gpt-4o'),
+        "tokens_used": analysis_data.get('tokens_used', 0),
+        "processing_time_ms": analysis_data.get('processing_time_ms', 0),
+        "confidence_score": analysis_data.get('confidence_score', 0.9)
+    }
+
+
+def task_row(prp_id: Union[int, "Ref"], task: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha de `prp_tasks`"""
+    return {
+        "prp_id": prp_id,
+        "task_name": task.get('name', ''),
+        "description": task.get('description', ''),
+        "task_type": task.get('type', 'feature'),
+        "priority": task.get('priority', 'medium'),
+        "estimated_hours": task.get('estimated_hours', 0),
+        "complexity": task.get('complexity', 'medium'),
+        "context_files": json.dumps(task.get('context_files', [])),
+        "acceptance_criteria": task.get('acceptance_criteria', '')
+    }
+
+
+def conversation_row(session_id: str, message: str, response: str,
+                     context: Optional[str] = None) -> Dict[str, Any]:
+    """Linha de `conversations`"""
+    metadata = json.dumps({
+        "agent_type": "prp_agent",
+        "timestamp": datetime.now().isoformat(),
+        "tools_used": []
+    })
+    return {
+        "session_id": session_id,
+        "message": message,
+        "response": response,
+        "context": context,
+        "metadata": metadata
+    }
+
+
+class PRPWriteBatch:
+    """
+    Escritas do agente PRP coletadas em uma unidade de trabalho.
+    
+    Os métodos só registram a escrita e devolvem a referência ao id que ela vai gerar;
+    uma referência pode ser o `prp_id` das escritas seguintes. `commit` envia tudo.
+    Sem `ref`, o nome é gerado (único no lote): um lote pode guardar vários PRPs.
+    """
+    
+    def __init__(self, integration: "RealPRPMCPIntegration"):
+        self.integration = integration
+        self.uow = UnitOfWork()
+    
+    def store_prp(self, prp_data: Dict[str, Any], ref: Optional[str] = None) -> "Ref":
+        return self.uow.insert("prps", prp_row(prp_data), ref=ref)
+    
+    def store_llm_analysis(self, prp_id: Union[int, "Ref"], analysis_data: Dict[str, Any],
+                           ref: Optional[str] = None) -> "Ref":
+        return self.uow.insert("prp_llm_analysis", analysis_row(prp_id, analysis_data), ref=ref)
+    
+    def store_tasks(self, prp_id: Union[int, "Ref"], tasks: List[Dict[str, Any]]) -> List["Ref"]:
+        start = len(self.uow)
+        return [
+            self.uow.insert("prp_tasks", task_row(prp_id, task), ref=f"task:{start + index}")
+            for index, task in enumerate(tasks)
+        ]
+    
+    def store_conversation(self, session_id: str, message: str, response: str,
+                           context: str = None, ref: Optional[str] = None) -> "Ref":
+        return self.uow.insert("conversations", conversation_row(session_id, message, response, context), ref=ref)
+    
+    async def commit(self) -> "WriteResult":
+        return await self.integration.commit(self.uow)
+
+
 class RealPRPMCPIntegration:
     """Integração real entre Agente PRP e MCP Turso."""
     
-    def __init__(self):
+    def __init__(self, backend=None):
         self.database = "context-memory"
+        # Conexão direta ao Turso para os lotes (pipeline libSQL); sem ela, chamadas MCP
+        self.backend = backend if backend is not None else self._backend_from_env()
+        self.write_stats = {"commits": 0, "writes": 0, "round_trips": 0, "round_trips_saved": 0}
     
-    async def store_prp(self, prp_data: Dict[str, Any]) -> int:
-        """Armazena um PRP no banco via MCP Turso."""
-        
-        query = """
-            INSERT INTO prps (
-                name, title, description, objective, context_data,
-                implementation_details, validation_gates, status, priority, tags, search_text
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
-        search_text = f"{prp_data['title']} {prp_data['description']} {prp_data['objective']}".lower()
-        
-        params = [
-            prp_data['name'],
-            prp_data['title'],
-            prp_data['description'],
-            prp_data['objective'],
-            json.dumps(prp_data.get('context_data', {})),
-            json.dumps(prp_data.get('implementation_details', {})),
-            json.dumps(prp_data.get('validation_gates', {})),
-            prp_data.get('status', 'draft'),
-            prp_data.get('priority', 'medium'),
-            json.dumps(prp_data.get('tags', [])),
-            search_text
-        ]
-        
+    @staticmethod
+    def _backend_from_env():
+        url = os.getenv("TURSO_DATABASE_URL")
+        if connect_backend is None or not url:
+            return None
+        return connect_backend(url, os.getenv("TURSO_AUTH_TOKEN"))
+    
+    def batch(self) -> PRPWriteBatch:
+        """Novo lote de escritas (`await batch.commit()` envia)"""
+        if UnitOfWork is None:
+            raise RuntimeError(f"Lotes de escrita exigem os módulos do mcp-turso ({_MCP_TURSO})")
+        return PRPWriteBatch(self)
+    
+    async def _execute_query(self, sql: str, args: List[Any]) -> Optional[int]:
         result = await call_mcp_turso_tool("execute_query", {
             "database": self.database,
-            "query": query,
-            "params": params
+            "query": sql,
+            "params": args
         })
+        return result.get('lastInsertId')
+    
+    async def commit(self, uow: "UnitOfWork") -> "WriteResult":
+        """Envia uma unidade de trabalho: uma transação no Turso, ou uma chamada MCP por escrita."""
+        if self.backend is not None:
+            result = await asyncio.to_thread(uow.commit, self.backend)
+        else:
+            result = await uow.commit_each(self._execute_query)
+        self.write_stats["commits"] += 1
+        self.write_stats["writes"] += result.writes
+        self.write_stats["round_trips"] += result.round_trips
+        self.write_stats["round_trips_saved"] += result.round_trips_saved
+        print(f"📦 {result.writes} escritas em {result.round_trips} requisição(ões) "
+              f"({result.round_trips_saved} economizadas)")
+        return result
+    
+    async def _store_rows(self, rows: List[Tuple[str, Dict[str, Any]]]) -> List[int]:
+        """
+        Insere as linhas em um lote; sem o mcp-turso, uma chamada MCP por linha.
         
-        prp_id = result.get('lastInsertId', 1)
+        Devolve o id gerado de cada linha (1 quando a resposta não traz o id).
+        """
+        if UnitOfWork is None:
+            ids = []
+            for table, row in rows:
+                sql = f"INSERT INTO {table} ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})"
+                ids.append(await self._execute_query(sql, list(row.values())) or 1)
+            self.write_stats["writes"] += len(rows)
+            self.write_stats["round_trips"] += len(rows)
+            return ids
+        uow = UnitOfWork()
+        refs = [uow.insert(table, row) for table, row in rows]
+        result = await self.commit(uow)
+        return [result.ids.get(ref.name, 1) for ref in refs]
+    
+    async def store_prp(self, prp_data: Dict[str, Any]) -> int:
+        """Armazena um PRP no banco via MCP Turso."""
+        
+        prp_id, = await self._store_rows([("prps", prp_row(prp_data))])
         print(f"✅ PRP '{prp_data['title']}' armazenado com ID: {prp_id}")
         return prp_id
     
     async def store_llm_analysis(self, prp_id: int, analysis_data: Dict[str, Any]) -> int:
         """Armazena análise LLM no banco via MCP Turso."""
         
-        query = """
-            INSERT INTO prp_llm_analysis (
-                prp_id, analysis_type, input_content, output_content,
-                parsed_data, model_used, tokens_used, processing_time_ms, confidence_score
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
-        params = [
-            prp_id,
-            analysis_data.get('analysis_type', 'task_extraction'),
-            analysis_data.get('input_content', ''),
-            analysis_data.get('output_content', ''),
-            json.dumps(analysis_data.get('parsed_data', {})),
-            analysis_data.get('model_used', 'gpt-4o'),
-            analysis_data.get('tokens_used', 0),
-            analysis_data.get('processing_time_ms', 0),
-            analysis_data.get('confidence_score', 0.9)
-        ]
-        
-        result = await call_mcp_turso_tool("execute_query", {
-            "database": self.database,
-            "query": query,
-            "params": params
-        })
-        
-        analysis_id = result.get('lastInsertId', 1)
+        analysis_id, = await self._store_rows([("prp_llm_analysis", analysis_row(prp_id, analysis_data))])
         print(f"🧠 Análise LLM armazenada com ID: {analysis_id}")
         return analysis_id
     
     async def store_tasks(self, prp_id: int, tasks: List[Dict[str, Any]]) -> List[int]:
-        """Armazena tarefas extraídas no banco via MCP Turso."""
+        """Armazena tarefas extraídas no banco via MCP Turso (todas em um lote)."""
         
-        task_ids = []
-        
-        for task in tasks:
-            query = """
-                INSERT INTO prp_tasks (
-                    prp_id, task_name, description, task_type, priority,
-                    estimated_hours, complexity, context_files, acceptance_criteria
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            params = [
-                prp_id,
-                task.get('name', ''),
-                task.get('description', ''),
-                task.get('type', 'feature'),
-                task.get('priority', 'medium'),
-                task.get('estimated_hours', 0),
-                task.get('complexity', 'medium'),
-                json.dumps(task.get('context_files', [])),
-                task.get('acceptance_criteria', '')
-            ]
-            
-            result = await call_mcp_turso_tool("execute_query", {
-                "database": self.database,
-                "query": query,
-                "params": params
-            })
-            
-            task_id = result.get('lastInsertId', 1)
-            task_ids.append(task_id)
+        task_ids = await self._store_rows([("prp_tasks", task_row(prp_id, task)) for task in tasks])
+        for task, task_id in zip(tasks, task_ids):
             print(f"📋 Tarefa '{task.get('name', '')}' armazenada com ID: {task_id}")
         
         return task_ids
@@ -149,27 +245,9 @@ class RealPRPMCPIntegration:
                                context: str = None) -> int:
         """Armazena conversa no banco via MCP Turso."""
         
-        query = """
-            INSERT INTO conversations (
-                session_id, message, response, context, metadata
-            ) VALUES (?, ?, ?, ?, ?)
-        """
-        
-        metadata = json.dumps({
-            "agent_type": "prp_agent",
-            "timestamp": datetime.now().isoformat(),
-            "tools_used": []
-        })
-        
-        params = [session_id, message, response, context, metadata]
-        
-        result = await call_mcp_turso_tool("execute_query", {
-            "database": self.database,
-            "query": query,
-            "params": params
-        })
-        
-        conversation_id = result.get('lastInsertId', 1)
+        conversation_id, = await self._store_rows([
+            ("conversations", conversation_row(session_id, message, response, context))
+        ])
         print(f"💬 Conversa armazenada com ID: {conversation_id}")
         return conversation_id
     
@@ -368,6 +446,9 @@ async def demo_real_integration():
     print(f"   - PRPs encontrados: {len(prps)}")
     print(f"   - Total estimado: {analysis_data['parsed_data']['total_estimated_hours']} horas")
     print(f"   - Complexidade: {analysis_data['parsed_data']['complexity_assessment']}")
+    stats = integration.write_stats
+    print(f"   - Escritas: {stats['writes']} em {stats['round_trips']} requisições "
+          f"({stats['round_trips_saved']} economizadas pelos lotes)")
 
 
 # Função para integração com agente PydanticAI real
@@ -376,33 +457,65 @@ async def integrate_with_pydantic_agent(integration: RealPRPMCPIntegration,
                                        user_message: str,
                                        agent_response: str,
                                        prp_data: Optional[Dict[str, Any]] = None,
-                                       llm_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
-    """Integra interação do agente PydanticAI com MCP Turso."""
+                                       llm_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Integra interação do agente PydanticAI com MCP Turso.
     
-    results = {}
+    Conversa, PRP, análise e tarefas vão em um único lote: com conexão direta ao Turso,
+    uma requisição em vez de uma por linha. `write` traz as idas ao banco economizadas.
+    Sem o mcp-turso, as linhas vão uma a uma pelos `store_*`.
+    """
     
-    # 1. Armazenar conversa
-    results['conversation_id'] = await integration.store_conversation(
-        session_id, user_message, agent_response
-    )
+    if UnitOfWork is None:
+        return await _integrate_each(integration, session_id, user_message, agent_response,
+                                     prp_data, llm_analysis)
+    
+    batch = integration.batch()
+    
+    # 1. Conversa
+    conversation = batch.store_conversation(session_id, user_message, agent_response)
     
-    # 2. Se o agente criou um PRP, armazenar
+    # 2. Se o agente criou um PRP, a análise e as tarefas usam o id gerado no mesmo lote
+    prp = analysis = None
+    task_refs: List["Ref"] = []
     if prp_data:
-        results['prp_id'] = await integration.store_prp(prp_data)
-        
-        # 3. Se o agente fez análise LLM, armazenar
-        if llm_analysis and 'prp_id' in results:
-            results['analysis_id'] = await integration.store_llm_analysis(
-                results['prp_id'], llm_analysis
-            )
-            
-            # 4. Se extraiu tarefas, armazenar
+        prp = batch.store_prp(prp_data)
+        if llm_analysis:
+            analysis = batch.store_llm_analysis(prp, llm_analysis)
             if 'tasks' in llm_analysis.get('parsed_data', {}):
-                results['task_ids'] = await integration.store_tasks(
-                    results['prp_id'], 
-                    llm_analysis['parsed_data']['tasks']
-                )
+                task_refs = batch.store_tasks(prp, llm_analysis['parsed_data']['tasks'])
+    
+    write = await batch.commit()
     
+    results: Dict[str, Any] = {'conversation_id': write.ids.get(conversation.name)}
+    if prp is not None:
+        results['prp_id'] = write.ids.get(prp.name)
+    if analysis is not None:
+        results['analysis_id'] = write.ids.get(analysis.name)
+    if task_refs:
+        results['task_ids'] = [write.ids.get(ref.name) for ref in task_refs]
+    results['write'] = write.as_dict()
+    
+    return results
+
+
+async def _integrate_each(integration: RealPRPMCPIntegration, session_id: str, user_message: str,
+                          agent_response: str, prp_data: Optional[Dict[str, Any]],
+                          llm_analysis: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """`integrate_with_pydantic_agent` sem lotes: uma chamada MCP por linha, na mesma ordem."""
+    writes = integration.write_stats["writes"]
+    results: Dict[str, Any] = {
+        'conversation_id': await integration.store_conversation(session_id, user_message, agent_response)
+    }
+    if prp_data:
+        results['prp_id'] = await integration.store_prp(prp_data)
+        if llm_analysis:
+            results['analysis_id'] = await integration.store_llm_analysis(results['prp_id'], llm_analysis)
+            tasks = llm_analysis.get('parsed_data', {}).get('tasks')
+            if tasks:
+                results['task_ids'] = await integration.store_tasks(results['prp_id'], tasks)
+    count = integration.write_stats["writes"] - writes
+    results['write'] = {"writes": count, "round_trips": count, "round_trips_saved": 0}
     return results
 
 
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Testes do pipeline de análise de PRPs (agents/analysis_pipeline.py).
+
+Usa um FunctionModel do pydantic-ai no lugar do LLM e um banco SQLite temporário.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+
+os.environ.setdefault("LLM_API_KEY", "test")
+
+import pytest
+from pydantic_ai.messages import ModelMessage, ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from agents.analysis_pipeline import PRPAnalysisPipeline, RateLimiter
+from agents.database import DatabaseGateway
+from agents.prp_loader import PRPDetailLoader
+
+SCHEMA = """
+CREATE TABLE prps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    description TEXT,
+    objective TEXT NOT NULL,
+    context_data TEXT NOT NULL,
+    implementation_details TEXT NOT NULL,
+    status TEXT DEFAULT 'draft',
+    priority TEXT DEFAULT 'medium',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    tags TEXT,
+    search_text TEXT
+);
+CREATE TABLE prp_tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prp_id INTEGER NOT NULL,
+    task_name TEXT NOT NULL,
+    description TEXT,
+    task_type TEXT DEFAULT 'feature',
+    priority TEXT DEFAULT 'medium',
+    estimated_hours REAL,
+    complexity TEXT DEFAULT 'medium',
+    status TEXT DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    context_files TEXT,
+    acceptance_criteria TEXT
+);
+CREATE TABLE prp_llm_analysis (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prp_id INTEGER NOT NULL,
+    analysis_type TEXT NOT NULL,
+    input_content TEXT NOT NULL,
+    output_content TEXT NOT NULL,
+    parsed_data TEXT,
+    model_used TEXT,
+    tokens_used INTEGER,
+    processing_time_ms INTEGER,
+    confidence_score REAL,
+    status TEXT DEFAULT 'completed',
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO prps (name, title, description, objective, context_data, implementation_details)
+VALUES ('api', 'API', 'Descrição', 'Objetivo', '{}', '{}');
+INSERT INTO prp_tasks (prp_id, task_name) VALUES (1, 'Tarefa manual');
+"""
+
+
+def make_model(calls, tasks=3):
+    async def respond(messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        calls.append(1)
+        output = {
+            "tasks": [
+                {"name": f"Tarefa {i}", "description": "Gerada", "estimated_hours": 1.0}
+                for i in range(tasks)
+            ],
+            "summary": "Análise",
+            "total_estimated_hours": float(tasks),
+            "complexity_assessment": "low",
+            "confidence_score": 0.8,
+        }
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, json.dumps(output))])
+
+    return FunctionModel(respond, model_name="test-function-model")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "context-memory.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.close()
+    return path
+
+
+def run_pipeline(db_path, calls, *analyses):
+    async def main():
+        db = DatabaseGateway(db_path)
+        pipeline = PRPAnalysisPipeline(db, PRPDetailLoader(db), model=make_model(calls))
+        try:
+            return [await pipeline.analyze(1, force=force) for force in analyses]
+        finally:
+            db.close()
+
+    return asyncio.run(main())
+
+
+def task_names(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(row[0] for row in conn.execute("SELECT task_name FROM prp_tasks WHERE prp_id = 1"))
+    finally:
+        conn.close()
+
+
+def test_unchanged_prp_is_served_from_cache(db_path):
+    calls = []
+    first, second = run_pipeline(db_path, calls, False, False)
+
+    assert len(calls) == 1
+    assert not first.cached and first.tasks_inserted == 3
+    assert second.cached and second.analysis_id == first.analysis_id
+    assert len(second.analysis.tasks) == 3
+
+
+def test_reanalysis_replaces_extracted_tasks(db_path):
+    calls = []
+    first, second = run_pipeline(db_path, calls, False, True)
+
+    assert len(calls) == 2
+    assert second.analysis_id != first.analysis_id
+    assert task_names(db_path) == ["Tarefa 0", "Tarefa 1", "Tarefa 2", "Tarefa manual"]
+
+
+def test_rate_limiter_returns_permit_when_cancelled_while_waiting():
+    limiter = RateLimiter(max_concurrency=1, requests_per_minute=1)
+
+    async def run():
+        async with limiter:
+            pass
+        # A segunda chamada espera ~60s pelo próximo horário e é cancelada
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire(), timeout=0.05)
+        limiter.interval = 0
+        await asyncio.wait_for(limiter.acquire(), timeout=0.5)
+
+    asyncio.run(run())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Testes do gateway do banco (agents/database.py): conexões emprestadas entre event loops.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from agents.database import DatabaseGateway
+
+
+@pytest.fixture
+def gateway(tmp_path):
+    gateway = DatabaseGateway(str(tmp_path / "agent.db"), reader_pool_size=1)
+    yield gateway
+    gateway.close()
+
+
+def test_reader_is_not_shared_with_a_new_loop_while_a_late_query_runs(gateway):
+    release = threading.Event()
+    in_use = []
+
+    def slow(conn):
+        in_use.append(conn)
+        release.wait(5)
+        in_use.remove(conn)
+        return "lenta"
+
+    def fast(conn):
+        assert conn not in in_use, "leitor entregue a duas threads"
+        return conn.execute("SELECT 1").fetchone()[0]
+
+    async def abandon():
+        # Timeout: a corrotina desiste, a consulta continua na thread
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(gateway._read("lenta", slow), timeout=0.05)
+
+    # Primeiro loop em outra thread (asyncio.run espera o executor ao fechar)
+    first = threading.Thread(target=asyncio.run, args=(abandon(),))
+    first.start()
+    while not in_use:
+        threading.Event().wait(0.01)
+
+    async def second_loop():
+        pending = asyncio.ensure_future(gateway._read("rápida", fast))
+        await asyncio.sleep(0.1)
+        assert not pending.done()  # sem leitor livre: espera
+        release.set()
+        return await asyncio.wait_for(pending, timeout=5)
+
+    assert asyncio.run(second_loop()) == 1
+    first.join(5)
+    assert gateway._reader_pool.idle == 1
+
+
+def test_cancelled_write_keeps_the_writer_until_it_finishes(gateway):
+    async def run():
+        await gateway.execute("CREATE TABLE t (x INTEGER)")
+        started = threading.Event()
+
+        def slow_insert(conn):
+            started.set()
+            threading.Event().wait(0.2)
+            conn.execute("INSERT INTO t VALUES (1)")
+
+        task = asyncio.ensure_future(gateway.transaction(slow_insert))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        await gateway.execute("INSERT INTO t VALUES (2)")
+        return [row[0] for row in await gateway.fetch_all("SELECT x FROM t ORDER BY rowid")]
+
+    assert asyncio.run(run()) == [1, 2]
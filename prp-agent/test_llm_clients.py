@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Testes do registro de clientes LLM (agents/llm_clients.py) com um transporte simulado.
+"""
+
+import asyncio
+
+import httpx
+
+from agents.llm_clients import LLMClientRegistry
+
+
+class HangingBody(httpx.AsyncByteStream):
+    """Corpo que entrega um pedaço e depois nunca termina (stream travado)."""
+
+    async def __aiter__(self):
+        yield b'data: {"choices": []}\n\n'
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        pass
+
+
+def registry_with(handler, **kwargs) -> LLMClientRegistry:
+    registry = LLMClientRegistry(http2=False, max_retries=0, **kwargs)
+    transport = httpx.MockTransport(handler)
+    registry.pool = lambda provider, base_url: transport
+    return registry
+
+
+def test_abandoned_streams_do_not_hold_permits():
+    async def handler(request):
+        if request.url.path == "/stream":
+            return httpx.Response(200, stream=HangingBody())
+        return httpx.Response(200, json={"usage": {"prompt_tokens": 3, "completion_tokens": 2}})
+
+    registry = registry_with(handler, max_concurrency=8)
+    client = registry.http_client("openai", "gpt-test", "https://llm.test")
+
+    async def run():
+        for _ in range(8):
+            response = await client.send(client.build_request("POST", "https://llm.test/stream"), stream=True)
+            chunks = response.aiter_bytes()
+            await chunks.__anext__()
+            try:
+                await asyncio.wait_for(chunks.__anext__(), timeout=0.01)
+            except asyncio.TimeoutError:
+                pass  # abandonado sem fechar
+        # A nona chamada não espera por vaga
+        return await asyncio.wait_for(client.post("https://llm.test/json"), timeout=1)
+
+    response = asyncio.run(run())
+
+    assert response.status_code == 200
+    stats = registry.stats()["openai/gpt-test"]
+    assert stats["requests"] == 9
+    assert stats["in_flight"] == 0
+    assert (stats["input_tokens"], stats["output_tokens"]) == (3, 2)
+
+
+def test_failed_request_returns_its_permit():
+    attempts = []
+
+    async def handler(request):
+        attempts.append(request.url.path)
+        if request.url.path == "/down":
+            raise httpx.ConnectError("recusada", request=request)
+        return httpx.Response(200, json={})
+
+    registry = registry_with(handler, max_concurrency=1)
+    client = registry.http_client("openai", "gpt-test", "https://llm.test")
+
+    async def run():
+        try:
+            await client.post("https://llm.test/down")
+        except httpx.ConnectError:
+            pass
+        return await asyncio.wait_for(client.post("https://llm.test/up"), timeout=1)
+
+    assert asyncio.run(run()).status_code == 200
+    assert attempts == ["/down", "/up"]
+    stats = registry.stats()["openai/gpt-test"]
+    assert (stats["requests"], stats["errors"], stats["in_flight"]) == (2, 1, 0)
+
+
+def test_closed_stream_records_usage_and_frees_permit():
+    async def handler(request):
+        return httpx.Response(200, json={"usage": {"input_tokens": 5, "output_tokens": 7}})
+
+    registry = registry_with(handler, max_concurrency=1)
+    client = registry.http_client("anthropic", "claude-test", "https://llm.test")
+
+    async def run():
+        async with client.stream("POST", "https://llm.test/v1/messages") as response:
+            await response.aread()
+        return await asyncio.wait_for(client.post("https://llm.test/v1/messages"), timeout=1)
+
+    assert asyncio.run(run()).status_code == 200
+    stats = registry.stats()["anthropic/claude-test"]
+    assert (stats["input_tokens"], stats["output_tokens"]) == (10, 14)
+    assert stats["in_flight"] == 0
+
+
+def test_track_returns_permit_on_error():
+    registry = LLMClientRegistry(max_concurrency=1)
+
+    async def run():
+        try:
+            async with registry.track("simulated", "model"):
+                raise RuntimeError("falhou")
+        except RuntimeError:
+            pass
+        async with registry.track("simulated", "model") as stats:
+            stats.record_usage(1, 1)
+
+    asyncio.run(asyncio.wait_for(run(), timeout=1))
+    stats = registry.stats()["simulated/model"]
+    assert (stats["requests"], stats["errors"], stats["in_flight"]) == (2, 1, 0)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Testes dos lotes de escrita de real_mcp_integration.py em um arquivo SQLite.
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+import real_mcp_integration
+from real_mcp_integration import RealPRPMCPIntegration
+
+
+def prp(name):
+    return {"name": name, "title": name.upper(), "description": "d", "objective": "o"}
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "context-memory.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE prps (id INTEGER PRIMARY KEY, name TEXT, title TEXT, description TEXT,
+            objective TEXT, context_data TEXT, implementation_details TEXT, validation_gates TEXT,
+            status TEXT, priority TEXT, tags TEXT, search_text TEXT);
+        CREATE TABLE prp_tasks (id INTEGER PRIMARY KEY, prp_id INTEGER, task_name TEXT,
+            description TEXT, task_type TEXT, priority TEXT, estimated_hours REAL,
+            complexity TEXT, context_files TEXT, acceptance_criteria TEXT);
+        CREATE TABLE prp_llm_analysis (id INTEGER PRIMARY KEY, prp_id INTEGER, analysis_type TEXT,
+            input_content TEXT, output_content TEXT, parsed_data TEXT, model_used TEXT,
+            tokens_used INTEGER, processing_time_ms INTEGER, confidence_score REAL);
+        CREATE TABLE conversations (id INTEGER PRIMARY KEY, session_id TEXT, message TEXT,
+            response TEXT, context TEXT, metadata TEXT);
+    """)
+    conn.close()
+    return path
+
+
+def test_batch_stores_several_prps_and_conversations(db):
+    integration = RealPRPMCPIntegration(backend=real_mcp_integration.connect_backend(str(db)))
+    batch = integration.batch()
+    first, second = batch.store_prp(prp("a")), batch.store_prp(prp("b"))
+    batch.store_tasks(second, [{"name": "t"}])
+    batch.store_conversation("s", "m1", "r1")
+    batch.store_conversation("s", "m2", "r2")
+
+    result = asyncio.run(batch.commit())
+
+    assert result.round_trips == 1
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT id, name FROM prps ORDER BY id").fetchall() == [
+        (result.ids[first.name], "a"), (result.ids[second.name], "b")
+    ]
+    assert conn.execute("SELECT prp_id FROM prp_tasks").fetchall() == [(result.ids[second.name],)]
+    assert conn.execute("SELECT COUNT(*) FROM conversations").fetchone() == (2,)
+
+
+def test_without_mcp_turso_each_row_goes_through_mcp(db, monkeypatch):
+    monkeypatch.setattr(real_mcp_integration, "UnitOfWork", None)
+    monkeypatch.setattr(real_mcp_integration, "connect_backend", None)
+    conn = sqlite3.connect(db)
+
+    async def execute_query(self, sql, args):
+        return conn.execute(sql, args).lastrowid
+
+    monkeypatch.setattr(RealPRPMCPIntegration, "_execute_query", execute_query)
+    integration = RealPRPMCPIntegration()
+
+    results = asyncio.run(real_mcp_integration.integrate_with_pydantic_agent(
+        integration, "s", "m", "r", prp("a"), {"parsed_data": {"tasks": [{"name": "t"}]}}
+    ))
+
+    assert results["write"] == {"writes": 4, "round_trips": 4, "round_trips_saved": 0}
+    assert conn.execute("SELECT prp_id FROM prp_tasks").fetchall() == [(results["prp_id"],)]
+    assert integration.write_stats["round_trips"] == 4
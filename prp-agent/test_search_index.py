@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Testes dos índices de busca do prp-agent (agents/search_index.py).
+"""
+
+import sqlite3
+
+from agents.search_index import ensure_conversations_index
+
+
+def test_conversations_index_is_created_and_filled():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE conversations (id INTEGER PRIMARY KEY, message TEXT, response TEXT, context TEXT)"
+    )
+    conn.execute("INSERT INTO conversations (message, response) VALUES ('token do turso', 'use o JWT')")
+
+    assert ensure_conversations_index(conn)
+    assert conn.execute(
+        "SELECT rowid FROM conversations_fts WHERE conversations_fts MATCH 'turso'"
+    ).fetchall() == [(1,)]
+
+
+def test_old_conversations_schema_is_left_without_index():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE conversations (id INTEGER PRIMARY KEY, role TEXT, content TEXT)")
+
+    assert not ensure_conversations_index(conn)
+    assert conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE name LIKE 'conversations_fts%'"
+    ).fetchone() == (0,)
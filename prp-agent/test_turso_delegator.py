@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Testes das escritas do TursoDelegator (tools/turso_delegator.py) em um arquivo SQLite.
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from tools.turso_delegator import SQLiteBackend, TursoDelegator
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "context-memory.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE knowledge_base (id INTEGER PRIMARY KEY, topic TEXT, content TEXT, "
+        "source TEXT, tags TEXT, updated_at TEXT)"
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_writes_go_through_the_writer_without_replica(db, monkeypatch):
+    monkeypatch.delenv("TURSO_REPLICA_PATH", raising=False)
+    delegator = TursoDelegator(writer=SQLiteBackend(str(db)))
+    assert delegator.replica is None
+
+    uow = delegator.write_batch()
+    stored = asyncio.run(delegator.store_prp({"title": "API"}, uow=uow))
+    asyncio.run(delegator.update_prp(1, {"tags": "prp,revisado"}, uow=uow))
+    result = asyncio.run(delegator.commit(uow))["result"]
+
+    assert result["committed"]
+    assert result["ids"] == {stored["result"]["ref"]: 1}
+    assert result["affected"] == [1, 1]
+    assert sqlite3.connect(db).execute("SELECT topic, tags FROM knowledge_base").fetchall() == [
+        ("PRP: API", "prp,revisado")
+    ]
+
+
+def test_without_database_url_nothing_is_reported_as_written(monkeypatch):
+    monkeypatch.delenv("TURSO_DATABASE_URL", raising=False)
+    monkeypatch.delenv("TURSO_REPLICA_PATH", raising=False)
+    delegator = TursoDelegator()
+
+    stored = asyncio.run(delegator.store_prp({"title": "API"}))["result"]
+    deleted = asyncio.run(delegator.delete_prp(1))["result"]
+
+    assert stored["committed"] is False and "id" not in stored
+    assert deleted == {"affected_rows": None, "committed": False}
@@ -1,11 +1,81 @@
 """
 Turso Delegator - Delegação específica para Turso MCP
 Gerencia armazenamento, busca e análise de PRPs
+
+Leituras (get_prp_by_id, list_all_prps, get_prp_statistics) saem da réplica local do
+mcp-turso (`mcp-turso/turso_replica.py`) quando TURSO_REPLICA_PATH está configurado.
+A listagem é paginada por (created_at, id) (`mcp-turso/keyset_pagination.py`).
+A busca vetorial usa o índice `vector_top_k` do Turso ou, sem ele, o índice ANN local
+sobre a réplica (`mcp-turso/vector_search.py`).
+As escritas são parametrizadas e podem ser agrupadas em uma unidade de trabalho
+(`write_batch` + `commit`, `mcp-turso/unit_of_work.py`): uma transação, uma requisição.
+Elas vão ao Turso por uma conexão própria (TURSO_DATABASE_URL + TURSO_AUTH_TOKEN),
+independente da réplica; sem TURSO_DATABASE_URL nada é gravado (`committed: False`).
+
+Os módulos do mcp-turso são opcionais: sem o diretório ao lado do prp-agent, o delegador
+continua importável e só monta as chamadas MCP (sem réplica, paginação por cursor, lotes
+de escrita nem busca vetorial).
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence
 from datetime import datetime
+from pathlib import Path
+import asyncio
 import json
+import logging
+import os
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+mcp_turso = Path(__file__).resolve().parents[2] / "mcp-turso"
+if str(mcp_turso) not in sys.path:
+    sys.path.append(str(mcp_turso))
+try:
+    from keyset_pagination import DEFAULT_PAGE_SIZE, KeysetPager, KeysetQuery, decode_cursor
+    from turso_replica import TursoReplica
+    from unit_of_work import UnitOfWork
+    from vector_search import VectorSearch
+    from docs_bulk_loader import SQLiteBackend, connect_backend
+    MCP_TURSO_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"mcp-turso indisponível ({e}): sem réplica, cursores, lotes de escrita e busca vetorial")
+    MCP_TURSO_AVAILABLE = False
+    DEFAULT_PAGE_SIZE = 100
+    KeysetPager = KeysetQuery = TursoReplica = UnitOfWork = VectorSearch = SQLiteBackend = None
+    connect_backend = None
+
+# PRPs guardados como conhecimento (tag prp), do mais recente para o mais antigo
+PRP_COLUMNS = ("id", "topic", "tags", "created_at")
+PRP_LISTING = KeysetQuery("knowledge_base", PRP_COLUMNS, where="tags LIKE '%prp%'") if KeysetQuery else None
+
+
+def require_mcp_turso(feature: str):
+    if not MCP_TURSO_AVAILABLE:
+        raise RuntimeError(f"{feature} exige os módulos do mcp-turso ({mcp_turso})")
+
+
+def connect_replica():
+    """Réplica local do Turso (TURSO_REPLICA_PATH), sincronizando em segundo plano, ou None"""
+    if TursoReplica is None:
+        return None
+    replica = TursoReplica.from_env()
+    if replica:
+        replica.start()
+    return replica
+
+
+def connect_writer():
+    """Conexão de escrita com o Turso (TURSO_DATABASE_URL), separada da réplica, ou None"""
+    url = os.getenv("TURSO_DATABASE_URL")
+    if connect_backend is None or not url:
+        return None
+    try:
+        return connect_backend(url, os.getenv("TURSO_AUTH_TOKEN"))
+    except (ValueError, ImportError) as e:
+        logger.warning(f"Sem conexão de escrita com o Turso: {e}")
+        return None
 
 class TursoDelegator:
     """
@@ -18,7 +88,7 @@ class TursoDelegator:
     - Gerenciamento de conhecimento
     """
     
-    def __init__(self):
+    def __init__(self, replica=None, writer=None):
         self.available_tools = {
             # Gerenciamento de Conhecimento
             "add_knowledge": "mcp__mcp_turso__add_knowledge",
@@ -40,25 +110,100 @@ class TursoDelegator:
         }
         
         self.prp_database = "prp-database"
+        # TursoReplica (mcp-turso/turso_replica.py): leituras locais com fallback ao remoto
+        self.replica = replica if replica is not None else connect_replica()
+        # Escritas: conexão própria, uma transação por vez (a sessão HTTP não é thread-safe)
+        self.writer = writer if writer is not None else connect_writer()
+        self._write_lock = threading.Lock()
+        self._vector_search = None
+    
+    async def _read(self, sql: str, args: Sequence[Any], tables: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Consulta parametrizada na réplica; None quando não há réplica configurada"""
+        if self.replica is None:
+            return None
+        return await asyncio.to_thread(self.replica.fetch, sql, args, tables)
         
-    async def store_prp(self, prp_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Armazena um PRP no Turso"""
+    def write_batch(self) -> "UnitOfWork":
+        """
+        Unidade de trabalho para várias escritas (`store_prp`, `update_prp`, `delete_prp`
+        com `uow=`); `await delegator.commit(uow)` envia todas de uma vez.
+        """
+        require_mcp_turso("write_batch")
+        return UnitOfWork()
+    
+    async def commit(self, uow: "UnitOfWork") -> Dict[str, Any]:
+        """
+        Envia as escritas em uma transação no Turso (uma requisição pipeline).
         
+        `result` traz os ids gerados, as linhas afetadas e as requisições economizadas.
+        Sem conexão de escrita (TURSO_DATABASE_URL) as instruções voltam em `params`,
+        nada é gravado e `result.committed` é False.
+        """
+        statements = uow.statements()
         params = {
             "database": self.prp_database,
+            "statements": [{"query": sql, "params": list(args)} for sql, args in statements]
+        }
+        if self.writer is None:
+            result = {"ids": {}, "affected": [], "writes": len(uow), "round_trips": 0,
+                      "round_trips_saved": 0, "committed": False}
+            uow.clear()
+        else:
+            write = await asyncio.to_thread(self._commit, uow)
+            result = {**write.as_dict(), "committed": True}
+        return {
+            "tool": self.available_tools["execute_query"],
+            "params": params,
+            "result": result
+        }
+    
+    def _commit(self, uow: "UnitOfWork"):
+        with self._write_lock:
+            return uow.commit(self.writer)
+    
+    async def _write(self, uow: Optional["UnitOfWork"], queue) -> Optional[Dict[str, Any]]:
+        """Registra a escrita em `uow`, ou a envia sozinha; devolve o commit (None se enfileirada)"""
+        if uow is not None:
+            queue(uow)
+            return None
+        single = UnitOfWork()
+        queue(single)
+        return await self.commit(single)
+    
+    async def store_prp(self, prp_data: Dict[str, Any], uow: Optional["UnitOfWork"] = None) -> Dict[str, Any]:
+        """
+        Armazena um PRP no Turso.
+        
+        Com `uow`, só registra a escrita: `result.ref` é a chave do id em `commit(uow)`.
+        """
+        
+        row = {
             "topic": f"PRP: {prp_data.get('title', 'Untitled')}",
             "content": json.dumps(prp_data),
             "source": "prp-agent",
             "tags": ",".join(prp_data.get('tags', ['prp', 'generated']))
         }
+        params = {"database": self.prp_database, **row}
+        if not MCP_TURSO_AVAILABLE:
+            # Só a chamada MCP (add_knowledge) com os dados do PRP
+            return {
+                "tool": self.available_tools["add_knowledge"],
+                "params": params,
+                "result": {"committed": False, "stored_at": datetime.now().isoformat()}
+            }
+        refs = []
+        committed = await self._write(uow, lambda batch: refs.append(batch.insert("knowledge_base", row)))
+        
+        result = {"ref": refs[0].name, "stored_at": datetime.now().isoformat()}
+        if committed is not None:
+            result["committed"] = committed["result"]["committed"]
+            if result["committed"]:
+                result["id"] = committed["result"]["ids"].get(refs[0].name)
         
         return {
             "tool": self.available_tools["add_knowledge"],
             "params": params,
-            "result": {
-                "id": "prp-001",
-                "stored_at": datetime.now().isoformat()
-            }
+            "result": result
         }
     
     async def search_prps(self, query: str, limit: int = 10) -> Dict[str, Any]:
@@ -92,85 +237,134 @@ class TursoDelegator:
             """
         }
         
+        rows = await self._read("SELECT * FROM knowledge_base WHERE id = ? LIMIT 1", [prp_id], ["knowledge_base"])
+        
         return {
             "tool": self.available_tools["execute_read_only"],
             "params": params,
             "result": {
-                "rows": [],
-                "columns": ["id", "topic", "content", "created_at"]
+                "rows": rows or [],
+                "columns": list(rows[0]) if rows else ["id", "topic", "content", "created_at"]
             }
         }
     
-    async def list_all_prps(self, offset: int = 0, limit: int = 20) -> Dict[str, Any]:
-        """Lista todos os PRPs"""
+    async def list_all_prps(self, cursor: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+        """
+        Lista uma página de PRPs.
         
+        `result.next_cursor` (None na última página) pede a página seguinte; a consulta
+        continua da última chave (created_at, id) em vez de pular linhas com OFFSET.
+        """
+        
+        if PRP_LISTING is None:
+            sql, args = (f"SELECT {', '.join(PRP_COLUMNS)} FROM knowledge_base WHERE tags LIKE '%prp%' "
+                         "ORDER BY created_at DESC, id DESC LIMIT ?", [limit])
+        else:
+            sql, args = PRP_LISTING.page(decode_cursor(cursor), limit)
         params = {
             "database": self.prp_database,
-            "query": f"""
-                SELECT id, topic, tags, created_at 
-                FROM knowledge_base 
-                WHERE tags LIKE '%prp%'
-                ORDER BY created_at DESC
-                LIMIT {limit} OFFSET {offset}
-            """
+            "query": sql,
+            "params": args
         }
         
+        rows, next_cursor = [], None
+        if self.replica is not None:
+            rows, next_cursor = await self.iter_prps(page_size=limit, cursor=cursor).next_page()
+        
         return {
             "tool": self.available_tools["execute_read_only"],
             "params": params,
             "result": {
-                "rows": [],
-                "columns": ["id", "topic", "tags", "created_at"]
+                "rows": rows,
+                "columns": list(PRP_COLUMNS),
+                "next_cursor": next_cursor
             }
         }
     
-    async def update_prp(self, prp_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-        """Atualiza um PRP existente"""
-        
-        # Construir query de update
-        set_clauses = []
-        for field, value in updates.items():
-            if isinstance(value, str):
-                set_clauses.append(f"{field} = '{value}'")
-            else:
-                set_clauses.append(f"{field} = {value}")
-                
-        params = {
-            "database": self.prp_database,
-            "query": f"""
-                UPDATE knowledge_base 
-                SET {', '.join(set_clauses)}, 
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = '{prp_id}'
-            """
-        }
+    def iter_prps(self, page_size: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                  prefetch: bool = True) -> "KeysetPager":
+        """
+        Todos os PRPs, página a página (`async for prp in delegator.iter_prps()`).
         
-        return {
-            "tool": self.available_tools["execute_query"],
-            "params": params,
-            "result": {
-                "affected_rows": 1
-            }
-        }
+        A próxima página é buscada enquanto a atual é consumida; `pager.cursor` retoma a
+        listagem em outra chamada. Sem réplica configurada não há de onde ler: nada é
+        entregue.
+        """
+        require_mcp_turso("iter_prps")
+        indexed = False
+        
+        async def fetch(sql: str, args: List[Any]) -> List[Dict[str, Any]]:
+            nonlocal indexed
+            if self.replica is not None and not indexed:
+                indexed = self.replica.ensure_local_index(PRP_LISTING.table, PRP_LISTING.key)
+            return await self._read(sql, args, [PRP_LISTING.table]) or []
+        
+        return KeysetPager(PRP_LISTING, fetch, page_size=page_size, cursor=cursor, prefetch=prefetch)
     
-    async def delete_prp(self, prp_id: str) -> Dict[str, Any]:
-        """Remove um PRP do banco"""
+    async def update_prp(self, prp_id: str, updates: Dict[str, Any],
+                         uow: Optional["UnitOfWork"] = None) -> Dict[str, Any]:
+        """Atualiza um PRP existente (com `uow`, só registra a escrita)"""
         
-        params = {
-            "database": self.prp_database,
-            "query": f"DELETE FROM knowledge_base WHERE id = '{prp_id}'"
+        # Valores vão como parâmetros; listas e dicts são gravados como JSON
+        values = {
+            field: json.dumps(value) if isinstance(value, (dict, list)) else value
+            for field, value in updates.items()
         }
+        return await self._send(
+            uow, lambda batch: batch.update("knowledge_base", values, {"id": prp_id}, touch="updated_at")
+        )
+    
+    async def delete_prp(self, prp_id: str, uow: Optional["UnitOfWork"] = None) -> Dict[str, Any]:
+        """Remove um PRP do banco (com `uow`, só registra a escrita)"""
+        
+        return await self._send(uow, lambda batch: batch.delete("knowledge_base", {"id": prp_id}))
+    
+    async def _send(self, uow: Optional["UnitOfWork"], queue) -> Dict[str, Any]:
+        """Resposta de update/delete: a instrução parametrizada e as linhas afetadas"""
+        require_mcp_turso("update_prp/delete_prp")
+        statement = UnitOfWork()
+        queue(statement)
+        sql, args = statement.statements()[0]
+        params = {"database": self.prp_database, "query": sql, "params": list(args)}
+        
+        committed = await self._write(uow, queue)
+        if committed is None:
+            result = {"queued": True}
+        elif committed["result"]["committed"]:
+            result = {"affected_rows": committed["result"]["affected"][0], "committed": True}
+        else:
+            result = {"affected_rows": None, "committed": False}
         
         return {
             "tool": self.available_tools["execute_query"],
             "params": params,
-            "result": {
-                "affected_rows": 1
-            }
+            "result": result
         }
     
+    def vector_search(self) -> Optional["VectorSearch"]:
+        """
+        Busca vetorial sobre knowledge_base.embedding (None sem réplica configurada).
+        
+        Com o índice vetorial no Turso a consulta roda lá (`vector_top_k`); sem ele, ou
+        com o remoto fora do ar, o índice ANN é montado com os vetores da réplica local.
+        A conexão remota é a da réplica, sob o lock da thread de sincronização.
+        """
+        if self.replica is None:
+            return None
+        if self._vector_search is None:
+            self._vector_search = VectorSearch(
+                self.replica.locked_remote, local_backend=SQLiteBackend(str(self.replica.path))
+            )
+        return self._vector_search
+    
     async def vector_search_prps(self, query_vector: List[float], limit: int = 5) -> Dict[str, Any]:
-        """Busca vetorial de PRPs similares"""
+        """
+        Busca vetorial de PRPs similares.
+        
+        `query_vector` tem a dimensão da coluna embedding (256, `HashingEmbedder` do
+        mcp-turso); `result.path` diz se a busca rodou no banco ("native") ou no índice
+        local ("local").
+        """
         
         params = {
             "database": self.prp_database,
@@ -180,12 +374,19 @@ class TursoDelegator:
             "limit": limit
         }
         
+        similar, path = [], None
+        search = self.vector_search()
+        if search is not None:
+            similar = await asyncio.to_thread(search.search, query_vector, limit)
+            path = search.last.get("path")
+        
         return {
             "tool": self.available_tools["vector_search"],
             "params": params,
             "result": {
-                "similar_prps": [],
-                "distances": []
+                "similar_prps": similar,
+                "distances": [row["distance"] for row in similar],
+                "path": path
             }
         }
     
@@ -228,15 +429,28 @@ class TursoDelegator:
             """
         }
         
+        statistics = {
+            "total_prps": 0,
+            "unique_tags": 0,
+            "daily_stats": []
+        }
+        daily = await self._read(params["query"], [], ["knowledge_base"])
+        if daily is not None:
+            totals = await self._read(
+                "SELECT COUNT(*) AS total_prps, COUNT(DISTINCT tags) AS unique_tags "
+                "FROM knowledge_base WHERE tags LIKE '%prp%'",
+                [], ["knowledge_base"]
+            )
+            statistics.update(totals[0])
+            statistics["daily_stats"] = [
+                {"date": row["date"], "count": row["daily_count"]} for row in daily
+            ]
+        
         return {
             "tool": self.available_tools["execute_read_only"],
             "params": params,
             "result": {
-                "statistics": {
-                    "total_prps": 0,
-                    "unique_tags": 0,
-                    "daily_stats": []
-                }
+                "statistics": statistics
             }
         }
     